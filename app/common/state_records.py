@@ -0,0 +1,141 @@
+"""
+Компактные записи для хранения в state FSM вместо ORM-объектов и сообщений aiogram.
+
+INFO:
+1. В state сохраняются только id и небольшие неизменяемые записи (frozen dataclass со __slots__). Такие данные
+   не удерживают сессии SQLAlchemy с их картой идентичности, занимают в разы меньше памяти на чат и без потерь
+   сериализуются во внешнее хранилище FSM (SQLite/Redis).
+2. Записи повторяют имена атрибутов исходных объектов (id, email, title, text, examples, example, name), поэтому код
+   обработчиков, читающий атрибуты, не меняется: в state вместо <Notes_object> лежит NoteRecord и т.д.
+3. Если обработчику нужны данные слова WordPhrase с темой и примерами (напр. в тестах), в state хранится только его
+   id, а данные восстанавливаются при обращении через load_word(): запись WordRecord из общего кеша слов
+   (DataBase.get_cached_word_phrase), при отсутствии - из БД. Записи тем, примеров и слов - в app/database/records.py.
+4. Сообщения сохраняются как MessageRef (chat_id, message_id) - этого достаточно для удаления и редактирования
+   сообщения через объект бота.
+5. Схема ключей state:
+   - 'user': UserRecord;
+   - 'word_id': id слова WordPhrase в тестах (вместо 'word_obj');
+   - 'word_to_update_id': id редактируемого слова WordPhrase (вместо 'word_to_update');
+   - 'editing_context': ContextRecord с редактируемым примером слова (вместо 'editing_context_obj');
+   - 'stat_data': кортеж статистики, где тема - TopicRecord;
+   - 'random_example': ContextRecord с примером для практики произношения (вместо 'random_example_obj');
+   - 'user_notes': кортеж NoteRecord, 'edited_note' и 'new_note': NoteRecord;
+   - 'note_msg', 'info_msg': MessageRef;
+   - 'audio_examples': {entity_id: [MessageRef, ...]};
+   - 'giga_memory': GigaMemory - история диалога с GigaChat (app/utils/giga_memory.py).
+"""
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Sequence
+
+from aiogram import Bot
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import DataBase
+from app.database.models import User, Notes
+from app.database.records import TopicRecord, ContextRecord, WordRecord
+
+
+# Ссылка на сообщение в чате
+@dataclass(frozen=True, slots=True)
+class MessageRef:
+    """ Ссылка на сообщение в чате: chat_id + message_id вместо всего объекта Message. """
+    chat_id: int
+    message_id: int
+
+    @classmethod
+    def from_message(cls, message: Message) -> 'MessageRef':
+        """
+        Создание ссылки из объекта сообщения.
+
+        :param message: Объект сообщения aiogram
+        :return: Объект MessageRef
+        """
+        return cls(chat_id=message.chat.id, message_id=message.message_id)
+
+    async def delete(self, bot: Bot) -> bool:
+        """
+        Удаление сообщения из чата.
+
+        :param bot: Объект бота
+        :return: True при успешном удалении
+        """
+        return await bot.delete_message(chat_id=self.chat_id, message_id=self.message_id)
+
+    async def edit_text(self, bot: Bot, text: str, **kwargs: Any) -> Any:
+        """
+        Редактирование текста сообщения.
+
+        :param bot: Объект бота
+        :param text: Новый текст сообщения
+        :param kwargs: Дополнительные параметры (reply_markup и т.д.)
+        :return: Результат запроса к Telegram API
+        """
+        return await bot.edit_message_text(text=text, chat_id=self.chat_id, message_id=self.message_id, **kwargs)
+
+
+# Данные пользователя для работы в профиле
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """ Данные пользователя User, необходимые в разделе профиля. """
+    id: int
+    email: str
+
+    @classmethod
+    def from_orm(cls, user: User) -> 'UserRecord':
+        return cls(id=user.id, email=user.email)
+
+
+# Данные заметки с примерами
+@dataclass(frozen=True, slots=True)
+class NoteRecord:
+    """ Данные заметки Notes с примерами. Объект заметки должен быть загружен с примерами (selectinload). """
+    id: int
+    title: str
+    text: str
+    examples: tuple[ContextRecord, ...]
+
+    @classmethod
+    def from_orm(cls, note: Notes) -> 'NoteRecord':
+        return cls(
+            id=note.id, title=note.title, text=note.text,
+            examples=tuple(ContextRecord.from_orm(example) for example in note.examples)
+        )
+
+
+# Преобразование списка заметок в кортеж записей
+def notes_to_records(notes: Iterable[Notes]) -> tuple[NoteRecord, ...]:
+    """
+    Преобразование списка заметок Notes в кортеж записей NoteRecord для хранения в state.
+
+    :param notes: Список заметок Notes с подгруженными примерами
+    :return: Кортеж записей NoteRecord
+    """
+    return tuple(NoteRecord.from_orm(note) for note in notes)
+
+
+# Замена объекта темы на запись в данных статистики тестов
+def stat_data_to_record(stat_data: Sequence) -> tuple:
+    """
+    Замена объекта темы Topic на TopicRecord в кортеже статистики из DataBase.get_stat_attempts().
+
+    :param stat_data: (total_attempts, correct_attempts, incorrect_attempts, result_percentage, topic_count, topic/None)
+    :return: Тот же кортеж, где последний элемент - TopicRecord или None
+    """
+    *counters, topic = stat_data
+    return *counters, TopicRecord.from_orm(topic) if topic else None
+
+
+# Восстановление данных слова по id из state
+async def load_word(session: AsyncSession, word_id: Optional[int]) -> WordRecord | None:
+    """
+    Восстановление данных слова WordPhrase (с темой и примерами) по id, сохранённому в state или истории тестов.
+    Повторные обращения берут запись из общего кеша слов без запроса к БД.
+
+    :param session: Пользовательская сессия
+    :param word_id: id слова WordPhrase или None
+    :return: Запись WordRecord или None
+    """
+    if word_id is None:
+        return None
+    return await DataBase.get_cached_word_phrase(session, word_id)
@@ -1,11 +1,8 @@
 """
 Различные вспомогательные функции, общие для разных модулей.
 """
+import asyncio
 import re
-import smtplib
-import time
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from typing import Type, Sequence
 
 from aiogram import types
@@ -18,9 +15,10 @@ from app.utils.paginator import Paginator, pages
 from app.database.db import DataBase
 from app.database.models import WordPhrase, Topic, Notes
 from app.keyboards.inlines import get_kbds_with_topic_btns
-from app.settings import (PLUG_TEMPLATE, PATTERN_CONTEXT_EXAMPLE, KEYWORDS_FOR_RE_SEND_MSG, SYSTEM_SHEETS, SENDER_EMAIL,
-                          SMTP_SERVER, SMTP_PORT, SENDER_PASSWORD)
+from app.utils.mailer import email_queue
+from app.settings import PLUG_TEMPLATE, PATTERN_CONTEXT_EXAMPLE, KEYWORDS_FOR_RE_SEND_MSG, SYSTEM_SHEETS
 from app.common.msg_templates import note_msg_template
+from app.common.state_records import NoteRecord, WordRecord
 
 
 # ПРОВЕРКИ И ВАЛИДАЦИЯ
@@ -253,7 +251,7 @@ async def try_alert_msg(bot: Bot, chat_id: int, msg_text: str, if_error_send_msg
             try:
                 msg = await bot.send_message(text=msg_text, chat_id=chat_id)
                 bot.auxiliary_msgs['user_msgs'][chat_id].append(msg)
-                time.sleep(2)
+                await asyncio.sleep(2)
                 await bot.delete_message(chat_id, msg.message_id)
             except (Exception, ) as e:
                 print(f'Error in try_alert_msg: {e}')
@@ -301,28 +299,28 @@ async def re_send_msg_with_step(message: types.Message, bot: Bot, state: FSMCont
 # ФОРМИРОВАНИЕ СЛОВАРЕЙ ДЛЯ РАСПАКОВКИ / ДАННЫХ ДЛЯ .format() И КЛАВИАТУР
 
 # Формирование строки со списком примеров для отображения
-def join_examples_in_unordered_list(some_obj: Notes | WordPhrase) -> str:
+def join_examples_in_unordered_list(some_obj: Notes | NoteRecord | WordPhrase | WordRecord) -> str:
     """
     Функция формирует строку со списком примеров заметки/слова по заданному шаблону.
 
-    :param some_obj: Объект Notes или WordPhrase
+    :param some_obj: Объект Notes (или его запись NoteRecord из state) или WordPhrase (или его запись WordRecord)
     :return: Строка для отображения со списком примеров использования
     """
     examples = None
-    if some_obj.__class__.__name__ == 'WordPhrase':
+    if some_obj.__class__.__name__ in ('WordPhrase', 'WordRecord'):
         examples = some_obj.context
-    elif some_obj.__class__.__name__ == 'Notes':
+    elif some_obj.__class__.__name__ in ('Notes', 'NoteRecord'):
         examples = some_obj.examples
     return '- ' + '\n- '.join([i.example for i in examples])
 
 
 # Формирование словаря с данными для формирования баннеров редактирования записи слова/фразы из объекта WordPhrase
-async def get_word_phrase_caption_formatting(word_phrase_obj: WordPhrase | Type[WordPhrase]) -> dict:
+async def get_word_phrase_caption_formatting(word_phrase_obj: WordPhrase | Type[WordPhrase] | WordRecord) -> dict:
     """
     Формирование словаря с готовыми данными для формирования баннеров редактирования записи WordPhrase.
     Функция принимает объект WordPhrase и возвращает словарь с данными для распаковки в .format()
 
-    :param word_phrase_obj: Объект WordPhrase
+    :param word_phrase_obj: Объект WordPhrase или его запись WordRecord (из кеша слов)
     :return: Словарь с данными для распаковки в .format()
     """
     return {
@@ -454,21 +452,27 @@ async def modify_callback_data(callback: types.CallbackQuery, new_callback_data:
     return new_callback
 
 
-# Получение word_to_update и page_address данных из контекста
-async def get_upd_word_and_cancel_page_from_context(state: FSMContext) -> tuple[WordPhrase, str]:
+# Получение редактируемого слова/фразы и page_address данных из контекста
+async def get_upd_word_and_cancel_page_from_context(state: FSMContext, session: AsyncSession) \
+        -> tuple[WordPhrase | None, str]:
     """
     Вспомогательная функция для получения данных из контекста при редактировании слова/фразы WordPhrase.
-    Получает объект WordPhrase и callback_data для страницы отображения при отмене редактирования.
+    Загружает из БД объект WordPhrase по id из контекста и получает callback_data для страницы отображения при отмене
+    редактирования.
 
-    :param state: Контекст состояния с объектом WordPhrase в ключе 'word_to_update' и
+    :param state: Контекст состояния с id слова/фразы WordPhrase в ключе 'word_to_update_id' и
                     callback_data для страницы отмены редактирования в ключе 'page_address'
-    :return: Кортеж (word_to_update, page_address)
+    :param session: Пользовательская сессия
+    :return: Кортеж (word_to_update, page_address). Объект WordPhrase - None, если запись не найдена
     """
 
     # Получаем данные из контекста
     data = await state.get_data()
-    word_to_update = data.get('word_to_update')             # Получаем слово/фразу объект WordPhrase
+    word_id = data.get('word_to_update_id')                 # Получаем id редактируемого слова/фразы
     cancel_page = data.get('page_address')                  # Получаем callback для страницы отмены редактирования
+
+    # Загружаем актуальный объект WordPhrase из БД (в state хранится только id)
+    word_to_update = await DataBase.get_word_phrase_by_id(session, word_id) if word_id else None
     return word_to_update, cancel_page
 
 
@@ -501,7 +505,7 @@ async def update_user_chat_data(session: AsyncSession, chat_id: int, user_id: in
 
 
 # Редактирование сообщения с заметкой
-async def update_note_msg_data(bot: Bot, chat_id: int, state_data: dict, edited_note: Notes) -> None:
+async def update_note_msg_data(bot: Bot, chat_id: int, state_data: dict, edited_note: Notes | NoteRecord) -> None:
     """
     Функция редактирует сообщение с заметкой после её редактирования.
 
@@ -510,9 +514,9 @@ async def update_note_msg_data(bot: Bot, chat_id: int, state_data: dict, edited_
     :param state_data: Контекст состояния FSM с ключами:
                         'user_notes' - список всех заметок пользователя,
                         'show_user_notes_cbq' - callback-запрос с номером страницы с заметкой (для "заметка №"),
-                        'note_msg' - с редактируемым сообщением с заметкой,
+                        'note_msg' - со ссылкой MessageRef на редактируемое сообщение с заметкой,
                         'note_title_view_mode' (опционально) - режим просмотра по заголовкам
-    :param edited_note: Объект заметки
+    :param edited_note: Объект заметки или её запись NoteRecord
     :return: None
     """
 
@@ -534,35 +538,27 @@ async def update_note_msg_data(bot: Bot, chat_id: int, state_data: dict, edited_
     )
 
     # Редактируем сообщение
-    await note_msg.edit_text(msg_text, reply_markup=bot.reply_markup_save[chat_id])
+    await note_msg.edit_text(bot, msg_text, reply_markup=bot.reply_markup_save[chat_id])
 
 
 # Отправить письмо пользователю на ранее указанную почту с токеном на сброс пароля
-def send_email_reset_psw_token(to_email, reset_token) -> None:
+async def send_email_reset_psw_token(session: AsyncSession, to_email: str, reset_token: str) -> bool:
     """
     Отправить письмо пользователю на ранее указанную почту с токеном на сброс пароля.
+    Письмо ставится в очередь исходящих писем и отправляется в фоне (app/utils/mailer.py).
 
+    :param session: Пользовательская сессия
     :param to_email: Почта получателя
     :param reset_token: Токен для сброса пароля
-    :return: Функция ничего не возвращает, только отправляет письмо
+    :return: True, если письмо поставлено в очередь, иначе False
     """
-
-    # Создание письма
-    msg = MIMEMultipart()
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = to_email
-    msg['Subject'] = "Сброс пароля для вашего аккаунта"
-
-    # Тело письма с токеном на сброс пароля
-    body = f"Ваш токен для сброса пароля: {reset_token}"
-    msg.attach(MIMEText(body, 'plain'))
-
-    # Отправка письма
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.sendmail(SENDER_EMAIL, to_email, msg.as_string())
-        server.quit()
-    except Exception as e:
-        print(f"Ошибка при отправке письма: {e}")
+    email = await DataBase.enqueue_email(
+        session,
+        to_email=to_email,
+        subject="Сброс пароля для вашего аккаунта",
+        body=f"Ваш токен для сброса пароля: {reset_token}",
+    )
+    if email is None:
+        return False
+    email_queue.notify()
+    return True
@@ -4,19 +4,41 @@
 import os
 import re
 import secrets
-from typing import Sequence, Type
+from typing import Iterable, Sequence, Type
 from datetime import datetime, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine, AsyncEngine
-from sqlalchemy import select, update, func, desc, exists, event, or_, Row
+from sqlalchemy import select, update, delete, func, desc, exists, event, or_, Row, Connection, Table, inspect, text
 from sqlalchemy.orm import joinedload, selectinload
-from argon2 import PasswordHasher
 
 from app.database.models import Base, WordPhrase, Topic, Context, Banner, User, PasswordReset, Attempt, Report, \
-    UserChat, UserSettings, Notes, SavedAudio
+    UserChat, UserSettings, Notes, SavedAudio, EmailOutbox, AudioArchiveSegment
+from app.database.records import WordRecord, SettingsRecord
 from app.banners.banners_details import banner_details
 from app.settings import PLUG_TEMPLATE, PATTERN_CONTEXT_EXAMPLE, UTC_ADJUSTMENT, RESET_PASS_TOKEN_EXPIRE_MINUTES, \
-    CHAT_AUTOLOGIN_EXPIRE_DAYS
+    CHAT_AUTOLOGIN_EXPIRE_DAYS, WORD_CACHE_MAX_SIZE, WORD_CACHE_TTL_MINUTES, AUTH_CACHE_MAX_SIZE, \
+    AUTH_CACHE_TTL_SECONDS, EMAIL_OUTBOX_KEEP_DAYS, USER_SETTINGS_CACHE_MAX_SIZE, USER_SETTINGS_CACHE_TTL_MINUTES
+from app.utils.cache import TTLCache
+from app.utils.passwords import hash_password, verify_password, needs_rehash
+from app.utils.query_stats import install_query_hooks
+
+
+# Общий для всех чатов кеш слов WordPhrase с темой и примерами: {WordPhrase.id: <WordRecord>}. Хранит неизменяемые
+# записи, а не ORM-объекты (app/database/records.py). Сбрасывается методами DataBase, изменяющими слова, примеры и темы
+word_cache: TTLCache[int, WordRecord] = TTLCache(WORD_CACHE_MAX_SIZE, ttl=WORD_CACHE_TTL_MINUTES * 60)
+
+# Кеш аутентификации чатов по данным таблицы UserChat: {chat_id: User.id | None}, None - чат не привязан к пользователю.
+# Заполняется при первом обращении к чату, сбрасывается методами DataBase, изменяющими UserChat. Другие экземпляры бота
+# (webhook за балансировщиком) о входе и выходе в этом экземпляре не знают - их записи перечитываются из БД через
+# AUTH_CACHE_TTL_SECONDS, поэтому время жизни короткое
+auth_cache: TTLCache[int, int | None] = TTLCache(AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+# Кеш настроек пользователей для озвучки: {User.id: <SettingsRecord>} - неизменяемые записи, не ORM-объекты.
+# Заполняется при первом обращении, при изменении настроек (update_user_settings) в кеш записывается обновлённая запись
+# (write-through)
+user_settings_cache: TTLCache[int, SettingsRecord] = TTLCache(
+    USER_SETTINGS_CACHE_MAX_SIZE, ttl=USER_SETTINGS_CACHE_TTL_MINUTES * 60
+)
 
 
 # Функция для регистрации функции REGEXP в БД. Возвращает True, если строка row содержит pattern
@@ -55,10 +77,31 @@ def create_engine_with_regexp() -> AsyncEngine:
         """
         dbapi_connection.create_function("REGEXP", 2, regexp)                       # Регистрируем функцию
 
+    # Учёт кол-ва и времени запросов по апдейтам, вывод медленных запросов (подробнее в app/utils/query_stats.py)
+    install_query_hooks(engine.sync_engine)
+
     # Возвращаем настроенный AsyncEngine с поддержкой REGEXP
     return engine
 
 
+# Добавление в существующую таблицу столбцов, появившихся в модели после её создания
+def add_missing_columns(sync_conn: Connection, table: Table, column_names: Iterable[str]) -> None:
+    """
+    Добавление в существующую таблицу столбцов модели, которых в ней нет (create_all не меняет существующие таблицы).
+    Столбцы должны допускать NULL.
+
+    :param sync_conn: Синхронное соединение (из AsyncConnection.run_sync)
+    :param table: Таблица модели
+    :param column_names: Названия добавляемых столбцов
+    :return: None
+    """
+    existing = {column['name'] for column in inspect(sync_conn).get_columns(table.name)}
+    for name in column_names:
+        if name not in existing:
+            column_type = table.c[name].type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}'))
+
+
 class DataBase:
     """ Класс для взаимодействия с БД. """
 
@@ -76,6 +119,13 @@ class DataBase:
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
+            # Индексы, добавленные в модели после создания таблиц (create_all не меняет существующие таблицы)
+            for index in (*UserChat.__table__.indexes, *SavedAudio.__table__.indexes):
+                await conn.run_sync(index.create, checkfirst=True)
+
+            # Столбцы, добавленные в модели после создания таблиц
+            await conn.run_sync(add_missing_columns, SavedAudio.__table__, ('file_name',))
+
         # Заполнить таблицу баннеров
         await self.create_banners()
 
@@ -117,6 +167,17 @@ class DataBase:
         result = await session.execute(select(Banner).where(Banner.name == page_name))
         return result.scalar()
 
+    @staticmethod
+    async def get_all_banners(session: AsyncSession) -> Sequence[Banner]:
+        """
+        Получить все баннеры Banner (загружаются в память при запуске, подробнее в app/utils/banners.py).
+
+        :param session: Пользовательская сессия
+        :return: Список объектов Banner
+        """
+        result = await session.execute(select(Banner))
+        return result.scalars().all()
+
     # USERS & AUTH
 
     @staticmethod
@@ -129,13 +190,10 @@ class DataBase:
         :return: Созданный объект User
         """
 
-        # Создаём объект для хеширования пароля
-        ph = PasswordHasher()
-
-        # Создаём нового пользователя
+        # Создаём нового пользователя (пароль хешируется в пуле потоков, не блокируя event loop)
         new_user = User(
             email=data['email'],
-            password_hash=ph.hash(data['password'])
+            password_hash=await hash_password(data['password'])
         )
         session.add(new_user)
         await session.commit()
@@ -163,6 +221,7 @@ class DataBase:
         """
         Получить id пользователя User по его email и паролю.
         Функция используется для аутентификации, находит пользователя по логину и сверяет хеш пароля.
+        Если хеш создан с устаревшими параметрами argon2, он пересчитывается по текущим настройкам.
 
         :param session: Пользовательская сессия
         :param data: Словарь с данными для получения (email, password)
@@ -175,7 +234,12 @@ class DataBase:
 
         # Проверяем хеш пароля, если пользователь найден. Возвращаем его id
         if user:
-            if user.check_password(given_password=data['password']):
+            if await verify_password(user.password_hash, data['password']):
+
+                # Обновляем хеш, если изменились параметры хеширования
+                if needs_rehash(user.password_hash):
+                    user.password_hash = await hash_password(data['password'])
+                    await session.commit()
                 return user.id
         return None
 
@@ -198,7 +262,7 @@ class DataBase:
 
         # Пробуем установить новый пароль
         try:
-            user.set_password(data['password'])
+            user.password_hash = await hash_password(data['password'])
             session.add(user)
             await session.commit()
             return user
@@ -264,6 +328,92 @@ class DataBase:
             except Exception as e:
                 print(str(e))
 
+    # EMAIL OUTBOX
+
+    @staticmethod
+    async def enqueue_email(session: AsyncSession, to_email: str, subject: str, body: str) -> EmailOutbox | None:
+        """
+        Поставить письмо в очередь исходящих писем EmailOutbox.
+
+        :param session: Пользовательская сессия
+        :param to_email: Почта получателя
+        :param subject: Тема письма
+        :param body: Текст письма
+        :return: Созданный объект EmailOutbox или None в случае ошибки
+        """
+        try:
+            email = EmailOutbox(to_email=to_email, subject=subject, body=body)
+            session.add(email)
+            await session.commit()
+            return email
+
+        except Exception as e:
+            print(f'Ошибка при добавлении письма в очередь: {e}')
+            return None
+
+    async def get_due_emails(self, limit: int) -> Sequence[EmailOutbox]:
+        """
+        Получить письма EmailOutbox, ожидающие отправки, у которых наступило время очередной попытки.
+
+        :param limit: Макс. количество писем
+        :return: Список объектов EmailOutbox в порядке постановки в очередь
+        """
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == 'pending', EmailOutbox.next_attempt <= func.now())
+                .order_by(EmailOutbox.id)
+                .limit(limit)
+            )
+            return result.scalars().all()
+
+    async def delete_sent_email(self, email_id: int) -> None:
+        """
+        Удалить отправленное письмо из очереди EmailOutbox (текст письма может содержать ключ сброса пароля).
+
+        :param email_id: id письма EmailOutbox
+        :return: None
+        """
+        async with self.session_maker() as session:
+            await session.execute(delete(EmailOutbox).where(EmailOutbox.id == email_id))
+            await session.commit()
+
+    async def reschedule_email(self, email_id: int, error: str, retry_in: float | None) -> None:
+        """
+        Зафиксировать неудачную попытку отправки письма EmailOutbox и назначить время следующей попытки.
+
+        :param email_id: id письма EmailOutbox
+        :param error: Текст ошибки отправки
+        :param retry_in: Через сколько секунд повторить отправку. None - попытки исчерпаны (статус 'failed')
+        :return: None
+        """
+        values = dict(attempts=EmailOutbox.attempts + 1, last_error=error[:1000])
+        if retry_in is None:
+            values['status'] = 'failed'
+        else:
+            values['next_attempt'] = func.datetime('now', f'+{int(retry_in)} seconds')
+
+        async with self.session_maker() as session:
+            await session.execute(update(EmailOutbox).where(EmailOutbox.id == email_id).values(**values))
+            await session.commit()
+
+    async def delete_old_emails(self) -> None:
+        """ Удалить из очереди EmailOutbox письма старше установленного в settings.py срока (в т.ч. неотправленные). """
+
+        async with self.session_maker() as session:
+            try:
+                result = await session.execute(
+                    delete(EmailOutbox).where(
+                        EmailOutbox.created < func.datetime('now', f'-{EMAIL_OUTBOX_KEEP_DAYS} days')
+                    )
+                )
+                await session.commit()
+                if result.rowcount:
+                    print(f'Удалены устаревшие письма из очереди: {result.rowcount}')
+
+            except Exception as e:
+                print(f'Ошибка при удалении устаревших писем из очереди: {e}')
+
     # TOPICS
 
     @staticmethod
@@ -351,6 +501,7 @@ class DataBase:
                 topic_name = topic.name
                 await session.delete(topic)
                 await session.commit()
+                word_cache.clear()
                 return str(topic_name)
 
         except (Exception, ):
@@ -368,6 +519,7 @@ class DataBase:
         """
         await session.execute(update(Topic).where(Topic.id == topic_id).values(name=data['name']))
         await session.commit()
+        word_cache.clear()
         return True
 
     # WORD_PHRASES
@@ -480,6 +632,10 @@ class DataBase:
 
         result = await session.execute(query)
         random_word = result.scalars().first()
+
+        # Слово загружено с темой и примерами - сохраняем в общий кеш для навигации по истории тестов и ответов
+        if random_word is not None:
+            word_cache.set(random_word.id, WordRecord.from_orm(random_word))
         return random_word
 
     @staticmethod
@@ -495,6 +651,7 @@ class DataBase:
         query = update(WordPhrase).where(WordPhrase.id == word_id).values(**data)
         await session.execute(query)
         await session.commit()
+        word_cache.invalidate(word_id)
         return True
 
     @staticmethod
@@ -510,6 +667,7 @@ class DataBase:
         if word_to_delete:
             await session.delete(word_to_delete)
             await session.commit()
+            word_cache.invalidate(word_id)
             return True
         return False
 
@@ -527,6 +685,23 @@ class DataBase:
         )
         return word_phrase
 
+    @staticmethod
+    async def get_cached_word_phrase(session: AsyncSession, word_id: int) -> WordRecord | None:
+        """
+        Получить данные слова/фразы с темой и примерами через общий кеш слов word_cache.
+        При отсутствии в кеше загружает слово из БД и сохраняет в кеш запись WordRecord (только для чтения: для
+        изменения слово загружается через get_word_phrase_by_id).
+
+        :param session: Пользовательская сессия
+        :param word_id: int id записи в таблице
+        :return: запись WordRecord или None, если запись не найдена
+        """
+        async def load() -> WordRecord | None:
+            word_phrase = await DataBase.get_word_phrase_by_id(session, word_id)
+            return WordRecord.from_orm(word_phrase) if word_phrase is not None else None
+
+        return await word_cache.get_or_load(word_id, load)
+
     @staticmethod
     async def get_word_phrase_by_data(session: AsyncSession, word: str, translate: str, topic_id: int) \
             -> WordPhrase | None:
@@ -570,6 +745,8 @@ class DataBase:
         )
         session.add(obj)
         await session.commit()
+        if word_id is not None:
+            word_cache.invalidate(word_id)
         return obj
 
     @staticmethod
@@ -585,6 +762,8 @@ class DataBase:
         if context_to_delete:
             await session.delete(context_to_delete)
             await session.commit()
+            if context_to_delete.word_id is not None:
+                word_cache.invalidate(context_to_delete.word_id)
             return True
 
     @staticmethod
@@ -632,6 +811,9 @@ class DataBase:
         query = update(Context).where(Context.id == context_id).values(example=example)
         await session.execute(query)
         await session.commit()
+
+        # Пример может относиться к любому из слов в кеше, а его word_id в запросе неизвестен
+        word_cache.clear()
         return True
 
     @staticmethod
@@ -673,14 +855,14 @@ class DataBase:
 
     @staticmethod
     async def create_attempt(
-            session: AsyncSession, user_id: int, test_type: str, word: WordPhrase, result: str) -> None:
+            session: AsyncSession, user_id: int, test_type: str, word: WordPhrase | WordRecord, result: str) -> None:
         """
         Создание записи о попытке прохождения теста в таблице Attempts.
 
         :param session: Пользовательская сессия
         :param user_id: id пользователя User
         :param test_type: тип теста
-        :param word: объект WordPhrase
+        :param word: объект WordPhrase или его запись WordRecord (из кеша слов)
         :param result: correct/wrong результат попытки
         :return: None
         """
@@ -834,6 +1016,7 @@ class DataBase:
         user_chat = UserChat(user_id=user_id, chat_id=chat_id)
         session.add(user_chat)
         await session.commit()
+        auth_cache.set(chat_id, user_id)
         return user_chat
 
     @staticmethod
@@ -849,6 +1032,40 @@ class DataBase:
         result = await session.execute(query)
         return result.scalar()
 
+    @staticmethod
+    async def get_auth_user_id(session: AsyncSession, chat_id: int) -> int | None:
+        """
+        Получение id пользователя, привязанного к чату Telegram, через кеш auth_cache.
+        При отсутствии чата в кеше выполняет один запрос к таблице UserChat (по индексу chat_id) и сохраняет результат,
+        в т.ч. отсутствие привязки.
+
+        :param session: Пользовательская сессия
+        :param chat_id: ID чата Telegram
+        :return: ID пользователя User или None, если чат не привязан к пользователю
+        """
+        async def load_user_id() -> int | None:
+            query = select(UserChat.user_id).where(UserChat.chat_id == chat_id).order_by(desc(UserChat.id)).limit(1)
+            result = await session.execute(query)
+            return result.scalar()
+
+        return await auth_cache.get_or_load(chat_id, load_user_id, cache_none=True)
+
+    @staticmethod
+    async def delete_user_chats_by_chat_id(session: AsyncSession, chat_id: int) -> None:
+        """
+        Удаление всех записей с привязкой ID чата Telegram к пользователям в таблице UserChat (выход из учётной записи).
+
+        :param session: Пользовательская сессия
+        :param chat_id: ID чата Telegram
+        :return: None
+        """
+        query = select(UserChat).where(UserChat.chat_id == chat_id)
+        result = await session.execute(query)
+        for user_chat in result.scalars().all():
+            await session.delete(user_chat)
+        await session.commit()
+        auth_cache.set(chat_id, None)
+
     @staticmethod
     async def check_if_chat_attached_to_another_user(session: AsyncSession, chat_id: int, user_id: int) -> bool:
         """
@@ -884,6 +1101,7 @@ class DataBase:
         for user_chat in outdated_user_chats:
             await session.delete(user_chat)
         await session.commit()
+        auth_cache.invalidate(chat_id)
 
     async def delete_old_user_chats(self) -> None:
         """
@@ -909,6 +1127,10 @@ class DataBase:
                     for user_chat in outdated_user_chats:
                         await session.delete(user_chat)
                     await session.commit()
+
+                    # Чаты с удалёнными привязками при следующем обращении перечитываются из БД
+                    for user_chat in outdated_user_chats:
+                        auth_cache.invalidate(user_chat.chat_id)
                 except Exception as e:
                     print(f'Ошибка при удалении неактуальных записей UserChat: {e}')
 
@@ -927,19 +1149,26 @@ class DataBase:
         obj = UserSettings(user_id=user_id)
         session.add(obj)
         await session.commit()
+        user_settings_cache.invalidate(user_id)
 
     @staticmethod
-    async def get_user_settings(session: AsyncSession, user_id: int) -> Type[UserSettings] | None:
+    async def get_user_settings(session: AsyncSession, user_id: int) -> SettingsRecord | None:
         """
-        Получить запись с персональными настройками пользователя из таблицы UserSettings.
+        Получить персональные настройки пользователя из таблицы UserSettings (только для чтения, изменение - через
+        update_user_settings).
+        Запись берётся из кеша user_settings_cache, при отсутствии - загружается из БД и сохраняется в кеш.
 
         :param session: Пользовательская сессия
         :param user_id: ID пользователя
-        :return: Объект UserSettings с настройками или None если запись не найдена
+        :return: Запись SettingsRecord с настройками или None если запись не найдена
         """
-        query = select(UserSettings).where(UserSettings.user_id == user_id)
-        result = await session.execute(query)
-        return result.scalar()
+        async def load_settings() -> SettingsRecord | None:
+            query = select(UserSettings).where(UserSettings.user_id == user_id)
+            result = await session.execute(query)
+            settings = result.scalar()
+            return SettingsRecord.from_orm(settings) if settings is not None else None
+
+        return await user_settings_cache.get_or_load(user_id, load_settings)
 
     @staticmethod
     async def update_user_settings(session: AsyncSession, user_id: int, **kwargs) -> bool:
@@ -951,9 +1180,16 @@ class DataBase:
         :param kwargs: Параметры для обновления
         :return: True если обновление прошло успешно
         """
-        query = update(UserSettings).where(UserSettings.user_id == user_id).values(**kwargs)
-        await session.execute(query)
+        query = update(UserSettings).where(UserSettings.user_id == user_id).values(**kwargs).returning(UserSettings)
+        result = await session.execute(query)
+        settings = result.scalar()
         await session.commit()
+
+        # Сохраняем обновлённую запись в кеш
+        if settings is not None:
+            user_settings_cache.set(user_id, SettingsRecord.from_orm(settings))
+        else:
+            user_settings_cache.invalidate(user_id)
         return True
 
     # NOTES
@@ -1089,17 +1325,19 @@ class DataBase:
     # AUDIOS
 
     @staticmethod
-    async def save_file_path_to_audio(session: AsyncSession, file_path: str, user_id: int) -> SavedAudio:
+    async def save_file_path_to_audio(session: AsyncSession, file_path: str, user_id: int,
+                                      file_name: str = None) -> SavedAudio:
         """
-        Сохранение пути к аудиофайлу в таблице SavedAudio.
-        Сам аудиофайл сохраняется в другом модуле, здесь фиксируется в БД путь к нему.
+        Сохранение ключа аудиофайла в таблице SavedAudio.
+        Сам аудиофайл сохраняется в хранилище (app/utils/blob_store.py), здесь фиксируется в БД ключ к нему.
 
         :param session: Пользовательская сессия
-        :param file_path: Путь к сохранённому аудиофайлу
+        :param file_path: Ключ аудиофайла в хранилище
         :param user_id: ID пользователя User
+        :param file_name: Исходное название файла (ключ в хранилище - хеш содержимого)
         :return: Объект SavedAudio
         """
-        new_audio = SavedAudio(file_path=file_path, user_id=user_id)
+        new_audio = SavedAudio(file_path=file_path, user_id=user_id, file_name=file_name)
         session.add(new_audio)
         await session.commit()
         return new_audio
@@ -1124,6 +1362,24 @@ class DataBase:
         result = await session.execute(query)
         return result.scalars().all()
 
+    @staticmethod
+    async def get_saved_audio_paths(session: AsyncSession, user_id: int) \
+            -> Sequence[Row[tuple[int, str, str | None, datetime]]]:
+        """
+        Получить ключи всех сохранённых аудиофайлов пользователя, их исходные названия и даты сохранения (для выгрузки
+        архива).
+
+        :param session: Пользовательская сессия
+        :param user_id: ID пользователя User
+        :return: Список кортежей (ID SavedAudio, ключ аудиофайла, исходное название или None, дата и время сохранения)
+                 в порядке сохранения
+        """
+        query = (select(SavedAudio.id, SavedAudio.file_path, SavedAudio.file_name, SavedAudio.created)
+                 .where(SavedAudio.user_id == user_id)
+                 .order_by(SavedAudio.created, SavedAudio.id))
+        result = await session.execute(query)
+        return result.all()
+
     @staticmethod
     async def get_audio_dates_and_count(session: AsyncSession, user_id: int) -> Sequence[Row[tuple[datetime, int]]]:
         """
@@ -1151,7 +1407,7 @@ class DataBase:
 
         :param session: Пользовательская сессия
         :param audio_id: ID аудиофайла SavedAudio
-        :return: Путь к аудиофайлу если удаление из БД прошло успешно (для передачи на удаление из файловой системы)
+        :return: Ключ аудиофайла если удаление из БД прошло успешно (для передачи на удаление из хранилища)
         """
         query = await session.get(SavedAudio, audio_id)
 
@@ -1163,3 +1419,113 @@ class DataBase:
         await session.delete(query)
         await session.commit()
         return file_name
+
+    @staticmethod
+    async def is_audio_file_used(session: AsyncSession, file_path: str) -> bool:
+        """
+        Проверить, есть ли записи SavedAudio с ключом аудиофайла (одинаковые файлы хранятся в хранилище один раз).
+
+        :param session: Пользовательская сессия
+        :param file_path: Ключ аудиофайла в хранилище
+        :return: True, если на файл ссылается хотя бы одна запись
+        """
+        result = await session.execute(select(exists().where(SavedAudio.file_path == file_path)))
+        return bool(result.scalar())
+
+    @staticmethod
+    async def get_audio_file_paths(session: AsyncSession) -> Sequence[Row[tuple[int, str]]]:
+        """
+        Получить ключи аудиофайлов всех записей SavedAudio (для переноса файлов в хранилище).
+
+        :param session: Сессия БД
+        :return: Список кортежей (ID SavedAudio, ключ или путь к аудиофайлу)
+        """
+        result = await session.execute(select(SavedAudio.id, SavedAudio.file_path).order_by(SavedAudio.id))
+        return result.all()
+
+    @staticmethod
+    async def set_audio_file_path(session: AsyncSession, audio_id: int, file_path: str, file_name: str = None) -> None:
+        """
+        Обновить ключ аудиофайла записи SavedAudio.
+
+        :param session: Сессия БД
+        :param audio_id: ID записи SavedAudio
+        :param file_path: Ключ аудиофайла в хранилище
+        :param file_name: Исходное название файла
+        :return: None
+        """
+        await session.execute(
+            update(SavedAudio).where(SavedAudio.id == audio_id).values(file_path=file_path, file_name=file_name)
+        )
+        await session.commit()
+
+    # AUDIO ARCHIVE SEGMENTS
+
+    @staticmethod
+    async def get_audio_archive_segments(session: AsyncSession, user_id: int) -> Sequence[AudioArchiveSegment]:
+        """
+        Получить кешированные части архива аудиозаписей пользователя.
+
+        :param session: Пользовательская сессия
+        :param user_id: ID пользователя User
+        :return: Список объектов AudioArchiveSegment по месяцам и номерам частей
+        """
+        query = (select(AudioArchiveSegment)
+                 .where(AudioArchiveSegment.user_id == user_id)
+                 .order_by(AudioArchiveSegment.period, AudioArchiveSegment.part))
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    @staticmethod
+    async def replace_audio_archive_segments(session: AsyncSession, user_id: int, period: str, fingerprint: str,
+                                             file_names: list[str]) -> list[AudioArchiveSegment]:
+        """
+        Заменить кешированные части архива аудиозаписей пользователя за месяц (после пересборки архива).
+        Если файлов нет (все аудиофайлы месяца отсутствуют в хранилище), сохраняется маркер месяца без файлов
+        (part = parts = 0, пустой file_name), чтобы месяц не пересобирался до изменения записей SavedAudio.
+
+        :param session: Пользовательская сессия
+        :param user_id: ID пользователя User
+        :param period: Месяц 'YYYY-MM'
+        :param fingerprint: Отпечаток записей SavedAudio за месяц
+        :param file_names: Файлы частей архива в папке кеша пользователя по порядку
+        :return: Список созданных объектов AudioArchiveSegment (маркер - при пустом file_names)
+        """
+        await session.execute(delete(AudioArchiveSegment).where(AudioArchiveSegment.user_id == user_id,
+                                                                AudioArchiveSegment.period == period))
+        segments = [
+            AudioArchiveSegment(user_id=user_id, period=period, part=part, parts=len(file_names),
+                                fingerprint=fingerprint, file_name=file_name)
+            for part, file_name in enumerate(file_names, start=1)
+        ] or [AudioArchiveSegment(user_id=user_id, period=period, part=0, parts=0, fingerprint=fingerprint,
+                                  file_name='')]
+        session.add_all(segments)
+        await session.commit()
+        return segments
+
+    @staticmethod
+    async def delete_audio_archive_segments(session: AsyncSession, user_id: int, periods: list[str]) -> None:
+        """
+        Удалить кешированные части архива аудиозаписей пользователя за месяцы без аудиозаписей.
+
+        :param session: Пользовательская сессия
+        :param user_id: ID пользователя User
+        :param periods: Месяцы 'YYYY-MM'
+        :return: None
+        """
+        await session.execute(delete(AudioArchiveSegment).where(AudioArchiveSegment.user_id == user_id,
+                                                                AudioArchiveSegment.period.in_(periods)))
+        await session.commit()
+
+    @staticmethod
+    async def set_audio_archive_file_id(session: AsyncSession, segment: AudioArchiveSegment, tg_file_id: str) -> None:
+        """
+        Сохранить file_id Telegram отправленной части архива (для повторной отправки без загрузки файла).
+
+        :param session: Пользовательская сессия
+        :param segment: Объект AudioArchiveSegment
+        :param tg_file_id: file_id документа в Telegram
+        :return: None
+        """
+        segment.tg_file_id = tg_file_id
+        await session.commit()
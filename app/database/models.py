@@ -4,9 +4,8 @@
 from sqlalchemy import String, Text, DateTime, func, ForeignKey, Integer, UniqueConstraint, CheckConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy_utils import EmailType
-from argon2 import PasswordHasher
-
 from app.utils.tts_voices import all_voices_en_US_ShortName_list
+from app.utils.passwords import password_hasher
 from app.settings import (PATTERN_CONTEXT_EXAMPLE, TEST_TYPES_SQL, MIN_NOTE_TEXT_LENGTH, MIN_NOTE_TITLE_LENGTH,
                           SYSTEM_SHEETS_SQL)
 
@@ -46,24 +45,27 @@ class User(Base):
     user_settings = relationship("UserSettings", back_populates="user", cascade="all, delete-orphan")
     notes = relationship("Notes", back_populates="user", cascade="all, delete-orphan")
     saved_audio = relationship("SavedAudio", back_populates="user", cascade="all, delete-orphan")
+    audio_archive_segments = relationship("AudioArchiveSegment", back_populates="user", cascade="all, delete-orphan")
 
     # Установка пароля (захешированного)
     def set_password(self, password: str) -> None:
-        """ Установка пароля (захешированного). """
-        ph = PasswordHasher()
-        self.password_hash = ph.hash(password)
+        """
+        Установка пароля (захешированного). Синхронное хеширование - в асинхронном коде использовать
+        app.utils.passwords.hash_password().
+        """
+        self.password_hash = password_hasher.hash(password)
 
     # Проверка введённого пароля
     def check_password(self, given_password: str) -> bool:
         """
-        Проверка переданного пароля. Хэширует и сверяет с сохраненным в БД.
+        Проверка переданного пароля. Хэширует и сверяет с сохраненным в БД. Синхронная проверка - в асинхронном коде
+        использовать app.utils.passwords.verify_password().
 
         :param given_password: Переданный пароль
         :return: True, если пароли совпадают, иначе False
         """
         try:
-            ph = PasswordHasher()
-            ph.verify(self.password_hash, given_password)
+            password_hasher.verify(self.password_hash, given_password)
             return True
         except (Exception, ):
             return False
@@ -78,13 +80,30 @@ class PasswordReset(Base):
     reset_token: Mapped[str] = mapped_column(String(128), nullable=False)
 
 
+# Очередь исходящих писем
+class EmailOutbox(Base):
+    """ Очередь исходящих писем (отправляются фоновым обработчиком app/utils/mailer.py). """
+    __tablename__ = 'email_outbox'
+
+    to_email: Mapped[str] = mapped_column(EmailType, nullable=False)
+    subject: Mapped[str] = mapped_column(String(150), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default='pending')
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), index=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+
+    # Ограничения
+    __table_args__ = (CheckConstraint("status IN ('pending', 'failed')", name='valid_email_status'), )
+
+
 # Таблица для автоматической авторизации, связь между пользователем User и чатом Telegram
 class UserChat(Base):
     """ Таблица для автоматической авторизации, связь между пользователем User и чатом Telegram. """
     __tablename__ = 'user_chat'
 
     user_id: Mapped[int] = mapped_column(ForeignKey(User.id, ondelete='CASCADE'), nullable=False)
-    chat_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    chat_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
 
     # Отношения
     user = relationship(User, back_populates="user_chat", passive_deletes=True)
@@ -269,13 +288,34 @@ class Notes(Base):
     )
 
 
-# Сохраненные аудио. Пути к файлам
+# Сохраненные аудио. Ключи файлов в хранилище
 class SavedAudio(Base):
-    """ Сохраненные аудио. Пути к файлам. """
+    """ Сохраненные аудио. Ключи файлов в хранилище (app/utils/blob_store.py). """
     __tablename__ = 'saved_audio'
 
     user_id: Mapped[int] = mapped_column(ForeignKey(User.id, ondelete='CASCADE'), nullable=False)
-    file_path: Mapped[str] = mapped_column(String(255), nullable=False)
+    file_path: Mapped[str] = mapped_column(String(255), nullable=False, index=True)     # Ключ файла в хранилище
+    file_name: Mapped[str] = mapped_column(String(255), nullable=True)      # Исходное название файла (для выгрузки)
 
     # Отношения
     user = relationship(User, back_populates='saved_audio', passive_deletes=True)
+
+
+# Кешированные части архива аудиозаписей пользователя за месяц
+class AudioArchiveSegment(Base):
+    """ Кешированные части архива аудиозаписей пользователя за месяц (app/utils/audio_archive.py). """
+    __tablename__ = 'audio_archive_segment'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey(User.id, ondelete='CASCADE'), nullable=False)
+    period: Mapped[str] = mapped_column(String(7), nullable=False)                  # Месяц 'YYYY-MM'
+    part: Mapped[int] = mapped_column(Integer, nullable=False)                      # Номер части (0 - месяц без файлов)
+    parts: Mapped[int] = mapped_column(Integer, nullable=False)                     # Кол-во частей архива за месяц
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)            # Отпечаток записей SavedAudio
+    file_name: Mapped[str] = mapped_column(String(100), nullable=False)             # Файл в папке кеша пользователя
+    tg_file_id: Mapped[str] = mapped_column(String(255), nullable=True)             # file_id отправленного архива
+
+    # Отношения
+    user = relationship(User, back_populates='audio_archive_segments', passive_deletes=True)
+
+    # Ограничения
+    __table_args__ = (UniqueConstraint('user_id', 'period', 'part', name='uq_user_period_part'), )
@@ -0,0 +1,80 @@
+"""
+Неизменяемые записи с данными ORM-объектов для общих кешей и state FSM.
+
+INFO:
+1. Объекты ORM привязаны к сессии, в которой загружены: общий для всех чатов кеш с такими объектами отдаёт одни и те же
+   экземпляры в разные сессии, а изменение атрибутов в одном обработчике видно во всех остальных. Поэтому в общих кешах
+   (word_cache, user_settings_cache в app/database/db.py) хранятся frozen dataclass-записи с копией данных.
+2. Записи повторяют имена атрибутов исходных объектов (id, word, topic.name, context, example и т.д.), поэтому код,
+   читающий атрибуты, работает и с объектом, и с записью.
+3. Для изменения данных записи объект загружается из БД заново (DataBase.get_word_phrase_by_id и т.д.).
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from app.database.models import Topic, Context, WordPhrase, UserSettings
+
+
+# Данные темы
+@dataclass(frozen=True, slots=True)
+class TopicRecord:
+    """ Данные темы Topic (id и название). """
+    id: int
+    name: str
+
+    @classmethod
+    def from_orm(cls, topic: Topic) -> 'TopicRecord':
+        return cls(id=topic.id, name=topic.name)
+
+
+# Данные примера
+@dataclass(frozen=True, slots=True)
+class ContextRecord:
+    """ Данные примера Context (id, текст примера и даты для отображения). """
+    id: int
+    example: str
+    created: Optional[datetime] = None
+    updated: Optional[datetime] = None
+
+    @classmethod
+    def from_orm(cls, context: Context) -> 'ContextRecord':
+        return cls(id=context.id, example=context.example, created=context.created, updated=context.updated)
+
+
+# Данные слова/фразы с темой и примерами
+@dataclass(frozen=True, slots=True)
+class WordRecord:
+    """ Данные слова/фразы WordPhrase с темой и примерами. Объект слова должен быть загружен с темой и примерами. """
+    id: int
+    word: str
+    transcription: Optional[str]
+    translate: Optional[str]
+    topic_id: int
+    topic: TopicRecord
+    context: tuple[ContextRecord, ...]
+    created: Optional[datetime] = None
+    updated: Optional[datetime] = None
+
+    @classmethod
+    def from_orm(cls, word: WordPhrase) -> 'WordRecord':
+        return cls(
+            id=word.id, word=word.word, transcription=word.transcription, translate=word.translate,
+            topic_id=word.topic_id, topic=TopicRecord.from_orm(word.topic),
+            context=tuple(ContextRecord.from_orm(example) for example in word.context),
+            created=word.created, updated=word.updated
+        )
+
+
+# Настройки озвучки пользователя
+@dataclass(frozen=True, slots=True)
+class SettingsRecord:
+    """ Настройки пользователя UserSettings для озвучки (скорость речи и голос). """
+    id: int
+    user_id: int
+    speech_rate: str
+    voice: str
+
+    @classmethod
+    def from_orm(cls, settings: UserSettings) -> 'SettingsRecord':
+        return cls(id=settings.id, user_id=settings.user_id, speech_rate=settings.speech_rate, voice=settings.voice)
@@ -5,6 +5,8 @@ from aiogram.filters import Filter
 from aiogram.fsm.context import FSMContext
 from aiogram import types
 
+from app.settings import ADMIN_CHAT_IDS
+
 
 class ChatTypeFilter(Filter):
     """
@@ -81,3 +83,11 @@ class IsKeyNotInStateFilter(Filter):
 
         # Если ни одного ключа в FSMContext нет, возвращаем True
         return True
+
+
+# Фильтр для событий из чатов администраторов
+class IsAdminFilter(Filter):
+    """ Фильтр для событий из чатов администраторов бота (ADMIN_CHAT_IDS в настройках окружения). """
+
+    async def __call__(self, message: types.Message) -> bool:
+        return message.chat.id in ADMIN_CHAT_IDS
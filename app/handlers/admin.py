@@ -0,0 +1,86 @@
+"""
+Обработчики роутера администратора бота.
+
+INFO:
+1. Роутер работает только для чатов из ADMIN_CHAT_IDS (настройки окружения). Команды администратора не добавляются в
+   меню команд бота.
+2. Команда /profile - профилирование работающего бота (подробнее в app/utils/profiling.py):
+    - /profile - состояние профилирования и справка;
+    - /profile <cpu|sample|memory> [N] [Ts] - запуск на N апдейтов и/или T секунд (напр. /profile sample 60s);
+    - /profile stop - остановка до лимита.
+   После окончания профилирования в чат отправляется краткий отчёт и файлы с результатами.
+"""
+import html
+
+from aiogram import types, Router
+from aiogram.filters import Command, CommandObject
+
+from app.filters.custom_filters import ChatTypeFilter, IsAdminFilter
+from app.utils.custom_bot_class import Bot
+from app.utils.lazy_session import NO_DB_SESSION
+from app.utils.profiling import profiler, parse_profile_args, ProfileResult, PROFILE_MODES
+
+# Создаём роутер администратора
+admin_router = Router()
+
+# Настраиваем фильтр, что строго приватный чат администратора
+admin_router.message.filter(ChatTypeFilter(['private']), IsAdminFilter())
+
+PROFILE_HELP = (
+    f'/profile &lt;{"|".join(PROFILE_MODES)}&gt; [N] [Ts] - профилирование на N апдейтов и/или T секунд\n'
+    '/profile stop - остановить профилирование'
+)
+MESSAGE_MAX_LENGTH = 3500                                               # Макс. длина отчёта в сообщении
+
+
+# Отправка результатов профилирования администратору
+async def send_profile_result(bot: Bot, chat_id: int, result: ProfileResult) -> None:
+    """
+    Отправка краткого отчёта и файлов с результатами профилирования в чат администратора.
+
+    :param bot: Объект бота
+    :param chat_id: ID чата администратора
+    :param result: Результат профилирования
+    :return: None
+    """
+    try:
+        await bot.send_message(chat_id, f'<pre>{html.escape(result.summary[:MESSAGE_MAX_LENGTH])}</pre>')
+        for path in result.files:
+            await bot.send_document(chat_id, types.FSInputFile(path))
+    except Exception as e:
+        print(f'Ошибка отправки результатов профилирования: {e}')
+
+
+# Обработчик команды /profile
+@admin_router.message(Command('profile'), flags=NO_DB_SESSION)
+async def profile_cmd(message: types.Message, command: CommandObject, bot: Bot) -> None:
+    """
+    Управление профилированием: состояние, запуск, остановка.
+
+    :param message: Сообщение с командой /profile
+    :param command: Разобранная команда с параметрами
+    :param bot: Объект бота
+    :return: None
+    """
+    args = command.args.split() if command.args else []
+
+    # Без параметров - состояние и справка
+    if not args:
+        await message.answer(f'Состояние: {profiler.status()}\n\n{PROFILE_HELP}')
+        return
+
+    # Остановка: результаты отправляются из send_profile_result
+    if args[0] == 'stop':
+        if profiler.stop() is None:
+            await message.answer(f'Состояние: {profiler.status()}')
+        return
+
+    chat_id = message.chat.id
+    try:
+        mode, updates, seconds = parse_profile_args(args)
+        status = profiler.start(mode, updates, seconds,
+                                on_finish=lambda result: send_profile_result(bot, chat_id, result))
+    except (ValueError, RuntimeError) as e:
+        await message.answer(f'⚠️ {html.escape(str(e))}\n\n{PROFILE_HELP}')
+        return
+    await message.answer(f'Профилирование запущено: {status}')
@@ -4,6 +4,7 @@
 from aiogram import F, types, Router
 
 from app.filters.custom_filters import ChatTypeFilter
+from app.utils.lazy_session import NO_DB_SESSION
 
 
 user_group_router = Router()
@@ -16,6 +17,6 @@ user_group_router.edited_message.filter(ChatTypeFilter(['group', 'supergroup']))
 
 
 # Тестовый handler
-@user_group_router.message(F.text)
+@user_group_router.message(F.text, flags=NO_DB_SESSION)
 async def moderate_msg(message: types.Message) -> None:
     await message.answer('Keep calm and HERRACH (с)')
@@ -396,14 +396,15 @@ async def add_word_get_context(message: types.Message, state: FSMContext, sessio
 # ДОБАВИТЬ ПРИМЕРЫ созданной записи WordPhrase
 
 # ДОБАВИТЬ ПРИМЕРЫ только что созданной записи WordPhrase
-# * Разделение с контроллером добавления примеров при редактировании: FSM-ключ "word_to_update" + разный StateFilter
+# * Разделение с контроллером добавления примеров при редактировании: FSM-ключ "word_to_update_id" + разный StateFilter
 @word_phrase_router.callback_query(StateFilter(None), F.data.startswith('add_more_examples_to_word_'))
 async def add_new_context_ask_text(callback: types.CallbackQuery, state: FSMContext, session: AsyncSession, bot: Bot) \
         -> None:
     """
     Добавить примеры только что созданной записи WordPhrase.
 
-    * Разделение с контроллером добавления примеров при редактировании: FSM-ключ "word_to_update" + разный StateFilter
+    * Разделение с контроллером добавления примеров при редактировании: FSM-ключ "word_to_update_id" + разный
+      StateFilter
 
     :param callback: Callback-запрос формата "add_more_examples_to_word_{WordPhrase.id}"
     :param state: Контекст состояния
@@ -10,9 +10,10 @@ INFO:
 3. При прохождении аутентификации пользователь сохраняется в bot.auth_user_id[message.chat.id] = User.id. По наличию
    записи в этом атрибуте и проверяется аутентификация.
 4. Также после успешной аутентификации связка User.id и ID чата записывается в БД. При последующих запусках приложения
-   пользователь будет определяться автоматически на основе этой записи для используемого чата. Запись сохраняется
-   в течение 90 дней. Если пользователь выходит из учётной записи и проходит аутентификацию с новыми данными - старая
-   запись будет удалена и автоматическая аутентификация будет срабатывать по новым данным (Таблица UserChat).
+   пользователь будет определяться автоматически на основе этой записи для используемого чата (при первом апдейте
+   из чата, через кеш - подробнее в app/utils/auth_sessions.py). Запись сохраняется в течение 90 дней. Если
+   пользователь проходит аутентификацию с новыми данными - старая запись будет удалена и автоматическая аутентификация
+   будет срабатывать по новым данным (Таблица UserChat). При выходе из учётной записи привязка чата удаляется.
 5. При входе в профиль (или завершении регистрации Sign in) в state сохраняется ключ user=<User object> для доступа
    к данным.
 6. При регистрации нового пользователя автоматически создаётся запись в таблице с настройками пользователя
@@ -32,11 +33,13 @@ from app.database.db import DataBase
 from app.filters.custom_filters import ChatTypeFilter, IsKeyInStateFilter
 from app.keyboards.inlines import get_auth_btns, get_inline_btns
 from app.common.fsm_classes import AuthFSM
+from app.common.state_records import UserRecord
 from app.common.tools import try_alert_msg, clear_all_data, update_user_chat_data, clear_auxiliary_msgs_in_chat, \
     send_email_reset_psw_token
 from app.common.msg_templates import action_cancelled_msg_template, oops_try_again_msg_template
 from app.handlers.user_private.menu_processing import auth_page, start_page
 from app.utils.custom_bot_class import Bot
+from app.utils.lazy_session import NO_DB_SESSION
 from app.settings import PATTERN_EMAIL, MIN_USER_PSW_LENGTH
 
 
@@ -202,8 +205,8 @@ async def sign_in_get_confirm_psw(message: types.Message, state: FSMContext, bot
         await clear_all_data(bot, message.chat.id, state)
         AuthFSM.psw_first_input = None
 
-        # Добавляем в контекст ключ user с созданным объектом User для доступа к данным при работе в профиле
-        await state.update_data(user=new_user)
+        # Добавляем в контекст ключ user с данными созданного User для доступа к ним при работе в профиле
+        await state.update_data(user=UserRecord.from_orm(new_user))
 
         # Обновляем данные привязки чата к пользователю
         await update_user_chat_data(session, message.chat.id, new_user.id)
@@ -252,7 +255,7 @@ async def cancel_sign_in(callback: types.CallbackQuery, state: FSMContext, bot:
 # LOG OUT - выход пользователя из учётной записи
 
 # Выход из учётной записи - ШАГ 1, запрос подтверждения
-@auth_router.callback_query(F.data.contains('log_out_ask_confirm'))
+@auth_router.callback_query(F.data.contains('log_out_ask_confirm'), flags=NO_DB_SESSION)
 async def log_out_ask_confirm(callback: types.CallbackQuery, bot: Bot) -> None:
     """
     Отправка сообщения для подтверждения выхода из учётной записи.
@@ -276,7 +279,7 @@ async def log_out_ask_confirm(callback: types.CallbackQuery, bot: Bot) -> None:
 
 
 # Выход из учётной записи - отмена, возврат на страницу профиля
-@auth_router.callback_query(F.data == 'cancel_log_out')
+@auth_router.callback_query(F.data == 'cancel_log_out', flags=NO_DB_SESSION)
 async def cancel_log_out(callback: types.CallbackQuery, bot: Bot) -> None:
     """
     Отмена попытки выхода из учётной записи и откат в начало аутентификации.
@@ -305,8 +308,8 @@ async def log_out_get_confirm(callback: types.CallbackQuery, state: FSMContext,
     :return: Функция ничего не возвращает, но меняет баннер и клавиатуру.
     """
 
-    # Снятие отметки id пользователя в боте и оповещение
-    bot.auth_user_id[callback.message.chat.id] = None
+    # Удаление привязки чата к пользователю (снимает отметку id пользователя в боте) и оповещение
+    await DataBase.delete_user_chats_by_chat_id(session, callback.message.chat.id)
     await callback.answer('⚠️ Вы вышли из учётной записи!', show_alert=True)
 
     # Возврат на главную страницу, редактирование баннера
@@ -486,10 +489,17 @@ async def reset_password_start(
         # Если токен существует, то отправляем его, если нет, то генерируем и отправляем
         psw_token = await DataBase.get_token_pass_reset_by_email(session, data['email'])
         if psw_token:
-            send_email_reset_psw_token(to_email=data['email'], reset_token=psw_token)
+            is_sent = await send_email_reset_psw_token(session, to_email=data['email'], reset_token=psw_token)
         else:
             reset_object = await DataBase.create_token_reset_psw(session, data)
-            send_email_reset_psw_token(to_email=reset_object.email, reset_token=reset_object.reset_token)
+            is_sent = await send_email_reset_psw_token(
+                session, to_email=reset_object.email, reset_token=reset_object.reset_token
+            )
+
+        # Если письмо не поставлено в очередь, оповещаем и выходим из функции (состояние ввода ключа не устанавливаем)
+        if not is_sent:
+            await callback.answer(oops_try_again_msg_template, show_alert=True)
+            return
 
         # Отправляем сообщение с инструкцией
         await callback.answer('✅ На указанный email отправлено письмо с ключом для сброса пароля.\n '
@@ -615,13 +625,14 @@ async def reset_password_get_new_psw_confirm(
 
         # Обновляем id авторизованного пользователя, входим в систему
         bot.auth_user_id[message.chat.id] = user.id
+        await update_user_chat_data(session, message.chat.id, user.id)
 
         # Чистим состояние, атрибуты, удаляем временные сообщения
         await clear_all_data(bot, message.chat.id, state)
         AuthFSM.psw_first_input = None
 
-        # Записываем пользователя в контекст
-        await state.update_data(user=user)
+        # Записываем данные пользователя в контекст
+        await state.update_data(user=UserRecord.from_orm(user))
 
     # Если смена пароля не удалась, отправляем сообщение и сохраняем его
     else:
@@ -1,15 +1,24 @@
 """
 Обработка действий с AI-ассистентом GIGACHAT
+
+INFO:
+1. История диалога хранится в state под ключом 'giga_memory' (GigaMemory, подробнее в app/utils/giga_memory.py) и
+   передаётся в GigaChat с каждым вопросом в пределах бюджета токенов. Кнопка "Очистить чат" сбрасывает историю.
+2. Кеш ответов (app/utils/giga_cache.py) используется только для первого вопроса диалога: ответ на уточняющий вопрос
+   зависит от истории.
 """
 from aiogram import Router, F, types
-from langchain_core.messages import HumanMessage, SystemMessage
+from aiogram.fsm.context import FSMContext
 from langchain_gigachat import GigaChat
 
 from app.common.fsm_classes import GigaAiFSM
 from app.common.tools import clear_auxiliary_msgs_in_chat
 from app.filters.custom_filters import ChatTypeFilter
 from app.utils.custom_bot_class import Bot
-from app.settings import GIGA_SYSTEM_PROMPT
+from app.utils.gigachat_assistant import stream_giga_response, send_giga_text
+from app.utils.giga_cache import giga_cache
+from app.utils.giga_memory import GigaMemory, build_prompt, summarize_memory
+from app.utils.lazy_session import NO_DB_SESSION
 
 
 # Создаём роутер для приватного чата бота с пользователем
@@ -21,12 +30,13 @@ giga_router.message.filter(ChatTypeFilter(['private']))
 
 # Отправка пользовательского запроса в GIGACHAT и отправка ответа в чат бота
 @giga_router.message(GigaAiFSM.text_input, F.text)
-async def giga_chat_get_response(message: types.Message, bot: Bot, giga_chat: GigaChat) -> None:
+async def giga_chat_get_response(message: types.Message, state: FSMContext, bot: Bot, giga_chat: GigaChat) -> None:
     """
     Обработка действий с AI-ассистентом GIGACHAT.
     Отправка пользовательского запроса в GIGACHAT и отправка ответа в чат бота.
 
     :param message: Сообщение с запросом от пользователя
+    :param state: Контекст состояния FSM (история диалога)
     :param bot: Объект бота
     :param giga_chat: Объект GIGACHAT, взаимодействующий с API GIGACHAT SBER
     :return: None
@@ -35,16 +45,50 @@ async def giga_chat_get_response(message: types.Message, bot: Bot, giga_chat: Gi
     # Сохраняем сообщение во вспомогательном хранилище
     bot.auxiliary_msgs['user_msgs'][message.chat.id].append(message)
 
-    # Формируем промпт
-    prompt = [
-        SystemMessage(content=GIGA_SYSTEM_PROMPT),
-        HumanMessage(content=message.text),
-    ]
+    # Забираем историю диалога
+    memory: GigaMemory = (await state.get_data()).get('giga_memory') or GigaMemory()
+
+    # Если это первый вопрос диалога и на него уже есть ответ в кеше, отправляем его без обращения к GigaChat
+    cached_response = None
+    if memory.is_empty:
+        try:
+            cached_response = await giga_cache.get(message.text)
+        except Exception as e:
+            print(f"Ошибка чтения кеша ответов GigaChat: {e}")
+    if cached_response:
+        await send_giga_text(message, cached_response, bot.auxiliary_msgs['user_msgs'][message.chat.id])
+        await state.update_data(giga_memory=memory.add_exchange(message.text, cached_response))
+        return
+
+    # Формируем промпт: системный промпт, история диалога в пределах бюджета токенов, вопрос
+    prompt = build_prompt(memory, message.text)
 
-    # Обращаемся к GigaChat и отправляем ответ в чат бота
+    # Обращаемся к GigaChat и выводим ответ в чат бота по мере генерации (сообщения с ответом сразу попадают во
+    # вспомогательное хранилище)
     try:
-        response = giga_chat.invoke(prompt)
-        msg = await message.answer(response.content)
+        response_text = await stream_giga_response(
+            giga_chat, prompt, message, bot.auxiliary_msgs['user_msgs'][message.chat.id]
+        )
+        if not response_text.strip():
+            msg = await message.answer("⚠️ GigaChat вернул пустой ответ. Попробуйте переформулировать вопрос.")
+            bot.auxiliary_msgs['user_msgs'][message.chat.id].append(msg)
+            return
+
+        # Сохраняем полный ответ на первый вопрос диалога в кеш
+        if memory.is_empty:
+            try:
+                await giga_cache.set(message.text, response_text)
+            except Exception as e:
+                print(f"Ошибка записи кеша ответов GigaChat: {e}")
+
+        # Добавляем вопрос и ответ в историю, при необходимости сжимаем ранние реплики в резюме
+        memory = memory.add_exchange(message.text, response_text)
+        if memory.needs_summary():
+            memory = await summarize_memory(giga_chat, memory)
+        await state.update_data(giga_memory=memory)
+
+    except TimeoutError:
+        msg = await message.answer("⚠️ GigaChat не ответил вовремя. Попробуйте ещё раз чуть позже.")
         bot.auxiliary_msgs['user_msgs'][message.chat.id].append(msg)
 
     except Exception as e:
@@ -54,13 +98,15 @@ async def giga_chat_get_response(message: types.Message, bot: Bot, giga_chat: Gi
 
 
 # Очистка чата от истории сообщений
-@giga_router.callback_query(GigaAiFSM.text_input, F.data == 'clear_chat')
-async def clear_chat(callback: types.CallbackQuery, bot: Bot) -> None:
+@giga_router.callback_query(GigaAiFSM.text_input, F.data == 'clear_chat', flags=NO_DB_SESSION)
+async def clear_chat(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """
-    Очистка чата от сообщений.
+    Очистка чата от сообщений и сброс истории диалога.
 
     :param callback: CallbackQuery-запрос формата 'clear_chat'
+    :param state: Контекст состояния FSM
     :param bot: Объект бота
     :return: None
     """
     await clear_auxiliary_msgs_in_chat(bot, callback.message.chat.id)
+    await state.update_data(giga_memory=None)
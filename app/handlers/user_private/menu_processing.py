@@ -2,18 +2,19 @@
 Обработка наполнения сообщения бота: баннер + описание + клавиатура.
 """
 from aiogram.fsm.context import FSMContext
-from aiogram.types import InputMediaPhoto, CallbackQuery, FSInputFile, InlineKeyboardMarkup
+from aiogram.types import InputMediaPhoto, CallbackQuery, InlineKeyboardMarkup
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.db import DataBase
-from app.database.models import Banner
 from app.banners import banners_details as bnr
 from app.common.tools import clear_all_data, check_if_authorized, get_topic_kbds_helper, \
     get_word_phrase_caption_formatting, clear_auxiliary_msgs_in_chat, check_if_user_has_topics, check_if_words_exist
 from app.common.msg_templates import stat_msg_template
 from app.common.fsm_classes import GigaAiFSM
+from app.common.state_records import UserRecord, stat_data_to_record, load_word
 from app.keyboards.inlines import (get_kbds_start_page_btns, get_auth_btns, get_kbds_with_navi_header_btns,
                                    MenuCallBack, get_inline_btns, get_kbds_tests_btns)
+from app.utils.banners import banners
 from app.utils.custom_bot_class import Bot
 from app.utils.tts import speak_text
 from app.settings import TEST_EN_RU_WORD, TEST_EN_RU_AUDIO, TEST_RU_EN_WORD
@@ -52,11 +53,8 @@ async def start_page(
     # При обработке кнопки "НА ГЛАВНУЮ" чистим состояние, ключевые атрибуты и удаляем все вспомогательные сообщения.
     await clear_all_data(bot, chat_id, state)
 
-    # Получаем соответствующий странице баннер
-    banner: Banner = await DataBase.get_banner_by_name(session, menu_name)
-
-    # Формируем объект изображения с описанием
-    image = InputMediaPhoto(media=FSInputFile(banner.image_path), caption=banner.description)
+    # Формируем объект изображения баннера страницы с описанием
+    image = banners.media(menu_name)
 
     # Получаем из БД имя пользователя (email) - при пройденной аутентификации
     username = None
@@ -97,7 +95,7 @@ async def auth_page(
     """
 
     # Получаем соответствующий странице баннер
-    banner: Banner = await DataBase.get_banner_by_name(session, menu_name)
+    banner = banners.get(menu_name)
     banner_description = banner.description
     kbds = None
 
@@ -115,8 +113,8 @@ async def auth_page(
         banner_description = bnr.user_profile.format(email=user.email)
         kbds = get_auth_btns(profile=True)
 
-        # Добавляем пользователя в состояние для дальнейшего использования в настройках профиля
-        await state.update_data(user=user)
+        # Добавляем данные пользователя в состояние для дальнейшего использования в настройках профиля
+        await state.update_data(user=UserRecord.from_orm(user))
 
     # Обработка запроса входа в систему ("menu:1:auth:log_in_app:1")
     elif menu_details == 'log_in_app':
@@ -128,7 +126,7 @@ async def auth_page(
         kbds = get_auth_btns()
 
     # Формируем объект изображения с описанием
-    image = InputMediaPhoto(media=FSInputFile(banner.image_path), caption=banner_description)
+    image = banners.media(menu_name, caption=banner_description)
 
     return image, kbds
 
@@ -164,7 +162,7 @@ async def vocabulary(
     """
 
     # Получаем баннер страницы
-    banner: Banner = await DataBase.get_banner_by_name(session, menu_name)
+    banner = banners.get(menu_name)
     caption = banner.description
     kbds = None
 
@@ -241,7 +239,7 @@ async def vocabulary(
         caption = bnr.vcb_descrptn_topic_manager
 
     # Формируем объект изображения с описанием
-    image = InputMediaPhoto(media=FSInputFile(banner.image_path), caption=caption)
+    image = banners.media(menu_name, caption=caption)
 
     return image, kbds
 
@@ -294,12 +292,11 @@ async def add_new_word(
         page=page, per_page=per_page
     )
 
-    # Получаем соответствующий меню баннер и редактируем его описание по конкретным данным
-    banner: Banner = await DataBase.get_banner_by_name(session, menu_name)
+    # Формируем описание баннера по конкретным данным
     banner_description = bnr.add_new_word_step_1.format(**topic_info_for_caption)
 
     # Формируем объект изображения с описанием
-    image = InputMediaPhoto(media=FSInputFile(banner.image_path), caption=banner_description)
+    image = banners.media(menu_name, caption=banner_description)
 
     # Возвращаем объект изображения и клавиатуру
     return image, kbds
@@ -325,7 +322,7 @@ async def tests(
     :param bot: Объект бота
     :param session: Пользовательская сессия
     :param state: Контекст состояния FSM с возможными ключами: 'test_type': str, 'search_keywords': str,
-                 'selected_topic_id': int, 'word_obj': <WordPhrase.object>, 'stat_data' : tuple
+                 'selected_topic_id': int, 'word_id': <WordPhrase.id>, 'stat_data' : tuple
     :param level: Уровень вложенности меню
     :param callback: CallbackQuery-запросы формата: "menu:1:tests::1", "menu:2:tests:en_ru_audio:1",
                     "menu:2:tests:ru_en_word:1", "menu:2:tests:en_ru_word_previous:1",
@@ -338,7 +335,7 @@ async def tests(
     """
 
     # Получаем баннер страницы
-    banner: Banner = await DataBase.get_banner_by_name(session, menu_name)
+    banner = banners.get(menu_name)
 
     # Тестирование - основное меню раздела с выбором типа теста.
     # Вход из стартового меню бота или обработка кнопки "НАЗАД" из разделов тестирования с уровнем 2.
@@ -402,21 +399,20 @@ async def tests(
         navi_index_now = bot.tests_word_navi[callback.message.chat.id][test_type]['navi_index']
         history = bot.tests_word_navi[callback.message.chat.id][test_type]['history']
 
-        # Если в истории есть записанное слово за таким индексом, будем выводить его
-        if history.get(navi_index_now):
-            random_word = history.get(navi_index_now)
+        # Если в истории есть id слова за таким индексом, будем выводить это слово (через общий кеш слов)
+        random_word = await load_word(session, history.get(navi_index_now))
 
-        # Если в истории нет слова за таким индексом, будем генерировать новое
-        else:
+        # Если в истории нет слова за таким индексом (или оно уже удалено), будем генерировать новое
+        if random_word is None:
             # Генерируем случайное слово (с учётом фильтра по теме)
             random_word = await DataBase.get_random_word_phrase(
                 session, bot.auth_user_id.get(callback.message.chat.id), topic_filter=topic_filter
             )
-            #  Записываем полученное слово в историю попыток за текущим индексом
-            bot.tests_word_navi[callback.message.chat.id][test_type]['history'][navi_index_now] = random_word
+            #  Записываем id полученного слова в историю попыток за текущим индексом
+            history[navi_index_now] = random_word.id
 
-        # Записываем полученное слово в state для последующей обработки
-        await state.update_data(word_obj=random_word)
+        # Записываем id полученного слова в state для последующей обработки
+        await state.update_data(word_id=random_word.id)
 
         # Формируем описание баннера
         word_info: dict = await get_word_phrase_caption_formatting(random_word)
@@ -445,8 +441,8 @@ async def tests(
         total_attempts, correct_attempts, incorrect_attempts, result_percentage, topic_count, topic_obj = stat_data
         topic_name = topic_obj.name if topic_obj else '-'
 
-        # Записываем данные статистики в state
-        await state.update_data(stat_data=stat_data)
+        # Записываем данные статистики в state (тема - компактной записью вместо ORM-объекта)
+        await state.update_data(stat_data=stat_data_to_record(stat_data))
 
         # Отправляем информационное сообщение со статистикой и кнопкой "Записать отчёт"
         stat_msg_text = stat_msg_template.format(**locals())
@@ -459,7 +455,7 @@ async def tests(
         bot.tests_word_navi[callback.message.chat.id][test_type]['navi_index'] += 1
 
     # Формируем объект изображения с описанием
-    image = InputMediaPhoto(media=FSInputFile(banner.image_path), caption=caption)
+    image = banners.media(menu_name, caption=caption)
     return image, kbds
 
 
@@ -494,15 +490,12 @@ async def speaking(
     # Очищаем чат и контекст FSM
     await clear_all_data(bot, callback.message.chat.id, state)
 
-    # Получаем баннер страницы
-    banner: Banner = await DataBase.get_banner_by_name(session, menu_name)
-
     # Формируем описание баннера и клавиатуру
     btns = {'Преобразовать текст в аудио 🔊': 'convert_text_to_audio', 'Практика произношения 🎙': 'speaking_practice'}
     kbds = get_kbds_with_navi_header_btns(btns=btns, level=level, menu_name=menu_name)
 
     # Формируем объект изображения с описанием
-    image = InputMediaPhoto(media=FSInputFile(banner.image_path), caption=banner.description)
+    image = banners.media(menu_name)
     return image, kbds
 
 
@@ -521,9 +514,6 @@ async def giga_ai(session: AsyncSession, state: FSMContext | None, level, menu_n
     :return: Баннер с описанием и клавиатуру для дальнейшего редактирования в вызывающем обработчике или None при ошибке
     """
 
-    # Получаем баннер страницы
-    banner: Banner = await DataBase.get_banner_by_name(session, menu_name)
-
     # Формируем описание баннера и клавиатуру
     caption = bnr.ai_header
     kbds = get_kbds_with_navi_header_btns(btns={'Очистить чат 🗑': 'clear_chat'}, level=level, menu_name=menu_name)
@@ -532,7 +522,7 @@ async def giga_ai(session: AsyncSession, state: FSMContext | None, level, menu_n
     await state.set_state(GigaAiFSM.text_input)
 
     # Формируем объект изображения с описанием
-    image = InputMediaPhoto(media=FSInputFile(banner.image_path), caption=caption)
+    image = banners.media(menu_name, caption=caption)
     return image, kbds
 
 
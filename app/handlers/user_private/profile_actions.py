@@ -21,10 +21,9 @@ INFO:
 """
 import os
 import re
-import zipfile
-from tempfile import NamedTemporaryFile
 
 from aiogram import Router, F, types
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import FSInputFile
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -41,9 +40,12 @@ from app.utils.paginator import Paginator, pages
 from app.utils.tts import speak_text
 from app.utils.tts_voices import all_voices_en_US_ShortName_list
 from app.utils.xsl_tools import export_statistic_data_to_xls, export_all_user_data_to_xls
+from app.utils.audio_archive import prepare_audio_archive
+from app.utils.blob_store import audio_store
+from app.utils.lazy_session import NO_DB_SESSION
 from app.settings import PER_PAGE_STAT_REPORTS, PATTERN_SPEECH_RATE, PER_PAGE_VOICE_SAMPLES, VOICE_SAMPLES_TEXT, \
-    PER_PAGE_AUDIO_DATES, SAVED_AUDIO_ROOT_DIR, PER_PAGE_AUDIOS, FILENAME_AUDIOS_ZIP, FILENAME_AUDIOS_CAPTION, \
-    XLS_DB_CAPTION
+    PER_PAGE_AUDIO_DATES, PER_PAGE_AUDIOS, FILENAME_AUDIOS_ZIP, FILENAME_AUDIOS_CAPTION, \
+    FILENAME_AUDIOS_ZIP_PART, AUDIO_ARCHIVE_CACHE_DIR, XLS_DB_CAPTION
 
 # Создаём роутер для приватного чата бота с пользователем
 profile_router = Router()
@@ -117,7 +119,7 @@ async def change_speech_rate_ask_value(callback: types.CallbackQuery, state: FSM
 
 
 # Универсальный обработчик отмены изменений настроек профиля.
-@profile_router.callback_query(F.data == 'cancel_user_settings', IsKeyInStateFilter('user'))
+@profile_router.callback_query(F.data == 'cancel_user_settings', IsKeyInStateFilter('user'), flags=NO_DB_SESSION)
 async def cancel_user_settings_update(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """
     Универсальный обработчик отмены изменений настроек профиля. Сбрасывает состояния ввода и удаляет сообщения из чата.
@@ -563,7 +565,7 @@ async def audio_by_date(callback: types.CallbackQuery, bot: Bot, session: AsyncS
     :param bot: Объект бота
     :param session: Пользовательская сессия
     :param state: Контекст состояния FSM с ключами:
-                  'user'(<User_object>) и 'last_date_page'(callback.data для кнопки назад)
+                  'user'(<UserRecord>) и 'last_date_page'(callback.data для кнопки назад)
     :return: None
     """
 
@@ -617,7 +619,7 @@ async def audio_by_date(callback: types.CallbackQuery, bot: Bot, session: AsyncS
     # Отправляем аудиозаписи в чат
     for audio_obj in current_page_data:
         try:
-            audio = FSInputFile(path=audio_obj.file_path)
+            audio = await audio_store.input_file(audio_obj.file_path, filename=audio_obj.file_name)
             kbds = get_inline_btns(btns={'Удалить 🗑': f'delete_audio:{audio_obj.id}'})
             msg = await callback.message.answer_audio(
                 audio=audio,
@@ -644,7 +646,7 @@ async def delete_audio_ask_to_confirm(callback: types.CallbackQuery, state: FSMC
 
     :param callback: CallbackQuery-запрос формата "delete_audio:<SavedAudio.id>"
     :param state: Контекст состояния FSM с ключами:
-                  'user' (с объектом User) и 'audios_by_date_page' (с callback.data при отмене удаления)
+                  'user' (с данными UserRecord) и 'audios_by_date_page' (с callback.data при отмене удаления)
     :param bot: Объект бота
     :return: None
     """
@@ -668,18 +670,19 @@ async def delete_audio_ask_to_confirm(callback: types.CallbackQuery, state: FSMC
     bot.auxiliary_msgs['user_msgs'][callback.message.chat.id].append(msg)
 
 
-# Удаление аудио, ШАГ 2 - подтверждение получено, удаление из файловой системы и БД
+# Удаление аудио, ШАГ 2 - подтверждение получено, удаление из БД и хранилища
 @profile_router.callback_query(F.data.startswith('confirm_delete_audio:'),
                                IsKeyInStateFilter('user', 'audios_by_date_page'))
 async def confirm_delete_audio(callback: types.CallbackQuery, session: AsyncSession, state: FSMContext, bot: Bot) \
         -> None:
     """
-    Удаление аудио, ШАГ 2 - подтверждение получено, удаление из файловой системы и БД
+    Удаление аудио, ШАГ 2 - подтверждение получено, удаление из БД и хранилища.
+    Файл удаляется из хранилища, если на него не ссылаются другие записи SavedAudio.
 
     :param callback: CallbackQuery-запрос формата "confirm_delete_audio:<audio_id>"
     :param session: Пользовательская сессия
     :param state: Контекст состояния FSM с ключами:
-                  'user' (с объектом User) и 'audios_by_date_page' (с callback.data страницы с аудиозаписями)
+                  'user' (с данными UserRecord) и 'audios_by_date_page' (с callback.data страницы с аудиозаписями)
     :param bot: Объект бота
     :return: None
     """
@@ -692,15 +695,18 @@ async def confirm_delete_audio(callback: types.CallbackQuery, session: AsyncSess
     # Забираем SavedAudio.id из callback
     audio_id = int(callback.data.split(':')[-1])
 
-    # Удаляем аудио из файловой системы и запись о нем из БД
+    # Удаляем запись об аудио из БД и аудио из хранилища
     is_del = False                                                              # Флаг удаления
     try:
         # Удаляем запись об аудио из БД
-        path_for_delete = await DataBase.delete_audio_by_id(session, audio_id)
-        if path_for_delete:
+        key_for_delete = await DataBase.delete_audio_by_id(session, audio_id)
+        if key_for_delete:
             try:
-                # Удаляем аудио из файловой системы
-                os.remove(path_for_delete)
+                # Удаляем аудио из хранилища, если файл не используется другими записями (под блокировкой ключа,
+                # чтобы не удалить файл, только что повторно сохранённый для новой записи)
+                async with audio_store.key_lock(key_for_delete):
+                    if not await DataBase.is_audio_file_used(session, key_for_delete):
+                        await audio_store.remove(key_for_delete)
                 is_del = True
             except Exception as e:
                 await callback.answer(text=oops_with_error_msg_template.format(error=str(e)), show_alert=True)
@@ -716,13 +722,17 @@ async def confirm_delete_audio(callback: types.CallbackQuery, session: AsyncSess
     await audio_by_date(modified_callback, bot, session, state)
 
 
-# Выгрузка всех аудиозаписей пользователя в zip-архив (с сохранением структуры папок)
+# Выгрузка всех аудиозаписей пользователя в zip-архивы по месяцам (с сохранением структуры папок)
 @profile_router.callback_query(F.data.startswith('export_all_user_audios'), IsKeyInStateFilter('user'))
-async def export_all_user_audios(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
+async def export_all_user_audios(callback: types.CallbackQuery, session: AsyncSession, state: FSMContext, bot: Bot) \
+        -> None:
     """
-    Выгрузка всех аудиозаписей пользователя в zip-архив (с сохранением структуры папок).
+    Выгрузка всех аудиозаписей пользователя в zip-архивы по месяцам (с сохранением структуры папок).
+    Пересобираются только архивы за месяцы с изменёнными аудиозаписями, отправленные ранее архивы отправляются по
+    file_id Telegram (подробнее в app/utils/audio_archive.py).
 
     :param callback: CallbackQuery-запрос формата 'export_all_user_audios'
+    :param session: Пользовательская сессия
     :param state: Контекст состояния FSM с ключом 'user' с данными о пользователе User
     :param bot: Объект бота
     :return: None
@@ -735,51 +745,38 @@ async def export_all_user_audios(callback: types.CallbackQuery, state: FSMContex
     state_data = await state.get_data()
     user = state_data.get('user')
 
-    # Формируем список папок с сохраненными аудиозаписями
     try:
+        # Получаем части архива по месяцам (пересобираются изменённые месяцы)
+        segments = await prepare_audio_archive(session, user.id)
 
-        # Формируем путь до корневой папки с аудиозаписями пользователя
-        user_audio_root = SAVED_AUDIO_ROOT_DIR.format(user_id=user.id)
-
-        # Проверяем существование папки в файловой системе
-        if not os.path.exists(user_audio_root):
+        # Если у пользователя нет сохранённых аудиозаписей, оповещаем и выходим из функции
+        if not segments:
             await callback.answer(text='⚠️ У вас нет сохранённых аудиозаписей!', show_alert=True)
             return
 
-        # Получаем список всех поддиректорий с датами. Исключаем папку с временными файлами
-        all_audio_dirs = os.listdir(user_audio_root)  # ['2025-05-05', '2025-05-06', ... , 'tmp']
-        if 'tmp' in all_audio_dirs:
-            all_audio_dirs.remove('tmp')
+        # Отправляем части архива в чат бота
+        cache_dir = AUDIO_ARCHIVE_CACHE_DIR.format(user_id=user.id)
+        for segment in segments:
+            if segment.parts == 1:
+                filename = FILENAME_AUDIOS_ZIP.format(period=segment.period)
+                caption = f'{FILENAME_AUDIOS_CAPTION} за {segment.period}'
+            else:
+                filename = FILENAME_AUDIOS_ZIP_PART.format(period=segment.period, part=segment.part,
+                                                           parts=segment.parts)
+                caption = f'{FILENAME_AUDIOS_CAPTION} за {segment.period} (часть {segment.part} из {segment.parts})'
+
+            # Отправляем по file_id, при ошибке (напр., file_id недействителен) - загружаем файл из кеша
+            msg = None
+            if segment.tg_file_id:
+                try:
+                    msg = await callback.message.answer_document(segment.tg_file_id, caption=caption)
+                except TelegramBadRequest as e:
+                    print(f'Архив не отправлен по file_id: {e}')
+            if msg is None:
+                file_to_send = FSInputFile(os.path.join(cache_dir, segment.file_name), filename=filename)
+                msg = await callback.message.answer_document(file_to_send, caption=caption)
+                await DataBase.set_audio_archive_file_id(session, segment, msg.document.file_id)
+            bot.auxiliary_msgs['user_msgs'][callback.message.chat.id].append(msg)
 
     except Exception as e:
         await callback.answer(text=oops_with_error_msg_template.format(error=str(e)), show_alert=True)
-        return
-
-    # Формируем архив
-    files = None                                                      # Флаг наличия аудиофайлов для архивации в архиве
-    with NamedTemporaryFile(delete=False, suffix=".zip") as tmp_zip:  # Создаем временный zip-файл
-        with zipfile.ZipFile(tmp_zip.name, "w") as archive:
-
-            # Формируем пути до каждого аудиофайла в каждой датированной папке хранилища
-            for date_dir in all_audio_dirs:
-                date_dir_path = os.path.join(user_audio_root, date_dir)
-                for file_name in os.listdir(date_dir_path):
-                    audio_path = os.path.join(date_dir_path, file_name)
-                    files = True
-
-                    # Добавляем файл в архив с сохранением вложенных директорий
-                    arcname = os.path.join(date_dir, file_name)
-                    archive.write(audio_path, arcname=arcname)
-
-            # Если у пользователя нет сохранённых аудиозаписей, оповещаем и выходим из функции
-            if not files:
-                await callback.answer("⚠️ У вас нет аудиофайлов для архивации!", show_alert=True)
-                return
-
-        # Отправляем архив в чат бота
-        file_to_send = FSInputFile(tmp_zip.name, filename=FILENAME_AUDIOS_ZIP)
-        msg = await callback.message.answer_document(file_to_send, caption=FILENAME_AUDIOS_CAPTION)
-        bot.auxiliary_msgs['user_msgs'][callback.message.chat.id].append(msg)
-
-    # Удаляем архив после отправки
-    os.remove(tmp_zip.name)
@@ -6,22 +6,18 @@ INFO:
 ПРАКТИКА ПРОИЗНОШЕНИЯ
 1. Аудио пользователя с попытками произношения изначально сохраняются во временной папке (путь к ней определен в
    настройках). При запросе нового примера все файлы из временной папки удаляются.
-2. При определении примера для практики произношения, объект примера сохраняется в state под ключом
-   'random_example_obj'.
+2. При определении примера для практики произношения, данные примера (ContextRecord с id и текстом) сохраняются в
+   state под ключом 'random_example'.
 3. Для хранения данных о временных файлах используется ключ 'saving_structure' в state (Т.к. имя файла не передать в
    callback из-за ограничения по символам). В этом ключе записывается словарь, где ключ - номер попытки
    'attempt_number' (т.е. порядковый номер присланного аудио), а значение - название записанного аудиофайла с попыткой
    произношения.
 4. Структура 'saving_structure' с 'attempt_number'=1 инициализируется и записывается в контекст в момент выбора примера.
    Далее, при отправке пользователем аудио с практикой, она перезаписывается с дополненными данными.
-5. При сохранении аудио запись переносится из временного хранилища в постоянное.
-   Путь к постоянному хранилищу определен в настройках, логика: app/data/audio/user_{user_id}/{date}/{filename}.ogg.
-   В папке /audio/ расположены подпапки для каждого пользователя, внутри подпапки по датам, внутри которых аудио
-   за каждую дату.
+5. При сохранении аудио запись переносится из временного хранилища в хранилище аудио (app/utils/blob_store.py,
+   локальная папка или S3-совместимое хранилище). В SavedAudio записывается ключ файла в хранилище.
 """
 import os
-import shutil
-import datetime
 
 from aiogram import Router, F, types
 from aiogram.fsm.context import FSMContext
@@ -29,6 +25,7 @@ from aiogram.types import FSInputFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.common.fsm_classes import SpeakingFSM
+from app.common.state_records import ContextRecord
 from app.common.tools import clear_auxiliary_msgs_in_chat, check_if_authorized
 from app.common.msg_templates import oops_with_error_msg_template, oops_try_again_msg_template
 from app.filters.custom_filters import ChatTypeFilter, IsKeyInStateFilter
@@ -37,7 +34,9 @@ from app.utils.tts import speak_text
 from app.banners import banners_details
 from app.keyboards.inlines import get_kbds_with_navi_header_btns, get_inline_btns
 from app.database.db import DataBase
-from app.settings import AUDIO_TEMP_PATH, AUDIO_FINAL_PATH
+from app.utils.lazy_session import NO_DB_SESSION
+from app.utils.blob_store import audio_store
+from app.settings import AUDIO_TEMP_PATH
 
 
 # Создаём роутер для приватного чата бота с пользователем
@@ -48,7 +47,7 @@ speaking_router.message.filter(ChatTypeFilter(['private']))
 
 
 # Очистка чата - универсальный обработчик
-@speaking_router.callback_query(F.data == 'clear_chat')
+@speaking_router.callback_query(F.data == 'clear_chat', flags=NO_DB_SESSION)
 async def clear_chat(callback: types.CallbackQuery, bot: Bot) -> None:
     """
     Очистка чата от аудио файлов.
@@ -156,8 +155,9 @@ async def speaking_practice_main(callback: types.CallbackQuery, bot: Bot, state:
     # Достаем случайный пример пользователя
     random_example_obj = await DataBase.get_random_context(session, user_id)
 
-    # Сохраняем в state данные объекта, инициируем структуру временного хранения присланных аудио с произношением
-    await state.update_data(random_example_obj=random_example_obj)
+    # Сохраняем в state данные примера, инициируем структуру временного хранения присланных аудио с произношением
+    random_example = ContextRecord.from_orm(random_example_obj) if random_example_obj else None
+    await state.update_data(random_example=random_example)
     await state.update_data(saving_structure={})                            # Словарь с данными временного хранения
     await state.update_data(attempt_number=1)                               # Номер попытки произношения
 
@@ -168,7 +168,7 @@ async def speaking_practice_main(callback: types.CallbackQuery, bot: Bot, state:
         'Очистить чат 🗑': 'clear_chat',
     }
     kbds = get_kbds_with_navi_header_btns(btns=btns, level=2, menu_name='speaking', sizes=(2, ))
-    caption = banners_details.speaking_practice.format(example=random_example_obj.example)
+    caption = banners_details.speaking_practice.format(example=random_example.example)
 
     # Редактируем баннер и клавиатуру
     try:
@@ -178,7 +178,7 @@ async def speaking_practice_main(callback: types.CallbackQuery, bot: Bot, state:
 
 
 # Прослушать аудио с произношением примера
-@speaking_router.callback_query(F.data == 'listen_example', IsKeyInStateFilter('random_example_obj'))
+@speaking_router.callback_query(F.data == 'listen_example', IsKeyInStateFilter('random_example'))
 async def speaking_practice_listen_example(callback: types.CallbackQuery, bot: Bot, state: FSMContext,
                                            session: AsyncSession) -> None:
     """
@@ -186,24 +186,24 @@ async def speaking_practice_listen_example(callback: types.CallbackQuery, bot: B
 
     :param callback: CallbackQuery-запрос формата 'listen_example'
     :param bot: Объект бота
-    :param state: Контекст состояния FSM с ключом 'random_example_obj' с объектом примера Context;
+    :param state: Контекст состояния FSM с ключом 'random_example' с данными примера ContextRecord;
     :param session: Пользовательская сессия
     :return: None
     """
 
-    # Получаем объект примера из контекста
+    # Получаем данные примера из контекста
     state_data = await state.get_data()
-    random_example_obj = state_data.get('random_example_obj')
+    random_example = state_data.get('random_example')
 
     # Формируем аудиофайл с произношением примера
-    text = random_example_obj.example
+    text = random_example.example
     chat_id = callback.message.chat.id
     await speak_text(text, bot, chat_id, is_with_title=True, autodelete=False, state=state, session=session)
 
 
 # Обработка голосового сообщения с практикой произношения от пользователя
 # Запись аудио с произношением примера во временное хранилище файлов
-@speaking_router.message(F.voice, IsKeyInStateFilter('random_example_obj'))
+@speaking_router.message(F.voice, IsKeyInStateFilter('random_example'))
 async def speaking_practice_recording(message: types.Message, state: FSMContext, bot: Bot) -> None:
     """
     Обработка голосового сообщения с практикой произношения от пользователя.
@@ -211,7 +211,7 @@ async def speaking_practice_recording(message: types.Message, state: FSMContext,
 
     :param message: Голосовое сообщение
     :param state: Контекст состояния FSM с ключами:
-                  'random_example_obj' - объект примера Context;
+                  'random_example' - данные примера ContextRecord;
                   'attempt_number' - номер записываемого аудио с попыткой произношения;
                   'saving_structure' - словарь, где ключ - номер попытки, а значение - название записанного аудиофайла
                   с попыткой произношения
@@ -247,7 +247,7 @@ async def speaking_practice_recording(message: types.Message, state: FSMContext,
     await state.update_data(attempt_number=attempt_number)
 
 
-# Обработка сохранения аудио. Переносит аудио из временного хранилища в постоянное
+# Обработка сохранения аудио. Переносит аудио из временного хранилища в постоянное (app/utils/blob_store.py)
 @speaking_router.callback_query(F.data.startswith('save_audio'), IsKeyInStateFilter('saving_structure'))
 async def speaking_practice_save_audio(callback: types.CallbackQuery, bot: Bot, state: FSMContext,
                                        session: AsyncSession) -> None:
@@ -277,20 +277,18 @@ async def speaking_practice_save_audio(callback: types.CallbackQuery, bot: Bot,
     # Получаем идентификатор пользователя
     user_id = bot.auth_user_id[callback.message.chat.id]
 
-    # Формируем финальную директорию сохранения за дату
-    audio_root_dir = AUDIO_FINAL_PATH.format(user_id=user_id, date=datetime.date.today())
-
-    # Создаем директорию хранилища, если она не существует
-    os.makedirs(audio_root_dir, exist_ok=True)
-
     try:
-        # Переносим файл из временного хранилища в сохраняемые файлы
+        # Сохраняем файл из временного хранилища в хранилище аудио и записываем ключ в БД. Под блокировкой ключа:
+        # иначе параллельное удаление записи с таким же файлом может удалить файл между сохранением и записью в БД
         temp_path = os.path.join(AUDIO_TEMP_PATH.format(user_id=user_id), f'{file_name}.ogg')
-        final_path = os.path.join(audio_root_dir, f'{file_name}.ogg')
-        shutil.move(temp_path, final_path)
-
-        # Записываем путь к сохранённому аудио в БД
-        write_to_db = await DataBase.save_file_path_to_audio(session, final_path, user_id)
+        key = await audio_store.file_key(temp_path)
+        async with audio_store.key_lock(key):
+            await audio_store.save(temp_path, key)
+            write_to_db = await DataBase.save_file_path_to_audio(session, key, user_id,
+                                                                 file_name=os.path.basename(temp_path))
+
+        # Удаляем временный файл
+        os.remove(temp_path)
         if write_to_db:
             await callback.answer('✅ Аудио сохранено!', show_alert=True)
         else:
@@ -17,21 +17,23 @@ INFO:
 5. НАВИГАЦИЯ по словам: пропустить - к предыдущему. Пропуск просто перевызывает обработчик, переход к предыдущему
    происходит за счет добавления к menu_details в callback-запросе вставки '_previous', которая обрабатывается в коде
    обработчика, меняя индекс попытки.
-6. ИСТОРИЯ слов реализуется в структуре словаря внутри бота, куда под ключом типа теста сохраняется слово за каждым
-   индексом попытки + текущий индекс попытки. Если слова с текущим индексом попытки нет в словаре, рандомно
-   выбирается слово из базы и записывается в словарь, если есть - достаётся из словаря.
+6. ИСТОРИЯ слов реализуется в структуре словаря внутри бота, куда под ключом типа теста сохраняется id слова за
+   каждым индексом попытки + текущий индекс попытки. История - кольцевой буфер WordHistoryRing фиксированной ёмкости
+   (TESTS_HISTORY_CAPACITY): хранятся только последние индексы, более ранние перезаписываются. Если слова с текущим
+   индексом попытки нет в истории, рандомно выбирается слово из базы и его id записывается в историю, если есть -
+   запись слова WordRecord достаётся по id из общего кеша слов (load_word).
    Формат структуры:
    bot.tests_word_navi[chat_id] =
    {'en_ru_word': {
-        'history': {1:  <word_obj>, 2: <word_obj>, ... },
+        'history': WordHistoryRing({1: <WordPhrase.id>, 2: <WordPhrase.id>, ... }),
         'navi_index': 3},
-    'en_ru_audio': {'history': {},  'navi_index': 1}}
+    'en_ru_audio': {'history': WordHistoryRing(),  'navi_index': 1}}
 7. Фиксация ОТВЕТОВ. Универсальный обработчик get_tests_answer() для ответов и 'да', и 'нет'. При подборе слова
-   (из истории или сгенерированного рандомайзером) в state пробрасывается ключ word_obj=<word_obj> с объектом слова.
-   Он используется для доступа к данным слова при обработке ответов.
+   (из истории или сгенерированного рандомайзером) в state пробрасывается ключ word_id=<WordPhrase.id> с id слова.
+   По нему запись слова восстанавливается (load_word) для доступа к данным при обработке ответов.
 8. Отображение текущей СТАТИСТИКИ прохождения. В чат отправляется сообщение с текущей статистикой + в state
    сохраняются данные статистики под ключом 'stat_data'. При записи отчёта данные берутся из state:
-   (total_attempts, correct_attempts, incorrect_attempts, result_percentage, topic_count, <Topic object>)
+   (total_attempts, correct_attempts, incorrect_attempts, result_percentage, topic_count, <TopicRecord>/None)
 """
 from aiogram import Router, F, types
 from aiogram.fsm.context import FSMContext
@@ -42,6 +44,7 @@ from app.database.db import DataBase
 from app.filters.custom_filters import ChatTypeFilter, IsKeyInStateFilter
 from app.utils.custom_bot_class import Bot
 from app.handlers.user_private.menu_processing import tests
+from app.common.state_records import load_word
 from app.common.tools import get_topic_kbds_helper, get_word_phrase_caption_formatting, try_alert_msg
 from app.common.msg_templates import stat_msg_template, oops_with_error_msg_template
 from app.settings import PER_PAGE_INLINE_TOPICS
@@ -186,20 +189,24 @@ async def cancel_find_topic_by_matches_tests(
 
 # Показать всю информацию по слову/фразе
 @tests_router.callback_query(F.data.startswith('tests_ask_hint_'))
-async def tests_ask_hint(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
+async def tests_ask_hint(callback: types.CallbackQuery, state: FSMContext, session: AsyncSession, bot: Bot) -> None:
     """
     Показать всю информацию по слову/фразе.
 
     :param callback: CallbackQuery-запрос формата 'tests_ask_hint_<WordPhrase.id>'
-    :param state: Контекст состояния FSM с ключом 'test_type' с типом тестирования и 'word_obj' с объектом WordPhrase
+    :param state: Контекст состояния FSM с ключом 'test_type' с типом тестирования и 'word_id' с id WordPhrase
+    :param session: Пользовательская сессия
     :param bot: Объект бота
     :return: None
     """
 
-    # Забираем информацию из контекста
+    # Забираем информацию из контекста, восстанавливаем объект слова по id
     state_data = await state.get_data()
     test_type = state_data.get('test_type')
-    word = state_data.get('word_obj')
+    word = await load_word(session, state_data.get('word_id'))
+    if not word:
+        await callback.answer('⚠️ Запись не найдена!', show_alert=True)
+        return
 
     # Формируем новое описание баннера
     hint_caption = getattr(bnr, f'tests_dscr_{test_type}_hint')
@@ -217,7 +224,7 @@ async def get_tests_answer(callback: types.CallbackQuery, state: FSMContext, ses
     Обработка ответов на тест. Запись попыток Attempt с полученным результатом в БД.
 
     :param callback: CallbackQuery-запрос формата 'tests_answer_<correct/wrong>'
-    :param state: Контекст состояния FSM с ключом 'test_type' с типом тестирования и 'word_obj' с объектом WordPhrase
+    :param state: Контекст состояния FSM с ключом 'test_type' с типом тестирования и 'word_id' с id WordPhrase
     :param session: Пользовательская сессия
     :param bot: Объект бота
     :return: None
@@ -226,7 +233,7 @@ async def get_tests_answer(callback: types.CallbackQuery, state: FSMContext, ses
     # Забираем информацию о типе теста, слове и результате из контекста и callback
     state_data = await state.get_data()
     test_type = state_data.get('test_type')
-    word = state_data.get('word_obj')
+    word = await load_word(session, state_data.get('word_id'))
     result = callback.data.split('_')[-1]
 
     # фиксация попытки в БД.
@@ -12,9 +12,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.filters.custom_filters import ChatTypeFilter
 from app.keyboards.inlines import MenuCallBack
-from app.database.db import DataBase
 from app.handlers.user_private.menu_processing import get_menu_content, start_page
 from app.utils.custom_bot_class import Bot
+from app.utils.ring_buffer import WordHistoryRing
 from app.settings import TEST_TYPES
 
 # Создаём роутер для приватного чата бота с пользователем
@@ -40,22 +40,20 @@ async def start_cmd(message: types.Message, session: AsyncSession, bot: Bot) ->
     :return: None
     """
 
-    # Инициализируем в атрибутах бота словари для хранения различных данных по ключу с ID чата:
+    # Сбрасываем в хранилище бота данные чата (ChatSession) для хранения различных данных по ключу с ID чата:
     bot.auxiliary_msgs['user_msgs'][message.chat.id] = []               # Вспомогательные сообщения
     bot.auxiliary_msgs['add_or_edit_word'][message.chat.id] = {}        # Сообщения с вводом данных и шагом
     bot.auxiliary_msgs['example_msgs'][message.chat.id] = []            # Сообщения с примерами
     bot.tests_word_navi[message.chat.id] = {}                           # Словарь с историей попыток прохождения тестов
     for test_type in TEST_TYPES:
         bot.tests_word_navi[message.chat.id][test_type] = {
-            'history': {},
+            'history': WordHistoryRing(),
             'navi_index': 1
         }
     bot.word_search_keywords[message.chat.id] = {}
 
-    # Попытка автоматического log in, если в БД есть привязка ID чата Telegram к пользователю User
-    user_chat = await DataBase.get_user_chat(session, message.chat.id)
-    if user_chat:
-        bot.auth_user_id[message.chat.id] = user_chat.user_id
+    # Автоматический log in, если в БД есть привязка ID чата Telegram к пользователю User, выполняется
+    # middleware AuthUserMiddleware для любого апдейта чата
 
     # Вызываем основное меню
     media, reply_markup = await start_page(
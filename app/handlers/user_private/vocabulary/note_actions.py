@@ -14,14 +14,15 @@ INFO:
    другом режиме без сброса страницы и перенаправления на первую). Это удобно для быстрого поиска нужной заметки.
 3. При просмотре заметки в state сохраняется ключ 'show_user_notes_cbq' с callback_data этой заметки, он используется в
    callback_data кнопок для отмены действий и возврата к просмотру заметки.
-4. Для снижения нагрузки на БД при входе в раздел заметки пользователя сохраняются в state  под ключом "user_notes", все
-   заметки при пагинации подгружаются оттуда. Новая загрузка из БД происходит только при поиске/отмене поиска,
+4. Для снижения нагрузки на БД при входе в раздел заметки пользователя сохраняются в state  под ключом "user_notes"
+   (кортеж компактных записей NoteRecord, см. app/common/state_records.py), все заметки при пагинации подгружаются
+   оттуда. Новая загрузка из БД происходит только при поиске/отмене поиска,
    добавлении/редактировании/удалении данных (при необходимости обновления данных заметок).
 
 СОЗДАНИЕ:
 4. Создание новой заметки с первым примеров и добавление дополнительных примеров новой заметке происходит в одном
-   обработчике, логика контроллера разделяется наличием в state ключа "new_note", который добавляется в state после
-   создания новой заметки и сохраняется там до возврата в основную функцию показа заметок.
+   обработчике, логика контроллера разделяется наличием в state ключа "new_note" (NoteRecord), который добавляется в
+   state после создания новой заметки и сохраняется там до возврата в основную функцию показа заметок.
 
 ПОИСК:
 5. При поиске в state добавляется ключ "notes_search_keywords" с ключевым словом поиска. Поиск ведется по заголовку и
@@ -31,11 +32,11 @@ INFO:
 
 РЕДАКТИРОВАНИЕ:
 7. При выборе редактирования заметки в state сохраняются ключи:
-    - 'edited_note' с объектом редактируемой заметки (удаляется при выходе из редактирования), который используется для
-    доступа к данным заметки и ветвления логики работы контроллеров.
-    - 'note_msg' с сообщением с редактируемой заметкой для доступа к изменению текста.
-8. Информационные сообщения при редактировании дополнительно сохраняем в контекст под ключом 'info_msg' для удобного
-   удаления при переключении запроса.
+    - 'edited_note' с данными (NoteRecord) редактируемой заметки (удаляется при выходе из редактирования), который
+    используется для доступа к данным заметки и ветвления логики работы контроллеров.
+    - 'note_msg' со ссылкой (MessageRef) на сообщение с редактируемой заметкой для доступа к изменению текста.
+8. Информационные сообщения при редактировании дополнительно сохраняем в контекст под ключом 'info_msg' (MessageRef)
+   для удобного удаления при переключении запроса.
 9. Редактирование заголовка и текста заметки происходит в одних обработчиках (полностью общая логика).
 10. При добавлении нового примера при редактировании в state добавляется ключ 'add_example' для разделения контроллеров
    с редактированием текста примера. После добавления примера ключ удаляется, дополнительно проверяется его удаление
@@ -53,7 +54,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.banners import banners_details
 from app.database.db import DataBase
-from app.database.models import Notes
+from app.common.state_records import NoteRecord, MessageRef, notes_to_records
 from app.filters.custom_filters import ChatTypeFilter, IsKeyInStateFilter, IsKeyNotInStateFilter
 from app.keyboards.inlines import get_inline_btns, get_kbds_with_navi_header_btns, get_pagination_btns
 from app.utils.custom_bot_class import Bot
@@ -92,14 +93,14 @@ async def show_user_notes(callback: types.CallbackQuery, bot: Bot, session: Asyn
     :param session: Пользовательская сессия
     :param state: Контекст состояния с возможными ключами:
                  'show_user_notes_cbq' с callback.data последней открытой заметки - 'my_notes_page_1'/ 'show_note_6:10';
-                 'user_notes' со списком объектов заметок пользователя - [<Notes_object_1>, <Notes_object_2>, ...] или
+                 'user_notes' с кортежем записей заметок пользователя - (<NoteRecord_1>, <NoteRecord_2>, ...) или
                              None (при первом входе или если данные менялись);
                  'notes_search_keywords' c str ключом для поиска - 'Try to find me';
-                 'edited_note' (если возврат из редактирования) c объектом заметки - <Notes_object>;
-                 'note_msg' (если возврат из редактирования) c message-объектом сообщения редактируемой заметки;
-                 'info_msg' (если возврат из редактирования) c message-объектом информационного сообщения;
+                 'edited_note' (если возврат из редактирования) c записью заметки - <NoteRecord>;
+                 'note_msg' (если возврат из редактирования) c MessageRef сообщения редактируемой заметки;
+                 'info_msg' (если возврат из редактирования) c MessageRef информационного сообщения;
                  'add_example' (если возврат из редактирования с добавлением примера)
-                 'new_note' (если возврат после добавления заметки) c объектом заметки - <Notes_object>;
+                 'new_note' (если возврат после добавления заметки) c записью заметки - <NoteRecord>;
                  'title', 'text' (если отмена добавления заметки) c str названием и текстом;
                  'note_title_view_mode' (при просмотре из режима по заголовкам) c True;
                  'title_mode_page' (при просмотре из режима по заголовкам) c callback.data последней просмотренной
@@ -177,7 +178,9 @@ async def show_user_notes(callback: types.CallbackQuery, bot: Bot, session: Asyn
     # При пагинации используем данные из контекста
     user_notes = state_data.get('user_notes')
     if not user_notes:
-        user_notes = await DataBase.get_user_notes(session, bot.auth_user_id[callback.message.chat.id], search_filter)
+        user_notes = notes_to_records(
+            await DataBase.get_user_notes(session, bot.auth_user_id[callback.message.chat.id], search_filter)
+        )
         await state.update_data(user_notes=user_notes)
 
     # Если у пользователя нет заметок, сообщаем и выходим из функции
@@ -241,10 +244,10 @@ async def note_title_view_mode(callback: types.CallbackQuery, state: FSMContext,
     :param callback: CallbackQuery-запрос формата "note_title_view_mode_page_<page_number>"
     :param state: Контекст состояния FSM с возможными ключами:
                  'show_user_notes_cbq' с callback.data последней открытой заметки - 'my_notes_page_1'/ 'show_note_6:10';
-                 'user_notes' со списком объектов заметок пользователя - [<Notes_object_1>, <Notes_object_2>, ...] или
+                 'user_notes' с кортежем записей заметок пользователя - (<NoteRecord_1>, <NoteRecord_2>, ...) или
                              None (при первом входе или если данные менялись);
                  'notes_search_keywords' c str ключом для поиска - 'Try to find me';
-                 'new_note' (если возврат после добавления заметки) c объектом заметки - <Notes_object>;
+                 'new_note' (если возврат после добавления заметки) c записью заметки - <NoteRecord>;
                  'title', 'text' (если отмена добавления заметки) c str названием и текстом;
                  'note_title_view_mode' (при пагинации, принудительном вызове) c True;
                  'title_mode_page' (при пагинации, принудительном вызове) c callback.data последней просмотренной
@@ -296,7 +299,9 @@ async def note_title_view_mode(callback: types.CallbackQuery, state: FSMContext,
     # При пагинации используем данные из контекста
     user_notes = state_data.get('user_notes')
     if not user_notes:
-        user_notes = await DataBase.get_user_notes(session, bot.auth_user_id[callback.message.chat.id], search_filter)
+        user_notes = notes_to_records(
+            await DataBase.get_user_notes(session, bot.auth_user_id[callback.message.chat.id], search_filter)
+        )
         await state.update_data(user_notes=user_notes)
 
     # Получаем номер текущей страницы из callback.data
@@ -694,7 +699,7 @@ async def add_new_note_get_example(message: types.Message, bot: Bot, state: FSMC
 
     # Сбрасываем контекст и добавляем туда созданную заметку на случай добавления дополнительных примеров и режим
     await state.clear()
-    await state.update_data(new_note=new_note, note_title_view_mode=title_view_mode)
+    await state.update_data(new_note=NoteRecord.from_orm(new_note), note_title_view_mode=title_view_mode)
 
 
 # Добавление новой заметки - ШАГ 5, добавление дополнительных (2+) примеров; запрос текста примера.
@@ -706,7 +711,7 @@ async def add_example_to_note(callback: types.CallbackQuery, bot: Bot, state: FS
     :param callback: CallbackQuery-запрос формата "add_example_to_new_note_<Note.id>"
     :param bot: Объект бота
     :param state: Контекст состояния FSM с ключами:
-                    - "new_note" (обязательно): Объект заметки;
+                    - "new_note" (обязательно): Запись заметки NoteRecord;
                     - "note_title_view_mode" (опционально): Режим просмотра названий заметок
     :return: None
     """
@@ -867,9 +872,9 @@ async def edit_note_main(callback: types.CallbackQuery, bot: Bot, state: FSMCont
     # Очищаем чат от аудиозаписей примеров, если они есть
     if state_data.get('audio_examples'):
         audio_msgs = list(state_data.get('audio_examples').values())[0]
-        for msg in audio_msgs:
+        for msg_ref in audio_msgs:
             try:
-                await bot.delete_message(callback.message.chat.id, msg.message_id)
+                await msg_ref.delete(bot)
             except (Exception, ):
                 pass
         await state.update_data(audio_examples=None)
@@ -877,8 +882,8 @@ async def edit_note_main(callback: types.CallbackQuery, bot: Bot, state: FSMCont
     # Получаем id заметки из callback
     note_id = int(callback.data.split('_')[-1])
 
-    # Получаем объект заметки по id и сохраняем его в контекст под ключом "edited_note"
-    edited_note = await DataBase.get_note_by_id(session, note_id)
+    # Получаем заметку по id и сохраняем её данные в контекст под ключом "edited_note"
+    edited_note = NoteRecord.from_orm(await DataBase.get_note_by_id(session, note_id))
     await state.update_data(edited_note=edited_note)
 
     # Формируем и сохраняем клавиатуру
@@ -899,7 +904,7 @@ async def edit_note_main(callback: types.CallbackQuery, bot: Bot, state: FSMCont
     # Если это первичный вызов редактирования, то сохраняем сообщение с заметкой и редактируем клавиатуру
     else:
         await callback.message.edit_reply_markup(reply_markup=kbds)
-        await state.update_data(note_msg=callback.message)
+        await state.update_data(note_msg=MessageRef.from_message(callback.message))
 
 
 # Редактирование заметки - отмена ввода данных, возврат к основному меню редактирования заметки
@@ -936,7 +941,7 @@ async def edit_note_title_or_text_ask_for_new_data(callback: types.CallbackQuery
 
     # Забираем из контекста информацию о редактируемой заметке
     state_data = await state.get_data()
-    edited_note: Notes = state_data.get('edited_note')
+    edited_note: NoteRecord = state_data.get('edited_note')
 
     # Удаляем из чата сообщения с примерами и информационные (если есть)
     await clear_auxiliary_msgs_in_chat(bot, callback.message.chat.id, only_examples=True)
@@ -959,7 +964,7 @@ async def edit_note_title_or_text_ask_for_new_data(callback: types.CallbackQuery
                 'ввода текущих данных для удобной корректировки.')
     msg = await callback.message.answer(text=msg_text, reply_markup=kbds)
     bot.auxiliary_msgs['user_msgs'][callback.message.chat.id].append(msg)
-    await state.update_data(info_msg=msg)
+    await state.update_data(info_msg=MessageRef.from_message(msg))
 
     # Определяем требуемое состояние ввода и устанавливаем его
     required_state = NotesFSM.title if edited_attr == 'title' else NotesFSM.text
@@ -992,7 +997,7 @@ async def edit_note_get_title_or_text(message: types.Message, bot: Bot, state: F
 
     # Забираем из контекста информацию о редактируемой заметке
     state_data = await state.get_data()
-    edited_note: Notes = state_data.get('edited_note')
+    edited_note: NoteRecord = state_data.get('edited_note')
 
     # Обновляем данные заметки в БД и выводим уведомление
     is_updated = await DataBase.update_note_by_id(session, edited_note.id, **{attr_name: message.text})
@@ -1032,7 +1037,8 @@ async def add_another_example_to_edited_note_ask_text(callback: types.CallbackQu
     msg_text = 'Введите текст <b>нового примера</b> заметки'
     msg = await callback.message.answer(text=msg_text, reply_markup=kbds)
     bot.auxiliary_msgs['user_msgs'][callback.message.chat.id].append(msg)
-    await state.update_data(info_msg=msg)               # Дублируем в контекст, чтобы удалять при переключении запросов
+    # Дублируем в контекст, чтобы удалять при переключении запросов
+    await state.update_data(info_msg=MessageRef.from_message(msg))
 
     # Добавляем в state ключ 'add_example' для разделения контроллеров добавления и редактирования текста примера
     await state.update_data(add_example=True)
@@ -1068,7 +1074,7 @@ async def add_another_example_to_edited_note_get_text(message: types.Message, bo
 
     # Забираем из контекста данные
     state_data = await state.get_data()
-    edited_note: Notes = state_data.get('edited_note')
+    edited_note: NoteRecord = state_data.get('edited_note')
 
     # Создаём новый пример Context в БД и отправляем уведомление с результатом
     try:
@@ -1113,7 +1119,7 @@ async def edit_note_show_examples(callback: types.CallbackQuery, bot: Bot, state
 
     # Забираем из контекста информацию о редактируемой заметке
     state_data = await state.get_data()
-    edited_note: Notes = state_data.get('edited_note')
+    edited_note: NoteRecord = state_data.get('edited_note')
 
     # Проверяем отсутствие ключа 'add_example' в контексте, если есть - удаляем
     if state_data.get('add_example'):
@@ -1224,7 +1230,7 @@ async def confirm_delete_note_example(callback: types.CallbackQuery, bot: Bot, s
 
     # Получаем данные о редактируемой заметке из контекста
     state_data = await state.get_data()
-    edited_note: Notes = state_data.get('edited_note')
+    edited_note: NoteRecord = state_data.get('edited_note')
 
     # Забираем из callback ID удаляемого примера
     example_to_delete_id = int(callback.data.split('_')[-1])
@@ -1244,7 +1250,7 @@ async def confirm_delete_note_example(callback: types.CallbackQuery, bot: Bot, s
     await delete_last_message(bot, callback.message.chat.id)
 
     # Обновляем в контексте данные о заметке с учетом изменений
-    edited_note = await DataBase.get_note_by_id(session, edited_note.id)
+    edited_note = NoteRecord.from_orm(await DataBase.get_note_by_id(session, edited_note.id))
     await state.update_data(edited_note=edited_note)
 
     # Обновляем данные сообщения с описанием заметки
@@ -1290,7 +1296,7 @@ async def update_context_example_ask_new_text(callback: types.CallbackQuery, bot
     kbds = get_inline_btns(btns=btns)
     msg = await callback.message.answer(text=msg_text, reply_markup=kbds)
     bot.auxiliary_msgs['user_msgs'][callback.message.chat.id].append(msg)
-    await state.update_data(info_msg=msg)
+    await state.update_data(info_msg=MessageRef.from_message(msg))
 
     # Устанавливаем состояние ввода нового текста примера
     await state.set_state(NotesFSM.example)
@@ -1324,7 +1330,7 @@ async def update_context_example_get_text(message: types.Message, bot: Bot, stat
 
     # Получаем данные о редактируемой заметке из контекста
     state_data = await state.get_data()
-    edited_note: Notes = state_data.get('edited_note')
+    edited_note: NoteRecord = state_data.get('edited_note')
 
     # Получаем ID редактируемого примера
     example_to_update_id = state_data.get('example_to_update_id')
@@ -1352,7 +1358,7 @@ async def update_context_example_get_text(message: types.Message, bot: Bot, stat
     await state.update_data(example_to_update_id=None)
 
     # Обновляем в контексте данные о заметке с учетом изменений
-    edited_note = await DataBase.get_note_by_id(session, edited_note.id)
+    edited_note = NoteRecord.from_orm(await DataBase.get_note_by_id(session, edited_note.id))
     await state.update_data(edited_note=edited_note)
 
     # Обновляем данные сообщения с описанием заметки
@@ -26,6 +26,7 @@ from app.common.msg_templates import topic_msg_template, oops_with_error_msg_tem
     action_cancelled_msg_template
 from app.handlers.user_private.tests_actions import tests_ask_select_topic
 from app.handlers.user_private.add_word_phrase_actions import add_word_ask_topic
+from app.utils.lazy_session import NO_DB_SESSION
 from app.settings import PER_PAGE_TOPICS
 
 
@@ -96,13 +97,13 @@ async def cancel_find_topic(callback: types.CallbackQuery, state: FSMContext, se
         await add_word_ask_topic(callback, state, session, bot)
 
     # Логика при редактировании существующей записи WordPhrase
-    if state_data.get('word_to_update'):
+    if state_data.get('word_to_update_id'):
         await state.set_state(WordPhraseFSM.topic)
 
 
 # Применение фильтра по темам при выборе раздела в словаре И добавлении нового слова WordPhrase, тестировании.
 # НЕ обрабатывает кейс с редактированием слова. Необходимая функция определяется по наличию ключа в контексте.
-@topic_router.message(F.text, StateFilter(TopicFSM.search_keywords), IsKeyNotInStateFilter('word_to_update'))
+@topic_router.message(F.text, StateFilter(TopicFSM.search_keywords), IsKeyNotInStateFilter('word_to_update_id'))
 async def find_topic_by_matches_get_keywords(
         message: types.Message, session: AsyncSession, state: FSMContext, bot: Bot) -> None:
     """
@@ -115,7 +116,8 @@ async def find_topic_by_matches_get_keywords(
 
     :param message: Сообщение пользователя с текстом для фильтра
     :param session: Пользовательская сессия
-    :param state: Контекст состояния (Строго БЕЗ ключа 'word_to_update', ВОЗМОЖНЫ ключи 'add_new_word_key', 'test_type')
+    :param state: Контекст состояния (Строго БЕЗ ключа 'word_to_update_id', ВОЗМОЖНЫ ключи 'add_new_word_key',
+                  'test_type')
     :param bot: Объект бота
     :return: None
     """
@@ -163,7 +165,7 @@ async def find_topic_by_matches_get_keywords(
 # НЕ обрабатывает отмену фильтра по теме в добавлении и редактировании, тестированиях.
 @topic_router.callback_query(
     F.data.contains('cancel_find_topic_by_matches'),
-    IsKeyNotInStateFilter('word_to_update', 'add_new_word_key', 'test_type'))
+    IsKeyNotInStateFilter('word_to_update_id', 'add_new_word_key', 'test_type'))
 async def cancel_find_topic_by_matches_vcb(
         callback: types.CallbackQuery, session: AsyncSession, state: FSMContext, bot: Bot) -> None:
     """
@@ -377,7 +379,7 @@ async def create_topic_ask_name(callback: types.CallbackQuery, state: FSMContext
 
 
 # Отмена создания новой темы
-@topic_router.callback_query(F.data == 'cancel_create_topic')
+@topic_router.callback_query(F.data == 'cancel_create_topic', flags=NO_DB_SESSION)
 async def cancel_create_topic(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """
     Отмена создания новой темы.
@@ -478,7 +480,7 @@ async def update_topic_start_process(callback: types.CallbackQuery, session: Asy
 
 
 # Отмена редактирования темы
-@topic_router.callback_query(F.data == 'cancel_update_topic')
+@topic_router.callback_query(F.data == 'cancel_update_topic', flags=NO_DB_SESSION)
 async def cancel_update_topic(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """
     Отмена редактирования темы.
@@ -14,19 +14,20 @@ INFO:
 3. При запросе прослушивания нового слова неактуальные аудио автоматически удаляются из чата.
 
 РЕДАКТИРОВАНИЕ записей WordPhrase.
-1. При выборе редактирования в FSMContext добавляется ключ "word_to_update" с редактируемым объектом WordPhrase, он
-   используется для ветвления логики контроллеров.
+1. При выборе редактирования в FSMContext добавляется ключ "word_to_update_id" с id редактируемой записи WordPhrase,
+   он используется для ветвления логики контроллеров. Объект WordPhrase загружается из БД в каждом обработчике.
 2. При отмене редактирования происходит автоматическое перенаправление на последнюю просмотренную страницу словаря.
    Дополнительный обработчик не требуется, переход прописан в callback_data кнопки отмены редактирования.
 3. Ключ для фильтра по темам при редактировании сохраняется в bot.topic_search_keywords[chat_id], НЕ в FSMContext.
 4. Поиск темы. Отправка сообщения с запросом ввода ключа поиска темы и отмена ввода обрабатываются в topic_actions.py:
    find_topic_by_matches_ask_keywords          - запрос ключевого слова поиска темы
    cancel_find_topic                           - отмена поиска темы
-5. При редактировании примера в контекст добавляется ключ 'editing_context_obj' с редактируемым объектом Context.
+5. При редактировании примера в контекст добавляется ключ 'editing_context' с записью ContextRecord редактируемого
+   примера (app/common/state_records.py).
 """
+import asyncio
 import os
 import re
-import time
 from typing import BinaryIO
 
 from aiogram import Router, F, types
@@ -49,6 +50,8 @@ from app.common.tools import get_upd_word_and_cancel_page_from_context, get_topi
 from app.common.msg_templates import word_msg_template, oops_with_error_msg_template, oops_try_again_msg_template, \
     word_validation_not_passed_msg_template, context_validation_not_passed_msg_template, context_example_msg_template
 from app.common.fsm_classes import WordPhraseFSM, TopicFSM, ImportXlsFSM
+from app.common.state_records import ContextRecord
+from app.utils.lazy_session import NO_DB_SESSION
 from app.settings import PER_PAGE_VOCABULARY, PATTERN_WORD, PER_PAGE_INLINE_TOPICS, XLS_DB_CAPTION
 
 
@@ -79,7 +82,7 @@ async def show_vocabulary_words(callback: types.CallbackQuery, session: AsyncSes
 
     # Чистим контекст и вспомогательные сообщения (на случай отмены/завершения редактирования)
     await state.set_state(None)
-    await state.update_data(word_to_update=None)    # Сбрасываем слово для редактирования на случай перехода по отмене
+    await state.update_data(word_to_update_id=None)     # Сбрасываем слово для редактирования на случай отмены
     await clear_auxiliary_msgs_in_chat(bot, callback.message.chat.id)
 
     # Записываем в контекст значение callback текущей страницы, чтобы возвращаться после редактирования или при отмене
@@ -427,7 +430,7 @@ async def import_data_from_xlsx_ask_file(callback: types.CallbackQuery, state: F
 
 
 # Отмена импорта данных из .xlsx файла
-@vocabulary_router.callback_query(F.data == 'import_data_cancel')
+@vocabulary_router.callback_query(F.data == 'import_data_cancel', flags=NO_DB_SESSION)
 async def import_data_cancel(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """
     Функция для отмены импорта данных из .xlsx. Сбрасывает состояние ожидания отправки файла и чистит чат.
@@ -487,7 +490,7 @@ async def import_data_from_xlsx_get_file(message: types.Message, session: AsyncS
     if type(added) is int:
         msg_text = f'✅ Загружено/обновлено записей: {added}'
         await try_alert_msg(bot, message.chat.id, msg_text, if_error_send_msg=True)
-        time.sleep(3)
+        await asyncio.sleep(3)
         await state.set_state(None)
         await clear_auxiliary_msgs_in_chat(bot, message.chat.id)
 
@@ -604,11 +607,11 @@ async def edit_word_phrase_main(callback: types.CallbackQuery, state: FSMContext
         await callback.answer('⚠️ Слово/фраза не найдены!', show_alert=True)
         return
 
-    # Записываем редактируемое слово/фразу в контекст состояния
-    await state.update_data(word_to_update=word_to_update)
+    # Записываем id редактируемого слова/фразы в контекст состояния
+    await state.update_data(word_to_update_id=word_to_update.id)
 
     # Формируем и сохраняем клавиатуру
-    _, cancel_page_address = await get_upd_word_and_cancel_page_from_context(state)
+    cancel_page_address = (await state.get_data()).get('page_address')
     btns = {
         'Тема 🖌': 'edit_word_topic_page_1',
         'Слово/фраза 🖌': 'edit_word:word',
@@ -628,14 +631,14 @@ async def edit_word_phrase_main(callback: types.CallbackQuery, state: FSMContext
 
 
 # Редактирование слова/фразы - отмена ввода данных, возврат к основному меню редактирования записи
-@vocabulary_router.callback_query(F.data == 'return_to_edit_word_main', IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(F.data == 'return_to_edit_word_main', IsKeyInStateFilter('word_to_update_id'))
 async def return_to_edit_word_main(callback: types.CallbackQuery, bot: Bot, state: FSMContext) -> None:
     """
     Редактирование слова/фразы - отмена ввода данных, возврат к основному меню редактирования записи.
 
     :param callback: CallbackQuery-запрос формата "return_to_edit_word_main"
     :param bot: Объект бота
-    :param state: Контекст состояния FSM с ключом "word_to_update"
+    :param state: Контекст состояния FSM с ключом "word_to_update_id"
     :return: None
     """
     bot.auxiliary_msgs['cbq'][callback.message.chat.id] = callback
@@ -654,15 +657,16 @@ async def return_to_edit_word_main(callback: types.CallbackQuery, bot: Bot, stat
 
 
 # Редактирование слова/фразы - изменение слова, транскрипции или перевода, ШАГ 1: запрос новых данных
-@vocabulary_router.callback_query(F.data.startswith('edit_word:'), IsKeyInStateFilter('word_to_update'))
-async def edit_word_transcription_translate_ask_for_data(callback: types.CallbackQuery, state: FSMContext, bot: Bot) \
-        -> None:
+@vocabulary_router.callback_query(F.data.startswith('edit_word:'), IsKeyInStateFilter('word_to_update_id'))
+async def edit_word_transcription_translate_ask_for_data(
+        callback: types.CallbackQuery, state: FSMContext, bot: Bot, session: AsyncSession) -> None:
     """
     Редактирование слова/фразы - изменение слова, транскрипции или перевода, ШАГ 1: запрос новых данных.
 
     :param callback: CallbackQuery-запрос формата "edit_word:<атрибут>"
-    :param state: Контекст состояния FSM с ключом "word_to_update"
+    :param state: Контекст состояния FSM с ключом "word_to_update_id"
     :param bot: Объект бота
+    :param session: Пользовательская сессия
     :return: None
     """
     bot.auxiliary_msgs['cbq'][callback.message.chat.id] = callback
@@ -671,8 +675,7 @@ async def edit_word_transcription_translate_ask_for_data(callback: types.Callbac
     await clear_auxiliary_msgs_in_chat(bot, callback.message.chat.id)
 
     # Забираем из контекста информацию о редактируемой записи
-    state_data = await state.get_data()
-    edited_word_obj = state_data.get('word_to_update')
+    edited_word_obj, _ = await get_upd_word_and_cancel_page_from_context(state, session)
 
     # Из callback забираем название редактируемого атрибута
     edited_attr = callback.data.split(':')[-1]
@@ -703,7 +706,7 @@ async def edit_word_transcription_translate_ask_for_data(callback: types.Callbac
 
 # Редактирование слова/фразы - изменение слова, транскрипции или перевода, ШАГ 2: новые данные получены, обновление в БД
 @vocabulary_router.message(StateFilter(WordPhraseFSM.word, WordPhraseFSM.transcription, WordPhraseFSM.translate),
-                           IsKeyInStateFilter('word_to_update'))
+                           IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_get_data_except_topic_or_context(
         message: types.Message, state: FSMContext, bot: Bot, session: AsyncSession) -> None:
     """
@@ -711,7 +714,7 @@ async def edit_word_get_data_except_topic_or_context(
     обновление в БД.
 
     :param message: Текстовое сообщение с новыми данными
-    :param state: Контекст состояния FSM с ключом "word_to_update"
+    :param state: Контекст состояния FSM с ключом "word_to_update_id"
     :param bot: Объект бота
     :param session: Пользовательская сессия
     :return: None
@@ -733,13 +736,13 @@ async def edit_word_get_data_except_topic_or_context(
     # Удаляем сообщение с данными от пользователя и информационное сообщение с кнопками
     await clear_auxiliary_msgs_in_chat(bot, message.chat.id)
 
-    # Забираем из контекста информацию о редактируемой записи
+    # Забираем из контекста id редактируемой записи
     state_data = await state.get_data()
-    edited_word_obj = state_data.get('word_to_update')
+    word_id = state_data.get('word_to_update_id')
 
     # Обновляем данные заметки в БД и выводим уведомление
     try:
-        is_updated = await DataBase.update_word_phrase(session, edited_word_obj.id, {attr_name: message.text})
+        is_updated = await DataBase.update_word_phrase(session, word_id, {attr_name: message.text})
     except (Exception, ) as e:
         msg_text = oops_with_error_msg_template.format(error=str(e))
         await try_alert_msg(bot, message.chat.id, msg_text, if_error_send_msg=True)
@@ -752,14 +755,14 @@ async def edit_word_get_data_except_topic_or_context(
 
     # Возвращаемся к основному окну редактирования записи
     modified_callback = await modify_callback_data(
-        bot.auxiliary_msgs['cbq'][message.chat.id], f'update_word_{edited_word_obj.id}'
+        bot.auxiliary_msgs['cbq'][message.chat.id], f'update_word_{word_id}'
     )
     await edit_word_phrase_main(modified_callback, state, bot, session)
 
 
 # Редактирование слова/фразы - изменение темы, ШАГ 1: запрос новой темы.
 # Обработчик также принудительно вызывается после применения/отмены фильтра по темам, при пагинации списка тем
-@vocabulary_router.callback_query(F.data.startswith('edit_word_topic_page_'), IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(F.data.startswith('edit_word_topic_page_'), IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_ask_for_topic(callback: types.CallbackQuery, state: FSMContext, bot: Bot, session: AsyncSession) \
         -> None:
     """
@@ -767,7 +770,7 @@ async def edit_word_ask_for_topic(callback: types.CallbackQuery, state: FSMConte
     Обработчик также принудительно вызывается после применения/отмены фильтра по темам, при пагинации списка тем.
 
     :param callback: CallbackQuery-запрос формата 'edit_word_topic_page_<page_number>'
-    :param state: Контекст состояния FSM с ключом "word_to_update"
+    :param state: Контекст состояния FSM с ключом "word_to_update_id"
     :param bot: Объект бота
     :param session: Пользовательская сессия
     :return: None
@@ -775,8 +778,7 @@ async def edit_word_ask_for_topic(callback: types.CallbackQuery, state: FSMConte
     bot.auxiliary_msgs['cbq'][callback.message.chat.id] = callback
 
     # Забираем из контекста информацию о редактируемой записи
-    state_data = await state.get_data()
-    edited_word_obj = state_data.get('word_to_update')
+    edited_word_obj, _ = await get_upd_word_and_cancel_page_from_context(state, session)
 
     # Чистим чат
     await clear_auxiliary_msgs_in_chat(bot, callback.message.chat.id)
@@ -809,7 +811,7 @@ async def edit_word_ask_for_topic(callback: types.CallbackQuery, state: FSMConte
 
 
 # Редактирование слова/фразы - изменение темы, ШАГ 1.5: ПРИМЕНЕНИЕ фильтра по темам
-@vocabulary_router.message(F.text, StateFilter(TopicFSM.search_keywords), IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.message(F.text, StateFilter(TopicFSM.search_keywords), IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_find_topic_by_matches_get_keywords(
         message: types.Message, session: AsyncSession, state: FSMContext, bot: Bot) -> None:
     """
@@ -819,7 +821,7 @@ async def edit_word_find_topic_by_matches_get_keywords(
 
     :param message: Текстовое сообщение с ключевым словом для фильтра
     :param session: Пользовательская сессия
-    :param state: Контекст состояния (только TopicFSM.search_keywords и при наличии атрибута word_to_update)
+    :param state: Контекст состояния (только TopicFSM.search_keywords и при наличии атрибута word_to_update_id)
     :param bot: Объект бота
     :return: None
     """
@@ -838,7 +840,7 @@ async def edit_word_find_topic_by_matches_get_keywords(
 
 
 # Редактирование слова/фразы - изменение темы, ШАГ 1.5: ОТМЕНА фильтра по темам
-@vocabulary_router.callback_query(F.data == 'cancel_find_topic_by_matches', IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(F.data == 'cancel_find_topic_by_matches', IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_cancel_find_topic_by_matches(
         callback: types.CallbackQuery, session: AsyncSession, state: FSMContext, bot: Bot) -> None:
     """
@@ -848,7 +850,7 @@ async def edit_word_cancel_find_topic_by_matches(
 
     :param callback: Callback-запрос формата "cancel_find_topic_by_matches"
     :param session: Пользовательская сессия
-    :param state: Контекст состояния (обязательно наличие атрибута word_to_update)
+    :param state: Контекст состояния (обязательно наличие атрибута word_to_update_id)
     :param bot: Объект бота
     :return: None
     """
@@ -865,7 +867,7 @@ async def edit_word_cancel_find_topic_by_matches(
 
 
 # Редактирование слова/фразы - изменение темы, ШАГ 2: ПРИМЕНЕНИЕ выбора темы, обновление в БД
-@vocabulary_router.callback_query(WordPhraseFSM.topic, IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(WordPhraseFSM.topic, IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_get_new_topic(
         callback: types.CallbackQuery, session: AsyncSession, state: FSMContext, bot: Bot) -> None:
     """
@@ -873,14 +875,14 @@ async def edit_word_get_new_topic(
 
     :param callback: Callback-запрос формата "updated_word_topic_{Topic.id}"
     :param session: Пользовательская сессия
-    :param state: Контекст состояния FSM с ключом 'word_to_update'
+    :param state: Контекст состояния FSM с ключом 'word_to_update_id'
     :param bot: Объект бота
     :return: None
     """
     bot.auxiliary_msgs['cbq'][callback.message.chat.id] = callback
 
     # Получаем данные из контекста
-    edited_word_obj, _ = await get_upd_word_and_cancel_page_from_context(state)
+    edited_word_obj, _ = await get_upd_word_and_cancel_page_from_context(state, session)
 
     # Получаем id выбранной темы из callback и находим тему
     topic_id = int(callback.data.replace('updated_word_topic_', ''))
@@ -914,8 +916,9 @@ async def edit_word_get_new_topic(
 
 # Редактирование слова/фразы - просмотр примеров Context.
 # Обработчик также принудительно вызывается после отмены изменений примеров, завершения удаления/редактирования примера
-@vocabulary_router.callback_query(F.data == 'edit_word_examples', IsKeyInStateFilter('word_to_update'))
-async def edit_word_show_examples(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
+@vocabulary_router.callback_query(F.data == 'edit_word_examples', IsKeyInStateFilter('word_to_update_id'))
+async def edit_word_show_examples(
+        callback: types.CallbackQuery, state: FSMContext, bot: Bot, session: AsyncSession) -> None:
     """
     Редактирование слова/фразы - просмотр примеров Context.
     Обработчик также принудительно вызывается после отмены изменений примеров, завершения удаления/редактирования
@@ -924,20 +927,21 @@ async def edit_word_show_examples(callback: types.CallbackQuery, state: FSMConte
     Функция выводит в чат сообщения с информацией о примерах с доступом к редактированию/удалению.
 
     :param callback: Callback-запрос формата "edit_word_examples"
-    :param state: Контекст состояния с объектом WordPhrase в ключе 'word_to_update'
+    :param state: Контекст состояния с id слова WordPhrase в ключе 'word_to_update_id'
     :param bot: Объект бота
+    :param session: Пользовательская сессия
     :return: None
     """
     bot.auxiliary_msgs['cbq'][callback.message.chat.id] = callback
 
     # Получаем данные из контекста
-    word_to_update, _ = await get_upd_word_and_cancel_page_from_context(state)
+    word_to_update, _ = await get_upd_word_and_cancel_page_from_context(state, session)
 
     # Очищаем сообщения в чате
     await clear_auxiliary_msgs_in_chat(bot, callback.message.chat.id)
 
     # Отправляем в чат примеры с inline кнопками редактирования/удаления
-    for example in word_to_update.context:
+    for example in (word_to_update.context if word_to_update else []):
         msg = await callback.message.answer(
             text=context_example_msg_template.format(
                 example=example.example, created=example.created, updated=example.updated
@@ -951,13 +955,14 @@ async def edit_word_show_examples(callback: types.CallbackQuery, state: FSMConte
 # ДОБАВЛЕНИЕ ПРИМЕРА
 
 # Редактирование WordPhrase - добавить НОВЫЙ пример Context
-@vocabulary_router.callback_query(F.data.startswith('edit_word_add_new_example'), IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(F.data.startswith('edit_word_add_new_example'),
+                                  IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_add_new_context_ask_text(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """
     Редактирование WordPhrase - добавить НОВЫЙ пример Context.
 
     :param callback: Callback-запрос формата "edit_word_add_new_example"
-    :param state: Контекст состояния с объектом WordPhrase в ключе 'word_to_update'
+    :param state: Контекст состояния с id слова WordPhrase в ключе 'word_to_update_id'
     :param bot: Объект бота
     :return: None
     """
@@ -977,15 +982,15 @@ async def edit_word_add_new_context_ask_text(callback: types.CallbackQuery, stat
 
 
 # Добавление нового введённого примера из add_new_context_ask_text, запрос завершения / дальнейших действий с примерами
-@vocabulary_router.message(WordPhraseFSM.context, IsKeyNotInStateFilter('editing_context_obj'),
-                           IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.message(WordPhraseFSM.context, IsKeyNotInStateFilter('editing_context'),
+                           IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_add_new_context_get_text(message: types.Message, state: FSMContext, session: AsyncSession,
                                              bot: Bot) -> None:
     """
     Добавление нового введённого примера Context из add_new_context, запрос завершения/дальнейших действий с примерами.
 
     :param message: Сообщение пользователя с новым примером Context
-    :param state: Контекст состояния с объектом WordPhrase в ключе 'word_to_update' и БЕЗ ключа 'editing_context_obj'
+    :param state: Контекст состояния с id слова WordPhrase в ключе 'word_to_update_id' и БЕЗ ключа 'editing_context'
                   для ветвления с редактированием примера WordPhrase
     :param session: Пользовательская сессия
     :param bot: Объект бота
@@ -1002,14 +1007,14 @@ async def edit_word_add_new_context_get_text(message: types.Message, state: FSMC
     # Сохраняем сообщение во вспомогательные
     bot.auxiliary_msgs['user_msgs'][message.chat.id].append(message)
 
-    # Забираем WordPhrase из контекста
+    # Забираем id WordPhrase из контекста
     state_data = await state.get_data()
-    word_to_update = state_data.get('word_to_update')
+    word_id = state_data.get('word_to_update_id')
 
     # Создаём новый пример Context в БД и отправляем уведомление с результатом
     try:
         data = {'context': message.text}
-        created_example = await DataBase.create_context_example(session, data, word_id=word_to_update.id)
+        created_example = await DataBase.create_context_example(session, data, word_id=word_id)
         if created_example:
             await try_alert_msg(bot, message.chat.id, '✅ Пример успешно добавлен!', if_error_send_msg=True)
     except (Exception,) as e:
@@ -1022,7 +1027,7 @@ async def edit_word_add_new_context_get_text(message: types.Message, state: FSMC
 
     # Возвращаемся к основному окну редактирования записи
     modified_callback = await modify_callback_data(
-        bot.auxiliary_msgs['cbq'][message.chat.id], f'update_word_{word_to_update.id}'
+        bot.auxiliary_msgs['cbq'][message.chat.id], f'update_word_{word_id}'
     )
     await edit_word_phrase_main(modified_callback, state, bot, session)
 
@@ -1030,8 +1035,9 @@ async def edit_word_add_new_context_get_text(message: types.Message, state: FSMC
 # УДАЛЕНИЕ ПРИМЕРОВ
 
 # Отмена редактирования/удаления примера Context
-@vocabulary_router.callback_query(F.data == 'cancel_update_context', IsKeyInStateFilter('word_to_update'))
-async def cancel_update_context(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
+@vocabulary_router.callback_query(F.data == 'cancel_update_context', IsKeyInStateFilter('word_to_update_id'))
+async def cancel_update_context(
+        callback: types.CallbackQuery, state: FSMContext, bot: Bot, session: AsyncSession) -> None:
     """
     Отмена редактирования/удаления примера Context.
     Удаляет информационное сообщение, сбрасывает значение атрибутов WordPhraseFSM.
@@ -1039,19 +1045,20 @@ async def cancel_update_context(callback: types.CallbackQuery, state: FSMContext
     :param callback: Callback-запрос формата "cancel_update_context"
     :param state: Контекст состояния FSM
     :param bot: Объект бота
+    :param session: Пользовательская сессия
     :return: None
     """
     await callback.answer('⚠️ Действие отменено!', show_alert=True)
 
-    # Удаляем ключ editing_context_obj с объектом Context из FSM
-    await state.update_data(editing_context_obj=None)
+    # Удаляем ключ editing_context с записью примера из FSM
+    await state.update_data(editing_context=None)
 
     # Возвращаемся к основному окну редактирования примеров
-    await edit_word_show_examples(callback, state, bot)
+    await edit_word_show_examples(callback, state, bot, session)
 
 
 # Редактирование WordPhrase, удаление примера Context - ШАГ 1, запрос подтверждения
-@vocabulary_router.callback_query(F.data.startswith('delete_context_'), IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(F.data.startswith('delete_context_'), IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_delete_example_ask_confirm(callback: types.CallbackQuery, session: AsyncSession, bot: Bot, ) \
         -> None:
     """
@@ -1080,7 +1087,7 @@ async def edit_word_delete_example_ask_confirm(callback: types.CallbackQuery, se
 
 
 # Редактирование WordPhrase, удаление примера Context - ШАГ 2, удаление из БД
-@vocabulary_router.callback_query(F.data.startswith('confirm_delete_context_'), IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(F.data.startswith('confirm_delete_context_'), IsKeyInStateFilter('word_to_update_id'))
 async def edit_word_delete_example_get_confirm(callback: types.CallbackQuery, session: AsyncSession, bot: Bot,
                                                state: FSMContext) -> None:
     """
@@ -1089,7 +1096,7 @@ async def edit_word_delete_example_get_confirm(callback: types.CallbackQuery, se
     :param callback: Callback-запрос формата "delete_context_{context_id}"
     :param session: Пользовательская сессия
     :param bot: Объект бота
-    :param state: Контекст состояния FSM с ключом 'word_to_update'
+    :param state: Контекст состояния FSM с ключом 'word_to_update_id'
     :return: None
     """
 
@@ -1108,11 +1115,8 @@ async def edit_word_delete_example_get_confirm(callback: types.CallbackQuery, se
         await callback.answer('✅ Пример удалён', show_alert=True)
 
         try:
-            # Обновляем данные 'word_to_update' в контексте FSM
-            state_data = await state.get_data()
-            word_to_update = state_data.get('word_to_update')
-            word_to_update = await DataBase.get_word_phrase_by_id(session, word_to_update.id)
-            await state.update_data(word_to_update=word_to_update)
+            # Загружаем обновлённые данные слова/фразы
+            word_to_update, _ = await get_upd_word_and_cancel_page_from_context(state, session)
 
             # Обновляем описание баннера в основном окне
             caption_formatting = await get_word_phrase_caption_formatting(word_phrase_obj=word_to_update)
@@ -1123,21 +1127,21 @@ async def edit_word_delete_example_get_confirm(callback: types.CallbackQuery, se
             pass
 
         # Возвращаемся к основному окну редактирования примеров
-        await edit_word_show_examples(callback, state, bot)
+        await edit_word_show_examples(callback, state, bot, session)
 
 
 # РЕДАКТИРОВАНИЕ ПРИМЕРОВ
 
 # Редактирование WordPhrase, редактирование примера Context - ШАГ 1, запрос ввода нового текста примера
-@vocabulary_router.callback_query(F.data.startswith('update_context_'), IsKeyInStateFilter('word_to_update'))
+@vocabulary_router.callback_query(F.data.startswith('update_context_'), IsKeyInStateFilter('word_to_update_id'))
 async def update_context_example_ask_new_text(
         callback: types.CallbackQuery, state: FSMContext, session: AsyncSession, bot: Bot) -> None:
     """
     Редактирование WordPhrase, редактирование примера Context - ШАГ 1, запрос ввода нового текста примера.
-    Функция добавляет в FSMState дополнительный ключ 'editing_context_obj' с редактируемым объектом Context.
+    Функция добавляет в FSMState дополнительный ключ 'editing_context' с записью ContextRecord редактируемого примера.
 
     :param callback: Callback-запрос формата "update_context_{Context.id}"
-    :param state: Контекст состояния с объектом WordPhrase в ключе 'word_to_update'
+    :param state: Контекст состояния с id слова WordPhrase в ключе 'word_to_update_id'
     :param session: Пользовательская сессия
     :param bot: Объект бота
     :return: None
@@ -1148,8 +1152,8 @@ async def update_context_example_ask_new_text(
     context_id = int(callback.data.replace('update_context_', ''))
     context_obj = await DataBase.get_context_by_id(session, context_id)
 
-    # Помещаем объект примера в FSM под ключом 'editing_context_obj'
-    await state.update_data(editing_context_obj=context_obj)
+    # Помещаем запись примера в FSM под ключом 'editing_context'
+    await state.update_data(editing_context=ContextRecord.from_orm(context_obj))
 
     # Очищаем вспомогательные сообщения
     await clear_auxiliary_msgs_in_chat(bot, callback.message.chat.id)
@@ -1171,15 +1175,15 @@ async def update_context_example_ask_new_text(
 
 
 # Редактирование WordPhrase, редактирование примера Context - ШАГ 2, сохранение нового текста примера в БД
-@vocabulary_router.message(WordPhraseFSM.context, IsKeyInStateFilter('editing_context_obj', 'word_to_update'))
+@vocabulary_router.message(WordPhraseFSM.context, IsKeyInStateFilter('editing_context', 'word_to_update_id'))
 async def update_context_example_get_new_text(
         message: types.Message, state: FSMContext, session: AsyncSession, bot: Bot) -> None:
     """
     Редактирование WordPhrase, редактирование примера Context - ШАГ 2, сохранение нового текста примера в БД.
 
     :param message: Текст сообщения с новым текстом примера
-    :param state: Контекст состояния с объектом Context в ключе 'editing_context_obj' и объектом WordPhrase в
-                  ключе 'word_to_update'
+    :param state: Контекст состояния с записью ContextRecord в ключе 'editing_context' и id слова WordPhrase в
+                  ключе 'word_to_update_id'
     :param session: Пользовательская сессия
     :param bot: Объект бота
     :return: None
@@ -1197,8 +1201,7 @@ async def update_context_example_get_new_text(
 
     # Получаем данные из контекста
     state_data = await state.get_data()
-    context_obj = state_data['editing_context_obj']
-    word_to_update = state_data.get('word_to_update')
+    context_obj = state_data['editing_context']
 
     # Обновляем текст примера (Context.example)
     is_updated = False
@@ -1212,9 +1215,8 @@ async def update_context_example_get_new_text(
     if is_updated:
         await try_alert_msg(bot, message.chat.id, '✅ Данные успешно изменены!', if_error_send_msg=True)
         try:
-            # Обновляем объект WordPhrase в контексте
-            word_to_update = await DataBase.get_word_phrase_by_id(session, word_to_update.id)
-            await state.update_data(word_to_update=word_to_update)
+            # Загружаем обновлённые данные слова/фразы
+            word_to_update, _ = await get_upd_word_and_cancel_page_from_context(state, session)
 
             # Редактируем caption в основном сообщении
             caption_formatting = await get_word_phrase_caption_formatting(word_phrase_obj=word_to_update)
@@ -1226,7 +1228,7 @@ async def update_context_example_get_new_text(
             pass
 
         # Возвращаемся к основному окну редактирования примеров
-        await edit_word_show_examples(bot.auxiliary_msgs['cbq'][message.chat.id], state, bot)
+        await edit_word_show_examples(bot.auxiliary_msgs['cbq'][message.chat.id], state, bot, session)
 
-    # Удаляем ключ editing_context_obj с объектом Context из FSM
-    await state.update_data(editing_context_obj=None)
+    # Удаляем ключ editing_context с записью примера из FSM
+    await state.update_data(editing_context=None)
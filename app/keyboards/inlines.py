@@ -6,6 +6,7 @@ from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder, KeyboardBuilder
 
 from app.database.models import WordPhrase
+from app.database.records import WordRecord
 from app.settings import REVERSO_URL
 
 
@@ -415,7 +416,7 @@ def add_new_or_edit_word_main_btns(
 
 # Клавиатура для прохождения тестов
 def get_kbds_tests_btns(level: int, menu_name: str, menu_details: str, topic_filter: int | None,
-                        random_word: WordPhrase, sizes: tuple[int, ...]) -> InlineKeyboardMarkup:
+                        random_word: WordPhrase | WordRecord, sizes: tuple[int, ...]) -> InlineKeyboardMarkup:
     """
     Основная клавиатура для прохождения тестов.
 
@@ -423,7 +424,7 @@ def get_kbds_tests_btns(level: int, menu_name: str, menu_details: str, topic_fil
     :param menu_name: Название меню (для формирования callback_data MenuCallBack)
     :param menu_details: Дополнительные данные меню (для формирования callback_data MenuCallBack)
     :param topic_filter: id выбранной темы или None (если тема не выбрана)
-    :param random_word: отображаемая запись WordPhrase
+    :param random_word: отображаемая запись WordPhrase (объект или WordRecord из кеша слов)
     :param sizes: Размеры клавиатуры, кортеж с количеством кнопок в строке
     :return: Готовая клавиатура InlineKeyboardMarkup
     """
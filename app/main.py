@@ -21,11 +21,27 @@ from app.handlers.user_private.vocabulary.note_actions import note_router
 from app.handlers.user_private.tests_actions import tests_router
 from app.handlers.user_private.vocabulary import vocabulary_actions
 from app.handlers.user_group import user_group_router
-from app.middlewares.middlewares import DataBaseSession, GigaChatMiddleware
+from app.handlers.admin import admin_router
+from app.middlewares.middlewares import DataBaseSession, AuthUserMiddleware, GigaChatMiddleware, \
+    ChatOrderedMiddleware, BannerFileIdMiddleware, UpdateMetricsMiddleware, HandlerMetricsMiddleware, ProfilerMiddleware
 from app.database.db import DataBase
 from app.utils.gigachat_assistant import create_gigachat_assistant
 from app.utils.scheduler import schedule_tasks
 from app.utils.custom_bot_class import Bot
+from app.utils.fsm_storage import create_fsm_storage, storage_size
+from app.utils.webhook import run_webhook
+from app.utils.ordered_dispatch import ChatOrderedExecutor
+from app.utils.giga_cache import giga_cache
+from app.utils.mailer import email_queue
+from app.utils.banners import banners
+from app.utils.metrics import metrics, start_metrics_server
+from app.utils.lazy_session import session_stats
+from app.utils.query_stats import query_totals
+from app.utils.profiling import profiler, add_profile_routes
+from app.utils.loop_monitor import loop_monitor
+from app.utils.blob_store import migrate_legacy_audios
+from app.database.db import word_cache, auth_cache, user_settings_cache
+from app.settings import BOT_RUN_MODE, METRICS_ENABLED, PROFILE_HTTP_TOKEN, LOOP_MONITOR_ENABLED
 from app.common.bot_commands import private
 
 
@@ -41,8 +57,10 @@ db = DataBase()
 # Создаём Gigachat ассистента
 giga_chat = create_gigachat_assistant()
 
-# Создаём диспетчер обработки + подключаем к нему роутеры
-dp = Dispatcher()
+# Создаём диспетчер обработки с хранилищем FSM по настройкам окружения + подключаем к нему роутеры
+# (хранилище закрывается диспетчером автоматически при завершении работы)
+dp = Dispatcher(storage=create_fsm_storage(bot))
+dp.include_router(admin_router)                         # Команды администратора - до остальных обработчиков
 dp.include_router(auth_actions.auth_router)
 dp.include_router(profile_router)
 dp.include_router(user_private_router)
@@ -55,15 +73,58 @@ dp.include_router(speaking_router)
 dp.include_router(giga_router)
 dp.include_router(user_group_router)
 
+# Обработка апдейтов по очереди внутри чата и параллельно между чатами (обработчики чатов останавливаются при
+# завершении работы диспетчера)
+update_executor = ChatOrderedExecutor()
+dp.shutdown.register(update_executor.close)
+dp.shutdown.register(giga_cache.close)                  # Закрытие файла кеша ответов GigaChat
+dp.shutdown.register(email_queue.close)                 # Остановка отправки писем (неотправленные остаются в БД)
+dp.shutdown.register(loop_monitor.stop)                 # Остановка контроля event loop
+
 # Регистрируем Middleware на диспетчер
-# dp.update.outer_middleware(SomeMiddleware())
-dp.update.middleware(DataBaseSession(db.session_maker))
+dp.update.outer_middleware(UpdateMetricsMiddleware())                   # Метрики апдейтов (с ожиданием очереди)
+dp.update.outer_middleware(ChatOrderedMiddleware(update_executor))
+dp.update.outer_middleware(ProfilerMiddleware())                        # Учёт апдейтов в профилировании
+for observer in (dp.message, dp.callback_query):            # Только для апдейтов с найденным обработчиком
+    observer.middleware(HandlerMetricsMiddleware())
+    observer.middleware(DataBaseSession(db.session_maker))
+    observer.middleware(AuthUserMiddleware())
 dp.update.middleware(GigaChatMiddleware(giga_chat))
 
+# Сохранение file_id изображений баннеров после первой загрузки в Telegram
+bot.session.middleware(BannerFileIdMiddleware(banners))
+
+# Счетчики компонентов бота в метриках Prometheus
+metrics.add_stats('bot_update_executor', update_executor.metrics)
+metrics.add_stats('bot_chat_sessions', bot.chat_sessions.metrics)
+metrics.add_stats('bot_db_sessions', session_stats.metrics)
+metrics.add_stats('bot_sql', query_totals.stats)
+metrics.add_stats('bot_word_cache', word_cache.stats)
+metrics.add_stats('bot_auth_cache', auth_cache.stats)
+metrics.add_stats('bot_user_settings_cache', user_settings_cache.stats)
+metrics.add_stats('bot_giga_cache', giga_cache.stats)
+metrics.add_stats('bot_email_queue', email_queue.stats)
+metrics.add_stats('bot_event_loop', loop_monitor.stats)
+
+# Структуры бота в отчёте профилирования памяти
+profiler.add_structure('bot.chat_sessions', lambda: len(bot.chat_sessions))
+profiler.add_structure('fsm_storage', lambda: storage_size(dp.storage))
+profiler.add_structure('word_cache', lambda: len(word_cache))
+profiler.add_structure('auth_cache', lambda: len(auth_cache))
+profiler.add_structure('user_settings_cache', lambda: len(user_settings_cache))
+profiler.add_structure('banners', lambda: len(banners))
+
 
 async def on_startup():
     """ Действия при запуске бота. """
     await db.create_db()                                    # Создание/обновление таблиц
+    await banners.load(db)                                  # Загрузка баннеров страниц в память
+    async with db.session_maker() as session:               # Перенос аудио, сохранённых до появления хранилища
+        if moved := await migrate_legacy_audios(session):
+            print(f'Аудиофайлов перенесено в хранилище: {moved}')
+    email_queue.start(db)                                   # Запуск отправки писем из очереди
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()                                # Контроль задержек и блокировок event loop
 
 
 async def on_shutdown():
@@ -81,12 +142,26 @@ async def main():
     # await bot.delete_my_commands(scope=types.BotCommandScopeAllPrivateChats())
 
     # Запускаем планировщик в фоновом режиме
-    asyncio.create_task(schedule_tasks(db))
+    asyncio.create_task(schedule_tasks(db, bot))
 
     # Запускаем диспетчер и бот
     dp.startup.register(on_startup)                                                       # Функции при старте бота
     dp.shutdown.register(on_shutdown)                                                     # Функции при завершении бота
-    await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())     # Все типы триггеров
+
+    # Внутренний веб-сервер с метриками в обоих режимах, отдельно от публичного webhook-сервера
+    # (+ управление профилированием при заданном PROFILE_HTTP_TOKEN)
+    routes = [add_profile_routes] if PROFILE_HTTP_TOKEN else []
+    if METRICS_ENABLED and (metrics_runner := await start_metrics_server(routes=routes)) is not None:
+        dp.shutdown.register(metrics_runner.cleanup)
+
+    # Режим webhook: Telegram сам отправляет апдейты на веб-сервер бота
+    if BOT_RUN_MODE == 'webhook':
+        await run_webhook(dp, bot)
+
+    # Режим polling: бот запрашивает апдейты у Telegram (webhook, если был установлен, снимается)
+    else:
+        await bot.delete_webhook()
+        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())     # Все типы триггеров
 
 
 if __name__ == '__main__':
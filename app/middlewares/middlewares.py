@@ -1,17 +1,148 @@
 """
 Middleware
 """
+import time
 from typing import Callable, Dict, Any, Awaitable
 
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.flags import get_flag
+from aiogram.methods import EditMessageMedia, SendPhoto, TelegramMethod
+from aiogram.types import TelegramObject, FSInputFile, Message, Update, CallbackQuery
 from langchain_gigachat import GigaChat
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from app.database.db import DataBase
+from app.utils.banners import BannerStore
+from app.utils.lazy_session import LazySession, session_stats
+from app.utils.metrics import updates_total, update_errors_total, update_duration, updates_in_flight, \
+    handler_duration, handler_errors_total, handlers_in_flight, handler_db_queries, handler_db_duration, event_label
+from app.utils.query_stats import track_queries
+from app.utils.profiling import profiler
+from app.utils.loop_monitor import loop_monitor
+from app.utils.ordered_dispatch import ChatOrderedExecutor
+
+
+# Middleware для обработки апдейтов по очереди внутри чата и параллельно между чатами
+class ChatOrderedMiddleware(BaseMiddleware):
+    """
+    Middleware для обработки апдейтов по очереди внутри чата и параллельно между чатами
+    (подробнее в app/utils/ordered_dispatch.py). Апдейты без чата обрабатываются сразу.
+    Подключается как outer middleware апдейтов - до открытия сессии БД, чтобы апдейт в очереди не держал соединение.
+    """
+
+    def __init__(self, executor: ChatOrderedExecutor) -> None:
+        self.executor = executor
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        event_chat = data.get('event_chat')         # Чат апдейта (определяет стандартный middleware aiogram)
+        if event_chat is None:
+            return await handler(event, data)
+        return await self.executor.submit(event_chat.id, lambda: handler(event, data))
+
+
+# Middleware для метрик обработки апдейтов
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Middleware для метрик обработки апдейтов (подробнее в app/utils/metrics.py): кол-во, ошибки, длительность
+    обработки по типу апдейта, кол-во апдейтов в обработке.
+    Подключается первым outer middleware апдейтов - длительность включает ожидание очереди чата.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        updates_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            update_errors_total.inc(update_type)
+            raise
+        finally:
+            update_duration.observe(update_type, value=time.perf_counter() - start)
+            updates_total.inc(update_type)
+            updates_in_flight.dec()
+
+
+# Middleware для учёта апдейтов в профилировании
+class ProfilerMiddleware(BaseMiddleware):
+    """
+    Middleware для учёта обработанных апдейтов в профилировании по запросу (подробнее в app/utils/profiling.py):
+    профилирование на N апдейтов останавливается после обработки N-го апдейта, начатого после запуска профилирования.
+    Подключается как outer middleware апдейтов.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        run = profiler.run
+        try:
+            return await handler(event, data)
+        finally:
+            if profiler.active:
+                profiler.update_finished(run)
+
+
+# Middleware для метрик обработчиков
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Middleware для метрик обработчиков (подробнее в app/utils/metrics.py): длительность, ошибки и кол-во
+    обработчиков в работе с метками: модуль роутера, имя обработчика, событие (префикс callback_data или
+    FSM-состояние для сообщений).
+    Подключается первым inner middleware событий message/callback_query - только там известен найденный обработчик.
+    Длительность включает работу остальных inner middleware (сессия БД, аутентификация).
+    Обработчик учитывается в контроле event loop - блокировки event loop относятся к нему (app/utils/loop_monitor.py).
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        callback = data['handler'].callback
+        router = callback.__module__.rsplit('.', 1)[-1]
+        name = callback.__name__
+        label = event_label(event.data if isinstance(event, CallbackQuery) else None, data.get('raw_state'),
+                            event.text if isinstance(event, Message) else None)
+
+        handlers_in_flight.inc(router, name)
+        start = time.perf_counter()
+        try:
+            with loop_monitor.track_handler(f'{router}.{name}'):
+                return await handler(event, data)
+        except Exception as e:
+            handler_errors_total.inc(router, name, label, type(e).__name__)
+            raise
+        finally:
+            handler_duration.observe(router, name, label, value=time.perf_counter() - start)
+            handlers_in_flight.dec(router, name)
+
 
 # Middleware для подключения к БД, который будет сохранять объект сессии
 class DataBaseSession(BaseMiddleware):
-    """ Middleware для подключения к БД, который будет сохранять объект сессии. """
+    """
+    Middleware для подключения к БД, который будет сохранять объект сессии.
+    Сессия ленивая (LazySession, подробнее в app/utils/lazy_session.py) - создаётся при первом обращении обработчика
+    к БД. Обработчикам с флагом NO_DB_SESSION сессия не передаётся.
+    Подключается как inner middleware событий message/callback_query - вызывается только для апдейтов с найденным
+    обработчиком, флаги которого уже известны.
+    Запросы к БД за время работы обработчика учитываются в его метриках (кол-во и время запросов, подробнее в
+    app/utils/query_stats.py).
+    """
 
     def __init__(self, session_pool: async_sessionmaker) -> None:
         self.Session = session_pool                 # Сессия БД
@@ -22,12 +153,47 @@ class DataBaseSession(BaseMiddleware):
             event: TelegramObject,                  # Событие-триггер для срабатывания - ЛЮБОЕ
             data: Dict[str, Any]                    # Данные, которые слои пробрасывают друг другу
     ) -> Any:
-        async with self.Session() as session:
-            data['session'] = session               # объект (!) асинхронной сессии
-
-            # Теперь в КАЖДОМ обработчике в параметре 'session' будет доступна асинхронная сессия с БД
+        if get_flag(data, 'db_session', default=True) is False:
+            session_stats.skipped += 1
             return await handler(event, data)
 
+        session = LazySession(self.Session)
+        data['session'] = session                   # объект (!) ленивой асинхронной сессии
+
+        callback = data['handler'].callback
+        router, name = callback.__module__.rsplit('.', 1)[-1], callback.__name__
+
+        # Теперь в КАЖДОМ обработчике в параметре 'session' будет доступна асинхронная сессия с БД
+        with track_queries(f'{router}.{name}') as queries:
+            try:
+                return await handler(event, data)
+            finally:
+                await session.close()
+                handler_db_queries.observe(router, name, value=queries.count)
+                handler_db_duration.observe(router, name, value=queries.total_time)
+
+
+# Middleware для определения пользователя, привязанного к чату
+class AuthUserMiddleware(BaseMiddleware):
+    """
+    Middleware для определения пользователя, привязанного к чату (таблица UserChat).
+    Заполняет кеш аутентификации для чата апдейта до вызова обработчика, чтобы bot.auth_user_id[chat_id] работал без
+    запросов к БД. Запрос выполняется при первом обращении чата, после сброса записи в кеше или по истечении
+    AUTH_CACHE_TTL_SECONDS.
+    Подключается после DataBaseSession - использует её сессию. Для обработчиков с флагом NO_DB_SESSION не вызывается.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        event_chat = data.get('event_chat')         # Чат апдейта (определяет стандартный middleware aiogram)
+        if event_chat is not None and 'session' in data:
+            await DataBase.get_auth_user_id(data['session'], event_chat.id)
+        return await handler(event, data)
+
 
 # Middleware для подключения к GigaChat, который будет сохранять объект созданного чата
 class GigaChatMiddleware(BaseMiddleware):
@@ -44,3 +210,37 @@ class GigaChatMiddleware(BaseMiddleware):
     ) -> Any:
         data['giga_chat'] = self.giga_chat
         return await handler(event, data)
+
+
+# Request-middleware бота для сохранения file_id загруженных изображений баннеров
+class BannerFileIdMiddleware(BaseRequestMiddleware):
+    """
+    Request-middleware бота (вызывается для запросов к Telegram API) для сохранения file_id загруженных изображений
+    баннеров. После первой отправки файла баннера его file_id сохраняется в BannerStore (app/utils/banners.py),
+    и дальше баннер отправляется без повторной загрузки файла.
+    """
+
+    def __init__(self, store: BannerStore) -> None:
+        self.store = store
+
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType,
+            bot,
+            method: TelegramMethod
+    ) -> Any:
+        result = await make_request(bot, method)
+
+        # Файл изображения в запросе отправки/замены фото
+        if isinstance(method, EditMessageMedia):
+            media = method.media.media
+        elif isinstance(method, SendPhoto):
+            media = method.photo
+        else:
+            return result
+
+        # Сохраняем file_id, если это первая загрузка изображения баннера
+        if isinstance(media, FSInputFile) and isinstance(result, Message) and result.photo and \
+                self.store.is_pending_upload(media.path):
+            self.store.set_file_id(media.path, result.photo[-1].file_id)
+        return result
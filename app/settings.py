@@ -2,6 +2,7 @@
 Основные настройки приложения + константы
 """
 import os
+import hashlib
 
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
@@ -10,6 +11,24 @@ load_dotenv(find_dotenv())
 UTC_ADJUSTMENT = 3                                                  # Корректировка UTC
 RESET_PASS_TOKEN_EXPIRE_MINUTES = 10                                # Время жизни ключа сброса пароля в минутах
 CHAT_AUTOLOGIN_EXPIRE_DAYS = 90                                     # Срок автоматической аутентификации по чату в днях
+CHAT_SESSIONS_MAX_SIZE = 10_000                                     # Макс. кол-во чатов с данными в памяти бота (LRU)
+CHAT_SESSION_IDLE_TTL_MINUTES = 24 * 60                             # Простой чата до удаления его данных из памяти
+CHAT_SESSIONS_EVICT_INTERVAL_MINUTES = 10                           # Интервал проверки неактивных чатов в минутах
+AUTH_CACHE_MAX_SIZE = 50_000                                        # Макс. кол-во привязок чат -> User.id в кеше (LRU)
+# Время жизни привязки в кеше до перечитывания из БД в секундах (задержка входа/выхода на других экземплярах бота)
+AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS', 30))
+USER_SETTINGS_CACHE_MAX_SIZE = 10_000                               # Макс. кол-во настроек пользователей в кеше (LRU)
+USER_SETTINGS_CACHE_TTL_MINUTES = 60                                # Время жизни настроек в кеше в минутах
+UPDATE_WORKERS = 32                                                 # Макс. кол-во одновременно выполняемых обработчиков
+UPDATE_CHAT_QUEUE_SIZE = 100                                        # Макс. кол-во апдейтов в очереди одного чата
+
+# Хеширование паролей argon2 (при изменении параметров хеш пароля обновляется при следующем входе пользователя)
+ARGON2_TIME_COST = 3                                                # Кол-во итераций
+ARGON2_MEMORY_COST = 65536                                          # Используемая память в КиБ
+ARGON2_PARALLELISM = 4                                              # Кол-во параллельных потоков вычисления
+ARGON2_HASH_LEN = 32                                                # Длина хеша в байтах
+ARGON2_SALT_LEN = 16                                                # Длина соли в байтах
+PASSWORD_HASH_WORKERS = 2                                           # Кол-во потоков для хеширования/проверки паролей
 
 # Настройки GIGACHAT
 GIGA_AUTH = os.getenv('SBER_AUTH')
@@ -17,12 +36,96 @@ GIGA_SCOPE = os.getenv('SBER_SCOPE')
 GIGA_SYSTEM_PROMPT = ("Ты репетитор английского языка. Помогаешь русскоязычным ученикам понять разницу в значениях "
                       "слов, контекст употребления, коннотации. Отвечай кратко, дружелюбно, с примерами. Избегай "
                       "дословных переводов.")
+GIGA_MAX_CONCURRENT_REQUESTS = 5                                    # Макс. кол-во одновременных запросов к GigaChat
+GIGA_REQUEST_TIMEOUT = 60                                           # Таймаут ответа GigaChat в секундах
+GIGA_STREAM_EDIT_INTERVAL = 1.0                                     # Мин. интервал правки сообщения с ответом, сек
+TELEGRAM_MSG_MAX_LENGTH = 4096                                      # Макс. длина текста сообщения Telegram
+GIGA_PROMPT_VERSION = hashlib.sha256(GIGA_SYSTEM_PROMPT.encode()).hexdigest()[:12]  # Версия промпта (ключ кеша)
+GIGA_CACHE_PATH = os.getenv(                                        # Путь к файлу SQLite с кешем ответов GigaChat
+    'GIGA_CACHE_PATH', os.path.join(os.getcwd(), 'app', 'data', 'giga_cache.db')
+)
+GIGA_CACHE_TTL_DAYS = 30                                            # Время жизни ответа в кеше в днях
+GIGA_CACHE_MAX_SIZE = 10_000                                        # Макс. кол-во ответов в кеше (LRU)
+GIGA_MEMORY_MAX_TURNS = 12                                          # Макс. кол-во реплик в истории диалога
+GIGA_MEMORY_KEEP_TURNS = 4                                          # Кол-во последних реплик, не сжимаемых в резюме
+GIGA_MEMORY_TOKEN_BUDGET = 2000                                     # Бюджет токенов на историю диалога в запросе
+GIGA_MEMORY_TURN_MAX_CHARS = 2000                                   # Макс. длина реплики, сохраняемой в истории
+GIGA_CHARS_PER_TOKEN = 3                                            # Оценка кол-ва символов на токен
+GIGA_SUMMARY_PROMPT = ("Кратко перескажи диалог ученика с репетитором английского языка: какие слова и темы "
+                       "обсуждались и к каким выводам пришли. Не более 5 предложений.")
 
 # Настройки почты для отправки писем (восстановление пароля и т.д.)
 SMTP_SERVER = os.getenv('SMTP_SERVER')
 SMTP_PORT = int(os.getenv('SMTP_PORT'))
 SENDER_EMAIL = os.getenv('SENDER_EMAIL')
 SENDER_PASSWORD = os.getenv('SENDER_PASSWORD')
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', 'true') != 'false'       # Шифрование соединения STARTTLS
+SMTP_TIMEOUT = 30                                                   # Таймаут операций с почтовым сервером в секундах
+# Простой до закрытия соединения с сервером в секундах
+SMTP_IDLE_TIMEOUT = 60
+EMAIL_QUEUE_POLL_INTERVAL = 15                                      # Интервал проверки очереди писем в секундах
+EMAIL_QUEUE_BATCH_SIZE = 20                                         # Кол-во писем, отправляемых за один проход очереди
+EMAIL_MAX_ATTEMPTS = 5                                              # Макс. кол-во попыток отправки письма
+EMAIL_RETRY_BASE_SECONDS = 10                                       # Задержка перед 1-м повтором (далее удваивается)
+EMAIL_RETRY_MAX_SECONDS = 600                                       # Макс. задержка перед повтором отправки в секундах
+EMAIL_OUTBOX_KEEP_DAYS = 7                                          # Срок хранения неотправленных писем в днях
+
+# Хранилище FSM-состояний
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory')                    # Тип хранилища: memory | sqlite | redis
+FSM_SQLITE_PATH = os.getenv(                                        # Путь к отдельному файлу SQLite для FSM
+    'FSM_SQLITE_PATH', os.path.join(os.getcwd(), 'app', 'data', 'fsm_storage.db')
+)
+FSM_FLUSH_INTERVAL = 0.5                                            # Интервал пакетной записи в SQLite в секундах
+FSM_FLUSH_BATCH_SIZE = 200                                          # Кол-во изменений для внеочередной записи
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')      # Адрес Redis для FSM_STORAGE=redis
+
+# Режим получения апдейтов
+BOT_RUN_MODE = os.getenv('BOT_RUN_MODE', 'polling')                 # Режим: polling | webhook
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL')                    # Публичный адрес бота для Telegram (https://...)
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')                # Путь обработчика апдейтов на веб-сервере
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')                        # Секретный токен для проверки запросов Telegram
+WEB_SERVER_HOST = os.getenv('WEB_SERVER_HOST', '0.0.0.0')           # Адрес веб-сервера
+WEB_SERVER_PORT = int(os.getenv('WEB_SERVER_PORT', 8080))           # Порт веб-сервера
+
+# Статистика SQL-запросов (app/utils/query_stats.py)
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))   # Время, с которого запрос печатается
+SQL_DEBUG = os.getenv('SQL_DEBUG', 'false') == 'true'               # Поиск N+1: повторяющихся запросов за апдейт
+SQL_N_PLUS_ONE_THRESHOLD = 5                                        # Допустимое кол-во повторов запроса за апдейт
+
+# Метрики Prometheus (app/utils/metrics.py)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true') != 'false'   # Отдавать метрики на веб-сервере бота
+METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')                # Путь метрик на веб-сервере
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')               # Адрес внутреннего веб-сервера метрик
+METRICS_PORT = int(os.getenv('METRICS_PORT', 8081))                 # Порт внутреннего сервера метрик (не публикуется)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')                          # Токен доступа к метрикам (пусто - без токена)
+METRICS_LATENCY_BUCKETS = (                                         # Интервалы гистограмм длительности, в секундах
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+# Контроль задержек и блокировок event loop (app/utils/loop_monitor.py)
+LOOP_MONITOR_ENABLED = os.getenv('LOOP_MONITOR_ENABLED', 'true') != 'false'   # Включить контроль event loop
+LOOP_MONITOR_INTERVAL = 0.1                                         # Интервал замера задержки в секундах
+LOOP_BLOCK_THRESHOLD_MS = int(os.getenv('LOOP_BLOCK_THRESHOLD_MS', 200))   # Задержка, с которой снимается стек
+LOOP_BLOCK_STACK_DEPTH = 15                                         # Кол-во кадров стека в выводе блокировки
+LOOP_LAG_BUCKETS = (                                                # Интервалы гистограммы задержки, в секундах
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+# Профилирование по запросу администратора (app/utils/profiling.py)
+ADMIN_CHAT_IDS = frozenset(                                         # id чатов администраторов (через запятую)
+    int(chat_id) for chat_id in os.getenv('ADMIN_CHAT_IDS', '').split(',') if chat_id.strip()
+)
+PROFILE_HTTP_TOKEN = os.getenv('PROFILE_HTTP_TOKEN')                # Токен HTTP-управления профилированием
+PROFILE_HTTP_PATH = '/debug/profile'                                # Путь управления профилированием на веб-сервере
+PROFILE_DIR = os.getenv(                                            # Папка для результатов профилирования
+    'PROFILE_DIR', os.path.join(os.getcwd(), 'app', 'data', 'profiles')
+)
+PROFILE_DEFAULT_UPDATES = 100                                       # Кол-во апдейтов профилирования по умолчанию
+PROFILE_DEFAULT_SECONDS = 30                                        # Длительность профилирования по умолчанию, сек
+PROFILE_MAX_SECONDS = 600                                           # Макс. длительность профилирования, сек
+PROFILE_SAMPLE_INTERVAL = 0.005                                     # Интервал снимков стека в режиме sample, сек
+PROFILE_TRACEMALLOC_FRAMES = 10                                     # Глубина стека выделений памяти в режиме memory
+PROFILE_REPORT_LINES = 30                                           # Кол-во строк в отчётах профилирования
 
 # Заглушка для БД - при встрече символа будет установлено значение None или не создан объект
 PLUG_TEMPLATE = '-'
@@ -33,6 +136,7 @@ PATTERN_CONTEXT_EXAMPLE = '[a-zA-Z].*[a-zA-Z].*[a-zA-Z]'
 PATTERN_EMAIL = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'
 PATTERN_SPEECH_RATE = r"^(\+0|\+([1-9][0-9]?|100)|-([1-9][0-9]?|100))$"           # +0, +1-100, -1-100
 PATTERN_AUDIO_CONVERT = r'^(?=.*[a-zA-Z]).{3,}$'                                # Мин 3 символа + мин 1 латинская буква
+PATTERN_WEBHOOK_SECRET = r'^[A-Za-z0-9_-]{1,256}$'                                # Допустимый секрет webhook (Telegram)
 MIN_USER_PSW_LENGTH = 4                                                           # Минимальная длина пароля
 MIN_NOTE_TITLE_LENGTH = 3                                                         # Минимальная длина заголовка заметки
 MIN_NOTE_TEXT_LENGTH = 5                                                          # Минимальная длина текста заметки
@@ -64,6 +168,9 @@ TEST_EN_RU_AUDIO = 'en_ru_audio'
 TEST_RU_EN_WORD = 'ru_en_word'
 TEST_TYPES = (TEST_EN_RU_WORD, TEST_EN_RU_AUDIO, TEST_RU_EN_WORD)       # Обозначения типов тестов в коде
 TEST_TYPES_SQL = ", ".join(f"'{tt}'" for tt in TEST_TYPES)              # Типы тестов для SQL (для ограничения моделей)
+TESTS_HISTORY_CAPACITY = 50                                             # Кол-во слов в истории навигации теста
+WORD_CACHE_MAX_SIZE = 5000                                              # Макс. кол-во слов в общем кеше WordPhrase
+WORD_CACHE_TTL_MINUTES = 30                                             # Время жизни слова в кеше в минутах
 
 # Excel
 FILENAME_STATISTICS = 'Statistics.xlsx'                     # Название xsl-файла со статистикой
@@ -129,14 +236,29 @@ XLS_DB_CAPTION = """
 """
 
 # Хранение аудио файлов
-FILENAME_AUDIOS_ZIP = 'my_audios.zip'                         # Название zip-архива с сохранёнными аудио
+FILENAME_AUDIOS_ZIP = 'my_audios_{period}.zip'                # Название zip-архива с сохранёнными аудио за месяц
+FILENAME_AUDIOS_ZIP_PART = 'my_audios_{period}_{part}_of_{parts}.zip'   # Название части архива за месяц
 FILENAME_AUDIOS_CAPTION = 'Ваш архив с аудио'                 # Заголовок zip-архива с сохранёнными аудио
+AUDIO_ZIP_PART_MAX_SIZE = 49 * 2 ** 20                        # Макс. размер части архива (лимит Telegram - 50 МБ)
+AUDIO_ARCHIVE_WORKERS = 1                                     # Кол-во потоков для сборки архивов с аудио
 
 # Путь к временному хранилищу несохраненных аудио пользователя
 AUDIO_TEMP_PATH = os.path.join(os.getcwd(), 'app', 'data', 'audio', 'user_{user_id}', 'tmp')
 
-# Путь к общей папке пользователя с сохранёнными аудио
-SAVED_AUDIO_ROOT_DIR = os.path.join(os.getcwd(), 'app', 'data', 'audio', 'user_{user_id}')
+# Хранилище сохранённых аудио (app/utils/blob_store.py): local - папка AUDIO_STORE_DIR, s3 - S3-совместимое хранилище
+AUDIO_STORE = os.getenv('AUDIO_STORE', 'local')                     # Тип хранилища: local | s3
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))    # Корень проекта (папка с app/)
+
+# Папка локального хранилища. Относительный путь отсчитывается от корня проекта, а не от рабочей папки процесса:
+# ключи SavedAudio.file_path указывают на файлы в этой папке, она не должна меняться от способа запуска бота
+AUDIO_STORE_DIR = os.path.join(PROJECT_DIR, os.getenv('AUDIO_STORE_DIR', os.path.join('app', 'data', 'audio_store')))
+AUDIO_STORE_WORKERS = 4                                             # Кол-во потоков для операций с хранилищем
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL')                      # Адрес S3 API (для MinIO: http://minio:9000)
+S3_BUCKET = os.getenv('S3_BUCKET', 'english-notes-audio')           # Бакет для аудио
+S3_PREFIX = os.getenv('S3_PREFIX', 'audio/')                        # Префикс ключей аудио в бакете
+S3_ACCESS_KEY = os.getenv('S3_ACCESS_KEY')
+S3_SECRET_KEY = os.getenv('S3_SECRET_KEY')
+S3_REGION = os.getenv('S3_REGION')
 
-# Путь к конкретной папке при сохранении аудио (с датой)
-AUDIO_FINAL_PATH = os.path.join(SAVED_AUDIO_ROOT_DIR, '{date}')
+# Путь к папке кеша архивов с аудио пользователя (части архива по месяцам)
+AUDIO_ARCHIVE_CACHE_DIR = os.path.join(os.getcwd(), 'app', 'data', 'audio_archives', 'user_{user_id}')
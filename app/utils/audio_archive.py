@@ -0,0 +1,239 @@
+"""
+Сборка zip-архивов с сохранёнными аудиозаписями пользователя вне event loop и кеш архивов по месяцам.
+
+INFO:
+1. Список файлов берётся из таблицы SavedAudio, файлы читаются из хранилища аудио (app/utils/blob_store.py). Архивы
+   собираются в отдельном пуле из AUDIO_ARCHIVE_WORKERS потоков: выгрузка архива за несколько месяцев практики не
+   останавливает обработку апдейтов других чатов.
+2. Файлы .ogg уже сжаты, поэтому добавляются без сжатия (ZIP_STORED) - zipfile копирует их в архив частями, не читая
+   файл в память целиком. Архив разбивается на части не больше AUDIO_ZIP_PART_MAX_SIZE (лимит Telegram на отправку
+   документа - 50 МБ): размер части считается заранее по размерам файлов и заголовков zip.
+   В архиве файлы разложены по папкам с датами сохранения ('<дата>/<файл>.ogg') под исходными названиями
+   (SavedAudio.file_name), а не под ключами хранилища; для записей без названия используется имя из ключа.
+3. Архив выгружается по месяцам. Части архива за месяц кешируются в AUDIO_ARCHIVE_CACHE_DIR, в таблице
+   AudioArchiveSegment для них хранится отпечаток записей SavedAudio за месяц (id и названия) и file_id Telegram после
+   первой отправки. При выгрузке пересобираются только месяцы, в которых аудиозаписи добавлены или удалены
+   (обычно - текущий), остальные части отправляются повторно по file_id без загрузки файла.
+4. Месяц, все файлы которого отсутствуют в хранилище, отмечается записью-маркером AudioArchiveSegment без файла
+   (part = parts = 0) и не пересобирается при каждой выгрузке, пока не изменятся его записи SavedAudio.
+5. Подготовка архива выполняется под блокировкой пользователя: параллельные выгрузки одного пользователя не
+   пересобирают одновременно одни и те же файлы '<месяц>_<номер части>.zip'.
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import weakref
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import DataBase
+from app.database.models import AudioArchiveSegment
+from app.utils.blob_store import audio_store
+from app.settings import AUDIO_ZIP_PART_MAX_SIZE, AUDIO_ARCHIVE_WORKERS, AUDIO_ARCHIVE_CACHE_DIR
+
+ZIP_LOCAL_HEADER_SIZE = 30                          # Размер локального заголовка записи zip (без имени файла)
+ZIP_CENTRAL_HEADER_SIZE = 46                        # Размер записи центрального каталога zip (без имени файла)
+ZIP_END_RECORD_SIZE = 22                            # Размер завершающей записи центрального каталога zip
+
+# Пул потоков для сборки архивов
+_executor = ThreadPoolExecutor(max_workers=AUDIO_ARCHIVE_WORKERS, thread_name_prefix='audio-zip')
+
+# Блокировки подготовки архива по пользователям (удаляются из словаря, когда не используются)
+_user_locks: weakref.WeakValueDictionary[int, asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+# Аудиофайл для архивации
+@dataclass
+class AudioEntry:
+    """ Аудиофайл для архивации: ключ в хранилище, путь в архиве, дата сохранения, размер в байтах. """
+    key: str
+    arcname: str
+    created: datetime
+    size: int
+
+    # Размер записи в архиве без сжатия
+    @property
+    def zip_size(self) -> int:
+        name_size = len(self.arcname.encode('utf-8'))
+        return self.size + ZIP_LOCAL_HEADER_SIZE + ZIP_CENTRAL_HEADER_SIZE + 2 * name_size
+
+
+# Список файлов для архивации
+def collect_entries(audios: Iterable[tuple[str, Optional[str], datetime]]) -> list[AudioEntry]:
+    """
+    Список существующих аудиофайлов для архивации. Отсутствующие в хранилище файлы пропускаются.
+
+    :param audios: Ключи аудиофайлов в хранилище, исходные названия (или None) и даты сохранения (из SavedAudio)
+    :return: Список AudioEntry
+    """
+    entries, added, arcnames = [], set(), set()
+    for key, file_name, created in audios:
+
+        # Один и тот же файл за одну дату добавляется один раз
+        day = created.date().isoformat()
+        if (day, key) in added:
+            continue
+        try:
+            size = audio_store.size(key)
+        except Exception as e:
+            print(f'Аудиофайл не добавлен в архив: {key}: {e}')
+            continue
+
+        # Путь в архиве - '<дата>/<исходное название>'. Разные файлы с одинаковым названием различаются началом ключа
+        arcname = f'{day}/{os.path.basename(file_name or key)}'
+        if arcname in arcnames:
+            stem, ext = os.path.splitext(arcname)
+            arcname = f'{stem}_{os.path.basename(key)[:8]}{ext}'
+        added.add((day, key))
+        arcnames.add(arcname)
+        entries.append(AudioEntry(key=key, arcname=arcname, created=created, size=size))
+    return entries
+
+
+# Разбиение файлов на части архива
+def split_entries(entries: list[AudioEntry], max_size: int = AUDIO_ZIP_PART_MAX_SIZE) -> list[list[AudioEntry]]:
+    """
+    Разбиение файлов на части архива размером не больше max_size. Файл больше max_size помещается в отдельную часть.
+
+    :param entries: Список AudioEntry
+    :param max_size: Макс. размер части архива в байтах
+    :return: Списки AudioEntry по частям архива
+    """
+    parts, part, part_size = [], [], ZIP_END_RECORD_SIZE
+    for entry in entries:
+        if part and part_size + entry.zip_size > max_size:
+            parts.append(part)
+            part, part_size = [], ZIP_END_RECORD_SIZE
+        part.append(entry)
+        part_size += entry.zip_size
+    if part:
+        parts.append(part)
+    return parts
+
+
+# Сборка частей архива (выполняется в пуле потоков)
+def _write_archives(audios: list[tuple[str, Optional[str], datetime]], out_dir: str, name: str, max_size: int) \
+        -> list[str]:
+    parts = split_entries(collect_entries(audios), max_size)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for number, part in enumerate(parts, start=1):
+        path = os.path.join(out_dir, f'{name}_{number}.zip')
+
+        # Архив собирается во временный файл и заменяет прежний только целиком
+        tmp_path = f'{path}.tmp'
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+                for entry in part:
+                    info = zipfile.ZipInfo(entry.arcname, date_time=entry.created.timetuple()[:6])
+                    info.file_size = entry.size
+                    with audio_store.open(entry.key) as src, archive.open(info, 'w') as dest:
+                        shutil.copyfileobj(src, dest)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        paths.append(path)
+    return paths
+
+
+# Сборка архивов с аудиозаписями пользователя
+async def build_audio_archives(audios: Iterable[tuple[str, Optional[str], datetime]], out_dir: str,
+                               name: str = 'part', max_size: int = AUDIO_ZIP_PART_MAX_SIZE) -> list[str]:
+    """
+    Сборка zip-архивов с аудиозаписями пользователя в пуле потоков.
+
+    :param audios: Ключи аудиофайлов в хранилище, исходные названия (или None) и даты сохранения (из SavedAudio)
+    :param out_dir: Папка для архивов
+    :param name: Начало названия файлов частей архива ('<name>_<номер части>.zip')
+    :param max_size: Макс. размер части архива в байтах
+    :return: Пути к частям архива по порядку. Пустой список, если файлов для архивации нет
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor, _write_archives, list(audios), out_dir, name, max_size
+    )
+
+
+# Отпечаток записей SavedAudio за месяц
+def audios_fingerprint(audios: Iterable[tuple[int, Optional[str]]]) -> str:
+    """ Отпечаток набора записей SavedAudio (id и названия): меняется при добавлении и удалении аудиозаписей. """
+    items = sorted(f'{audio_id}:{file_name or ""}' for audio_id, file_name in audios)
+    return hashlib.sha256(','.join(items).encode()).hexdigest()
+
+
+# Удаление файлов частей архива из кеша
+def _remove_cached_files(cache_dir: str, file_names: Iterable[str]) -> None:
+    for file_name in file_names:
+        if not file_name:                           # Маркер месяца без файлов
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, file_name))
+        except FileNotFoundError:
+            pass
+
+
+# Подготовка частей архива аудиозаписей пользователя
+async def prepare_audio_archive(session: AsyncSession, user_id: int) -> list[AudioArchiveSegment]:
+    """
+    Подготовка частей архива аудиозаписей пользователя по месяцам: пересборка месяцев, в которых изменились записи
+    SavedAudio (или файл части отсутствует в кеше), удаление частей за месяцы без аудиозаписей.
+
+    :param session: Пользовательская сессия
+    :param user_id: ID пользователя User
+    :return: Список AudioArchiveSegment по месяцам и номерам частей. Пустой список, если файлов для архивации нет
+    """
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = _user_locks[user_id] = asyncio.Lock()
+    async with lock:
+        return await _prepare_audio_archive(session, user_id)
+
+
+# Подготовка частей архива (под блокировкой пользователя)
+async def _prepare_audio_archive(session: AsyncSession, user_id: int) -> list[AudioArchiveSegment]:
+    cache_dir = AUDIO_ARCHIVE_CACHE_DIR.format(user_id=user_id)
+
+    # Аудиозаписи по месяцам
+    periods: dict[str, list] = {}
+    for audio in await DataBase.get_saved_audio_paths(session, user_id):
+        periods.setdefault(audio.created.strftime('%Y-%m'), []).append(audio)
+
+    # Кешированные части архива по месяцам
+    cached: dict[str, list[AudioArchiveSegment]] = {}
+    for segment in await DataBase.get_audio_archive_segments(session, user_id):
+        cached.setdefault(segment.period, []).append(segment)
+
+    # Удаляем части за месяцы, в которых не осталось аудиозаписей
+    obsolete = [period for period in cached if period not in periods]
+    if obsolete:
+        _remove_cached_files(cache_dir, [segment.file_name for period in obsolete for segment in cached[period]])
+        await DataBase.delete_audio_archive_segments(session, user_id, obsolete)
+
+    result = []
+    for period, audios in sorted(periods.items()):
+        fingerprint = audios_fingerprint((audio.id, audio.file_name) for audio in audios)
+        segments = cached.get(period, [])
+
+        # Месяц без файлов (маркер) с теми же записями - не пересобираем
+        if len(segments) == 1 and segments[0].parts == 0 and segments[0].fingerprint == fingerprint:
+            continue
+        if segments and all(segment.fingerprint == fingerprint and segment.file_name and
+                            os.path.exists(os.path.join(cache_dir, segment.file_name)) for segment in segments):
+            result.extend(segments)
+            continue
+
+        # Пересобираем месяц и заменяем кешированные части
+        paths = await build_audio_archives([(audio.file_path, audio.file_name, audio.created) for audio in audios],
+                                           cache_dir, name=period)
+        file_names = [os.path.basename(path) for path in paths]
+        _remove_cached_files(cache_dir, [segment.file_name for segment in segments
+                                         if segment.file_name not in file_names])
+        segments = await DataBase.replace_audio_archive_segments(session, user_id, period, fingerprint, file_names)
+        result.extend(segment for segment in segments if segment.parts)
+    return result
@@ -0,0 +1,49 @@
+"""
+Аутентификация чатов: определение пользователя User по чату Telegram на основе таблицы UserChat.
+
+INFO:
+1. Привязка чата к пользователю хранится в БД (UserChat), а в памяти бота - только LRU-кеш auth_cache
+   (app/database/db.py). Кеш заполняется лениво: при первом апдейте из чата после запуска бота middleware
+   AuthUserMiddleware выполняет один запрос к UserChat, поэтому перезапуск не разлогинивает пользователей, а запуск
+   бота не требует загрузки всех привязок.
+2. Кеш сбрасывается методами DataBase, изменяющими UserChat: привязка при входе, удаление неактуальных привязок,
+   выход из учётной записи (delete_user_chats_by_chat_id) и плановое удаление устаревших записей.
+3. bot.auth_user_id - словарь-представление кеша с прежним интерфейсом ({chat_id: User.id}). Для неизвестного чата
+   возвращается None вместо KeyError.
+4. Время жизни записи (AUTH_CACHE_TTL_SECONDS) короткое: при нескольких экземплярах бота вход и выход в одном
+   экземпляре видны остальным не позже, чем через это время. Устаревшая запись перечитывается middleware в начале
+   обработки апдейта, а bot.auth_user_id читает кеш без проверки времени жизни - в течение обработки апдейта
+   (в т.ч. долгой) привязка не пропадает.
+"""
+from collections.abc import MutableMapping
+from typing import Iterator
+
+from app.database.db import auth_cache
+
+
+# Словарь-представление кеша аутентификации чатов
+class AuthUserMap(MutableMapping):
+    """
+    Словарь-представление кеша аутентификации чатов: {chat_id: User.id | None}.
+    Чтение не выполняет запросов к БД: кеш для чата заполняется middleware AuthUserMiddleware до вызова обработчика.
+    """
+
+    def __getitem__(self, chat_id: int) -> int | None:
+        return auth_cache.peek(chat_id)
+
+    def __setitem__(self, chat_id: int, user_id: int | None) -> None:
+        auth_cache.set(chat_id, user_id)
+
+    def __delitem__(self, chat_id: int) -> None:
+        auth_cache.invalidate(chat_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(auth_cache)
+
+    def __len__(self) -> int:
+        return len(auth_cache)
+
+    def get(self, chat_id: int, default: int | None = None) -> int | None:
+        """ id пользователя для чата. None (чат не привязан или не загружен) заменяется на default. """
+        user_id = auth_cache.peek(chat_id)
+        return default if user_id is None else user_id
@@ -0,0 +1,116 @@
+"""
+Баннеры страниц бота в памяти.
+
+INFO:
+    Баннеры (таблица Banner) - статичные данные из app/banners/banners_details.py, записываются в БД при запуске бота.
+    BannerStore загружает их один раз (load() при запуске, повторно - reload()) в неизменяемый словарь
+    {Banner.name: BannerRecord}, поэтому страницы меню формируются без запросов к БД.
+    - media() возвращает готовый InputMediaPhoto баннера (с заменой описания при необходимости).
+    - После первой отправки изображения Telegram возвращает его file_id. Его запоминает request-middleware бота
+      BannerFileIdMiddleware (app/middlewares/middlewares.py), и дальше InputMediaPhoto ссылается на file_id вместо
+      повторной загрузки файла.
+"""
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from aiogram.types import FSInputFile, InputMediaPhoto
+
+
+# Запись баннера
+@dataclass(frozen=True, slots=True)
+class BannerRecord:
+    """ Баннер страницы: название, путь к изображению, описание. """
+    name: str
+    image_path: str
+    description: str | None
+
+
+# Хранилище баннеров
+class BannerStore:
+    """ Баннеры страниц бота в памяти + готовые InputMediaPhoto с file_id загруженных в Telegram изображений. """
+
+    def __init__(self) -> None:
+        self._banners: Mapping[str, BannerRecord] = MappingProxyType({})
+        self._media: Mapping[str, InputMediaPhoto] = MappingProxyType({})
+        self._file_ids: dict[str, str] = {}                 # {путь к изображению: file_id в Telegram}
+
+    # Загрузка баннеров из БД
+    async def load(self, db) -> None:
+        """
+        Загрузка (перезагрузка) всех баннеров из БД. Сохранённые file_id сбрасываются - изображения могли измениться.
+
+        :param db: Объект DataBase
+        :return: None
+        """
+        async with db.session_maker() as session:
+            banners = await db.get_all_banners(session)
+        self._banners = MappingProxyType({
+            banner.name: BannerRecord(banner.name, banner.image_path, banner.description) for banner in banners
+        })
+        self._file_ids.clear()
+        self._build_media()
+
+    reload = load
+
+    # Сборка готовых InputMediaPhoto
+    def _build_media(self) -> None:
+        self._media = MappingProxyType({
+            banner.name: InputMediaPhoto(
+                media=self._file_ids.get(banner.image_path) or FSInputFile(banner.image_path),
+                caption=banner.description,
+            )
+            for banner in self._banners.values()
+        })
+
+    # Получить баннер
+    def get(self, name: str) -> BannerRecord | None:
+        """
+        Получить баннер по названию.
+
+        :param name: Название баннера Banner.name
+        :return: Объект BannerRecord или None, если баннер не найден
+        """
+        return self._banners.get(name)
+
+    # Получить изображение баннера
+    def media(self, name: str, caption: Optional[str] = None) -> InputMediaPhoto:
+        """
+        Получить копию готового InputMediaPhoto баннера.
+
+        :param name: Название баннера Banner.name
+        :param caption: Описание вместо описания баннера
+        :return: Объект InputMediaPhoto
+        :raises KeyError: Баннер не найден
+        """
+        media = self._media[name]
+        return media.model_copy(update={'caption': caption} if caption is not None else None)
+
+    # Является ли файл изображением баннера без сохранённого file_id
+    def is_pending_upload(self, path: str) -> bool:
+        """ Является ли файл изображением баннера, ещё не загруженным в Telegram. """
+        return path not in self._file_ids and any(banner.image_path == path for banner in self._banners.values())
+
+    # Запомнить file_id изображения
+    def set_file_id(self, path: str, file_id: str) -> None:
+        """
+        Запомнить file_id загруженного в Telegram изображения баннера.
+
+        :param path: Путь к изображению
+        :param file_id: file_id изображения в Telegram
+        :return: None
+        """
+        if path not in self._file_ids:
+            self._file_ids[path] = file_id
+            self._build_media()
+
+    @property
+    def file_ids(self) -> Mapping[str, str]:
+        return MappingProxyType(self._file_ids)
+
+    def __len__(self) -> int:
+        return len(self._banners)
+
+
+# Общие для бота баннеры
+banners = BannerStore()
@@ -0,0 +1,309 @@
+"""
+Хранилище сохранённых аудиозаписей с адресацией по содержимому.
+
+INFO:
+1. Файл сохраняется под ключом из sha256 содержимого: '<2 символа>/<2 символа>/<sha256>.ogg'. Ключ (путь относительно
+   хранилища) записывается в SavedAudio.file_path - записи не зависят от рабочей папки и расположения хранилища.
+   Одинаковые файлы хранятся один раз: файл удаляется из хранилища, когда на него не осталось записей SavedAudio.
+2. Хранилище выбирается настройкой AUDIO_STORE:
+    - local: папка AUDIO_STORE_DIR, файлы разложены по подпапкам из первых символов хеша;
+    - s3: S3-совместимое хранилище (AWS S3, MinIO) - бакет S3_BUCKET, ключи с префиксом S3_PREFIX. Нужен пакет boto3.
+3. Методы хранилища синхронные (для сборки архивов в пуле потоков, app/utils/audio_archive.py). Обработчики вызывают
+   асинхронные методы save / read / remove / input_file, которые выполняются в пуле из AUDIO_STORE_WORKERS потоков.
+4. Проверка "на файл не осталось записей" и удаление файла не атомарны относительно сохранения такого же файла
+   (файл уже есть -> запись SavedAudio добавляется позже). Поэтому сохранение файла с созданием записи и удаление
+   записи с удалением файла выполняются под блокировкой ключа key_lock(key) (в пределах процесса бота).
+5. В записях SavedAudio, созданных до появления хранилища, хранится абсолютный путь к файлу. Такие пути читаются
+   напрямую с диска, а при запуске бота (migrate_legacy_audios) файлы переносятся в хранилище.
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import weakref
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional
+
+from aiogram.types import BufferedInputFile, FSInputFile, InputFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import DataBase
+from app.settings import AUDIO_STORE, AUDIO_STORE_DIR, AUDIO_STORE_WORKERS, S3_ENDPOINT_URL, S3_BUCKET, S3_PREFIX, \
+    S3_ACCESS_KEY, S3_SECRET_KEY, S3_REGION
+
+HASH_CHUNK_SIZE = 2 ** 20                           # Размер блока чтения файла при вычислении хеша
+
+# Пул потоков для операций с хранилищем
+_executor = ThreadPoolExecutor(max_workers=AUDIO_STORE_WORKERS, thread_name_prefix='blob-store')
+
+# Блокировки ключей хранилища (удаляются из словаря, когда не используются)
+_key_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+# Ключ файла по содержимому
+def content_key(path: str, suffix: str = '.ogg') -> str:
+    """
+    Ключ файла по sha256 содержимого с разбиением на подпапки: 'ab/cd/abcd...ef.ogg'.
+
+    :param path: Путь к файлу
+    :param suffix: Расширение файла в ключе
+    :return: Ключ файла в хранилище
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    digest = digest.hexdigest()
+    return f'{digest[:2]}/{digest[2:4]}/{digest}{suffix}'
+
+
+# Базовый класс хранилища
+class BlobStore(ABC):
+    """
+    Базовый класс хранилища файлов по ключам. Наследники реализуют _put / _exists / _size / _open / _delete.
+    Абсолютный путь вместо ключа (записи до появления хранилища) обрабатывается как файл на диске.
+    """
+
+    # Синхронные методы (вызываются в пуле потоков)
+
+    def put_file(self, path: str, key: Optional[str] = None) -> str:
+        """
+        Сохранение файла в хранилище. Если файл с таким содержимым уже есть, повторно не сохраняется.
+
+        :param path: Путь к файлу на диске (не удаляется)
+        :param key: Ключ файла, если уже вычислен (file_key), иначе вычисляется по содержимому
+        :return: Ключ файла в хранилище
+        """
+        key = key or content_key(path, suffix=os.path.splitext(path)[1])
+        if not self._exists(key):
+            self._put(key, path)
+        return key
+
+    def size(self, key: str) -> int:
+        """ Размер файла в байтах. """
+        return os.path.getsize(key) if os.path.isabs(key) else self._size(key)
+
+    def open(self, key: str) -> BinaryIO:
+        """ Файловый объект для чтения (закрывается вызывающим кодом). """
+        return open(key, 'rb') if os.path.isabs(key) else self._open(key)
+
+    def delete(self, key: str) -> None:
+        """ Удаление файла из хранилища. Отсутствующий файл не считается ошибкой. """
+        if os.path.isabs(key):
+            if os.path.exists(key):
+                os.remove(key)
+        else:
+            self._delete(key)
+
+    def local_path(self, key: str) -> Optional[str]:
+        """ Путь к файлу на диске, если файл доступен локально (для отправки без чтения в память). """
+        return key if os.path.isabs(key) else None
+
+    # Асинхронные методы (для обработчиков)
+
+    async def file_key(self, path: str) -> str:
+        """ Ключ файла по содержимому (вычисляется в пуле потоков). """
+        return await asyncio.get_running_loop().run_in_executor(
+            _executor, content_key, path, os.path.splitext(path)[1]
+        )
+
+    @staticmethod
+    def key_lock(key: str) -> asyncio.Lock:
+        """
+        Блокировка ключа: под ней выполняются сохранение файла вместе с созданием записи SavedAudio и удаление записи
+        вместе с проверкой "файл больше не используется" и удалением файла.
+
+        :param key: Ключ файла в хранилище
+        :return: Объект asyncio.Lock, общий для всех обращений к ключу
+        """
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = asyncio.Lock()
+        return lock
+
+    async def save(self, path: str, key: Optional[str] = None) -> str:
+        """
+        Сохранение файла в хранилище в пуле потоков.
+
+        :param path: Путь к файлу на диске (не удаляется)
+        :param key: Ключ файла, если уже вычислен (file_key)
+        :return: Ключ файла в хранилище
+        """
+        return await asyncio.get_running_loop().run_in_executor(_executor, self.put_file, path, key)
+
+    async def read(self, key: str) -> bytes:
+        """ Чтение файла целиком в пуле потоков. """
+        def _read() -> bytes:
+            with self.open(key) as file:
+                return file.read()
+        return await asyncio.get_running_loop().run_in_executor(_executor, _read)
+
+    async def remove(self, key: str) -> None:
+        """ Удаление файла из хранилища в пуле потоков. """
+        await asyncio.get_running_loop().run_in_executor(_executor, self.delete, key)
+
+    async def input_file(self, key: str, filename: Optional[str] = None) -> InputFile:
+        """
+        Файл для отправки в Telegram: с диска, если файл доступен локально, иначе - прочитанный из хранилища.
+
+        :param key: Ключ файла в хранилище
+        :param filename: Название файла для Telegram (по умолчанию - из ключа)
+        :return: Объект InputFile
+        """
+        filename = filename or os.path.basename(key)
+        path = self.local_path(key)
+        if path is not None:
+            return FSInputFile(path, filename=filename)
+        return BufferedInputFile(await self.read(key), filename=filename)
+
+    # Реализация хранилища
+
+    @abstractmethod
+    def _put(self, key: str, path: str) -> None:
+        """ Запись файла с диска под ключом. """
+
+    @abstractmethod
+    def _exists(self, key: str) -> bool:
+        """ Есть ли файл с ключом в хранилище. """
+
+    @abstractmethod
+    def _size(self, key: str) -> int:
+        """ Размер файла в байтах. """
+
+    @abstractmethod
+    def _open(self, key: str) -> BinaryIO:
+        """ Файловый объект для чтения. """
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """ Удаление файла (отсутствующий файл не считается ошибкой). """
+
+
+# Хранилище в локальной папке
+class LocalBlobStore(BlobStore):
+    """ Хранилище в локальной папке: файлы в подпапках из первых символов хеша ('<root>/ab/cd/abcd...ef.ogg'). """
+
+    def __init__(self, root: str = AUDIO_STORE_DIR) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def _put(self, key: str, path: str) -> None:
+        dest = self._path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+        # Файл копируется во временный и заменяет его целиком - в хранилище не бывает недописанных файлов
+        tmp_path = f'{dest}.tmp'
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, dest)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def _size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
+    def _open(self, key: str) -> BinaryIO:
+        return open(self._path(key), 'rb')
+
+    def _delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        return key if os.path.isabs(key) else self._path(key)
+
+
+# S3-совместимое хранилище
+class S3BlobStore(BlobStore):
+    """ S3-совместимое хранилище (AWS S3, MinIO): объекты '<prefix><ключ>' в бакете. """
+
+    def __init__(self, bucket: str = S3_BUCKET, prefix: str = S3_PREFIX, endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+                 access_key: Optional[str] = S3_ACCESS_KEY, secret_key: Optional[str] = S3_SECRET_KEY,
+                 region: Optional[str] = S3_REGION) -> None:
+
+        # Импорт внутри класса: пакет boto3 нужен только при AUDIO_STORE=s3
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError('Для хранилища аудио AUDIO_STORE=s3 нужен пакет boto3: pip install boto3') from e
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client('s3', endpoint_url=endpoint_url or None, aws_access_key_id=access_key or None,
+                                   aws_secret_access_key=secret_key or None, region_name=region or None)
+        self._client_error = ClientError
+
+    def _name(self, key: str) -> str:
+        return f'{self.prefix}{key}'
+
+    def _put(self, key: str, path: str) -> None:
+        self.client.upload_file(path, self.bucket, self._name(key))
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._name(key))
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def _size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self._name(key))['ContentLength']
+
+    def _open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._name(key))['Body']
+
+    def _delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._name(key))
+
+
+# Создание хранилища по настройкам
+def create_blob_store(store_type: str = AUDIO_STORE) -> BlobStore:
+    """
+    Создание хранилища аудиозаписей.
+
+    :param store_type: Тип хранилища: local | s3
+    :return: Объект хранилища
+    """
+    if store_type == 's3':
+        return S3BlobStore()
+    return LocalBlobStore()
+
+
+# Перенос аудиозаписей, сохранённых до появления хранилища
+async def migrate_legacy_audios(session: AsyncSession) -> int:
+    """
+    Перенос в хранилище аудиофайлов из записей SavedAudio с абсолютным путём: файл сохраняется в хранилище, в запись
+    записывается ключ, после этого файл удаляется с диска. Отсутствующие на диске файлы пропускаются.
+
+    :param session: Сессия БД
+    :return: Кол-во перенесённых файлов
+    """
+    moved = 0
+    for audio_id, file_path in await DataBase.get_audio_file_paths(session):
+        if not os.path.isabs(file_path):
+            continue
+        try:
+            key = await audio_store.save(file_path)
+        except FileNotFoundError:
+            print(f'Аудиофайл не найден при переносе в хранилище: {file_path}')
+            continue
+        await DataBase.set_audio_file_path(session, audio_id, key, file_name=os.path.basename(file_path))
+        await audio_store.remove(file_path)
+        moved += 1
+    return moved
+
+
+# Общее хранилище аудиозаписей бота
+audio_store = create_blob_store()
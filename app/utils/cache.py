@@ -0,0 +1,142 @@
+"""
+Небольшой внутрипроцессный кеш с ограничением по размеру (LRU) и времени жизни записей (TTL).
+
+INFO:
+    Используется для общих кешей DataBase (слова, аутентификация чатов, настройки пользователей). Загрузка значения
+    при промахе - get_or_load(), методы DataBase, изменяющие данные, обновляют (set) или сбрасывают (invalidate) запись.
+"""
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, Iterator, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+_MISSING = object()                                             # Маркер отсутствия записи в кеше
+
+
+# LRU-кеш с временем жизни записей
+class TTLCache(Generic[K, V]):
+    """
+    LRU-кеш с временем жизни записей.
+    При превышении maxsize вытесняется запись, к которой дольше всего не обращались; запись старше ttl секунд
+    считается отсутствующей (ttl=None - без ограничения по времени).
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()        # {ключ: (время записи, значение)}
+
+        # Счетчики для метрик
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._data))
+
+    # Поиск записи с проверкой времени жизни
+    def _lookup(self, key: K):
+        """ Поиск записи с проверкой времени жизни. Просроченная запись удаляется. """
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+        stored_at, value = item
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            return _MISSING
+        return value
+
+    # Получить значение из кеша
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Получить значение из кеша с отметкой обращения.
+
+        :param key: Ключ
+        :param default: Значение при отсутствии записи
+        :return: Значение из кеша или default
+        """
+        value = self._lookup(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    # Получить значение из кеша без проверки времени жизни
+    def peek(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Получить значение из кеша без проверки времени жизни и без отметки обращения (просроченная запись не удаляется).
+
+        :param key: Ключ
+        :param default: Значение при отсутствии записи
+        :return: Значение из кеша или default
+        """
+        item = self._data.get(key)
+        return default if item is None else item[1]
+
+    # Получить значение из кеша или загрузить его
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[Optional[V]]],
+                          cache_none: bool = False) -> Optional[V]:
+        """
+        Получить значение из кеша, при отсутствии - загрузить через loader() и сохранить в кеш.
+
+        :param key: Ключ
+        :param loader: Корутинная функция загрузки значения (напр. запрос к БД)
+        :param cache_none: Сохранять в кеш результат None (отсутствие данных в источнике)
+        :return: Значение из кеша или загруженное значение
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = await loader()
+        if value is not None or cache_none:
+            self.set(key, value)
+        return value
+
+    # Записать значение в кеш
+    def set(self, key: K, value: V) -> None:
+        """
+        Записать значение в кеш. При переполнении вытесняется самая давняя по обращению запись.
+
+        :param key: Ключ
+        :param value: Значение
+        :return: None
+        """
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    # Удалить запись из кеша
+    def invalidate(self, key: K) -> None:
+        """ Удалить запись из кеша (при изменении данных-источника). """
+        self._data.pop(key, None)
+
+    # Очистить кеш
+    def clear(self) -> None:
+        """ Удалить все записи из кеша. """
+        self._data.clear()
+
+    # Метрики кеша
+    def stats(self) -> dict[str, float]:
+        """
+        Метрики кеша.
+
+        :return: Словарь: размер, лимит, попадания, промахи, доля попаданий
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,194 @@
+"""
+Хранилище данных чатов в памяти бота: один объект ChatSession на чат с вытеснением неактивных чатов.
+
+INFO:
+1. Раньше данные чатов хранились в атрибутах бота в виде отдельных словарей с ключом по id чата (auxiliary_msgs[...],
+   reply_markup_save и т.д.), которые никогда не очищались. Теперь все данные чата лежат в одном
+   объекте ChatSession, а хранилище ChatSessionStore ограничено по размеру:
+    - LRU: при превышении CHAT_SESSIONS_MAX_SIZE вытесняется чат, к которому дольше всего не обращались;
+    - idle TTL: чаты без обращений дольше CHAT_SESSION_IDLE_TTL_MINUTES удаляются фоновой задачей планировщика.
+2. Для совместимости с кодом обработчиков атрибуты бота остались, но теперь это представления ChatFieldView одного поля
+   всех ChatSession: bot.auxiliary_msgs['user_msgs'][chat_id] читает/пишет ChatSession(chat_id).user_msgs.
+   Аутентификация чатов (bot.auth_user_id) хранится отдельно - см. app/utils/auth_sessions.py.
+   Обращение к отсутствующему чату создаёт ChatSession со значениями по умолчанию (пустые списки сообщений, новая
+   история тестов), поэтому вытеснение чата не приводит к KeyError в обработчиках.
+3. Метрики размера хранилища - ChatSessionStore.metrics().
+"""
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Iterator, Optional
+
+from app.settings import TEST_TYPES, CHAT_SESSIONS_MAX_SIZE, CHAT_SESSION_IDLE_TTL_MINUTES
+from app.utils.ring_buffer import WordHistoryRing
+
+
+# Данные одного чата
+class ChatSession:
+    """ Все данные одного чата, которые бот хранит в памяти между апдейтами. """
+
+    __slots__ = (
+        'chat_id', 'last_access', 'cbq_msg', 'cbq', 'statistic_msg', 'user_msgs', 'example_msgs',
+        'add_or_edit_word', 'reply_markup_save', 'markup_user_topics', 'word_search_keywords', 'topic_search_keywords',
+        'tests_word_navi',
+    )
+
+    def __init__(self, chat_id: int) -> None:
+        self.chat_id = chat_id
+        self.last_access = time.monotonic()                 # Время последнего обращения (для вытеснения по TTL)
+        self.cbq_msg = None                                 # Сообщение с баннером
+        self.cbq = None                                     # Последний callback-запрос
+        self.statistic_msg = None                           # Сообщение со статистикой тестирования
+        self.user_msgs: list = []                           # Вспомогательные сообщения к удалению
+        self.example_msgs: list = []                        # Сообщения с примерами контекста
+        self.add_or_edit_word: dict = {}                    # {'step_name': <msg_obj>} при добавлении/редактировании
+        self.reply_markup_save = None                       # Сохранённая клавиатура
+        self.markup_user_topics = None                      # Клавиатура с темами
+        self.word_search_keywords = None                    # Ключевое слово поиска WordPhrase
+        self.topic_search_keywords = None                   # Ключевое слово поиска Topic
+        self.tests_word_navi: dict = {                      # История слов и индекс навигации по типам тестов
+            test_type: {'history': WordHistoryRing(), 'navi_index': 1} for test_type in TEST_TYPES
+        }
+
+    # Количество сообщений и клавиатур, удерживаемых чатом
+    def held_objects_count(self) -> int:
+        """ Количество сообщений, callback-запросов и клавиатур, удерживаемых в памяти для чата. """
+        single = (self.cbq_msg, self.cbq, self.statistic_msg, self.reply_markup_save, self.markup_user_topics)
+        return (sum(obj is not None for obj in single) + len(self.user_msgs) + len(self.example_msgs)
+                + len(self.add_or_edit_word))
+
+
+# Хранилище данных чатов с LRU и вытеснением по времени простоя
+class ChatSessionStore:
+    """ Хранилище ChatSession с ограничением по размеру (LRU) и вытеснением неактивных чатов (idle TTL). """
+
+    def __init__(self, max_size: int = CHAT_SESSIONS_MAX_SIZE,
+                 idle_ttl: float = CHAT_SESSION_IDLE_TTL_MINUTES * 60) -> None:
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+
+        # Порядок словаря - порядок обращений: в начале чат, к которому дольше всего не обращались
+        self._sessions: OrderedDict[int, ChatSession] = OrderedDict()
+
+        # Счетчики для метрик
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._sessions
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._sessions))
+
+    # Получить данные чата, при отсутствии - создать
+    def get(self, chat_id: int) -> ChatSession:
+        """
+        Получить данные чата с отметкой обращения. При отсутствии создаёт новый ChatSession, при переполнении
+        хранилища вытесняет самый давний по обращению чат.
+
+        :param chat_id: ID чата
+        :return: Объект ChatSession
+        """
+        session = self.peek(chat_id)
+        if session is None:
+            session = ChatSession(chat_id)
+            self._sessions[chat_id] = session
+            self.created += 1
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+                self.evicted_lru += 1
+        return session
+
+    # Получить данные чата без создания
+    def peek(self, chat_id: int) -> Optional[ChatSession]:
+        """
+        Получить данные чата с отметкой обращения, не создавая новый ChatSession.
+
+        :param chat_id: ID чата
+        :return: Объект ChatSession или None
+        """
+        session = self._sessions.get(chat_id)
+        if session is not None:
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(chat_id)
+        return session
+
+    # Удалить данные чата
+    def drop(self, chat_id: int) -> None:
+        """ Удалить данные чата из хранилища. """
+        self._sessions.pop(chat_id, None)
+
+    # Удалить данные неактивных чатов
+    def evict_idle(self) -> int:
+        """
+        Удалить данные чатов, к которым не обращались дольше idle_ttl секунд.
+        Чаты упорядочены по времени обращения, поэтому проверка идёт с начала и останавливается на первом активном.
+
+        :return: Количество удалённых чатов
+        """
+        deadline = time.monotonic() - self.idle_ttl
+        evicted = 0
+        while self._sessions:
+            chat_id, session = next(iter(self._sessions.items()))
+            if session.last_access > deadline:
+                break
+            del self._sessions[chat_id]
+            evicted += 1
+        self.evicted_idle += evicted
+        return evicted
+
+    # Метрики размера хранилища
+    def metrics(self) -> dict[str, int]:
+        """
+        Метрики размера хранилища.
+
+        :return: Словарь: количество чатов, лимит, удерживаемые сообщения/клавиатуры, счетчики созданий и вытеснений
+        """
+        return {
+            'sessions': len(self._sessions),
+            'max_size': self.max_size,
+            'held_objects': sum(session.held_objects_count() for session in self._sessions.values()),
+            'created': self.created,
+            'evicted_lru': self.evicted_lru,
+            'evicted_idle': self.evicted_idle,
+        }
+
+
+# Словарь-представление одного поля данных всех чатов
+class ChatFieldView(MutableMapping):
+    """
+    Словарь-представление одного поля ChatSession всех чатов: {chat_id: значение поля}.
+    Сохраняет интерфейс прежних словарей бота (view[chat_id], view[chat_id] = ..., view.get(chat_id)).
+    """
+
+    def __init__(self, store: ChatSessionStore, field: str) -> None:
+        self.store = store
+        self.field = field
+
+    def __getitem__(self, chat_id: int) -> Any:
+        return getattr(self.store.get(chat_id), self.field)
+
+    def __setitem__(self, chat_id: int, value: Any) -> None:
+        setattr(self.store.get(chat_id), self.field, value)
+
+    def __delitem__(self, chat_id: int) -> None:
+        session = self.store.peek(chat_id)
+        if session is None:
+            raise KeyError(chat_id)
+        setattr(session, self.field, getattr(ChatSession(chat_id), self.field))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.store)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def get(self, chat_id: int, default: Any = None) -> Any:
+        """ Значение поля для чата без создания ChatSession. None (не заданное значение) заменяется на default. """
+        session = self.store.peek(chat_id)
+        value = getattr(session, self.field) if session is not None else None
+        return default if value is None else value
@@ -3,6 +3,9 @@
 """
 from aiogram import Bot as AiogramBot
 
+from app.utils.auth_sessions import AuthUserMap
+from app.utils.chat_sessions import ChatSessionStore, ChatFieldView
+
 
 class Bot(AiogramBot):
     """
@@ -12,10 +15,14 @@ class Bot(AiogramBot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Добавляем боту дополнительные атрибуты:
+        # Добавляем боту дополнительные атрибуты.
+        # Все данные чата хранятся в одном объекте ChatSession внутри хранилища с LRU и вытеснением неактивных чатов,
+        # атрибуты ниже - словари-представления отдельных полей всех чатов (подробнее в app/utils/chat_sessions.py).
+        self.chat_sessions = ChatSessionStore()
 
         # Для отметки авторизации в системе. Структура словаря: {'chat_id': 'User.id', 'chat_id2': 'User.id', ...}
-        self.auth_user_id: dict = {}
+        # Представление кеша привязок чатов из таблицы UserChat (подробнее в app/utils/auth_sessions.py)
+        self.auth_user_id = AuthUserMap()
 
         # Для хранения временных сообщений. Словарь с различными ключами по типу сообщений.
         # Внутри словаря вложенные словари с ключами по id чата (подробнее ниже)
@@ -23,46 +30,47 @@ class Bot(AiogramBot):
 
         # Сохранение сообщения с баннером, запись редактируемых callback-messages
         # Структура словаря: {'chat_id': None | <msg_obj>, 'chat_id2': None | <msg_obj>, ...}
-        self.auxiliary_msgs['cbq_msg'] = {}
+        self.auxiliary_msgs['cbq_msg'] = ChatFieldView(self.chat_sessions, 'cbq_msg')
 
         # Сохранение callback-запросов и отправка через них системных сообщений
         # Структура словаря: {'chat_id': None | <cbq_obj>, 'chat_id2': None | <cbq_obj>, ...}
-        self.auxiliary_msgs['cbq'] = {}
+        self.auxiliary_msgs['cbq'] = ChatFieldView(self.chat_sessions, 'cbq')
 
         # Сохранение сообщений со статистикой
         # Структура словаря: {'chat_id': None | <msg_obj>, 'chat_id2': None | <msg_obj>, ...}
-        self.auxiliary_msgs['statistic_msg'] = {}  # Для хранения сообщения со статистикой
+        self.auxiliary_msgs['statistic_msg'] = ChatFieldView(self.chat_sessions, 'statistic_msg')
 
         # Сохранение списка пользовательских сообщений к удалению (ввод, аудио, страницы и т.д.)
         # Структура словаря: {'chat_id': [< msg_obj >, < msg_obj2 >, ...], 'chat_id2': [< msg_obj >, ...], ...}
-        self.auxiliary_msgs['user_msgs'] = {}
+        self.auxiliary_msgs['user_msgs'] = ChatFieldView(self.chat_sessions, 'user_msgs')
 
         # Сохранение сообщений с примерами контекста для удаления комплектом
         # Структура словаря: {'chat_id': [< msg_obj >, < msg_obj2 >, ...], 'chat_id2': [< msg_obj >, ...], ...}
-        self.auxiliary_msgs['example_msgs'] = {}
+        self.auxiliary_msgs['example_msgs'] = ChatFieldView(self.chat_sessions, 'example_msgs')
 
         # Сохранение сообщений редактирования, где ключ - имя шага State(), значение - сообщение с новыми данными
         # Для привязки сообщений к шагу FSM-класса и обработке действия "Шаг назад"
         # Структура словаря: {'chat_id': {'step_name': <msg_obj>, ...}, 'chat_id2': {'step_name': <msg_obj>, ...}, ...}
-        self.auxiliary_msgs['add_or_edit_word'] = {}
+        self.auxiliary_msgs['add_or_edit_word'] = ChatFieldView(self.chat_sessions, 'add_or_edit_word')
 
         # Для хранения клавиатур:
         # Структура словаря: {'chat_id': < markup_obj >, 'chat_id2': < markup_obj >, ...}
-        self.reply_markup_save = {}                                         # Любая клавиатура
-        self.markup_user_topics = {}                                        # Для хранения клавиатуры с темами
+        self.reply_markup_save = ChatFieldView(self.chat_sessions, 'reply_markup_save')          # Любая клавиатура
+        self.markup_user_topics = ChatFieldView(self.chat_sessions, 'markup_user_topics')        # Клавиатура с темами
 
         # Для хранения ключевых слов для поиска
         # Структура словаря: {'chat_id': 'keyword', 'chat_id2': 'keyword', ...}
-        self.word_search_keywords = {}                                      # Поиск WordPhrase
-        self.topic_search_keywords = {}                                     # Поиск Topic
+        self.word_search_keywords = ChatFieldView(self.chat_sessions, 'word_search_keywords')    # Поиск WordPhrase
+        self.topic_search_keywords = ChatFieldView(self.chat_sessions, 'topic_search_keywords')  # Поиск Topic
 
         # Для хранения истории навигации слов в тестированиях.
         # Словарь с ключом по id чата и вложенным словарем с ключом по типу теста, с внутренним словарём
         #  истории слов и текущим индексом слова
         # Структура словаря:
         #     {'chat_id': {
-        #                   'en_ru_audio': {'history': {1: <word_obj>, 2: <word_obj>, ...}, 'navi_index': 3},
-        #                   'en_ru_word': {'history': {}, 'navi_index': 1}
+        #                   'en_ru_audio': {'history': WordHistoryRing({1: <word_id>, 2: <word_id>, ...}),
+        #                                   'navi_index': 3},
+        #                   'en_ru_word': {'history': WordHistoryRing(), 'navi_index': 1}
         #                 }
         #     }
-        self.tests_word_navi = {}
+        self.tests_word_navi = ChatFieldView(self.chat_sessions, 'tests_word_navi')
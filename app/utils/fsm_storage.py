@@ -0,0 +1,290 @@
+"""
+Хранилища FSM-состояний с сохранением данных между перезапусками бота.
+
+INFO:
+    Тип хранилища выбирается переменной окружения FSM_STORAGE:
+        - memory: стандартное хранилище aiogram в памяти процесса (по умолчанию);
+        - sqlite: отдельный от основной БД файл SQLite (FSM_SQLITE_PATH) в режиме WAL. Изменения копятся в буфере и
+          записываются в файл пакетно, одной транзакцией, раз в FSM_FLUSH_INTERVAL секунд;
+        - redis: Redis по адресу REDIS_URL, позволяет разделять состояния между несколькими процессами бота.
+
+    Данные state сериализуются через pickle: обработчики хранят в них ORM-объекты, кортежи, словари с int-ключами и
+    сообщения aiogram, которые не переводятся в JSON. Объект бота внутри сообщений в файл не пишется, а подставляется
+    текущий при загрузке, чтобы у восстановленных сообщений работали .edit_text(), .delete() и т.д.
+"""
+import asyncio
+import io
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+import aiosqlite
+from aiogram import Bot
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.settings import FSM_STORAGE, FSM_SQLITE_PATH, FSM_FLUSH_INTERVAL, FSM_FLUSH_BATCH_SIZE, REDIS_URL
+
+
+_BOT_PERSISTENT_ID = 'bot'                          # Метка, которой в pickle заменяется объект бота
+
+
+# Pickler, не сериализующий объект бота
+class _StatePickler(pickle.Pickler):
+    """ Pickler для данных state. Объект бота (в т.ч. вложенный в сообщения aiogram) заменяется меткой. """
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        if isinstance(obj, Bot):
+            return _BOT_PERSISTENT_ID
+        return None
+
+
+# Unpickler, подставляющий текущий объект бота
+class _StateUnpickler(pickle.Unpickler):
+    """ Unpickler для данных state. Вместо метки подставляет переданный объект бота. """
+
+    def __init__(self, file: io.BytesIO, bot: Optional[Bot]) -> None:
+        super().__init__(file)
+        self.bot = bot
+
+    def persistent_load(self, pid: Any) -> Any:
+        if pid == _BOT_PERSISTENT_ID:
+            return self.bot
+        raise pickle.UnpicklingError(f'Неизвестный persistent id: {pid}')
+
+
+# Сериализация данных state в байты
+def dump_state_data(data: Dict[str, Any]) -> bytes:
+    """
+    Сериализация данных state в байты.
+
+    :param data: Словарь с данными state
+    :return: Байтовое представление данных
+    """
+    buffer = io.BytesIO()
+    _StatePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(data)
+    return buffer.getvalue()
+
+
+# Восстановление данных state из байтов
+def load_state_data(raw: bytes, bot: Optional[Bot] = None) -> Dict[str, Any]:
+    """
+    Восстановление данных state из байтов.
+
+    :param raw: Байтовое представление данных
+    :param bot: Объект бота, который будет подставлен в восстановленные сообщения aiogram
+    :return: Словарь с данными state
+    """
+    return _StateUnpickler(io.BytesIO(raw), bot).load()
+
+
+# Хранилище FSM в отдельном файле SQLite
+class SQLiteStorage(BaseStorage):
+    """
+    Хранилище FSM в отдельном файле SQLite (режим WAL).
+
+    Записи копятся в буфере self._pending ({ключ: значение | None}, где None - удаление) и сбрасываются в файл пакетно
+    фоновой задачей. Чтение сначала проверяет буфер, поэтому незаписанные изменения сразу видны обработчикам.
+    """
+
+    def __init__(
+            self, path: str = FSM_SQLITE_PATH, bot: Optional[Bot] = None, key_builder: Optional[KeyBuilder] = None,
+            flush_interval: float = FSM_FLUSH_INTERVAL, flush_batch_size: int = FSM_FLUSH_BATCH_SIZE) -> None:
+        self.path = path
+        self.bot = bot
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+
+        self._connection: Optional[aiosqlite.Connection] = None
+        self._pending: Dict[str, Optional[bytes]] = {}          # Незаписанные изменения
+        self._in_flight: Dict[str, Optional[bytes]] = {}        # Изменения, записываемые в данный момент
+        self._flush_task: Optional[asyncio.Task] = None         # Фоновая задача пакетной записи
+        self._flush_requested = asyncio.Event()                 # Запрос внеочередной записи (переполнение буфера)
+        self._closing = False                                   # Остановка фоновой записи (close)
+        self._connect_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+
+    # Подключение к файлу и создание таблицы при первом обращении
+    async def _get_connection(self) -> aiosqlite.Connection:
+        """ Подключение к файлу SQLite и создание таблицы при первом обращении. """
+        if self._connection is not None:
+            return self._connection
+
+        async with self._connect_lock:
+            if self._connection is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                connection = await aiosqlite.connect(self.path)
+                await connection.execute('PRAGMA journal_mode=WAL')
+                await connection.execute('PRAGMA synchronous=NORMAL')
+                await connection.execute(
+                    'CREATE TABLE IF NOT EXISTS fsm_storage (key TEXT PRIMARY KEY, value BLOB NOT NULL)'
+                )
+                await connection.commit()
+                self._connection = connection
+                self._flush_task = asyncio.create_task(self._flush_loop())
+        return self._connection
+
+    # Фоновая пакетная запись изменений
+    async def _flush_loop(self) -> None:
+        """
+        Фоновая пакетная запись буфера изменений в файл: по интервалу или при переполнении буфера.
+        Завершается после записи буфера при остановке хранилища (close), а не отменой посреди транзакции.
+        """
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f'Ошибка записи FSM-хранилища: {e}')
+
+    # Запись накопленных изменений одной транзакцией
+    async def flush(self) -> None:
+        """ Запись накопленных изменений в файл одной транзакцией. """
+        if not self._pending or self._connection is None:
+            return
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            self._in_flight = batch
+            upserts = [(key, value) for key, value in batch.items() if value is not None]
+            deletes = [(key,) for key, value in batch.items() if value is None]
+            try:
+                if upserts:
+                    await self._connection.executemany(
+                        'INSERT INTO fsm_storage (key, value) VALUES (?, ?) '
+                        'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                        upserts
+                    )
+                if deletes:
+                    await self._connection.executemany('DELETE FROM fsm_storage WHERE key = ?', deletes)
+                await self._connection.commit()
+
+            # При ошибке или отмене возвращаем пакет в буфер, не затирая более свежие изменения
+            except BaseException:
+                self._pending = {**batch, **self._pending}
+                try:
+                    await self._connection.rollback()
+                except Exception:
+                    pass
+                raise
+            finally:
+                self._in_flight = {}
+
+    # Запись значения в буфер
+    async def _write(self, key: str, value: Optional[bytes]) -> None:
+        """ Запись значения в буфер изменений (None - удаление ключа). """
+        await self._get_connection()
+        self._pending[key] = value
+        if len(self._pending) >= self.flush_batch_size:
+            self._flush_requested.set()
+
+    # Чтение значения из буфера или файла
+    async def _read(self, key: str) -> Optional[bytes]:
+        """ Чтение значения: сначала из буфера незаписанных (или записываемых) изменений, затем из файла. """
+        connection = await self._get_connection()
+        if key in self._pending:
+            return self._pending[key]
+        if key in self._in_flight:
+            return self._in_flight[key]
+        async with connection.execute('SELECT value FROM fsm_storage WHERE key = ?', (key,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        await self._write(self.key_builder.build(key, 'state'), state.encode() if state is not None else None)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        value = await self._read(self.key_builder.build(key, 'state'))
+        return value.decode() if value is not None else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._write(self.key_builder.build(key, 'data'), dump_state_data(data) if data else None)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        value = await self._read(self.key_builder.build(key, 'data'))
+        return load_state_data(value, self.bot) if value is not None else {}
+
+    async def close(self) -> None:
+        """ Остановка фоновой записи, сброс буфера в файл и закрытие соединения. """
+        if self._flush_task is not None:
+
+            # Задача не отменяется, а завершается сама после текущей записи - пакет не теряется посреди транзакции
+            self._closing = True
+            self._flush_requested.set()
+            await self._flush_task
+            self._flush_task = None
+        if self._connection is not None:
+            await self.flush()
+            await self._connection.close()
+            self._connection = None
+
+
+# Создание Redis-хранилища с сериализацией через pickle
+def create_redis_storage(url: str = REDIS_URL, bot: Optional[Bot] = None) -> BaseStorage:
+    """
+    Создание Redis-хранилища FSM с сериализацией данных через pickle.
+
+    :param url: Адрес Redis
+    :param bot: Объект бота, который будет подставлен в восстановленные сообщения aiogram
+    :return: Объект хранилища
+    """
+
+    # Импорт внутри функции: пакет redis нужен только при FSM_STORAGE=redis
+    from aiogram.fsm.storage.redis import RedisStorage
+
+    # Стандартный RedisStorage переводит данные в JSON-строку, поэтому переопределяем запись и чтение данных
+    class PickleRedisStorage(RedisStorage):
+        """ RedisStorage с сериализацией данных state через pickle. """
+
+        async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+            redis_key = self.key_builder.build(key, 'data')
+            if not data:
+                await self.redis.delete(redis_key)
+                return
+            await self.redis.set(redis_key, dump_state_data(data), ex=self.data_ttl)
+
+        async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+            value = await self.redis.get(self.key_builder.build(key, 'data'))
+            return load_state_data(value, bot) if value is not None else {}
+
+    return PickleRedisStorage.from_url(url, key_builder=DefaultKeyBuilder(with_destiny=True))
+
+
+# Создание хранилища FSM по настройкам окружения
+def create_fsm_storage(bot: Optional[Bot] = None, storage_type: str = FSM_STORAGE) -> BaseStorage:
+    """
+    Создание хранилища FSM по типу из настроек окружения (FSM_STORAGE).
+
+    :param bot: Объект бота, который будет подставлен в восстановленные из хранилища сообщения aiogram
+    :param storage_type: Тип хранилища: memory | sqlite | redis
+    :return: Объект хранилища
+    """
+    if storage_type == 'sqlite':
+        return SQLiteStorage(FSM_SQLITE_PATH, bot=bot)
+    if storage_type == 'redis':
+        return create_redis_storage(REDIS_URL, bot=bot)
+    if storage_type == 'memory':
+        return MemoryStorage()
+    raise ValueError(f'Неизвестный тип FSM-хранилища: {storage_type}')
+
+
+# Кол-во записей хранилища FSM в памяти процесса
+def storage_size(storage: BaseStorage) -> int:
+    """
+    Кол-во записей хранилища FSM в памяти процесса (для отчёта профилирования памяти).
+
+    :param storage: Хранилище FSM
+    :return: memory - кол-во чатов в хранилище, sqlite - кол-во незаписанных изменений в буфере, redis - 0
+    """
+    if isinstance(storage, MemoryStorage):
+        return len(storage.storage)
+    if isinstance(storage, SQLiteStorage):
+        return len(storage._pending) + len(storage._in_flight)
+    return 0
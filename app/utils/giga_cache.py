@@ -0,0 +1,162 @@
+"""
+Кеш ответов GigaChat в отдельном файле SQLite.
+
+INFO:
+    Ученики часто задают одни и те же вопросы ("difference between make and do"), поэтому ответ на вопрос сохраняется
+    и при повторе выдаётся без обращения к GigaChat.
+    - Ключ - хеш версии системного промпта (GIGA_PROMPT_VERSION, меняется вместе с GIGA_SYSTEM_PROMPT) и
+      нормализованного текста вопроса (регистр, пробелы, кавычки и знаки препинания в конце не учитываются).
+    - TTL: ответы старше GIGA_CACHE_TTL_DAYS не выдаются и удаляются задачей планировщика.
+    - LRU: при превышении GIGA_CACHE_MAX_SIZE удаляются ответы, которые дольше всего не запрашивались.
+    - Счетчики попаданий/промахов - GigaResponseCache.stats().
+"""
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Optional
+
+import aiosqlite
+
+from app.settings import GIGA_CACHE_PATH, GIGA_CACHE_TTL_DAYS, GIGA_CACHE_MAX_SIZE, GIGA_PROMPT_VERSION
+
+
+# Нормализация текста вопроса для ключа кеша
+def normalize_question(text: str) -> str:
+    """
+    Нормализация текста вопроса: нижний регистр, единичные пробелы, без кавычек и знаков препинания по краям.
+
+    :param text: Текст вопроса
+    :return: Нормализованный текст
+    """
+    text = re.sub(r'\s+', ' ', text.lower().replace('ё', 'е'))
+    text = re.sub(r'["«»“”„]', '', text)
+    return text.strip(' .,!?;:…')
+
+
+# Кеш ответов GigaChat
+class GigaResponseCache:
+    """ Кеш ответов GigaChat в файле SQLite с ограничением по времени жизни (TTL) и размеру (LRU). """
+
+    def __init__(self, path: str = GIGA_CACHE_PATH, ttl: float = GIGA_CACHE_TTL_DAYS * 24 * 60 * 60,
+                 max_size: int = GIGA_CACHE_MAX_SIZE, prompt_version: str = GIGA_PROMPT_VERSION) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.prompt_version = prompt_version
+
+        self._connection: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+
+        # Счетчики для метрик
+        self.hits = 0
+        self.misses = 0
+
+    # Подключение к файлу и создание таблицы при первом обращении
+    async def _get_connection(self) -> aiosqlite.Connection:
+        """ Подключение к файлу SQLite и создание таблицы при первом обращении. """
+        if self._connection is not None:
+            return self._connection
+
+        async with self._connect_lock:
+            if self._connection is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                connection = await aiosqlite.connect(self.path)
+                await connection.execute('PRAGMA journal_mode=WAL')
+                await connection.execute(
+                    'CREATE TABLE IF NOT EXISTS giga_cache (key TEXT PRIMARY KEY, question TEXT NOT NULL, '
+                    'response TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)'
+                )
+                await connection.execute(
+                    'CREATE INDEX IF NOT EXISTS ix_giga_cache_last_access ON giga_cache (last_access)'
+                )
+                await connection.commit()
+                self._connection = connection
+        return self._connection
+
+    # Ключ кеша для вопроса
+    def make_key(self, question: str) -> str:
+        """ Ключ кеша: хеш версии системного промпта и нормализованного вопроса. """
+        return hashlib.sha256(f'{self.prompt_version}\n{normalize_question(question)}'.encode()).hexdigest()
+
+    # Получить ответ из кеша
+    async def get(self, question: str) -> Optional[str]:
+        """
+        Получить сохранённый ответ на вопрос с отметкой обращения.
+
+        :param question: Текст вопроса
+        :return: Текст ответа или None, если ответа нет или он устарел
+        """
+        connection = await self._get_connection()
+        key, now = self.make_key(question), time.time()
+        async with connection.execute(
+                'SELECT response FROM giga_cache WHERE key = ? AND created > ?', (key, now - self.ttl)) as cursor:
+            row = await cursor.fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        await connection.execute('UPDATE giga_cache SET last_access = ? WHERE key = ?', (now, key))
+        await connection.commit()
+        return row[0]
+
+    # Сохранить ответ в кеш
+    async def set(self, question: str, response: str) -> None:
+        """
+        Сохранить ответ на вопрос. При превышении размера кеша удаляются самые давние по обращению ответы.
+
+        :param question: Текст вопроса
+        :param response: Текст ответа
+        :return: None
+        """
+        connection = await self._get_connection()
+        now = time.time()
+        await connection.execute(
+            'INSERT INTO giga_cache (key, question, response, created, last_access) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET response = excluded.response, created = excluded.created, '
+            'last_access = excluded.last_access',
+            (self.make_key(question), question, response, now, now)
+        )
+        await connection.execute(
+            'DELETE FROM giga_cache WHERE key IN ('
+            'SELECT key FROM giga_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)', (self.max_size,)
+        )
+        await connection.commit()
+
+    # Удалить устаревшие ответы
+    async def purge_expired(self) -> int:
+        """
+        Удалить ответы старше времени жизни.
+
+        :return: Количество удалённых ответов
+        """
+        connection = await self._get_connection()
+        cursor = await connection.execute('DELETE FROM giga_cache WHERE created <= ?', (time.time() - self.ttl,))
+        await connection.commit()
+        return cursor.rowcount
+
+    # Метрики кеша
+    def stats(self) -> dict[str, float]:
+        """
+        Метрики кеша.
+
+        :return: Словарь: попадания, промахи, доля попаданий
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+    async def close(self) -> None:
+        """ Закрытие соединения с файлом. """
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+# Общий для бота кеш ответов GigaChat
+giga_cache = GigaResponseCache()
@@ -0,0 +1,145 @@
+"""
+История диалога с GIGACHAT с ограничением по бюджету токенов.
+
+INFO:
+1. История хранится в state FSM под ключом 'giga_memory' (запись GigaMemory) и сохраняется вместе с остальными
+   данными state (в т.ч. во внешнем хранилище SQLite/Redis): резюме ранних реплик + последние реплики в виде
+   кортежа (роль, текст). Длинные реплики (напр. вставленный текст) сохраняются усечёнными до
+   GIGA_MEMORY_TURN_MAX_CHARS символов.
+2. Реплики добавляются через deque(maxlen=GIGA_MEMORY_MAX_TURNS), поэтому история не растёт больше лимита.
+3. Когда реплик больше GIGA_MEMORY_MAX_TURNS - GIGA_MEMORY_KEEP_TURNS или история превышает GIGA_MEMORY_TOKEN_BUDGET,
+   все реплики, кроме последних GIGA_MEMORY_KEEP_TURNS, сжимаются GigaChat в резюме (вместе с предыдущим резюме).
+   При ошибке сжатия ранние реплики просто отбрасываются.
+4. При формировании промпта реплики, не помещающиеся в бюджет токенов, отбрасываются начиная с самых старых.
+   Токены оцениваются по длине текста (GIGA_CHARS_PER_TOKEN), без обращения к API.
+"""
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_gigachat import GigaChat
+
+from app.settings import GIGA_SYSTEM_PROMPT, GIGA_SUMMARY_PROMPT, GIGA_MEMORY_MAX_TURNS, GIGA_MEMORY_KEEP_TURNS, \
+    GIGA_MEMORY_TOKEN_BUDGET, GIGA_MEMORY_TURN_MAX_CHARS, GIGA_CHARS_PER_TOKEN, GIGA_REQUEST_TIMEOUT
+from app.utils.gigachat_assistant import giga_semaphore
+
+
+ROLE_USER = 'user'
+ROLE_ASSISTANT = 'assistant'
+
+
+# Оценка количества токенов в тексте
+def estimate_tokens(text: str) -> int:
+    """ Оценка количества токенов в тексте по его длине. """
+    return len(text) // GIGA_CHARS_PER_TOKEN + 1
+
+
+# История диалога
+@dataclass(frozen=True, slots=True)
+class GigaMemory:
+    """ История диалога с GigaChat: резюме ранних реплик и последние реплики ((роль, текст), ...). """
+    summary: str = ''
+    turns: tuple[tuple[str, str], ...] = ()
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.summary and not self.turns
+
+    # Количество токенов истории
+    def tokens(self) -> int:
+        """ Оценка количества токенов резюме и реплик. """
+        return estimate_tokens(self.summary) + sum(estimate_tokens(text) for _, text in self.turns)
+
+    # Добавление вопроса и ответа
+    def add_exchange(self, question: str, answer: str) -> 'GigaMemory':
+        """
+        Новая история с добавленными вопросом пользователя и ответом ассистента.
+
+        :param question: Вопрос пользователя
+        :param answer: Ответ ассистента
+        :return: Объект GigaMemory
+        """
+        turns = deque(self.turns, maxlen=GIGA_MEMORY_MAX_TURNS)
+        turns.append((ROLE_USER, _shorten(question)))
+        turns.append((ROLE_ASSISTANT, _shorten(answer)))
+        return GigaMemory(summary=self.summary, turns=tuple(turns))
+
+    # Нужно ли сжатие ранних реплик
+    def needs_summary(self) -> bool:
+        """ Нужно ли сжатие ранних реплик в резюме (история близка к лимиту реплик или превышает бюджет токенов). """
+        if len(self.turns) <= GIGA_MEMORY_KEEP_TURNS:
+            return False
+        return len(self.turns) > GIGA_MEMORY_MAX_TURNS - GIGA_MEMORY_KEEP_TURNS or \
+            self.tokens() > GIGA_MEMORY_TOKEN_BUDGET
+
+
+# Усечение длинной реплики
+def _shorten(text: str) -> str:
+    """ Усечение реплики до GIGA_MEMORY_TURN_MAX_CHARS символов. """
+    if len(text) <= GIGA_MEMORY_TURN_MAX_CHARS:
+        return text
+    return text[:GIGA_MEMORY_TURN_MAX_CHARS - 1] + '…'
+
+
+# Сообщение langchain для реплики
+def _turn_to_message(role: str, text: str) -> BaseMessage:
+    return HumanMessage(content=text) if role == ROLE_USER else AIMessage(content=text)
+
+
+# Формирование промпта с историей диалога
+def build_prompt(memory: Optional[GigaMemory], question: str) -> list[BaseMessage]:
+    """
+    Формирование промпта: системный промпт (+ резюме), последние реплики в пределах бюджета токенов, вопрос.
+
+    :param memory: История диалога или None
+    :param question: Вопрос пользователя
+    :return: Список сообщений для GigaChat
+    """
+    memory = memory or GigaMemory()
+    system_text = GIGA_SYSTEM_PROMPT
+    if memory.summary:
+        system_text += f'\n\nКраткое содержание предыдущей части диалога: {memory.summary}'
+
+    # Берём реплики с конца, пока помещаются в бюджет
+    budget = GIGA_MEMORY_TOKEN_BUDGET - estimate_tokens(memory.summary)
+    history: list[BaseMessage] = []
+    for role, text in reversed(memory.turns):
+        budget -= estimate_tokens(text)
+        if budget < 0:
+            break
+        history.append(_turn_to_message(role, text))
+
+    return [SystemMessage(content=system_text), *reversed(history), HumanMessage(content=question)]
+
+
+# Сжатие ранних реплик в резюме
+async def summarize_memory(giga_chat: GigaChat, memory: GigaMemory) -> GigaMemory:
+    """
+    Сжатие всех реплик, кроме последних GIGA_MEMORY_KEEP_TURNS, в резюме (вместе с предыдущим резюме).
+    При ошибке обращения к GigaChat ранние реплики отбрасываются без резюме.
+
+    :param giga_chat: Объект GigaChat
+    :param memory: История диалога
+    :return: Новая история диалога
+    """
+    older, recent = memory.turns[:-GIGA_MEMORY_KEEP_TURNS], memory.turns[-GIGA_MEMORY_KEEP_TURNS:]
+    dialog = '\n'.join(
+        f'{"Ученик" if role == ROLE_USER else "Репетитор"}: {text}' for role, text in older
+    )
+    if memory.summary:
+        dialog = f'Ранее: {memory.summary}\n{dialog}'
+
+    try:
+        async with giga_semaphore:
+            async with asyncio.timeout(GIGA_REQUEST_TIMEOUT):
+                response = await giga_chat.ainvoke(
+                    [SystemMessage(content=GIGA_SUMMARY_PROMPT), HumanMessage(content=dialog)]
+                )
+        summary = _shorten(response.content.strip())
+    except Exception as e:
+        print(f'Ошибка сжатия истории диалога GigaChat: {e}')
+        summary = memory.summary
+
+    return GigaMemory(summary=summary, turns=recent)
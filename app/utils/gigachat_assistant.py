@@ -1,9 +1,32 @@
 """
-Создание чата с GIGACHAT
+Создание чата с GIGACHAT и получение ответов ассистента.
+
+INFO:
+    Запросы к GigaChat выполняются асинхронно (astream), не блокируя обработку апдейтов других пользователей.
+    Ответ выводится в чат по мере генерации: первая часть отправляется новым сообщением, далее сообщение правится
+    не чаще раза в GIGA_STREAM_EDIT_INTERVAL секунд (ограничение Telegram на частоту правок). Текст длиннее
+    TELEGRAM_MSG_MAX_LENGTH продолжается в следующем сообщении.
+    Одновременно выполняется не более GIGA_MAX_CONCURRENT_REQUESTS запросов, ответ ограничен по времени
+    GIGA_REQUEST_TIMEOUT секунд.
+    Готовый ответ (напр. из кеша ответов app/utils/giga_cache.py) отправляется через send_giga_text().
 """
+import asyncio
+import time
+from typing import Sequence
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+from langchain_core.messages import BaseMessage
 from langchain_gigachat import GigaChat
 
-from app.settings import GIGA_AUTH, GIGA_SCOPE
+from app.settings import GIGA_AUTH, GIGA_SCOPE, GIGA_MAX_CONCURRENT_REQUESTS, GIGA_REQUEST_TIMEOUT, \
+    GIGA_STREAM_EDIT_INTERVAL, TELEGRAM_MSG_MAX_LENGTH
+
+
+# Ограничение количества одновременных запросов к GigaChat
+giga_semaphore = asyncio.Semaphore(GIGA_MAX_CONCURRENT_REQUESTS)
+
+TYPING_CURSOR = ' ▌'                                # Признак продолжающейся генерации в промежуточном тексте
 
 
 # Создание чата с GIGACHAT
@@ -18,3 +41,100 @@ def create_gigachat_assistant() -> GigaChat:
             verify_ssl_certs=False
         )
     return giga_chat
+
+
+# Правка сообщения с ответом
+async def _edit_reply(msg: Message, text: str, is_final: bool) -> None:
+    """
+    Правка сообщения с ответом. Промежуточный текст выводится без разметки (может обрываться внутри тега),
+    итоговый - с разметкой бота, а при ошибке разметки - без неё.
+
+    :param msg: Сообщение с ответом
+    :param text: Текст сообщения
+    :param is_final: Итоговый текст сообщения
+    :return: None
+    """
+    try:
+        if is_final:
+            try:
+                await msg.edit_text(text)
+            except TelegramBadRequest as e:
+                if 'not modified' in str(e):
+                    return
+                await msg.edit_text(text, parse_mode=None)
+        else:
+            await msg.edit_text(text + TYPING_CURSOR, parse_mode=None)
+    except TelegramBadRequest as e:
+        if 'not modified' not in str(e):
+            print(f'Ошибка правки сообщения с ответом GigaChat: {e}')
+
+
+# Отправка готового ответа в чат
+async def send_giga_text(message: Message, text: str, sent_msgs: list[Message]) -> None:
+    """
+    Отправка готового ответа в чат, с разбивкой на сообщения по TELEGRAM_MSG_MAX_LENGTH символов.
+    Текст отправляется с разметкой бота, а при ошибке разметки - без неё.
+
+    :param message: Сообщение пользователя, на которое отвечает ассистент
+    :param text: Текст ответа
+    :param sent_msgs: Список, в который добавляются отправленные сообщения
+    :return: None
+    """
+    for start in range(0, len(text), TELEGRAM_MSG_MAX_LENGTH):
+        part = text[start:start + TELEGRAM_MSG_MAX_LENGTH]
+        try:
+            sent_msgs.append(await message.answer(part))
+        except TelegramBadRequest:
+            sent_msgs.append(await message.answer(part, parse_mode=None))
+
+
+# Получение ответа GigaChat с выводом в чат по мере генерации
+async def stream_giga_response(giga_chat: GigaChat, prompt: Sequence[BaseMessage], message: Message,
+                               sent_msgs: list[Message]) -> str:
+    """
+    Получение ответа GigaChat с выводом в чат по мере генерации.
+
+    :param giga_chat: Объект GigaChat
+    :param prompt: Промпт (список сообщений)
+    :param message: Сообщение пользователя, на которое отвечает ассистент
+    :param sent_msgs: Список, в который добавляются отправленные сообщения с ответом (сразу при отправке)
+    :return: Полный текст ответа
+    :raises TimeoutError: Ответ не получен за GIGA_REQUEST_TIMEOUT секунд (отправленные части остаются в чате)
+    """
+    current_msg: Message | None = None              # Сообщение, в которое сейчас выводится ответ
+    full_text = ''                                  # Весь полученный текст
+    msg_text = ''                                   # Текст текущего сообщения
+    last_edit = 0.0                                 # Время последней правки
+    max_length = TELEGRAM_MSG_MAX_LENGTH - len(TYPING_CURSOR)
+
+    async with giga_semaphore:
+        try:
+            async with asyncio.timeout(GIGA_REQUEST_TIMEOUT):
+                async for chunk in giga_chat.astream(prompt):
+                    if not chunk.content:
+                        continue
+                    full_text += chunk.content
+
+                    # Текст не помещается в сообщение - завершаем текущее и начинаем новое
+                    if current_msg is not None and len(msg_text) + len(chunk.content) > max_length:
+                        await _edit_reply(current_msg, msg_text, is_final=True)
+                        current_msg, msg_text = None, ''
+                    msg_text += chunk.content
+
+                    # Первая часть - новым сообщением, далее правим его не чаще интервала
+                    if current_msg is None:
+                        if not msg_text.strip():
+                            continue
+                        current_msg = await message.answer(msg_text + TYPING_CURSOR, parse_mode=None)
+                        sent_msgs.append(current_msg)
+                        last_edit = time.monotonic()
+                    elif time.monotonic() - last_edit >= GIGA_STREAM_EDIT_INTERVAL:
+                        await _edit_reply(current_msg, msg_text, is_final=False)
+                        last_edit = time.monotonic()
+
+        # Фиксируем уже полученную часть ответа (в т.ч. при ошибке или таймауте)
+        finally:
+            if current_msg is not None:
+                await _edit_reply(current_msg, msg_text, is_final=True)
+
+    return full_text
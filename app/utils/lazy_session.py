@@ -0,0 +1,74 @@
+"""
+Ленивая сессия БД для обработчиков апдейтов.
+
+INFO:
+    Многие обработчики не обращаются к БД (очистка чата, отмена действий, сообщения в группах), а кеш аутентификации
+    (app/utils/auth_sessions.py) отвечает без запроса к БД. Поэтому middleware DataBaseSession передаёт в обработчик
+    не сессию, а LazySession: AsyncSession создаётся при первом обращении к любому её атрибуту (execute, add, commit
+    и т.д.), соединение из пула берётся SQLAlchemy при первом запросе. LazySession передаётся в методы DataBase вместо
+    AsyncSession без изменений.
+    Обработчик, которому сессия не нужна совсем, помечается флагом: @router.callback_query(..., flags=NO_DB_SESSION).
+    Счетчики session_stats: сколько сессий выдано обработчикам и сколько из них реально использовано.
+"""
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+NO_DB_SESSION = {'db_session': False}               # Флаг обработчика, которому не нужна сессия БД
+
+
+# Счетчики использования сессий
+class SessionStats:
+    """ Счетчики использования сессий БД обработчиками. """
+
+    def __init__(self) -> None:
+        self.skipped = 0                                # Апдейты обработчиков с флагом NO_DB_SESSION
+        self.opened = 0                                 # Выдано ленивых сессий
+        self.used = 0                                   # Из них создано настоящих сессий (было обращение к БД)
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Метрики использования сессий.
+
+        :return: Словарь: пропущено, выдано, использовано, доля использованных
+        """
+        return {
+            'skipped': self.skipped,
+            'opened': self.opened,
+            'used': self.used,
+            'used_rate': round(self.used / self.opened, 4) if self.opened else 0.0,
+        }
+
+
+# Общие для бота счетчики сессий
+session_stats = SessionStats()
+
+
+# Ленивая сессия БД
+class LazySession:
+    """ Заместитель AsyncSession: настоящая сессия создаётся при первом обращении к её атрибутам. """
+
+    __slots__ = ('_session_maker', '_session')
+
+    def __init__(self, session_maker: async_sessionmaker) -> None:
+        self._session_maker = session_maker
+        self._session: Optional[AsyncSession] = None
+        session_stats.opened += 1
+
+    @property
+    def is_used(self) -> bool:
+        return self._session is not None
+
+    # Создание настоящей сессии при первом обращении
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_maker()
+            session_stats.used += 1
+        return getattr(self._session, name)
+
+    # Закрытие настоящей сессии, если она была создана
+    async def close(self) -> None:
+        """ Закрытие сессии (если к ней обращались) с возвратом соединения в пул. """
+        if self._session is not None:
+            await self._session.close()
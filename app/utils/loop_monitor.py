@@ -0,0 +1,211 @@
+"""
+Контроль задержек и блокировок event loop.
+
+INFO:
+    Фоновая задача каждые LOOP_MONITOR_INTERVAL секунд засыпает на интервал и замеряет, насколько позже она проснулась
+    (задержка event loop - время, на которое другие задачи не отдавали управление). Задержка записывается в метрику
+    bot_event_loop_lag_seconds.
+
+    Задача обновляет отметку времени (heartbeat), которую проверяет фоновый поток. Если отметка не обновлялась дольше
+    интервала + LOOP_BLOCK_THRESHOLD_MS, event loop заблокирован синхронным вызовом: поток снимает стек потока event
+    loop и определяет текущую задачу asyncio - ту, корутина которой выполняется в снятом стеке (внутренние структуры
+    asyncio с текущей задачей не читаются: в новых версиях Python они устроены иначе). Сначала проверяются задачи
+    обработчиков, учтённые track_handler (вызывает HandlerMetricsMiddleware, app/middlewares/middlewares.py), затем
+    остальные задачи event loop: для задач без обработчика (планировщик, очередь писем) указывается имя корутины задачи.
+
+    После разблокировки event loop блокировка печатается со стеком и учитывается в метриках с метками: обработчик
+    и место в коде бота (ближайшая к месту блокировки функция из app/) - так новые блокирующие вызовы видны сразу.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import FrameType
+from typing import Iterator, Optional
+
+from app.settings import LOOP_MONITOR_INTERVAL, LOOP_BLOCK_THRESHOLD_MS, LOOP_BLOCK_STACK_DEPTH
+from app.utils.metrics import event_loop_lag, event_loop_blocks_total, event_loop_blocked_seconds
+
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))      # Папка app/ - код бота
+
+
+# Блокировка event loop
+@dataclass
+class BlockEvent:
+    """ Блокировка event loop: обработчик, место в коде бота, стек на момент обнаружения. """
+    handler: str
+    location: str
+    stack: str
+
+
+# Обработчик или имя корутины задачи
+def _task_label(task: Optional[asyncio.Task], handlers: dict) -> str:
+    if task is None:
+        return 'event_loop'                             # Колбэк event loop вне задачи
+    label = handlers.get(task)
+    if label is not None:
+        return label
+    coro = task.get_coro()
+    return getattr(coro, '__qualname__', None) or task.get_name()
+
+
+# Место блокировки в коде бота
+def _app_location(stack: traceback.StackSummary) -> str:
+    """ Ближайшая к месту блокировки функция из кода бота ('utils/xsl_tools.py:export_vcb_data_to_xls_file'). """
+    for frame in reversed(stack):
+        if frame.filename.startswith(_APP_DIR) and frame.filename != __file__:
+            return f'{os.path.relpath(frame.filename, _APP_DIR)}:{frame.name}'
+    return f'{os.path.basename(stack[-1].filename)}:{stack[-1].name}' if stack else 'unknown'
+
+
+# Контроль event loop
+class LoopMonitor:
+    """ Замер задержек event loop (фоновая задача) и обнаружение блокировок со стеком (фоновый поток). """
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS) -> None:
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self.handlers: dict[asyncio.Task, str] = {}     # {задача: обработчик} - обработчики в работе
+
+        # Счетчики для метрик
+        self.blocks = 0
+        self.max_lag = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._heartbeat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._events: list[BlockEvent] = []             # Блокировки, обнаруженные потоком (до вывода задачей)
+        self._events_lock = threading.Lock()
+
+    # Учёт обработчика текущей задачи
+    @contextmanager
+    def track_handler(self, label: str) -> Iterator[None]:
+        """
+        Учёт обработчика, выполняемого в текущей задаче asyncio, - для определения обработчика при блокировке.
+
+        :param label: Название обработчика ('роутер.обработчик')
+        """
+        task = asyncio.current_task()
+        self.handlers[task] = label
+        try:
+            yield
+        finally:
+            self.handlers.pop(task, None)
+
+    # Запуск
+    def start(self) -> None:
+        """ Запуск фоновой задачи и потока контроля. Вызывается из потока event loop. """
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        self._thread = threading.Thread(target=self._watch, name='loop-monitor', daemon=True)
+        self._thread.start()
+
+    # Остановка
+    async def stop(self) -> None:
+        """ Остановка фоновой задачи и потока контроля. """
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._stop.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._thread.join()
+        self._task, self._thread = None, None
+
+    def stats(self) -> dict[str, float]:
+        """
+        Метрики контроля event loop.
+
+        :return: Словарь: кол-во обнаруженных блокировок, макс. задержка event loop в секундах
+        """
+        return {'blocks': self.blocks, 'max_lag_seconds': round(self.max_lag, 6)}
+
+    # Фоновая задача: замер задержки
+    async def _run(self) -> None:
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._heartbeat - self.interval)
+            event_loop_lag.observe(value=lag)
+            self.max_lag = max(self.max_lag, lag)
+            if self._events:
+                self._report(lag)
+
+    # Вывод обнаруженных блокировок (после разблокировки - известна длительность)
+    def _report(self, lag: float) -> None:
+        """ Вывод и учёт в метриках блокировок. Задержка нескольких блокировок за один замер делится между ними. """
+        with self._events_lock:
+            events, self._events = self._events, []
+        for event in events:
+            self.blocks += 1
+            event_loop_blocks_total.inc(event.handler, event.location)
+            event_loop_blocked_seconds.inc(event.handler, amount=lag / len(events))
+            print(f'Event loop заблокирован на {lag:.3f} с (блокировок за замер: {len(events)}): {event.handler} '
+                  f'({event.location})\n{event.stack}')
+
+    # Фоновый поток: обнаружение блокировки
+    def _watch(self) -> None:
+        # Уже обнаруженная блокировка: (отметка времени, задача). Несколько задач подряд, блокирующих event loop
+        # до следующего замера, обнаруживаются по отдельности
+        reported = None
+        while not self._stop.wait(self.interval / 2):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            task = self._running_task(frame)
+            if reported == (heartbeat, task):
+                continue
+            reported = (heartbeat, task)
+            event = self._capture(frame, task)
+            with self._events_lock:
+                self._events.append(event)
+
+    # Задача, выполняющаяся в потоке event loop
+    def _running_task(self, frame: FrameType) -> Optional[asyncio.Task]:
+        """
+        Задача asyncio, корутина которой есть в стеке потока event loop. Вызывается из фонового потока, пока event loop
+        заблокирован (списки задач в это время не меняются).
+
+        :param frame: Текущий кадр потока event loop
+        :return: Задача или None (колбэк event loop вне задачи или задача не найдена)
+        """
+        frames = set()
+        while frame is not None:
+            frames.add(frame)
+            frame = frame.f_back
+
+        # Сначала задачи обработчиков, затем остальные задачи event loop
+        tasks = list(self.handlers)
+        try:
+            tasks.extend(asyncio.all_tasks(self._loop))
+        except RuntimeError:
+            pass
+        for task in tasks:
+            if getattr(task.get_coro(), 'cr_frame', None) in frames:
+                return task
+        return None
+
+    # Снимок стека потока event loop
+    def _capture(self, frame: FrameType, task: Optional[asyncio.Task]) -> BlockEvent:
+        stack = traceback.extract_stack(frame, limit=LOOP_BLOCK_STACK_DEPTH)
+        return BlockEvent(handler=_task_label(task, self.handlers), location=_app_location(stack),
+                          stack=''.join(stack.format()).rstrip())
+
+
+# Общий объект контроля event loop бота
+loop_monitor = LoopMonitor()
@@ -0,0 +1,253 @@
+"""
+Фоновая отправка писем из очереди исходящих писем (таблица EmailOutbox).
+
+INFO:
+    Обработчики не отправляют письма сами, а ставят их в очередь (DataBase.enqueue_email) и будят обработчик очереди
+    (email_queue.notify()), поэтому ответ пользователю не ждёт соединения с почтовым сервером.
+    - Очередь хранится в БД: письма, не отправленные до перезапуска бота, отправляются после запуска.
+    - smtplib выполняется в отдельном потоке (один поток, вызовы по очереди) с таймаутом SMTP_TIMEOUT, соединение с
+      сервером переиспользуется для следующих писем и закрывается после SMTP_IDLE_TIMEOUT секунд простоя.
+    - При ошибке отправки письмо повторяется с удвоением задержки (EMAIL_RETRY_BASE_SECONDS ...
+      EMAIL_RETRY_MAX_SECONDS), после EMAIL_MAX_ATTEMPTS попыток или при отказе сервера принять адрес получателя
+      письмо получает статус 'failed'.
+      Отправленные письма удаляются из очереди, устаревшие - задачей планировщика.
+    - Для проверки без настоящего почтового сервера - benchmarks/fake_smtp.py.
+"""
+import asyncio
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+
+from app.settings import SMTP_SERVER, SMTP_PORT, SENDER_EMAIL, SENDER_PASSWORD, SMTP_STARTTLS, SMTP_TIMEOUT, \
+    SMTP_IDLE_TIMEOUT, EMAIL_QUEUE_POLL_INTERVAL, EMAIL_QUEUE_BATCH_SIZE, EMAIL_MAX_ATTEMPTS, \
+    EMAIL_RETRY_BASE_SECONDS, EMAIL_RETRY_MAX_SECONDS
+
+
+# Задержка перед повторной отправкой
+def retry_delay(attempt: int, base: float = EMAIL_RETRY_BASE_SECONDS,
+                maximum: float = EMAIL_RETRY_MAX_SECONDS) -> float:
+    """
+    Задержка перед повторной отправкой письма: удваивается с каждой попыткой, но не больше maximum.
+
+    :param attempt: Номер неудачной попытки (с 1)
+    :param base: Задержка после первой неудачной попытки в секундах
+    :param maximum: Макс. задержка в секундах
+    :return: Задержка в секундах
+    """
+    return min(base * 2 ** (attempt - 1), maximum)
+
+
+# Соединение с почтовым сервером
+class SMTPConnection:
+    """ Соединение с почтовым сервером, переиспользуемое для нескольких писем. Методы вызываются из одного потока. """
+
+    def __init__(self, host: str = SMTP_SERVER, port: int = SMTP_PORT, user: str = SENDER_EMAIL,
+                 password: str = SENDER_PASSWORD, starttls: bool = SMTP_STARTTLS,
+                 timeout: float = SMTP_TIMEOUT) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+        self._smtp: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0                                # Время последней отправки (time.monotonic)
+        self.connects = 0                                   # Кол-во установленных соединений (для метрик)
+
+    @property
+    def is_open(self) -> bool:
+        return self._smtp is not None
+
+    # Подключение к серверу
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connects += 1
+        return smtp
+
+    # Отправка письма
+    def send(self, to_email: str, subject: str, body: str) -> None:
+        """
+        Отправка письма. Если сервер закрыл переиспользуемое соединение, письмо отправляется через новое.
+
+        :param to_email: Почта получателя
+        :param subject: Тема письма
+        :param body: Текст письма
+        :return: None
+        :raises smtplib.SMTPException, OSError: Ошибка отправки (соединение при этом закрывается)
+        """
+        msg = MIMEMultipart()
+        msg['From'] = self.user
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+
+        reused = self._smtp is not None
+        try:
+            self._sendmail(to_email, msg.as_string())
+
+        # Сервер закрыл переиспользуемое соединение (напр. по простою) - отправляем через новое
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            if not reused:
+                raise
+            self._sendmail(to_email, msg.as_string())
+
+    # Отправка письма через открытое (или новое) соединение
+    def _sendmail(self, to_email: str, message: str) -> None:
+        try:
+            if self._smtp is None:
+                self._smtp = self._connect()
+            self._smtp.sendmail(self.user, to_email, message)
+        except smtplib.SMTPRecipientsRefused:
+            raise
+        except Exception:
+            self.close()
+            raise
+        self.last_used = time.monotonic()
+
+    # Закрытие соединения
+    def close(self) -> None:
+        """ Закрытие соединения с сервером (при следующей отправке откроется новое). """
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+
+# Обработчик очереди исходящих писем
+class EmailQueue:
+    """ Фоновый обработчик очереди исходящих писем EmailOutbox. """
+
+    def __init__(self, connection: Optional[SMTPConnection] = None, poll_interval: float = EMAIL_QUEUE_POLL_INTERVAL,
+                 batch_size: int = EMAIL_QUEUE_BATCH_SIZE, max_attempts: int = EMAIL_MAX_ATTEMPTS,
+                 retry_base: float = EMAIL_RETRY_BASE_SECONDS, idle_timeout: float = SMTP_IDLE_TIMEOUT) -> None:
+        self.connection = connection or SMTPConnection()
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.idle_timeout = idle_timeout
+
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='smtp')
+
+        # Счетчики для метрик
+        self.sent = 0
+        self.failed_attempts = 0
+
+    # Запуск обработчика
+    def start(self, db) -> None:
+        """
+        Запуск обработчика очереди (в т.ч. отправка писем, оставшихся в очереди с прошлого запуска).
+
+        :param db: Объект DataBase
+        :return: None
+        """
+        self._db = db
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    # Сигнал о новом письме в очереди
+    def notify(self) -> None:
+        """ Сигнал о новом письме в очереди: обработчик проверяет очередь, не дожидаясь интервала. """
+        self._wakeup.set()
+
+    # Цикл обработки очереди
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.process_due()
+            except Exception as e:
+                print(f'Ошибка обработки очереди писем: {e}')
+
+            # Ждём нового письма или интервала проверки (при открытом соединении - не дольше его времени простоя)
+            timeout = self.poll_interval
+            if self.connection.is_open:
+                idle = time.monotonic() - self.connection.last_used
+                if idle >= self.idle_timeout:
+                    await self._in_thread(self.connection.close)
+                else:
+                    timeout = min(timeout, self.idle_timeout - idle)
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+
+    # Вызов в потоке отправки
+    async def _in_thread(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # Отправка писем, ожидающих отправки
+    async def process_due(self) -> int:
+        """
+        Отправка писем, у которых наступило время очередной попытки.
+
+        :return: Количество отправленных писем
+        """
+        sent = 0
+        while emails := await self._db.get_due_emails(self.batch_size):
+            for email in emails:
+                try:
+                    await self._in_thread(self.connection.send, email.to_email, email.subject, email.body)
+
+                except Exception as e:
+                    self.failed_attempts += 1
+                    attempt = email.attempts + 1
+                    permanent = isinstance(e, smtplib.SMTPRecipientsRefused) or attempt >= self.max_attempts
+                    retry_in = None if permanent else retry_delay(attempt, base=self.retry_base)
+                    await self._db.reschedule_email(email.id, f'{type(e).__name__}: {e}', retry_in)
+                    print(f'Ошибка при отправке письма {email.id} (попытка {attempt}): {e}')
+
+                    # Сервер недоступен или отклоняет отправку - остальные письма ждут следующей проверки очереди
+                    if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                        return sent
+
+                else:
+                    await self._db.delete_sent_email(email.id)
+                    self.sent += 1
+                    sent += 1
+        return sent
+
+    # Метрики очереди
+    def stats(self) -> dict[str, int]:
+        """
+        Метрики очереди.
+
+        :return: Словарь: отправлено писем, неудачных попыток, установлено соединений
+        """
+        return {'sent': self.sent, 'failed_attempts': self.failed_attempts, 'connects': self.connection.connects}
+
+    # Остановка обработчика
+    async def close(self) -> None:
+        """ Остановка обработчика и закрытие соединения с почтовым сервером (письма остаются в очереди в БД). """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._in_thread(self.connection.close)
+        self._executor.shutdown(wait=False)
+
+
+# Общий для бота обработчик очереди писем
+email_queue = EmailQueue()
@@ -0,0 +1,302 @@
+"""
+Метрики бота в формате Prometheus.
+
+INFO:
+    Небольшой реестр метрик без внешних зависимостей: счетчики (Counter), текущие значения (Gauge) и гистограммы
+    (Histogram) с метками. Реестр отдаётся в текстовом формате Prometheus по адресу METRICS_PATH (/metrics) отдельным
+    внутренним веб-сервером METRICS_HOST:METRICS_PORT (start_metrics_server) в обоих режимах. Публичный порт
+    webhook-сервера (WEB_SERVER_PORT) метрики не отдаёт: по ним видны пользователи, нагрузка и внутреннее устройство
+    бота. При заданном METRICS_TOKEN запрос принимается только с заголовком 'Authorization: Bearer <METRICS_TOKEN>'
+    (параметр authorization/bearer_token в конфигурации Prometheus).
+    - Метрики обработки апдейтов и обработчиков заполняют UpdateMetricsMiddleware и HandlerMetricsMiddleware
+      (app/middlewares/middlewares.py), метрики задержек и блокировок event loop - LoopMonitor
+      (app/utils/loop_monitor.py).
+    - Счетчики других компонентов (кеши, очередь апдейтов, хранилище чатов и т.д.) подключаются через add_stats():
+      при каждом запросе /metrics вызывается их метод stats()/metrics() и числовые значения выводятся как gauge.
+"""
+import hmac
+import math
+import re
+from typing import Callable, Iterable, Mapping, Optional
+
+from aiohttp import web
+
+from app.settings import METRICS_PATH, METRICS_LATENCY_BUCKETS, METRICS_HOST, METRICS_PORT, METRICS_TOKEN, \
+    LOOP_LAG_BUCKETS
+
+
+# Экранирование значения метки
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Форматирование меток
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+# Форматирование числа
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_ID_SUFFIX = re.compile(r'(_[\d-]+)+$')                 # Id/номер страницы в конце callback_data
+
+
+# Метка события обработчика
+def event_label(callback_data: Optional[str] = None, state: Optional[str] = None, text: Optional[str] = None) -> str:
+    """
+    Метка события для метрик обработчиков - без id и номеров страниц, чтобы кол-во меток было ограничено.
+
+    :param callback_data: callback_data кнопки ('menu:1:vocabulary::1' -> 'menu:vocabulary',
+                          'delete_context_15' -> 'delete_context', 'edit_note:text' -> 'edit_note')
+    :param state: FSM-состояние сообщения (напр. 'AddWordPhrase:word')
+    :param text: Текст сообщения (для команд - '/start')
+    :return: Метка события
+    """
+    if callback_data is not None:
+        prefix, _, rest = callback_data.partition(':')
+        if prefix == 'menu':
+            return f'menu:{rest.split(":")[1]}' if rest.count(':') >= 1 else prefix
+        return _ID_SUFFIX.sub('', prefix)[:64]
+    if state:
+        return state
+    if text and text.startswith('/'):
+        return text.split(maxsplit=1)[0].split('@')[0][:64]
+    return 'message'
+
+
+# Базовый класс метрики
+class _Metric:
+    """ Метрика с метками: {значения меток: значение}. """
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: tuple) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name}: ожидаются метки {self.labelnames}, получено {labels}')
+        return tuple(str(label) for label in labels)
+
+    def get(self, *labels) -> float:
+        """ Текущее значение метрики с метками labels. """
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for labels, value in self._values.items():
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+# Счетчик
+class Counter(_Metric):
+    """ Счетчик - только увеличивается (кол-во апдейтов, ошибок и т.д.). """
+    type = 'counter'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+# Текущее значение
+class Gauge(_Metric):
+    """ Текущее значение - увеличивается и уменьшается (кол-во обрабатываемых апдейтов и т.д.). """
+    type = 'gauge'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float) -> None:
+        self._values[self._key(labels)] = value
+
+
+# Гистограмма
+class Histogram(_Metric):
+    """ Гистограмма значений (длительность обработки) по интервалам buckets + сумма и количество наблюдений. """
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = METRICS_LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple[str, ...], list] = {}              # {метки: [счетчики интервалов, сумма, кол-во]}
+
+    def observe(self, *labels, value: float) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][idx] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        """ Кол-во наблюдений с метками labels. """
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for labels, (bucket_counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_str} {_format_value(total)}')
+            lines.append(f'{self.name}_count{label_str} {count}')
+        return lines
+
+
+# Реестр метрик
+class MetricsRegistry:
+    """ Реестр метрик бота + подключенные счетчики других компонентов. """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._stats: dict[str, Callable[[], Mapping]] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Метрика {metric.name} уже зарегистрирована')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = METRICS_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    # Подключение счетчиков компонента
+    def add_stats(self, prefix: str, stats: Callable[[], Mapping]) -> None:
+        """
+        Подключение счетчиков компонента: числовые значения словаря stats() выводятся как gauge '<prefix>_<ключ>'.
+
+        :param prefix: Префикс имён метрик (напр. 'bot_word_cache')
+        :param stats: Функция, возвращающая словарь счетчиков (напр. word_cache.stats)
+        :return: None
+        """
+        self._stats[prefix] = stats
+
+    # Вывод в текстовом формате Prometheus
+    def render(self) -> str:
+        """ Все метрики в текстовом формате Prometheus (text/plain; version=0.0.4). """
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        for prefix, stats in self._stats.items():
+            try:
+                values = stats()
+            except Exception as e:
+                print(f'Ошибка получения метрик {prefix}: {e}')
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f'{prefix}_{key}'
+                lines.extend([f'# TYPE {name} gauge', f'{name} {_format_value(value)}'])
+        return '\n'.join(lines) + '\n'
+
+
+# Общий реестр метрик бота
+metrics = MetricsRegistry()
+
+# Метрики апдейтов
+updates_total = metrics.counter('bot_updates_total', 'Обработано апдейтов', ('type',))
+update_errors_total = metrics.counter('bot_update_errors_total', 'Апдейты, обработка которых завершилась ошибкой',
+                                      ('type',))
+update_duration = metrics.histogram('bot_update_duration_seconds', 'Длительность обработки апдейта', ('type',))
+updates_in_flight = metrics.gauge('bot_updates_in_flight', 'Апдейты в обработке')
+
+# Метрики обработчиков
+handler_duration = metrics.histogram('bot_handler_duration_seconds', 'Длительность работы обработчика',
+                                     ('router', 'handler', 'event'))
+handler_errors_total = metrics.counter('bot_handler_errors_total', 'Ошибки обработчиков',
+                                       ('router', 'handler', 'event', 'error'))
+handlers_in_flight = metrics.gauge('bot_handlers_in_flight', 'Обработчики в работе', ('router', 'handler'))
+handler_db_queries = metrics.histogram('bot_handler_db_queries', 'Кол-во SQL-запросов за апдейт',
+                                       ('router', 'handler'), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+handler_db_duration = metrics.histogram('bot_handler_db_duration_seconds', 'Суммарное время SQL-запросов за апдейт',
+                                        ('router', 'handler'))
+
+# Метрики event loop (app/utils/loop_monitor.py)
+event_loop_lag = metrics.histogram('bot_event_loop_lag_seconds', 'Задержка event loop', buckets=LOOP_LAG_BUCKETS)
+event_loop_blocks_total = metrics.counter('bot_event_loop_blocks_total', 'Блокировки event loop',
+                                          ('handler', 'location'))
+event_loop_blocked_seconds = metrics.counter('bot_event_loop_blocked_seconds_total',
+                                             'Суммарное время блокировок event loop', ('handler',))
+
+
+# Проверка токена доступа к метрикам
+def _check_token(request: web.Request) -> None:
+    if not METRICS_TOKEN:
+        return
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(token, METRICS_TOKEN):
+        raise web.HTTPUnauthorized()
+
+
+# Обработчик запроса /metrics
+async def metrics_handler(request: web.Request) -> web.Response:
+    """ Ответ на запрос Prometheus: все метрики в текстовом формате (при заданном METRICS_TOKEN - только с токеном). """
+    _check_token(request)
+    return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+
+# Подключение /metrics к веб-приложению
+def add_metrics_route(app: web.Application, path: str = METRICS_PATH) -> None:
+    """ Подключение обработчика метрик к веб-приложению (внутреннему серверу метрик). """
+    app.router.add_get(path, metrics_handler)
+
+
+# Запуск отдельного веб-сервера с метриками
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT, path: str = METRICS_PATH,
+                               routes: Iterable[Callable[[web.Application], None]] = ()) -> Optional[web.AppRunner]:
+    """
+    Запуск внутреннего веб-сервера, отдающего метрики (в обоих режимах, отдельно от публичного webhook-сервера).
+
+    :param host: Адрес веб-сервера
+    :param port: Порт веб-сервера
+    :param path: Путь метрик
+    :param routes: Функции подключения дополнительных обработчиков (напр. add_profile_routes)
+    :return: AppRunner запущенного сервера (для остановки через cleanup()) или None, если порт занят
+    """
+    app = web.Application()
+    add_metrics_route(app, path)
+    for add_routes in routes:
+        add_routes(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=host, port=port).start()
+    except OSError as e:
+        print(f'Не удалось запустить веб-сервер метрик на {host}:{port}: {e}')
+        await runner.cleanup()
+        return None
+    print(f'Метрики доступны на {host}:{port}{path}')
+    return runner
@@ -0,0 +1,157 @@
+"""
+Обработка апдейтов с сохранением порядка внутри чата и параллельно между чатами.
+
+INFO:
+1. aiogram запускает обработку каждого апдейта отдельной задачей (и при polling, и при webhook), поэтому два быстрых
+   нажатия в одном чате могут обрабатываться одновременно, а обработчики меняют общие данные чата
+   (bot.auxiliary_msgs[chat_id], state FSM). ChatOrderedExecutor создаёт для каждого чата с апдейтами в работе свою
+   ограниченную очередь и задачу-обработчик: апдейты одного чата выполняются строго по очереди, апдейты разных чатов -
+   параллельно. Очередь и задача чата удаляются, когда очередь опустела.
+2. Долгий обработчик (ответ GigaChat, генерация аудио, экспорт, паузы с сообщениями) задерживает только свой чат.
+   Общее кол-во одновременно выполняемых обработчиков ограничено UPDATE_WORKERS (семафор): при достижении лимита
+   апдейты чатов ждут свободного места в порядке поступления.
+3. Обратное давление: при заполнении очереди чата (UPDATE_CHAT_QUEUE_SIZE) новый апдейт ждёт места в очереди, не
+   запуская обработчик. Количество таких ожиданий - в метриках.
+4. Обработчик выполняется в контексте (contextvars) задачи апдейта, результат и исключения возвращаются в неё без
+   изменений, поэтому обработка ошибок aiogram работает как прежде.
+5. Метрики очередей - ChatOrderedExecutor.metrics().
+"""
+import asyncio
+import contextvars
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from app.settings import UPDATE_WORKERS, UPDATE_CHAT_QUEUE_SIZE
+
+
+# Задание на обработку апдейта
+@dataclass(slots=True)
+class _Job:
+    """ Задание на обработку апдейта: функция обработки, контекст задачи апдейта и future для результата. """
+    run: Callable[[], Awaitable[Any]]
+    context: contextvars.Context
+    future: asyncio.Future
+
+
+# Очередь апдейтов чата
+@dataclass(slots=True)
+class _ChatQueue:
+    """ Очередь апдейтов чата и её задача-обработчик. """
+    queue: asyncio.Queue
+    worker: Optional[asyncio.Task] = None
+    busy: bool = False                      # Выполняется ли сейчас обработчик
+
+
+# Обработка апдейтов по очереди внутри чата
+class ChatOrderedExecutor:
+    """ Выполнение обработки апдейтов: по очереди внутри чата, параллельно между чатами (не больше max_workers). """
+
+    def __init__(self, max_workers: int = UPDATE_WORKERS, queue_size: int = UPDATE_CHAT_QUEUE_SIZE) -> None:
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._chats: dict[int, _ChatQueue] = {}     # {chat_id: очередь} - только чаты с апдейтами в работе
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Счетчики для метрик
+        self.processed = 0                          # Обработано апдейтов
+        self.max_depth = 0                          # Максимальная глубина очереди чата
+        self.blocked = 0                            # Апдейтов, ожидавших места в заполненной очереди чата
+        self.waiting = 0                            # Апдейтов, ожидающих свободного места (лимит max_workers)
+
+    # Задача-обработчик очереди чата
+    async def _work(self, chat_id: int, chat: _ChatQueue) -> None:
+        """ Задача-обработчик чата: выполняет задания из очереди по одному, завершается при пустой очереди. """
+        while True:
+            try:
+                job: _Job = chat.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # Между проверкой очереди и удалением нет переключения задач - новый апдейт создаст новую очередь
+                self._chats.pop(chat_id, None)
+                return
+            try:
+                # Задача апдейта уже отменена (остановка бота) - не выполняем
+                if job.future.done():
+                    continue
+                self.waiting += 1
+                try:
+                    await self._semaphore.acquire()
+                finally:
+                    self.waiting -= 1
+                try:
+                    chat.busy = True
+                    task = asyncio.create_task(job.run(), context=job.context)
+                    try:
+                        result = await task
+                    except asyncio.CancelledError:
+                        job.future.cancel()
+
+                        # Остановка самого обработчика чата - пробрасываем отмену
+                        if asyncio.current_task().cancelling():
+                            raise
+                    except Exception as e:
+                        if not job.future.done():
+                            job.future.set_exception(e)
+                    else:
+                        if not job.future.done():
+                            job.future.set_result(result)
+                finally:
+                    chat.busy = False
+                    self._semaphore.release()
+            finally:
+                self.processed += 1
+                chat.queue.task_done()
+
+    # Выполнение обработки апдейта в очереди чата
+    async def submit(self, chat_id: int, run: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнение обработки апдейта после ранее поступивших апдейтов этого чата.
+
+        :param chat_id: ID чата апдейта
+        :param run: Функция без аргументов, возвращающая корутину обработки апдейта
+        :return: Результат обработки
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _ChatQueue(queue=asyncio.Queue(maxsize=self.queue_size))
+            chat.worker = asyncio.create_task(self._work(chat_id, chat))
+
+        job = _Job(run=run, context=contextvars.copy_context(), future=asyncio.get_running_loop().create_future())
+        if chat.queue.full():
+            self.blocked += 1
+        await chat.queue.put(job)
+        self.max_depth = max(self.max_depth, chat.queue.qsize())
+        return await job.future
+
+    # Метрики очередей
+    def metrics(self) -> dict[str, Any]:
+        """
+        Метрики очередей чатов.
+
+        :return: Словарь: кол-во чатов с апдейтами в работе, апдейтов в очередях, выполняемых обработчиков,
+                 ожидающих свободного места, глубина самой длинной очереди сейчас и за всё время, обработано апдейтов,
+                 ожиданий места в заполненной очереди
+        """
+        chats = list(self._chats.values())
+        return {
+            'max_workers': self.max_workers,
+            'queue_size': self.queue_size,
+            'chats': len(chats),
+            'queued': sum(chat.queue.qsize() for chat in chats),
+            'busy': sum(chat.busy for chat in chats),
+            'waiting': self.waiting,
+            'depth': max((chat.queue.qsize() for chat in chats), default=0),
+            'max_depth': self.max_depth,
+            'processed': self.processed,
+            'blocked': self.blocked,
+        }
+
+    # Остановка задач-обработчиков
+    async def close(self) -> None:
+        """ Остановка задач-обработчиков чатов (при завершении работы бота). """
+        workers = [chat.worker for chat in self._chats.values() if chat.worker is not None]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._chats = {}
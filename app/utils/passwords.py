@@ -0,0 +1,73 @@
+"""
+Хеширование и проверка паролей argon2 вне event loop.
+
+INFO:
+    argon2 намеренно медленный (десятки миллисекунд и крупный буфер памяти на каждый вызов), поэтому хеширование и
+    проверка выполняются в отдельном пуле из PASSWORD_HASH_WORKERS потоков: вход нескольких пользователей одновременно
+    не останавливает обработку апдейтов других чатов, а размер пула ограничивает расход памяти.
+    Параметры argon2 задаются в settings.py. Если сохранённый хеш создан с другими параметрами, после успешной проверки
+    пароля хеш пересчитывается (needs_rehash) и сохраняется вызывающим кодом.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+
+from app.settings import ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, ARGON2_HASH_LEN, ARGON2_SALT_LEN, \
+    PASSWORD_HASH_WORKERS
+
+
+# Объект хеширования с параметрами из настроек
+password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+    hash_len=ARGON2_HASH_LEN,
+    salt_len=ARGON2_SALT_LEN,
+)
+
+# Пул потоков для вычисления хешей
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='argon2')
+
+
+# Хеширование пароля
+async def hash_password(password: str) -> str:
+    """
+    Хеширование пароля в пуле потоков.
+
+    :param password: Пароль
+    :return: Хеш пароля
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, password_hasher.hash, password)
+
+
+# Проверка пароля
+def _verify(password_hash: str, password: str) -> bool:
+    """ Проверка пароля по хешу (синхронно). """
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+async def verify_password(password_hash: str, password: str) -> bool:
+    """
+    Проверка пароля по сохранённому хешу в пуле потоков.
+
+    :param password_hash: Сохранённый хеш пароля
+    :param password: Введённый пароль
+    :return: True, если пароль верный, иначе False
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, _verify, password_hash, password)
+
+
+# Проверка необходимости пересчёта хеша
+def needs_rehash(password_hash: str) -> bool:
+    """
+    Проверка, создан ли хеш с параметрами, отличными от текущих настроек (быстрая проверка без вычисления хеша).
+
+    :param password_hash: Сохранённый хеш пароля
+    :return: True, если хеш нужно пересчитать
+    """
+    return password_hasher.check_needs_rehash(password_hash)
@@ -0,0 +1,420 @@
+"""
+Профилирование работающего бота по запросу администратора.
+
+INFO:
+    Профилирование включается на следующие N апдейтов или T секунд (что наступит раньше, но не дольше
+    PROFILE_MAX_SECONDS) командой администратора /profile (app/handlers/admin.py) или HTTP-запросом к веб-серверу бота
+    (add_profile_routes). Результаты записываются в PROFILE_DIR, по окончании вызывается on_finish (напр. отправка
+    отчёта администратору). Одновременно работает только одно профилирование.
+
+    Режимы:
+        - cpu - cProfile потока event loop: файл .pstats (python -m pstats, snakeviz, gprof2dot, flameprof) и отчёт
+          .txt с функциями по суммарному времени. Замедляет обработку, код в asyncio.to_thread не учитывается;
+        - sample - снимки стека потока event loop каждые PROFILE_SAMPLE_INTERVAL секунд из фонового потока: файл
+          .folded в формате collapsed stacks (flamegraph.pl, speedscope) и отчёт .txt с функциями по доле снимков.
+          Почти не влияет на скорость обработки, подходит для продакшна;
+        - memory - tracemalloc: отчёт .txt с приростом памяти по строкам и файлам кода за время профилирования,
+          изменением кол-ва записей в структурах бота (add_structure: хранилище чатов, FSM, кеши), кол-ва живых
+          сессий SQLAlchemy и объектов в их identity map, и кол-ва объектов по типам.
+
+    Апдейты считает ProfilerMiddleware (app/middlewares/middlewares.py).
+"""
+import asyncio
+import cProfile
+import gc
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import web
+
+from app.settings import PROFILE_DIR, PROFILE_DEFAULT_UPDATES, PROFILE_DEFAULT_SECONDS, PROFILE_MAX_SECONDS, \
+    PROFILE_SAMPLE_INTERVAL, PROFILE_TRACEMALLOC_FRAMES, PROFILE_REPORT_LINES, PROFILE_HTTP_TOKEN, PROFILE_HTTP_PATH
+
+
+PROFILE_MODES = ('cpu', 'sample', 'memory')
+
+
+# Результат профилирования
+@dataclass
+class ProfileResult:
+    """ Результат профилирования: режим, кол-во апдейтов, длительность, пути к файлам и краткий отчёт. """
+    mode: str
+    updates: int
+    seconds: float
+    files: list[str] = field(default_factory=list)
+    summary: str = ''
+
+
+# Снимки стека потока из фонового потока
+class StackSampler:
+    """ Снимки стека потока thread_id каждые interval секунд: {стек 'функция;функция;...': кол-во снимков}. """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ',')
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    # Функции по доле снимков
+    def top(self, limit: int = PROFILE_REPORT_LINES) -> str:
+        """ Отчёт: функции по доле снимков, в которых они выполнялись (self) и были в стеке (total). """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        samples = self.samples or 1
+        idle = sum(count for name, count in own.items() if name.startswith('select (selectors.py'))
+        lines = [f'Снимков стека: {self.samples} (интервал {self.interval * 1000:g} мс), '
+                 f'event loop ожидает событий: {idle / samples * 100:.1f}%', '', 'self %  total %  функция']
+        for name, count in own.most_common(limit):
+            lines.append(f'{count / samples * 100:6.1f}  {total[name] / samples * 100:7.1f}  {name}')
+        lines += ['', 'total %  функция']
+        for name, count in total.most_common(limit):
+            lines.append(f'{count / samples * 100:7.1f}  {name}')
+        return '\n'.join(lines)
+
+
+# Кол-во сессий SQLAlchemy и объектов в их identity map
+def _sqlalchemy_sessions() -> tuple[int, int]:
+    from sqlalchemy.orm import Session
+
+    sessions = [obj for obj in gc.get_objects() if isinstance(obj, Session)]
+    return len(sessions), sum(len(session.identity_map) for session in sessions)
+
+
+# Снимок размеров структур и кол-ва объектов по типам
+def _structures_snapshot(structures: dict[str, Callable[[], int]]) -> tuple[dict[str, int], Counter]:
+    sizes = {}
+    for name, size in structures.items():
+        try:
+            sizes[name] = size()
+        except Exception as e:
+            print(f'Ошибка получения размера структуры {name}: {e}')
+    sizes['sqlalchemy.sessions'], sizes['sqlalchemy.identity_map'] = _sqlalchemy_sessions()
+    types = Counter(type(obj).__qualname__ for obj in gc.get_objects())
+    return sizes, types
+
+
+# Профилирование
+class Profiler:
+    """ Профилирование по запросу: одна активная сессия профилирования в режиме cpu/sample/memory. """
+
+    def __init__(self, output_dir: str = PROFILE_DIR) -> None:
+        self.output_dir = output_dir
+        self.structures: dict[str, Callable[[], int]] = {}
+        self.last_result: Optional[ProfileResult] = None
+
+        # Активное профилирование
+        self.run = 0                                    # Номер профилирования (увеличивается при каждом запуске)
+        self.mode: Optional[str] = None
+        self.updates = 0
+        self.updates_limit = 0
+        self.started = 0.0
+        self.seconds_limit = 0.0
+        self._on_finish: Optional[Callable[[ProfileResult], Awaitable[None]]] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._structures_before: Optional[tuple[dict[str, int], Counter]] = None
+        self._stop_tracemalloc = False
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    # Подключение структуры к отчёту памяти
+    def add_structure(self, name: str, size: Callable[[], int]) -> None:
+        """
+        Подключение структуры бота к отчёту режима memory: изменение кол-ва записей за время профилирования.
+
+        :param name: Название структуры (напр. 'bot.chat_sessions')
+        :param size: Функция, возвращающая кол-во записей (напр. lambda: len(bot.chat_sessions))
+        :return: None
+        """
+        self.structures[name] = size
+
+    # Запуск профилирования
+    def start(self, mode: str, updates: Optional[int] = None, seconds: Optional[float] = None,
+              on_finish: Optional[Callable[[ProfileResult], Awaitable[None]]] = None) -> str:
+        """
+        Запуск профилирования на updates апдейтов или seconds секунд (что наступит раньше).
+        Вызывается из потока event loop.
+
+        :param mode: Режим: cpu | sample | memory
+        :param updates: Кол-во апдейтов (None - без ограничения)
+        :param seconds: Длительность (None - PROFILE_MAX_SECONDS), не больше PROFILE_MAX_SECONDS.
+                        Если не заданы ни updates, ни seconds - PROFILE_DEFAULT_UPDATES и PROFILE_DEFAULT_SECONDS
+        :param on_finish: Корутина, вызываемая с результатом после окончания профилирования
+        :return: Описание запущенного профилирования
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Неизвестный режим профилирования: {mode}. Доступны: {", ".join(PROFILE_MODES)}')
+        if self.active:
+            raise RuntimeError(f'Профилирование уже запущено: {self.status()}')
+        if updates is None and seconds is None:
+            updates, seconds = PROFILE_DEFAULT_UPDATES, PROFILE_DEFAULT_SECONDS
+        seconds = min(seconds or PROFILE_MAX_SECONDS, PROFILE_MAX_SECONDS)
+
+        if mode == 'cpu':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif mode == 'sample':
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        else:
+            self._structures_before = _structures_snapshot(self.structures)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+                self._stop_tracemalloc = True
+            self._snapshot = tracemalloc.take_snapshot()
+
+        self.run += 1
+        self.mode, self.updates, self.updates_limit = mode, 0, updates or 0
+        self.started, self.seconds_limit, self._on_finish = time.monotonic(), seconds, on_finish
+        self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        description = self.status()
+        print(f'Запущено профилирование: {description}')
+        return description
+
+    # Описание текущего профилирования
+    def status(self) -> str:
+        if not self.active:
+            return 'профилирование не запущено'
+        updates = f'{self.updates}/{self.updates_limit}' if self.updates_limit else f'{self.updates}'
+        return f'{self.mode}: {updates} апдейтов, {time.monotonic() - self.started:.0f}/{self.seconds_limit:g} с'
+
+    # Учёт обработанного апдейта
+    def update_finished(self, run: int) -> None:
+        """
+        Учёт обработанного апдейта (вызывает ProfilerMiddleware). Останавливает профилирование по лимиту.
+
+        :param run: Номер профилирования на момент начала обработки апдейта. Апдейты, начатые до запуска
+                    профилирования (в т.ч. сама команда запуска), не учитываются
+        :return: None
+        """
+        if not self.active or run != self.run:
+            return
+        self.updates += 1
+        if self.updates_limit and self.updates >= self.updates_limit:
+            self.stop()
+
+    # Остановка профилирования и запись результатов
+    def stop(self) -> Optional[ProfileResult]:
+        """
+        Остановка профилирования, запись результатов в PROFILE_DIR и вызов on_finish.
+
+        :return: Результат профилирования или None, если профилирование не запущено
+        """
+        if not self.active:
+            return None
+        if self._timer is not None:
+            self._timer.cancel()
+
+        mode, on_finish = self.mode, self._on_finish
+        result = ProfileResult(mode=mode, updates=self.updates, seconds=round(time.monotonic() - self.started, 1))
+        self.mode, self._on_finish, self._timer = None, None, None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base_path = os.path.join(self.output_dir, f'{mode}_{datetime.now():%Y%m%d_%H%M%S}')
+        try:
+            if mode == 'cpu':
+                self._finish_cpu(result, base_path)
+            elif mode == 'sample':
+                self._finish_sample(result, base_path)
+            else:
+                self._finish_memory(result, base_path)
+        except Exception as e:
+            print(f'Ошибка записи результатов профилирования: {e}')
+            result.summary = f'Ошибка записи результатов: {e}'
+
+        print(f'Профилирование {mode} завершено ({result.updates} апдейтов, {result.seconds} с): '
+              f'{", ".join(result.files)}')
+        self.last_result = result
+        if on_finish is not None:
+            asyncio.get_running_loop().create_task(on_finish(result))
+        return result
+
+    def _write_report(self, result: ProfileResult, path: str, header: str, body: str) -> None:
+        result.summary = f'{header}\n\n{body}'
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(result.summary + '\n')
+        result.files.append(path)
+
+    def _header(self, result: ProfileResult) -> str:
+        return f'Профилирование {result.mode}: {result.updates} апдейтов за {result.seconds} с'
+
+    def _finish_cpu(self, result: ProfileResult, base_path: str) -> None:
+        profile, self._profile = self._profile, None
+        profile.disable()
+        profile.dump_stats(f'{base_path}.pstats')
+        result.files.append(f'{base_path}.pstats')
+
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).strip_dirs().sort_stats('cumulative').print_stats(PROFILE_REPORT_LINES)
+        self._write_report(result, f'{base_path}.txt', self._header(result), stream.getvalue().strip())
+
+    def _finish_sample(self, result: ProfileResult, base_path: str) -> None:
+        sampler, self._sampler = self._sampler, None
+        sampler.stop()
+        with open(f'{base_path}.folded', 'w', encoding='utf-8') as file:
+            file.writelines(f'{stack} {count}\n' for stack, count in sampler.stacks.most_common())
+        result.files.append(f'{base_path}.folded')
+        self._write_report(result, f'{base_path}.txt', self._header(result), sampler.top())
+
+    def _finish_memory(self, result: ProfileResult, base_path: str) -> None:
+        snapshot_before, self._snapshot = self._snapshot, None
+        snapshot = tracemalloc.take_snapshot()
+        if self._stop_tracemalloc:
+            tracemalloc.stop()
+            self._stop_tracemalloc = False
+
+        # Выделения памяти самого профилирования не учитываются
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot_before, snapshot = snapshot_before.filter_traces(filters), snapshot.filter_traces(filters)
+
+        lines = ['Прирост памяти по строкам кода (КБ, кол-во блоков):']
+        for stat in snapshot.compare_to(snapshot_before, 'lineno')[:PROFILE_REPORT_LINES]:
+            frame = stat.traceback[0]
+            lines.append(f'{stat.size_diff / 1024:+10.1f}  {stat.count_diff:+8}  {frame.filename}:{frame.lineno}')
+        lines += ['', 'Прирост памяти по файлам (КБ):']
+        for stat in snapshot.compare_to(snapshot_before, 'filename')[:PROFILE_REPORT_LINES]:
+            lines.append(f'{stat.size_diff / 1024:+10.1f}  {stat.traceback[0].filename}')
+
+        # Структуры бота и объекты по типам
+        (sizes_before, types_before), (sizes_after, types_after) = self._structures_before, \
+            _structures_snapshot(self.structures)
+        self._structures_before = None
+        lines += ['', 'Записей в структурах (было -> стало):']
+        for name, after in sizes_after.items():
+            before = sizes_before.get(name, 0)
+            lines.append(f'{after - before:+8}  {name}: {before} -> {after}')
+        types_after.subtract(types_before)
+        lines += ['', 'Прирост кол-ва объектов по типам:']
+        for name, diff in types_after.most_common(PROFILE_REPORT_LINES):
+            if diff <= 0:
+                break
+            lines.append(f'{diff:+8}  {name}')
+        self._write_report(result, f'{base_path}.txt', self._header(result), '\n'.join(lines))
+
+
+# Общий объект профилирования бота
+profiler = Profiler()
+
+
+# Разбор параметров профилирования
+def parse_profile_args(args: list[str]) -> tuple[str, Optional[int], Optional[float]]:
+    """
+    Разбор параметров профилирования: режим, затем кол-во апдейтов (число) и/или длительность (число с 's').
+
+    :param args: Параметры, напр. ['cpu', '200'], ['sample', '60s'], ['memory', '500', '120s']
+    :return: Режим, кол-во апдейтов или None, длительность в секундах или None
+    """
+    if not args:
+        raise ValueError('Не задан режим профилирования')
+    mode, updates, seconds = args[0], None, None
+    for arg in args[1:]:
+        if arg.endswith('s') and arg[:-1].replace('.', '', 1).isdigit():
+            seconds = float(arg[:-1])
+        elif arg.isdigit():
+            updates = int(arg)
+        else:
+            raise ValueError(f'Неверный параметр профилирования: {arg}')
+    return mode, updates, seconds
+
+
+# Проверка токена HTTP-запроса
+def _check_token(request: web.Request) -> None:
+    token = request.headers.get('X-Profile-Token', '')
+    if not PROFILE_HTTP_TOKEN or not hmac.compare_digest(token, PROFILE_HTTP_TOKEN):
+        raise web.HTTPUnauthorized()
+
+
+# Описание результата для ответа HTTP
+def _result_json(result: Optional[ProfileResult]) -> Optional[dict]:
+    if result is None:
+        return None
+    return {'mode': result.mode, 'updates': result.updates, 'seconds': result.seconds, 'files': result.files}
+
+
+# Обработчик GET: состояние профилирования
+async def profile_status_handler(request: web.Request) -> web.Response:
+    """ Состояние профилирования и результат последнего профилирования. """
+    _check_token(request)
+    return web.json_response({'active': profiler.active, 'status': profiler.status(),
+                              'last_result': _result_json(profiler.last_result)})
+
+
+# Обработчик POST: запуск профилирования
+async def profile_start_handler(request: web.Request) -> web.Response:
+    """ Запуск профилирования: ?mode=cpu|sample|memory&updates=N&seconds=T """
+    _check_token(request)
+    try:
+        updates = int(request.query['updates']) if 'updates' in request.query else None
+        seconds = float(request.query['seconds']) if 'seconds' in request.query else None
+        status = profiler.start(request.query.get('mode', 'sample'), updates, seconds)
+    except (ValueError, RuntimeError) as e:
+        return web.json_response({'error': str(e)}, status=400)
+    return web.json_response({'active': True, 'status': status})
+
+
+# Обработчик POST: остановка профилирования
+async def profile_stop_handler(request: web.Request) -> web.Response:
+    """ Остановка профилирования до лимита, в ответе - файлы и краткий отчёт. """
+    _check_token(request)
+    result = profiler.stop()
+    if result is None:
+        return web.json_response({'error': profiler.status()}, status=400)
+    return web.json_response({**_result_json(result), 'summary': result.summary})
+
+
+# Подключение управления профилированием к веб-приложению
+def add_profile_routes(app: web.Application, path: str = PROFILE_HTTP_PATH) -> None:
+    """
+    Подключение управления профилированием к веб-приложению (внутренний сервер метрик). Запросы принимаются
+    только с заголовком X-Profile-Token, равным PROFILE_HTTP_TOKEN.
+
+    :param app: Веб-приложение
+    :param path: Путь: GET - состояние, POST - запуск, POST {path}/stop - остановка
+    :return: None
+    """
+    app.router.add_get(path, profile_status_handler)
+    app.router.add_post(path, profile_start_handler)
+    app.router.add_post(f'{path}/stop', profile_stop_handler)
@@ -0,0 +1,171 @@
+"""
+Статистика SQL-запросов: кол-во и время запросов к БД по апдейтам, журнал медленных запросов, поиск N+1.
+
+INFO:
+    На движке БД (create_engine_with_regexp, app/database/db.py) регистрируются обработчики событий SQLAlchemy
+    before_cursor_execute/after_cursor_execute (install_query_hooks). Каждый запрос:
+    - учитывается в общих счетчиках query_totals (кол-во, время, медленные запросы);
+    - при времени выполнения от SLOW_QUERY_THRESHOLD_MS печатается с нормализованным текстом (литералы и списки IN
+      заменены на '?', без параметров запроса);
+    - учитывается в статистике текущего апдейта, если она задана в contextvar (track_queries()). Статистику апдейта
+      задаёт middleware DataBaseSession на время работы обработчика, по её итогам заполняются метрики обработчика
+      (app/utils/metrics.py), а при SQL_DEBUG печатаются запросы, выполненные за апдейт больше SQL_N_PLUS_ONE_THRESHOLD
+      раз (признак N+1: запрос в цикле вместо одного запроса с join/IN).
+    Запросы фоновых задач (планировщик, очередь писем) учитываются только в общих счетчиках.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.settings import SLOW_QUERY_THRESHOLD_MS, SQL_DEBUG, SQL_N_PLUS_ONE_THRESHOLD
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+# Нормализация текста запроса (тексты запросов SQLAlchemy повторяются - результат кешируется)
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str, max_length: int = 500) -> str:
+    """
+    Нормализованный текст запроса: без литералов, лишних пробелов, с одинаковыми списками IN - одинаковые запросы
+    с разными значениями дают один и тот же текст.
+
+    :param statement: Текст SQL-запроса
+    :param max_length: Макс. длина результата
+    :return: Нормализованный текст запроса
+    """
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _SPACES.sub(' ', statement).strip()
+    statement = _IN_LIST.sub('IN (?)', statement)
+    return statement[:max_length]
+
+
+# Статистика запросов апдейта
+class UpdateQueryStats:
+    """ Кол-во и время SQL-запросов за время обработки одного апдейта. """
+
+    __slots__ = ('count', 'total_time', 'statements')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_time = 0.0                           # Суммарное время запросов в секундах
+        self.statements: Counter[str] = Counter()       # {нормализованный запрос: кол-во выполнений}
+
+    def add(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+
+    # Повторяющиеся запросы
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """
+        Запросы, выполненные больше threshold раз (признак N+1).
+
+        :param threshold: Допустимое кол-во повторов одного запроса
+        :return: Список (нормализованный запрос, кол-во выполнений)
+        """
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+
+# Общие счетчики запросов
+class QueryTotals:
+    """ Общие счетчики SQL-запросов процесса (в т.ч. фоновых задач). """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.total_time = 0.0
+        self.slow = 0
+        self.n_plus_one = 0                             # Апдейты с повторяющимися запросами (только при SQL_DEBUG)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Метрики запросов.
+
+        :return: Словарь: кол-во запросов, суммарное время, кол-во медленных запросов и апдейтов с N+1
+        """
+        return {
+            'queries': self.queries,
+            'seconds': round(self.total_time, 6),
+            'slow': self.slow,
+            'n_plus_one': self.n_plus_one,
+        }
+
+
+# Статистика запросов текущего апдейта
+current_query_stats: ContextVar[Optional[UpdateQueryStats]] = ContextVar('current_query_stats', default=None)
+
+# Общие для процесса счетчики запросов
+query_totals = QueryTotals()
+
+
+# Учёт запросов текущего апдейта
+@contextmanager
+def track_queries(label: str = '') -> Iterator[UpdateQueryStats]:
+    """
+    Учёт SQL-запросов, выполненных внутри блока (в текущей asyncio-задаче), в отдельной статистике.
+    При SQL_DEBUG после блока печатаются повторяющиеся запросы.
+
+    :param label: Название обработчика для вывода повторяющихся запросов
+    :return: Статистика запросов блока
+    """
+    stats = UpdateQueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+        if SQL_DEBUG and (repeated := stats.repeated()):
+            query_totals.n_plus_one += 1
+            for statement, count in repeated:
+                print(f'N+1 в {label or "апдейте"}: запрос выполнен {count} раз: {statement}')
+
+
+# Регистрация обработчиков событий на движке
+def install_query_hooks(engine: Engine, slow_threshold_ms: float = SLOW_QUERY_THRESHOLD_MS) -> None:
+    """
+    Регистрация обработчиков before_cursor_execute/after_cursor_execute на движке для учёта запросов.
+
+    :param engine: Синхронный движок (для AsyncEngine - engine.sync_engine)
+    :param slow_threshold_ms: Время запроса в мс, начиная с которого запрос печатается как медленный
+    :return: None
+    """
+    slow_threshold = slow_threshold_ms / 1000
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    # Запрос завершился ошибкой - after_cursor_execute не вызывается, убираем время начала запроса
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_start_time'):
+            connection.info['query_start_time'].pop()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+        query_totals.queries += 1
+        query_totals.total_time += elapsed
+
+        stats = current_query_stats.get()
+        if stats is None and elapsed < slow_threshold:
+            return
+
+        normalized = normalize_statement(statement)
+        if stats is not None:
+            stats.add(normalized, elapsed)
+        if elapsed >= slow_threshold:
+            query_totals.slow += 1
+            print(f'Медленный запрос ({elapsed * 1000:.1f} мс): {normalized}')
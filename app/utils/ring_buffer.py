@@ -0,0 +1,53 @@
+"""
+Кольцевой буфер фиксированного размера для истории навигации по словам в тестах.
+
+INFO:
+    История хранит только id слов WordPhrase в двух массивах array('q') фиксированной длины: позиция навигации и id
+    слова. Позиция pos хранится в ячейке pos % capacity, поэтому при длинной сессии тестирования старые позиции
+    перезаписываются новыми, а память на историю одного типа теста не растёт (~2 * 8 * capacity байт).
+    Объект слова восстанавливается по id при возврате назад/вперёд через общий кеш слов
+    (DataBase.get_cached_word_phrase).
+"""
+from array import array
+from typing import Optional
+
+from app.settings import TESTS_HISTORY_CAPACITY
+
+
+_EMPTY = -(2 ** 63)                                 # Значение незанятой ячейки массива позиций
+
+
+# История слов теста в кольцевом буфере
+class WordHistoryRing:
+    """
+    История слов теста: {позиция навигации: id слова} в кольцевом буфере фиксированной ёмкости.
+    Доступны только последние capacity позиций, более ранние считаются отсутствующими.
+    """
+
+    __slots__ = ('capacity', '_positions', '_word_ids')
+
+    def __init__(self, capacity: int = TESTS_HISTORY_CAPACITY) -> None:
+        self.capacity = capacity
+        self._positions = array('q', [_EMPTY]) * capacity
+        self._word_ids = array('q', [0]) * capacity
+
+    # Получить id слова по позиции
+    def get(self, position: int) -> Optional[int]:
+        """
+        Получить id слова по позиции навигации.
+
+        :param position: Позиция навигации (может быть отрицательной при переходе назад от начала теста)
+        :return: id слова или None, если позиция не заполнена или уже перезаписана
+        """
+        slot = position % self.capacity
+        if self._positions[slot] != position:
+            return None
+        return self._word_ids[slot]
+
+    def __setitem__(self, position: int, word_id: int) -> None:
+        slot = position % self.capacity
+        self._positions[slot] = position
+        self._word_ids[slot] = word_id
+
+    def __len__(self) -> int:
+        return sum(position != _EMPTY for position in self._positions)
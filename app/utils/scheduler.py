@@ -5,6 +5,9 @@ import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
+from app.settings import CHAT_SESSIONS_EVICT_INTERVAL_MINUTES
+from app.utils.giga_cache import giga_cache
+
 
 async def delete_old_pass_reset_tokens_task(db):
     """ Удаление старых токенов сброса пароля из БД. """
@@ -16,7 +19,25 @@ async def delete_old_user_chats_task(db):
     await db.delete_old_user_chats()
 
 
-async def schedule_tasks(db):
+async def delete_old_emails_task(db):
+    """ Удаление устаревших писем из очереди исходящих писем. """
+    await db.delete_old_emails()
+
+
+async def evict_idle_chat_sessions_task(bot):
+    """ Удаление из памяти бота данных неактивных чатов + вывод метрик размера хранилища. """
+    evicted = bot.chat_sessions.evict_idle()
+    if evicted:
+        print(f'Удалены данные неактивных чатов: {evicted}. Хранилище чатов: {bot.chat_sessions.metrics()}')
+
+
+async def purge_giga_cache_task():
+    """ Удаление устаревших ответов из кеша GigaChat + вывод метрик попаданий в кеш. """
+    purged = await giga_cache.purge_expired()
+    print(f'Кеш ответов GigaChat: удалено устаревших {purged}, метрики {giga_cache.stats()}')
+
+
+async def schedule_tasks(db, bot):
     """ Планировщик задач с использованием APScheduler. """
 
     # Создаем планировщик для асинхронных задач
@@ -25,6 +46,11 @@ async def schedule_tasks(db):
     # Добавляем задачу, определяем интервал и передаём аргументы
     scheduler.add_job(delete_old_pass_reset_tokens_task, IntervalTrigger(minutes=10), args=[db])
     scheduler.add_job(delete_old_user_chats_task, IntervalTrigger(days=1), args=[db])
+    scheduler.add_job(delete_old_emails_task, IntervalTrigger(days=1), args=[db])
+    scheduler.add_job(purge_giga_cache_task, IntervalTrigger(days=1))
+    scheduler.add_job(
+        evict_idle_chat_sessions_task, IntervalTrigger(minutes=CHAT_SESSIONS_EVICT_INTERVAL_MINUTES), args=[bot]
+    )
 
     # Запускаем планировщик
     scheduler.start()
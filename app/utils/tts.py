@@ -5,6 +5,8 @@ import asyncio
 import os
 import random
 import re
+import tempfile
+import uuid
 
 import edge_tts
 from aiogram.fsm.context import FSMContext
@@ -13,6 +15,7 @@ from mutagen.mp3 import MP3
 from mutagen.id3 import ID3, TIT2
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.common.state_records import MessageRef
 from app.database.db import DataBase
 from app.utils.custom_bot_class import Bot
 from app.utils.tts_voices import all_voices_en_US_ShortName_list
@@ -21,18 +24,22 @@ from app.settings import PATTERN_AUDIO_CONVERT
 
 # Генерация и сохранение аудиофайла mp3 на основе переданного текста
 async def text_to_speech(
-        text: str, rate: str, voice: str, is_with_title: bool = True, filename: str = 'output.mp3') -> str:
+        text: str, rate: str, voice: str, is_with_title: bool = True, filename: str | None = None) -> str:
     """
     Генерация и сохранение аудиофайла mp3 на основе переданного текста с использованием Edge TTS (Microsoft Voices).
 
     :param text: Текст для озвучки
     :param rate: Скорость речи ('-10%' — медленнее, '+0%' — стандарт, '+10%' — быстрее)
     :param voice: Голос из списка edge_tts.list_voices() (например, 'en-US-JennyNeural')
-    :param filename: Имя файла для сохранения.
+    :param filename: Имя файла для сохранения (по умолчанию - уникальный временный файл, чтобы одновременные
+                     озвучки разных чатов не перезаписывали файлы друг друга)
     :param is_with_title: Добавлять заголовок к аудио файлу (только на desktop)
     :return: Путь к сохранённому аудио файлу
     """
 
+    if filename is None:
+        filename = os.path.join(tempfile.gettempdir(), f'tts_{uuid.uuid4().hex}.mp3')
+
     # Генерируем аудиофайл и сохраняем его по указанному пути
     communicate = edge_tts.Communicate(text, voice=voice, rate=rate)
     try:
@@ -114,12 +121,12 @@ async def speak_text(
         print(e)
     bot.auxiliary_msgs['user_msgs'][chat_id].append(msg)
 
-    # Если аудио отправлено, то добавляем сообщение с ним в state в список аудио примеров
+    # Если аудио отправлено, то добавляем ссылку на сообщение с ним в state в список аудио примеров
     if msg:
         state_data = await state.get_data()
         audio_examples = state_data.get('audio_examples')
         if audio_examples:
-            list(audio_examples.values())[0].append(msg)
+            list(audio_examples.values())[0].append(MessageRef.from_message(msg))
             await state.update_data(audio_examples=audio_examples)
 
     # Удаляем файл из системы после отправки
@@ -151,14 +158,14 @@ async def clear_audio_examples_from_chat(
     """
 
     # Проверяем наличие в state ключа audio_examples
-    audio_examples_in_chat = state_data.get('audio_examples')                   # {'entity_id': [msg1, msg2, msg3]}
+    audio_examples_in_chat = state_data.get('audio_examples')           # {'entity_id': [msg_ref1, msg_ref2, ...]}
 
     # Если в чате есть аудио примеры, удаляем их и очищаем audio_examples в state
     if audio_examples_in_chat:
         if list(audio_examples_in_chat.keys())[0] != entity_id:
             for audio_example in list(audio_examples_in_chat.values())[0]:
                 try:
-                    await bot.delete_message(callback.message.chat.id, audio_example.message_id)
+                    await audio_example.delete(bot)
                 except (Exception, ) as e:
                     print(e)
             audio_examples = {entity_id: []}
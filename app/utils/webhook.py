@@ -0,0 +1,100 @@
+"""
+Запуск бота в режиме webhook: aiohttp веб-сервер, на который Telegram отправляет апдейты.
+
+INFO:
+    Режим выбирается переменной окружения BOT_RUN_MODE=webhook (по умолчанию - polling).
+    Настройки:
+        - WEBHOOK_BASE_URL: публичный https-адрес бота (или балансировщика перед несколькими экземплярами бота);
+        - WEBHOOK_PATH: путь обработчика апдейтов, итоговый адрес - WEBHOOK_BASE_URL + WEBHOOK_PATH;
+        - WEBHOOK_SECRET: секретный токен (обязателен, 1-256 символов A-Z, a-z, 0-9, _ и -). Telegram передаёт его в
+          заголовке X-Telegram-Bot-Api-Secret-Token, запросы без верного токена отклоняются с кодом 401. Без токена
+          любой, кто знает адрес, мог бы отправлять боту поддельные апдейты, поэтому без него бот не запускается;
+        - WEB_SERVER_HOST, WEB_SERVER_PORT: адрес и порт веб-сервера (8080, открыт в Dockerfile).
+    Порт веб-сервера публичный, поэтому метрики Prometheus (app/utils/metrics.py) и управление профилированием
+    (app/utils/profiling.py) на нём не подключаются - их отдаёт внутренний сервер метрик METRICS_HOST:METRICS_PORT.
+
+    Обработчик отвечает Telegram сразу, а апдейт обрабатывается в фоновой задаче. Каждый экземпляр бота при запуске
+    регистрирует один и тот же адрес webhook, поэтому несколько экземпляров можно поставить за один балансировщик
+    (при FSM_STORAGE=redis состояния общие для всех экземпляров).
+"""
+import asyncio
+import re
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from app.settings import WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEB_SERVER_HOST, WEB_SERVER_PORT, \
+    PATTERN_WEBHOOK_SECRET
+
+
+# Проверка секретного токена webhook
+def check_webhook_secret(secret: Optional[str]) -> str:
+    """
+    Проверка секретного токена webhook: пустой токен отключил бы проверку запросов, поэтому он обязателен.
+
+    :param secret: Секретный токен
+    :return: Секретный токен
+    :raises ValueError: Токен не задан или содержит недопустимые символы
+    """
+    if not secret or not re.fullmatch(PATTERN_WEBHOOK_SECRET, secret):
+        raise ValueError('Для режима webhook необходимо задать WEBHOOK_SECRET: 1-256 символов A-Z, a-z, 0-9, _ и -')
+    return secret
+
+
+# Создание веб-приложения с обработчиком апдейтов
+def create_webhook_app(dp: Dispatcher, bot: Bot, path: str = WEBHOOK_PATH,
+                       secret: Optional[str] = WEBHOOK_SECRET) -> web.Application:
+    """
+    Создание aiohttp веб-приложения с обработчиком апдейтов aiogram.
+    Запуск и остановка приложения вызывают startup/shutdown функции диспетчера. Метрики и управление профилированием
+    на этом (публичном) сервере не подключаются.
+
+    :param dp: Диспетчер
+    :param bot: Объект бота
+    :param path: Путь обработчика апдейтов
+    :param secret: Секретный токен для проверки запросов Telegram (обязателен)
+    :return: Веб-приложение
+    """
+    secret = check_webhook_secret(secret)
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+# Запуск бота в режиме webhook
+async def run_webhook(dp: Dispatcher, bot: Bot, base_url: Optional[str] = WEBHOOK_BASE_URL,
+                      path: str = WEBHOOK_PATH, secret: Optional[str] = WEBHOOK_SECRET,
+                      host: str = WEB_SERVER_HOST, port: int = WEB_SERVER_PORT) -> None:
+    """
+    Регистрация webhook в Telegram и запуск веб-сервера до остановки процесса.
+
+    :param dp: Диспетчер
+    :param bot: Объект бота
+    :param base_url: Публичный адрес бота
+    :param path: Путь обработчика апдейтов
+    :param secret: Секретный токен для проверки запросов Telegram
+    :param host: Адрес веб-сервера
+    :param port: Порт веб-сервера
+    :return: None
+    """
+    if not base_url:
+        raise ValueError('Для режима webhook необходимо задать WEBHOOK_BASE_URL')
+    secret = check_webhook_secret(secret)
+
+    await bot.set_webhook(
+        url=base_url.rstrip('/') + path, secret_token=secret, allowed_updates=dp.resolve_used_update_types()
+    )
+
+    runner = web.AppRunner(create_webhook_app(dp, bot, path, secret))
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    print(f'Webhook-сервер запущен на {host}:{port}{path}')
+
+    # Работаем до отмены задачи (Ctrl+C / остановка контейнера), затем останавливаем сервер
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
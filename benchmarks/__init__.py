@@ -0,0 +1,3 @@
+"""
+Бенчмарки производительности приложения (запуск из корня проекта: python -m benchmarks.<имя_модуля>).
+"""
@@ -0,0 +1,383 @@
+"""
+Микробенчмарк методов DataBase на синтетических данных разного объёма.
+
+INFO:
+    Для каждого объёма --sizes (кол-во слов на пользователя) создаётся временная БД SQLite, в которую записываются
+    --users пользователей с одинаковым набором данных: темы (по WORDS_PER_TOPIC слов), слова с примерами, заметки
+    с примерами, попытки тестов (без отчёта - как перед формированием отчёта), отчёты, сохранённые аудио за AUDIO_DAYS
+    дней. Объёмы заметок, попыток, отчётов и аудио пропорциональны кол-ву слов (NOTES_RATIO, ATTEMPTS_RATIO и т.д.).
+
+    Каждый метод (CASES) вызывается --repeat раз для первого пользователя (после одного прогрева без замера), каждый
+    вызов - в новой сессии, как в обработчике. Перед вызовом кеши слов, аутентификации и настроек очищаются - замеряется
+    запрос к БД, а не кеш. Для методов записи перед вызовом выполняется подготовка без замера (напр. для
+    create_stat_report попыткам возвращается report_id NULL, чтобы каждый отчёт учитывал одинаковое кол-во попыток).
+    Методы записи вызываются после методов чтения.
+
+    Для каждого метода выводится время вызова min/median/p95/mean (мс), кол-во SQL-запросов за вызов и кол-во
+    возвращённых записей. Результаты с параметрами запуска и версиями SQLite/SQLAlchemy записываются в JSON-файл
+    --output; с --compare выводится сравнение median с результатами предыдущего запуска (напр. до и после изменения
+    индексов, запросов или настроек движка).
+
+    Запуск из корня проекта (нужен заполненный .env, как и для запуска бота; БД - во временной папке):
+        python -m benchmarks.bench_db [--sizes 1000,10000,100000] [--users 3] [--repeat 5] [--methods notes,audio]
+                                      [--output bench_db.json] [--compare bench_db_old.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from benchmarks.fake_telegram import FAKE_TOKEN
+
+
+WORDS_PER_TOPIC = 100
+EXAMPLES_PER_WORD = 1
+NOTES_RATIO = 0.1                                   # Заметок на одно слово
+EXAMPLES_PER_NOTE = 2
+ATTEMPTS_RATIO = 1.0                                # Попыток тестов без отчёта на одно слово
+REPORTS_RATIO = 0.01                                # Отчётов на одно слово
+AUDIO_RATIO = 0.1                                   # Сохранённых аудио на одно слово
+AUDIO_DAYS = 30                                     # Аудио распределены по AUDIO_DAYS дням
+SEARCH_WORD = 'apple'                               # Поисковая строка слов (есть в 1% слов)
+SEARCH_NOTE = 'grammar'                             # Поисковая строка заметок (есть в 10% заметок)
+CHAT_ID_BASE = 10_000_000                           # id чата пользователя: CHAT_ID_BASE + User.id
+START_DATE = datetime(2025, 1, 1, 12, 0, 0)
+
+
+# Вызов метода: (сессия, данные пользователя) -> результат
+Call = Callable[[Any, dict], Awaitable[Any]]
+
+
+# Набор вызовов бенчмарка: (название, вызов, подготовка без замера или None)
+def make_cases() -> list[tuple[str, Call, Optional[Call]]]:
+    """ Список вызовов методов DataBase: сначала чтение, затем запись. """
+    from sqlalchemy import update
+
+    from app.database.db import DataBase as DB
+    from app.database.models import Attempt
+
+    # Подготовка create_stat_report: все попытки пользователя снова без отчёта
+    async def reset_attempts(session, ctx: dict) -> None:
+        await session.execute(update(Attempt).where(Attempt.user_id == ctx['user_id']).values(report_id=None))
+        await session.commit()
+
+    return [
+        # Пользователь, чат, настройки
+        ('get_user_by_id', lambda s, c: DB.get_user_by_id(s, c['user_id']), None),
+        ('get_user_chat', lambda s, c: DB.get_user_chat(s, c['chat_id']), None),
+        ('get_auth_user_id', lambda s, c: DB.get_auth_user_id(s, c['chat_id']), None),
+        ('get_user_settings', lambda s, c: DB.get_user_settings(s, c['user_id']), None),
+        ('get_all_banners', lambda s, c: DB.get_all_banners(s), None),
+
+        # Темы
+        ('get_all_topics', lambda s, c: DB.get_all_topics(s, c['user_id']), None),
+        ('get_all_topics[search]', lambda s, c: DB.get_all_topics(s, c['user_id'], search_key='Topic 1'), None),
+        ('count_topics', lambda s, c: DB.count_topics(s, c['user_id']), None),
+        ('get_topic_by_id', lambda s, c: DB.get_topic_by_id(s, c['topic_id']), None),
+
+        # Слова и примеры
+        ('get_user_word_phrases', lambda s, c: DB.get_user_word_phrases(s, c['user_id']), None),
+        ('get_user_word_phrases[topic]',
+         lambda s, c: DB.get_user_word_phrases(s, c['user_id'], topic_id=c['topic_id']), None),
+        ('get_user_word_phrases[search]',
+         lambda s, c: DB.get_user_word_phrases(s, c['user_id'], search_keywords=SEARCH_WORD), None),
+        ('get_random_word_phrase', lambda s, c: DB.get_random_word_phrase(s, c['user_id'], None), None),
+        ('get_random_word_phrase[topic]',
+         lambda s, c: DB.get_random_word_phrase(s, c['user_id'], c['topic_id']), None),
+        ('get_word_phrase_by_id', lambda s, c: DB.get_word_phrase_by_id(s, c['word_id']), None),
+        ('get_cached_word_phrase', lambda s, c: DB.get_cached_word_phrase(s, c['word_id']), None),
+        ('get_word_phrase_by_data',
+         lambda s, c: DB.get_word_phrase_by_data(s, c['word'].word, c['word'].translate, c['topic_id']), None),
+        ('check_if_user_has_words', lambda s, c: DB.check_if_user_has_words(s, c['user_id']), None),
+        ('get_context_by_id', lambda s, c: DB.get_context_by_id(s, c['context_id']), None),
+        ('get_random_context', lambda s, c: DB.get_random_context(s, c['user_id']), None),
+        ('check_if_user_has_examples', lambda s, c: DB.check_if_user_has_examples(s, c['user_id']), None),
+
+        # Тесты и статистика
+        ('get_stat_attempts', lambda s, c: DB.get_stat_attempts(s, c['user_id'], c['test_type']), None),
+        ('get_user_attempts', lambda s, c: DB.get_user_attempts(s, c['user_id']), None),
+        ('get_user_reports', lambda s, c: DB.get_user_reports(s, c['user_id']), None),
+
+        # Заметки
+        ('get_user_notes', lambda s, c: DB.get_user_notes(s, c['user_id']), None),
+        ('get_user_notes[search]', lambda s, c: DB.get_user_notes(s, c['user_id'], search_filter=SEARCH_NOTE), None),
+        ('get_note_by_id', lambda s, c: DB.get_note_by_id(s, c['note_id']), None),
+
+        # Аудио
+        ('get_all_saved_audios', lambda s, c: DB.get_all_saved_audios(s, c['user_id']), None),
+        ('get_all_saved_audios[date]',
+         lambda s, c: DB.get_all_saved_audios(s, c['user_id'], filter_date=c['audio_date']), None),
+        ('get_audio_dates_and_count', lambda s, c: DB.get_audio_dates_and_count(s, c['user_id']), None),
+
+        # Запись
+        ('create_attempt', lambda s, c: DB.create_attempt(s, c['user_id'], c['test_type'], c['word'], 'correct'),
+         None),
+        ('create_stat_report',
+         lambda s, c: DB.create_stat_report(s, c['user_id'], c['test_type'], 100, 50, 50.0, None), reset_attempts),
+        ('update_word_phrase',
+         lambda s, c: DB.update_word_phrase(s, c['word_id'], {'transcription': 'ˈæp.əl'}), None),
+        ('update_note_by_id', lambda s, c: DB.update_note_by_id(s, c['note_id'], text='Updated note text'), None),
+        ('update_user_settings',
+         lambda s, c: DB.update_user_settings(s, c['user_id'], speech_rate='-10%'), None),
+    ]
+
+
+# Заполнение БД
+async def seed_database(db, users: int, words: int) -> dict:
+    """
+    Заполнение БД: users пользователей с words словами каждый и пропорциональным кол-вом остальных данных.
+
+    :param db: Объект DataBase
+    :param users: Кол-во пользователей
+    :param words: Кол-во слов на пользователя
+    :return: Данные первого пользователя для вызовов (id пользователя, чата, темы, слова, заметки и т.д.)
+    """
+    from sqlalchemy import insert
+
+    from app.database.models import User, UserChat, UserSettings, Topic, WordPhrase, Context, Notes, Attempt, \
+        Report, SavedAudio
+    from app.settings import TEST_TYPES
+
+    rnd = random.Random(0)
+    topic_ids, word_ids, context_ids, note_ids, report_ids = (itertools.count(1) for _ in range(5))
+    topics = max(1, words // WORDS_PER_TOPIC)
+
+    async with db.session_maker() as session:
+        for user_id in range(1, users + 1):
+            rows: dict[Any, list[dict]] = {model: [] for model in (User, UserChat, UserSettings, Topic, WordPhrase,
+                                                                   Notes, Context, Report, Attempt, SavedAudio)}
+            rows[User].append({'id': user_id, 'email': f'user{user_id}@example.com', 'password_hash': 'x' * 97})
+            rows[UserChat].append({'user_id': user_id, 'chat_id': CHAT_ID_BASE + user_id})
+            rows[UserSettings].append({'user_id': user_id, 'speech_rate': '-20%', 'voice': 'en-US-AvaNeural'})
+
+            user_words = []
+            for topic_idx in range(topics):
+                topic_id = next(topic_ids)
+                rows[Topic].append({'id': topic_id, 'name': f'Topic {topic_idx}', 'user_id': user_id})
+            for word_idx in range(words):
+                word_id = next(word_ids)
+                topic_id = rows[Topic][word_idx % topics]['id']
+                word = f'{SEARCH_WORD} {word_idx}' if word_idx % 100 == 0 else f'word {word_idx}'
+                user_words.append((word_id, word, topic_id))
+                rows[WordPhrase].append({'id': word_id, 'topic_id': topic_id, 'word': word, 'transcription': 'wɜːd',
+                                         'translate': f'слово {word_idx}'})
+                rows[Context].extend(
+                    {'id': next(context_ids), 'word_id': word_id, 'example': f'This is example {idx} for {word}'}
+                    for idx in range(EXAMPLES_PER_WORD)
+                )
+
+            for note_idx in range(max(1, int(words * NOTES_RATIO))):
+                note_id = next(note_ids)
+                subject = SEARCH_NOTE if note_idx % 10 == 0 else 'vocabulary'
+                rows[Notes].append({'id': note_id, 'user_id': user_id, 'title': f'Note {note_idx}',
+                                    'text': f'Text of the note number {note_idx} about English {subject}'})
+                rows[Context].extend(
+                    {'id': next(context_ids), 'note_id': note_id, 'example': f'Note example {idx} sentence'}
+                    for idx in range(EXAMPLES_PER_NOTE)
+                )
+
+            for _ in range(max(1, int(words * REPORTS_RATIO))):
+                rows[Report].append({'id': next(report_ids), 'user_id': user_id, 'test_type': rnd.choice(TEST_TYPES),
+                                     'total_attempts': 100, 'correct_attempts': 50, 'result_percentage': 50,
+                                     'total_words': words})
+
+            for _ in range(int(words * ATTEMPTS_RATIO)):
+                word_id, word, topic_id = rnd.choice(user_words)
+                rows[Attempt].append({'user_id': user_id, 'test_type': rnd.choice(TEST_TYPES), 'topic_id': topic_id,
+                                      'word_id': word_id, 'word_text': word,
+                                      'result': rnd.choice(['correct', 'wrong'])})
+
+            for audio_idx in range(int(words * AUDIO_RATIO)):
+                created = START_DATE + timedelta(days=audio_idx % AUDIO_DAYS, seconds=audio_idx)
+                rows[SavedAudio].append({'user_id': user_id, 'file_path': f'audio/{user_id}/{audio_idx}.mp3',
+                                         'created': created, 'updated': created})
+
+            for model, model_rows in rows.items():
+                if model_rows:
+                    await session.execute(insert(model), model_rows)
+            await session.commit()
+
+    # Данные первого пользователя для вызовов методов
+    async with db.session_maker() as session:
+        from app.database.db import DataBase
+
+        topic_id = 1
+        word = (await DataBase.get_user_word_phrases(session, 1, topic_id=topic_id, ordering_asc=True))[0]
+        note = (await DataBase.get_user_notes(session, 1, ordering_asc=True))[0]
+    return {
+        'user_id': 1, 'chat_id': CHAT_ID_BASE + 1, 'topic_id': topic_id, 'word': word, 'word_id': word.id,
+        'context_id': word.context[0].id, 'note_id': note.id, 'test_type': TEST_TYPES[0],
+        'audio_date': START_DATE.strftime('%Y-%m-%d'),
+    }
+
+
+# Кол-во записей в результате метода
+def result_size(result: Any) -> Optional[int]:
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)) or hasattr(result, '__len__') and not isinstance(result, str):
+        return len(result)
+    return 1
+
+
+# Замер вызовов методов на одном наборе данных
+async def run_cases(db, ctx: dict, cases: list[tuple[str, Call, Optional[Call]]], repeat: int) -> dict[str, dict]:
+    """
+    Замер времени и кол-ва SQL-запросов вызовов cases.
+
+    :param db: Объект DataBase
+    :param ctx: Данные пользователя для вызовов
+    :param cases: Вызовы (название, вызов, подготовка)
+    :param repeat: Кол-во замеров каждого вызова
+    :return: Словарь {название: статистика вызова}
+    """
+    from app.database.db import word_cache, auth_cache, user_settings_cache
+    from app.utils.query_stats import query_totals
+
+    results = {}
+    for name, call, setup in cases:
+        timings, queries, rows = [], 0, None
+        for iteration in range(repeat + 1):                     # Первый вызов - прогрев, без замера
+            async with db.session_maker() as session:
+                if setup is not None:
+                    await setup(session, ctx)
+                for cache in (word_cache, auth_cache, user_settings_cache):
+                    cache.clear()
+
+                queries_before = query_totals.queries
+                start = time.perf_counter()
+                result = await call(session, ctx)
+                elapsed = time.perf_counter() - start
+                if iteration:
+                    timings.append(elapsed * 1000)
+                    queries += query_totals.queries - queries_before
+                    rows = result_size(result)
+
+        timings.sort()
+        results[name] = {
+            'min_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries': round(queries / repeat, 2),
+            'rows': rows,
+        }
+        print(f'  {name:<32} {results[name]["median_ms"]:>10.2f} мс  запросов: {results[name]["queries"]:g}',
+              file=sys.stderr)
+    return results
+
+
+# Бенчмарк на одном объёме данных
+async def run_size(words: int, args: argparse.Namespace, tmp_dir: str) -> dict:
+    """ Создание БД с words словами на пользователя, заполнение и замер методов. """
+    from app.database.db import DataBase
+
+    # Движок читает адрес БД при создании DataBase
+    os.environ['DB_LITE'] = f'sqlite+aiosqlite:///{os.path.join(tmp_dir, f"bench_{words}.db")}'
+    db = DataBase()
+    db.engine.sync_engine.echo = False
+    try:
+        await db.create_db()
+        await db.create_banners()
+
+        start = time.perf_counter()
+        ctx = await seed_database(db, args.users, words)
+        seed_seconds = time.perf_counter() - start
+        print(f'Слов на пользователя: {words}, пользователей: {args.users} (заполнение {seed_seconds:.1f} с)',
+              file=sys.stderr)
+
+        cases = [case for case in make_cases() if not args.methods or any(key in case[0] for key in args.methods)]
+        results = await run_cases(db, ctx, cases, args.repeat)
+    finally:
+        await db.engine.dispose()
+    return {'words_per_user': words, 'seed_seconds': round(seed_seconds, 2), 'methods': results}
+
+
+# Сравнение с предыдущим запуском
+def print_comparison(current: dict, previous: dict) -> None:
+    """ Вывод median текущего и предыдущего запуска для совпадающих объёмов и методов. """
+    previous_runs = {run['words_per_user']: run['methods'] for run in previous['runs']}
+    print(f'{"слов":>7} {"метод":<32} {"было, мс":>10} {"стало, мс":>10} {"изм.":>8}')
+    for run in current['runs']:
+        old_methods = previous_runs.get(run['words_per_user'], {})
+        for name, stats in run['methods'].items():
+            if name not in old_methods:
+                continue
+            old, new = old_methods[name]['median_ms'], stats['median_ms']
+            change = f'{(new - old) / old * 100:+.0f}%' if old else '-'
+            print(f'{run["words_per_user"]:>7} {name:<32} {old:>10.2f} {new:>10.2f} {change:>8}')
+
+
+# Вывод таблицы результатов
+def print_table(report: dict) -> None:
+    print(f'{"слов":>7} {"метод":<32} {"min":>9} {"median":>9} {"p95":>9} {"mean":>9} {"запросов":>9} {"записей":>8}')
+    for run in report['runs']:
+        for name, stats in run['methods'].items():
+            print(f'{run["words_per_user"]:>7} {name:<32} {stats["min_ms"]:>9.2f} {stats["median_ms"]:>9.2f} '
+                  f'{stats["p95_ms"]:>9.2f} {stats["mean_ms"]:>9.2f} {stats["queries"]:>9g} {stats["rows"]:>8}')
+
+
+async def main(args: argparse.Namespace, tmp_dir: str) -> dict:
+    import sqlalchemy
+
+    runs = [await run_size(words, args, tmp_dir) for words in args.sizes]
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'sizes': args.sizes,
+            'users': args.users,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'sqlalchemy': sqlalchemy.__version__,
+        },
+        'runs': runs,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Микробенчмарк методов DataBase на синтетических данных')
+    parser.add_argument('--sizes', default=[1000, 10000, 100000],
+                        type=lambda value: [int(size) for size in value.split(',') if size],
+                        help='Объёмы данных через запятую: кол-во слов на пользователя')
+    parser.add_argument('--users', type=int, default=3, help='Кол-во пользователей с данными')
+    parser.add_argument('--repeat', type=int, default=5, help='Кол-во замеров каждого метода')
+    parser.add_argument('--methods', default=[], type=lambda value: [name for name in value.split(',') if name],
+                        help='Только методы, в названии которых есть одна из подстрок (через запятую)')
+    parser.add_argument('--output', default='bench_db.json', help='Файл для результатов в формате JSON')
+    parser.add_argument('--compare', help='Файл результатов предыдущего запуска для сравнения')
+    arguments = parser.parse_args()
+    if arguments.repeat < 1:
+        parser.error('--repeat должен быть не меньше 1')
+
+    # Временная папка для БД (настройки читаются при импорте app, поэтому - до него)
+    tmp_dir = tempfile.mkdtemp(prefix='bench_db_')
+    os.environ['DB_LITE'] = f'sqlite+aiosqlite:///{os.path.join(tmp_dir, "bot.db")}'
+    os.environ.setdefault('BOT_TOKEN', FAKE_TOKEN)
+    try:
+        # Вывод методов БД (print) - в stderr, чтобы не смешивался с таблицей
+        with contextlib.redirect_stdout(sys.stderr):
+            bench_report = asyncio.run(main(arguments, tmp_dir))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    with open(arguments.output, 'w', encoding='utf-8') as output_file:
+        json.dump(bench_report, output_file, ensure_ascii=False, indent=2)
+    print_table(bench_report)
+    print(f'Результаты записаны в {arguments.output}')
+
+    if arguments.compare:
+        with open(arguments.compare, encoding='utf-8') as compare_file:
+            print_comparison(bench_report, json.load(compare_file))
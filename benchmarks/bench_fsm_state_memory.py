@@ -0,0 +1,144 @@
+"""
+Бенчмарк памяти state FSM: 10 000 одновременных чатов до и после перехода на компактные записи.
+
+INFO:
+    "До" - данные state в том виде, в котором их раньше сохраняли обработчики: ORM-объекты (слово с темой и примерами,
+    пример, пользователь, список заметок, редактируемая заметка, тема в статистике) и целые объекты сообщений aiogram.
+    "После" - id и записи из app/common/state_records.py.
+
+    Для каждого варианта state всех чатов записывается в MemoryStorage aiogram, замеряется прирост памяти (tracemalloc)
+    и размер сериализованных данных одного чата (как они будут записаны в SQLite/Redis хранилище).
+    ORM-объекты создаются без подключения к БД, поэтому для варианта "до" результат - нижняя оценка: объекты,
+    загруженные сессией, дополнительно удерживают ссылки на неё.
+
+    Запуск из корня проекта (нужен заполненный .env, как и для запуска бота):
+        python -m benchmarks.bench_fsm_state_memory [--chats 10000]
+"""
+import argparse
+import asyncio
+import datetime
+import gc
+import tracemalloc
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, Message, User as TgUser
+
+from app.database.models import User, Topic, WordPhrase, Context, Notes
+from app.common.state_records import UserRecord, ContextRecord, MessageRef, NoteRecord, notes_to_records, \
+    stat_data_to_record
+from app.utils.fsm_storage import dump_state_data
+
+
+NOTES_PER_CHAT = 10                                 # Количество заметок пользователя в 'user_notes'
+EXAMPLES_PER_ENTITY = 3                             # Количество примеров у слова/заметки
+AUDIO_EXAMPLES_PER_CHAT = 4                         # Количество сообщений в 'audio_examples'
+NOW = datetime.datetime(2025, 1, 1, 12, 0, 0)
+
+
+# Создание сообщения aiogram, аналогичного приходящему от Telegram
+def make_message(chat_id: int, message_id: int) -> Message:
+    """ Создание объекта сообщения aiogram с типичным для бота набором полей. """
+    return Message(
+        message_id=message_id, date=NOW, chat=Chat(id=chat_id, type='private', first_name='User'),
+        from_user=TgUser(id=chat_id, is_bot=False, first_name='User', language_code='ru'),
+        text='📒 Заметка с примерами использования слова в контексте'
+    )
+
+
+# Создание заметки с примерами
+def make_note(chat_id: int, idx: int) -> Notes:
+    """ Создание ORM-объекта заметки с примерами. """
+    note = Notes(id=chat_id * 100 + idx, user_id=chat_id, title=f'Заметка {idx}', text='Текст заметки ' * 10,
+                 created=NOW, updated=NOW)
+    note.examples = [
+        Context(id=note.id * 10 + i, example=f'Example sentence number {i}', note_id=note.id, created=NOW, updated=NOW)
+        for i in range(EXAMPLES_PER_ENTITY)
+    ]
+    return note
+
+
+# Данные state одного чата в старом формате (ORM-объекты и сообщения)
+def make_state_before(chat_id: int) -> dict:
+    """ Данные state одного чата в старом формате: ORM-объекты и объекты сообщений. """
+    topic = Topic(id=chat_id, name='Travel', user_id=chat_id, created=NOW, updated=NOW)
+    word = WordPhrase(id=chat_id, word='itinerary', transcription='aɪˈtɪnərəri', translate='маршрут',
+                      topic_id=topic.id, created=NOW, updated=NOW)
+    word.topic = topic
+    word.context = [Context(id=chat_id * 10 + i, example=f'Our itinerary includes {i} cities', word_id=word.id,
+                            created=NOW, updated=NOW) for i in range(EXAMPLES_PER_ENTITY)]
+    notes = [make_note(chat_id, i) for i in range(NOTES_PER_CHAT)]
+    return {
+        'user': User(id=chat_id, email=f'user{chat_id}@example.com', password_hash='x' * 97),
+        'word_obj': word,
+        'stat_data': (10, 7, 3, 70.0, 1, topic),
+        'random_example_obj': word.context[0],
+        'user_notes': notes,
+        'edited_note': notes[0],
+        'note_msg': make_message(chat_id, 1),
+        'info_msg': make_message(chat_id, 2),
+        'audio_examples': {word.id: [make_message(chat_id, 10 + i) for i in range(AUDIO_EXAMPLES_PER_CHAT)]},
+    }
+
+
+# Данные state одного чата в новом формате (id и компактные записи)
+def make_state_after(chat_id: int) -> dict:
+    """ Данные state одного чата в новом формате: id и записи из state_records. """
+    before = make_state_before(chat_id)
+    return {
+        'user': UserRecord.from_orm(before['user']),
+        'word_id': before['word_obj'].id,
+        'stat_data': stat_data_to_record(before['stat_data']),
+        'random_example': ContextRecord.from_orm(before['random_example_obj']),
+        'user_notes': notes_to_records(before['user_notes']),
+        'edited_note': NoteRecord.from_orm(before['edited_note']),
+        'note_msg': MessageRef.from_message(before['note_msg']),
+        'info_msg': MessageRef.from_message(before['info_msg']),
+        'audio_examples': {
+            entity_id: [MessageRef.from_message(msg) for msg in msgs]
+            for entity_id, msgs in before['audio_examples'].items()
+        },
+    }
+
+
+# Замер памяти на заполнение хранилища state всех чатов
+async def measure(make_state, chats: int) -> tuple[int, int]:
+    """
+    Замер памяти, занимаемой state всех чатов в MemoryStorage.
+
+    :param make_state: Функция формирования state одного чата
+    :param chats: Количество чатов
+    :return: (прирост памяти в байтах, размер сериализованного state одного чата в байтах)
+    """
+    storage = MemoryStorage()
+    pickled_size = len(dump_state_data(make_state(1)))
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for chat_id in range(1, chats + 1):
+        await storage.set_data(StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id), make_state(chat_id))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    await storage.close()
+    return used, pickled_size
+
+
+async def main(chats: int) -> None:
+    """ Запуск замеров и вывод результатов. """
+    before_mem, before_size = await measure(make_state_before, chats)
+    after_mem, after_size = await measure(make_state_after, chats)
+
+    print(f'Чатов: {chats}')
+    print(f'{"":<8}{"память, МБ":>14}{"на чат, КБ":>14}{"pickle на чат, КБ":>20}')
+    for title, mem, size in (('до', before_mem, before_size), ('после', after_mem, after_size)):
+        print(f'{title:<8}{mem / 2 ** 20:>14.1f}{mem / chats / 1024:>14.2f}{size / 1024:>20.2f}')
+    print(f'Сокращение памяти: в {before_mem / after_mem:.1f} раз')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--chats', type=int, default=10_000, help='Количество одновременных чатов')
+    asyncio.run(main(parser.parse_args().chats))
@@ -0,0 +1,268 @@
+"""
+Бенчмарк импорта/экспорта xlsx на сгенерированных файлах разного объёма.
+
+INFO:
+    Для каждого объёма --sizes (всего слов в файле) создаётся файл импорта (benchmarks/xlsx_workbooks.py): --topics
+    листов тем, заметок - 10% от кол-ва слов, --examples примеров у записи. На временной БД SQLite для одного
+    пользователя последовательно выполняются этапы:
+        - generate - создание файла (для сравнения с экспортом);
+        - import_new - import_data_from_xls_file в пустую БД (создание тем, слов, заметок и примеров);
+        - import_repeat - повторный импорт того же файла (только проверки существующих записей, без изменений);
+        - export_vocabulary - export_vcb_data_to_xls_file;
+        - export_all_data - export_all_user_data_to_xls (перед этапом добавляются попытки тестов - по одной на слово,
+          и отчёты).
+    Для каждого этапа выводится: время (с), пиковый RSS процесса и его прирост за этап (МБ, по замерам каждые
+    RSS_SAMPLE_INTERVAL с), кол-во SQL-запросов, размер файла (КБ) и кол-во записей (добавлено при импорте).
+
+    Запуск из корня проекта (нужен заполненный .env, как и для запуска бота; БД и файлы - во временной папке):
+        python -m benchmarks.bench_xlsx [--sizes 500,2000,10000] [--topics 10] [--examples 2] [--text mixed]
+                                        [--output bench_xlsx.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from benchmarks.fake_telegram import FAKE_TOKEN
+
+
+USER_ID = 1
+CHAT_ID = 10_000_001
+NOTES_RATIO = 0.1                                   # Заметок на одно слово
+REPORTS_RATIO = 0.01                                # Отчётов на одно слово (для export_all_data)
+RSS_SAMPLE_INTERVAL = 0.005                         # Интервал замеров RSS, в секундах
+
+
+# Текущий RSS процесса
+def current_rss() -> int:
+    """ Текущий RSS процесса в байтах (Linux: /proc/self/statm, иначе - пиковый RSS за всё время процесса). """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+# Пиковый RSS за время выполнения блока
+class RssSampler:
+    """ Замер пикового RSS процесса за время выполнения блока (в фоновом потоке каждые interval секунд). """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self) -> 'RssSampler':
+        self.start = self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+# Замер этапа
+async def measure(phase: str, action: Callable[[], Awaitable[Any]]) -> tuple[dict, Any]:
+    """
+    Замер времени, пикового RSS и кол-ва SQL-запросов этапа.
+
+    :param phase: Название этапа
+    :param action: Функция этапа
+    :return: Статистика этапа и результат action()
+    """
+    from app.utils.query_stats import query_totals
+
+    queries_before = query_totals.queries
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        result = await action()
+        elapsed = time.perf_counter() - start
+    stats = {
+        'phase': phase,
+        'seconds': round(elapsed, 3),
+        'peak_rss_mb': round(rss.peak / 2 ** 20, 1),
+        'rss_growth_mb': round((rss.peak - rss.start) / 2 ** 20, 1),
+        'queries': query_totals.queries - queries_before,
+    }
+    print(f'  {phase:<18} {stats["seconds"]:>8.2f} с', file=sys.stderr)
+    return stats, result
+
+
+# Попытки тестов и отчёты для экспорта всех данных
+async def seed_statistics(db, words: int) -> None:
+    """ Добавление попыток тестов (по одной на слово пользователя) и отчётов. """
+    from sqlalchemy import insert, select
+
+    from app.database.models import Attempt, Report, Topic, WordPhrase
+    from app.settings import TEST_TYPES
+
+    rnd = random.Random(0)
+    async with db.session_maker() as session:
+        user_words = (await session.execute(
+            select(WordPhrase.id, WordPhrase.word, WordPhrase.topic_id).join(Topic).where(Topic.user_id == USER_ID)
+        )).all()
+        reports = [{'id': idx, 'user_id': USER_ID, 'test_type': rnd.choice(TEST_TYPES), 'total_attempts': 100,
+                    'correct_attempts': 50, 'result_percentage': 50, 'total_words': words}
+                   for idx in range(1, max(1, int(words * REPORTS_RATIO)) + 1)]
+        attempts = [{'user_id': USER_ID, 'test_type': rnd.choice(TEST_TYPES), 'topic_id': topic_id, 'word_id': word_id,
+                     'word_text': word, 'result': rnd.choice(['correct', 'wrong']),
+                     'report_id': rnd.choice(reports)['id']}
+                    for word_id, word, topic_id in user_words]
+        await session.execute(insert(Report), reports)
+        if attempts:
+            await session.execute(insert(Attempt), attempts)
+        await session.commit()
+
+
+# Бенчмарк на одном объёме данных
+async def run_size(words: int, args: argparse.Namespace, tmp_dir: str, bot) -> dict:
+    """ Генерация файла с words словами, импорт в новую БД, повторный импорт и экспорт. """
+    from sqlalchemy import insert
+
+    from app.database.db import DataBase
+    from app.database.models import User, UserChat
+    from app.utils.xsl_tools import import_data_from_xls_file, export_vcb_data_to_xls_file, \
+        export_all_user_data_to_xls
+    from benchmarks.xlsx_workbooks import WorkbookSpec, generate_workbook
+
+    spec = WorkbookSpec(topics=args.topics, rows=max(1, words // args.topics), notes=max(1, int(words * NOTES_RATIO)),
+                        examples=args.examples, text=args.text)
+    print(f'Слов: {spec.words}, тем: {spec.topics}, заметок: {spec.notes}, примеров у записи: {spec.examples}',
+          file=sys.stderr)
+
+    # Движок читает адрес БД при создании DataBase
+    os.environ['DB_LITE'] = f'sqlite+aiosqlite:///{os.path.join(tmp_dir, f"bench_{words}.db")}'
+    db = DataBase()
+    db.engine.sync_engine.echo = False
+    phases = []
+    try:
+        await db.create_db()
+        async with db.session_maker() as session:
+            await session.execute(insert(User), [{'id': USER_ID, 'email': 'user@example.com', 'password_hash': 'x'}])
+            await session.execute(insert(UserChat), [{'user_id': USER_ID, 'chat_id': CHAT_ID}])
+            await session.commit()
+        bot.auth_user_id[CHAT_ID] = USER_ID
+
+        import_path = os.path.join(tmp_dir, f'import_{words}.xlsx')
+        stats, _ = await measure('generate', lambda: asyncio.to_thread(generate_workbook, import_path, spec))
+        stats['file_kb'] = round(os.path.getsize(import_path) / 1024, 1)
+        phases.append(stats)
+
+        # Импорт: в пустую БД и повторно тот же файл
+        async def import_file() -> int:
+            async with db.session_maker() as session:
+                with open(import_path, 'rb') as data_file:
+                    return await import_data_from_xls_file(session, bot, CHAT_ID, data_file)
+
+        for phase in ('import_new', 'import_repeat'):
+            stats, added = await measure(phase, import_file)
+            stats['file_kb'] = round(os.path.getsize(import_path) / 1024, 1)
+            stats['records'] = added
+            phases.append(stats)
+
+        # Экспорт словаря и всех данных
+        async def export_vocabulary() -> str:
+            async with db.session_maker() as session:
+                return await export_vcb_data_to_xls_file(session, bot, CHAT_ID,
+                                                         os.path.join(tmp_dir, f'export_{words}.xlsx'))
+
+        async def export_all_data() -> str:
+            async with db.session_maker() as session:
+                reports = await DataBase.get_user_reports(session, USER_ID)
+                return await export_all_user_data_to_xls(session, bot, CHAT_ID, USER_ID, list(reports))
+
+        await seed_statistics(db, spec.words)
+        for phase, action in (('export_vocabulary', export_vocabulary), ('export_all_data', export_all_data)):
+            stats, path = await measure(phase, action)
+            stats['file_kb'] = round(os.path.getsize(path) / 1024, 1)
+            phases.append(stats)
+    finally:
+        await db.engine.dispose()
+    return {'words': spec.words, 'topics': spec.topics, 'notes': spec.notes, 'examples': spec.examples,
+            'phases': phases}
+
+
+# Вывод таблицы результатов
+def print_table(report: dict) -> None:
+    print(f'{"слов":>7} {"этап":<18} {"время, с":>9} {"RSS, МБ":>8} {"прирост":>8} {"запросов":>9} '
+          f'{"файл, КБ":>9} {"записей":>8}')
+    for run in report['runs']:
+        for stats in run['phases']:
+            print(f'{run["words"]:>7} {stats["phase"]:<18} {stats["seconds"]:>9.2f} {stats["peak_rss_mb"]:>8.1f} '
+                  f'{stats["rss_growth_mb"]:>8.1f} {stats["queries"]:>9} {stats.get("file_kb", "-"):>9} '
+                  f'{stats.get("records", "-"):>8}')
+
+
+async def main(args: argparse.Namespace, tmp_dir: str) -> dict:
+    import openpyxl
+
+    from app.utils.custom_bot_class import Bot
+
+    bot = Bot(FAKE_TOKEN)
+    try:
+        runs = [await run_size(words, args, tmp_dir, bot) for words in args.sizes]
+    finally:
+        await bot.session.close()
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'sizes': args.sizes,
+            'topics': args.topics,
+            'examples': args.examples,
+            'text': args.text,
+            'python': platform.python_version(),
+            'openpyxl': openpyxl.__version__,
+        },
+        'runs': runs,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Бенчмарк импорта/экспорта xlsx на сгенерированных файлах')
+    parser.add_argument('--sizes', default=[500, 2000, 10000],
+                        type=lambda value: [int(size) for size in value.split(',') if size],
+                        help='Объёмы файлов через запятую: всего слов в файле')
+    parser.add_argument('--topics', type=int, default=10, help='Кол-во листов тем в файле')
+    parser.add_argument('--examples', type=int, default=2, help='Кол-во примеров у слова/заметки')
+    parser.add_argument('--text', default='mixed', choices=('mixed', 'latin', 'cyrillic'), help='Алфавит текста')
+    parser.add_argument('--output', default='bench_xlsx.json', help='Файл для результатов в формате JSON')
+    arguments = parser.parse_args()
+    output_path = os.path.abspath(arguments.output)
+
+    # Временная папка для БД и файлов (настройки читаются при импорте app, поэтому - до него).
+    # Экспорт всех данных записывает файл в текущую папку - на время бенчмарка это временная папка
+    tmp_dir = tempfile.mkdtemp(prefix='bench_xlsx_')
+    os.environ['DB_LITE'] = f'sqlite+aiosqlite:///{os.path.join(tmp_dir, "bot.db")}'
+    os.environ.setdefault('BOT_TOKEN', FAKE_TOKEN)
+    cwd = os.getcwd()
+    try:
+        os.chdir(tmp_dir)
+        with contextlib.redirect_stdout(sys.stderr):
+            bench_report = asyncio.run(main(arguments, tmp_dir))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        json.dump(bench_report, output_file, ensure_ascii=False, indent=2)
+    print_table(bench_report)
+    print(f'Результаты записаны в {arguments.output}')
@@ -0,0 +1,70 @@
+"""
+Самопроверка хранилища аудиозаписей app/utils/blob_store.py.
+
+INFO:
+    Проверяет хранилище, выбранное настройками (AUDIO_STORE и параметры S3_* из окружения или .env): сохранение файла
+    по ключу из хеша содержимого, повторное сохранение того же содержимого (тот же ключ), размер, чтение целиком и
+    потоком, файл для отправки в Telegram, удаление. Все файлы проверки удаляются из хранилища.
+
+    Локальное хранилище (во временной папке):
+        python -m benchmarks.check_blob_store
+    S3-совместимое хранилище на локальном MinIO (нужен пакет boto3):
+        docker run -d -p 9000:9000 -e MINIO_ROOT_USER=minio -e MINIO_ROOT_PASSWORD=minio123 minio/minio server /data
+        AUDIO_STORE=s3 S3_ENDPOINT_URL=http://localhost:9000 S3_ACCESS_KEY=minio S3_SECRET_KEY=minio123 \
+            python -m benchmarks.check_blob_store --create-bucket
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+
+from benchmarks.fake_telegram import FAKE_TOKEN
+
+
+async def check(create_bucket: bool, tmp_dir: str) -> None:
+    from app.utils.blob_store import audio_store, S3BlobStore, content_key
+
+    print(f'Хранилище: {type(audio_store).__name__}')
+    if create_bucket and isinstance(audio_store, S3BlobStore):
+        try:
+            audio_store.client.create_bucket(Bucket=audio_store.bucket)
+        except audio_store.client.exceptions.BucketAlreadyOwnedByYou:
+            pass
+
+    content = os.urandom(256 * 1024)
+    first, second = os.path.join(tmp_dir, 'first.ogg'), os.path.join(tmp_dir, 'second.ogg')
+    for path in (first, second):
+        with open(path, 'wb') as file:
+            file.write(content)
+
+    key = await audio_store.save(first)
+    assert key == content_key(first) and not os.path.isabs(key), key
+    assert os.path.exists(first), 'Исходный файл не должен удаляться хранилищем'
+    assert await audio_store.save(second) == key, 'Одинаковое содержимое должно сохраняться под одним ключом'
+    assert audio_store.size(key) == len(content)
+    assert await audio_store.read(key) == content
+    with audio_store.open(key) as stream:
+        assert stream.read(1024) == content[:1024]
+    input_file = await audio_store.input_file(key)
+    print(f'Ключ: {key}, файл для Telegram: {type(input_file).__name__}')
+
+    await audio_store.remove(key)
+    assert not audio_store._exists(key), 'Файл должен быть удалён'
+    await audio_store.remove(key)                                   # Повторное удаление - не ошибка
+    print('OK')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Самопроверка хранилища аудиозаписей')
+    parser.add_argument('--create-bucket', action='store_true', help='Создать бакет S3_BUCKET, если его нет')
+    arguments = parser.parse_args()
+
+    # Локальное хранилище - во временной папке (настройки читаются при импорте app, поэтому - до него)
+    tmp = tempfile.mkdtemp(prefix='check_blob_store_')
+    os.environ.setdefault('AUDIO_STORE_DIR', os.path.join(tmp, 'store'))
+    os.environ.setdefault('BOT_TOKEN', FAKE_TOKEN)
+    try:
+        asyncio.run(check(arguments.create_bucket, tmp))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,189 @@
+"""
+Локальная замена почтового сервера для проверки отправки писем без настоящего SMTP.
+
+INFO:
+    FakeSMTP - минимальный SMTP-сервер на asyncio (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT, без STARTTLS).
+    Принятые письма записываются в FakeSMTP.messages, количество подключений - в FakeSMTP.connections.
+    Для имитации ошибок: refused - адреса, которые сервер отклоняет (550), fail_data - кол-во следующих писем,
+    которые сервер временно не принимает (451).
+
+    Для запуска бота с заменой: SMTP_SERVER=127.0.0.1, SMTP_PORT=8025, SMTP_STARTTLS=false в .env.
+
+    Самопроверка очереди писем app/utils/mailer.py (нужен заполненный .env, как и для запуска бота; очередь
+    хранится во временном файле SQLite):
+        python -m benchmarks.fake_smtp
+    Проверяет отправку нескольких писем через одно соединение, повтор после временной ошибки и статус 'failed'
+    для отклонённого адреса.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from email import message_from_bytes
+from email.message import Message
+from typing import Callable, Optional
+
+
+# Замена почтового сервера
+class FakeSMTP:
+    """ Локальный SMTP-сервер, записывающий принятые письма. """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8025, delay: float = 0.0) -> None:
+        self.host = host
+        self.port = port
+        self.delay = delay                                      # Имитация задержки ответа сервера, в секундах
+        self.messages: list[tuple[str, list[str], Message]] = []  # [(отправитель, получатели, письмо), ...]
+        self.connections = 0
+        self.refused: set[str] = set()                          # Адреса, отклоняемые сервером
+        self.fail_data = 0                                      # Кол-во следующих писем, отклоняемых временно
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        """ Запуск сервера. """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def stop(self) -> None:
+        """ Остановка сервера. """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # Обработка подключения
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Обработка подключения клиента: команды SMTP по одной строке. """
+        self.connections += 1
+        sender, recipients = '', []
+
+        async def reply(line: str) -> None:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            writer.write(f'{line}\r\n'.encode())
+            await writer.drain()
+
+        try:
+            await reply(f'220 {self.host} FakeSMTP')
+            while line := await reader.readline():
+                command, _, arg = line.decode().strip().partition(' ')
+                command = command.upper()
+
+                if command == 'EHLO':
+                    writer.write(f'250-{self.host}\r\n250-AUTH PLAIN LOGIN\r\n'.encode())
+                    await reply('250 8BITMIME')
+                elif command == 'HELO':
+                    await reply(f'250 {self.host}')
+                elif command == 'AUTH':
+                    if arg.upper().startswith('LOGIN'):
+                        for prompt in ('VXNlcm5hbWU6', 'UGFzc3dvcmQ6'):         # "Username:", "Password:" в base64
+                            await reply(f'334 {prompt}')
+                            await reader.readline()
+                    await reply('235 Authentication successful')
+                elif command == 'MAIL':
+                    sender, recipients = arg.partition(':')[2].strip('<> '), []
+                    await reply('250 OK')
+                elif command == 'RCPT':
+                    address = arg.partition(':')[2].strip('<> ')
+                    if address in self.refused:
+                        await reply('550 Mailbox unavailable')
+                    else:
+                        recipients.append(address)
+                        await reply('250 OK')
+                elif command == 'DATA':
+                    await reply('354 End data with <CR><LF>.<CR><LF>')
+                    data = bytearray()
+                    while (chunk := await reader.readline()) not in (b'.\r\n', b''):
+                        data += chunk[1:] if chunk.startswith(b'..') else chunk
+                    if self.fail_data:
+                        self.fail_data -= 1
+                        await reply('451 Temporary failure')
+                    else:
+                        self.messages.append((sender, recipients, message_from_bytes(bytes(data))))
+                        await reply('250 OK: queued')
+                elif command in ('RSET', 'NOOP'):
+                    await reply('250 OK')
+                elif command == 'QUIT':
+                    await reply('221 Bye')
+                    break
+                else:
+                    await reply('502 Command not implemented')
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# Ожидание условия
+async def wait_until(condition: Callable[[], bool], timeout: float = 10.0) -> bool:
+    """ Ожидание, пока condition() не вернёт True. """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+async def main() -> None:
+    """ Самопроверка очереди писем на замене почтового сервера. """
+    from sqlalchemy import select
+
+    from app.database.db import DataBase
+    from app.database.models import EmailOutbox
+    from app.utils.mailer import EmailQueue, SMTPConnection
+
+    fake = FakeSMTP()
+    await fake.start()
+
+    db = DataBase()
+    db.engine.sync_engine.echo = False
+    async with db.engine.begin() as conn:
+        await conn.run_sync(EmailOutbox.__table__.create)
+
+    connection = SMTPConnection(fake.host, fake.port, 'bot@example.com', 'secret', starttls=False, timeout=5)
+    queue = EmailQueue(connection, poll_interval=0.2, retry_base=0.5)
+    queue.start(db)
+
+    async def enqueue(to_email: str, body: str) -> None:
+        async with db.session_maker() as session:
+            await DataBase.enqueue_email(session, to_email, 'Test', body)
+        queue.notify()
+
+    try:
+        # Несколько писем подряд - через одно соединение
+        for i in range(3):
+            await enqueue(f'user{i}@example.com', f'Message {i}')
+        sent_batch = await wait_until(lambda: len(fake.messages) == 3)
+        batch_connections = fake.connections
+
+        # Временная ошибка сервера - повтор с задержкой
+        fake.fail_data = 2
+        await enqueue('retry@example.com', 'Retry')
+        retried = await wait_until(lambda: len(fake.messages) == 4)
+
+        # Отклонённый адрес - письмо не повторяется
+        fake.refused.add('bad@example.com')
+        await enqueue('bad@example.com', 'Refused')
+        await wait_until(lambda: queue.failed_attempts == 3)
+
+        async with db.session_maker() as session:
+            rows = (await session.execute(select(EmailOutbox))).scalars().all()
+    finally:
+        await queue.close()
+        await fake.stop()
+        await db.engine.dispose()
+
+    print(f'3 письма отправлены: {sent_batch}, подключений к серверу: {batch_connections} (ожидается 1)')
+    print(f'Письмо отправлено после 2 временных ошибок: {retried}')
+    print(f'Осталось в очереди: {[(row.to_email, row.status, row.attempts) for row in rows]} '
+          f'(ожидается bad@example.com со статусом failed)')
+    print(f'Метрики очереди: {queue.stats()}')
+
+
+if __name__ == '__main__':
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DB_LITE'] = f'sqlite+aiosqlite:///{db_file.name}'
+    try:
+        asyncio.run(main())
+    finally:
+        os.remove(db_file.name)
@@ -0,0 +1,251 @@
+"""
+Локальная замена Telegram Bot API для проверки бота без обращения к серверам Telegram.
+
+INFO:
+    FakeTelegram - aiohttp веб-сервер, принимающий запросы бота по адресу /bot<token>/<method>. Все вызовы
+    записываются в FakeTelegram.calls, на запросы отправки/редактирования сообщений возвращается сообщение с новым
+    message_id (для фото - с file_id изображения), на остальные методы - True. Бот подключается к замене через
+    make_bot(). Для нагрузочных тестов бот подключается без HTTP - make_bot(local=True): вызовы передаются в замену
+    напрямую через сессию FakeTelegramSession (файлы при этом не читаются).
+
+    make_message_update() / make_callback_update() формируют апдейты в формате Telegram, post_update() отправляет
+    апдейт на webhook бота так же, как это делает Telegram (с заголовком секретного токена).
+
+    Самопроверка режима webhook (нужен заполненный .env, как и для запуска бота):
+        python -m benchmarks.fake_telegram
+    Поднимает замену Telegram и webhook-сервер (app/utils/webhook.py) с тестовым обработчиком, проверяет отклонение
+    запроса с неверным секретным токеном и ответ бота на апдейт.
+"""
+import asyncio
+import itertools
+import time
+from typing import Any, AsyncGenerator, Optional
+
+from aiogram import Bot, Dispatcher, F
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiohttp import ClientSession, web
+
+
+FAKE_TOKEN = '123456:TEST-TOKEN'                    # Токен бота для замены (формат как у настоящего)
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'English Notes', 'username': 'english_notes_bot'}
+
+
+# Замена Telegram Bot API
+class FakeTelegram:
+    """ Локальный веб-сервер, имитирующий Telegram Bot API. Записывает все вызовы методов. """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8081, delay: float = 0.0) -> None:
+        self.host = host
+        self.port = port
+        self.delay = delay                                      # Имитация сетевой задержки ответа, в секундах
+        self.calls: list[tuple[str, dict[str, Any]]] = []       # [(метод, параметры), ...]
+        self._message_ids = itertools.count(1000)
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_post('/bot{token}/{method}', self._handle)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    # Обработка вызова метода API
+    async def _handle(self, request: web.Request) -> web.Response:
+        """ Обработка вызова метода API: запись вызова и ответ в формате Telegram. """
+        result = await self.call(request.match_info['method'], dict(await request.post()))
+        return web.json_response({'ok': True, 'result': result})
+
+    # Вызов метода API
+    async def call(self, method: str, params: dict[str, Any]) -> Any:
+        """ Запись вызова метода API и результат вызова (после имитации сетевой задержки). """
+        self.calls.append((method, params))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self._result(method, params)
+
+    # Результат вызова метода
+    def _result(self, method: str, params: dict[str, Any]) -> Any:
+        """ Результат вызова: сообщение для отправки/редактирования, данные бота для getMe, иначе True. """
+        if method == 'getMe':
+            return BOT_USER
+        if method.startswith(('send', 'edit', 'copy')):
+            chat_id = int(params.get('chat_id', 0))
+            message = {
+                'message_id': int(params.get('message_id') or next(self._message_ids)),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+            }
+            if 'text' in params:
+                message['text'] = params['text']
+            if 'caption' in params:
+                message['caption'] = params['caption']
+            if method in ('sendPhoto', 'editMessageMedia'):
+                file_id = f'photo-{message["message_id"]}'
+                message['photo'] = [{'file_id': file_id, 'file_unique_id': file_id, 'width': 800, 'height': 600}]
+            return message
+        return True
+
+    # Вызовы метода
+    def calls_of(self, method: str) -> list[dict[str, Any]]:
+        """ Параметры всех вызовов метода method. """
+        return [params for name, params in self.calls if name == method]
+
+    async def start(self) -> None:
+        """ Запуск веб-сервера. """
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=self.host, port=self.port).start()
+
+    async def stop(self) -> None:
+        """ Остановка веб-сервера. """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # Создание бота, подключенного к замене
+    def make_bot(self, bot_class: type[Bot] = Bot, token: str = FAKE_TOKEN, local: bool = False, **kwargs: Any) -> Bot:
+        """
+        Создание объекта бота, отправляющего запросы в замену вместо Telegram.
+
+        :param bot_class: Класс бота (напр. app.utils.custom_bot_class.Bot)
+        :param token: Токен бота
+        :param local: Передавать вызовы в замену напрямую, без HTTP (веб-сервер замены можно не запускать)
+        :param kwargs: Дополнительные параметры бота (default= и т.д.)
+        :return: Объект бота
+        """
+        if local:
+            session = FakeTelegramSession(self)
+        else:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(self.base_url))
+        return bot_class(token=token, session=session, **kwargs)
+
+
+# Сессия бота, передающая вызовы в замену Telegram без HTTP
+class FakeTelegramSession(BaseSession):
+    """
+    Сессия бота, передающая вызовы методов в FakeTelegram напрямую. Параметры готовятся так же, как для HTTP-запроса
+    (с вызовом request-middleware сессии), а ответ проходит ту же проверку и разбор, что и ответ Telegram.
+    """
+
+    def __init__(self, fake: FakeTelegram, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.fake = fake
+
+    async def make_request(self, bot: Bot, method, timeout: Optional[int] = None) -> Any:
+        files: dict[str, Any] = {}
+        params = {
+            key: prepared for key, value in method.model_dump(warnings=False).items()
+            if (prepared := self.prepare_value(value, bot=bot, files=files))
+        }
+        result = await self.fake.call(method.__api_method__, params)
+        response = self.check_response(bot, method, 200, self.json_dumps({'ok': True, 'result': result}))
+        return response.result
+
+    async def stream_content(self, url: str, headers: Optional[dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b''
+
+    async def close(self) -> None:
+        pass
+
+
+# Апдейт с текстовым сообщением пользователя
+def make_message_update(update_id: int, chat_id: int, text: str) -> dict[str, Any]:
+    """ Апдейт Telegram с текстовым сообщением пользователя из личного чата. """
+    user = {'id': chat_id, 'is_bot': False, 'first_name': 'User', 'language_code': 'ru'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': int(time.time()), 'text': text, 'from': user,
+            'chat': {'id': chat_id, 'type': 'private', 'first_name': 'User'},
+            **({'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]}
+               if text.startswith('/') else {}),
+        },
+    }
+
+
+# Апдейт с нажатием inline-кнопки
+def make_callback_update(update_id: int, chat_id: int, data: str, message_id: int = 1) -> dict[str, Any]:
+    """ Апдейт Telegram с callback-запросом от inline-кнопки под сообщением бота message_id. """
+    user = {'id': chat_id, 'is_bot': False, 'first_name': 'User', 'language_code': 'ru'}
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id), 'from': user, 'chat_instance': str(chat_id), 'data': data,
+            'message': {
+                'message_id': message_id, 'date': int(time.time()), 'from': BOT_USER, 'caption': '',
+                'chat': {'id': chat_id, 'type': 'private', 'first_name': 'User'},
+            },
+        },
+    }
+
+
+# Отправка апдейта на webhook бота
+async def post_update(http: ClientSession, url: str, update: dict[str, Any], secret: Optional[str] = None) -> int:
+    """
+    Отправка апдейта на webhook бота так же, как это делает Telegram.
+
+    :param http: HTTP-сессия aiohttp
+    :param url: Адрес webhook бота
+    :param update: Апдейт
+    :param secret: Секретный токен (заголовок X-Telegram-Bot-Api-Secret-Token)
+    :return: HTTP-код ответа
+    """
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    async with http.post(url, json=update, headers=headers) as response:
+        return response.status
+
+
+# Ожидание вызова метода API ботом
+async def wait_for_call(fake: FakeTelegram, method: str, count: int = 1, timeout: float = 5.0) -> bool:
+    """ Ожидание, пока бот вызовет метод method не менее count раз. """
+    deadline = time.monotonic() + timeout
+    while len(fake.calls_of(method)) < count:
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def main() -> None:
+    """ Самопроверка режима webhook на замене Telegram. """
+    from app.utils.webhook import create_webhook_app
+
+    secret, path, port = 'test-secret', '/webhook', 8082
+    fake = FakeTelegram()
+    await fake.start()
+
+    bot = fake.make_bot()
+    dp = Dispatcher()
+
+    @dp.message(F.text)
+    async def echo(message: Message) -> None:
+        await message.answer(message.text)
+
+    runner = web.AppRunner(create_webhook_app(dp, bot, path=path, secret=secret))
+    await runner.setup()
+    await web.TCPSite(runner, host='127.0.0.1', port=port).start()
+
+    url = f'http://127.0.0.1:{port}{path}'
+    try:
+        async with ClientSession() as http:
+            bad_status = await post_update(http, url, make_message_update(1, 42, 'hello'), secret='wrong')
+            good_status = await post_update(http, url, make_message_update(2, 42, 'hello'), secret=secret)
+            answered = await wait_for_call(fake, 'sendMessage')
+    finally:
+        await runner.cleanup()
+        await fake.stop()
+
+    print(f'Неверный секретный токен: HTTP {bad_status} (ожидается 401)')
+    print(f'Верный секретный токен: HTTP {good_status} (ожидается 200)')
+    print(f'Ответ бота получен: {answered}, вызовы API: {[name for name, _ in fake.calls]}')
+    if bad_status != 401 or good_status != 200 or not answered:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,427 @@
+"""
+Нагрузочный тест бота: сценарии пользователей на настоящем диспетчере с заменами внешних сервисов.
+
+INFO:
+    Диспетчер dp из app/main.py (все роутеры и middleware) работает с временной БД SQLite, заполненной сгенерированными
+    данными (пользователи, привязанные к чатам, темы, слова с примерами, заметки, попытки тестов). Апдейты Telegram
+    формируются как в benchmarks/fake_telegram.py и передаются в dp.feed_update - так же, как их передаёт polling.
+    Внешние сервисы заменены локальными:
+        - Telegram Bot API - FakeTelegram без HTTP (make_bot(local=True)), --api-delay имитирует сетевую задержку;
+        - edge_tts - FakeCommunicate: записывает короткий mp3 с задержкой --tts-delay;
+        - GigaChat - FakeGigaChat: потоковый ответ частями с задержкой --giga-delay.
+
+    Сценарии (JOURNEYS) выполняются по очереди. В каждом сценарии --users пользователей одновременно проходят шаги
+    сценария --rounds раз, каждый пользователь - последовательно (следующий апдейт после обработки предыдущего, как
+    при общении с ботом). Для каждого сценария выводится: кол-во апдейтов, ошибок, апдейтов в секунду, время обработки
+    апдейта p50/p95/p99 (мс), среднее кол-во SQL-запросов и вызовов Telegram API на апдейт.
+
+    Запуск из корня проекта (нужен заполненный .env, как и для запуска бота; БД, FSM и кеш GigaChat - во временной
+    папке):
+        python -m benchmarks.load_test [--users 20] [--rounds 3] [--journeys browse,tests,notes] [--json]
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from benchmarks.fake_telegram import FakeTelegram, FAKE_TOKEN, make_message_update, make_callback_update
+
+
+CHAT_ID_BASE = 10_000_000                           # id чата пользователя: CHAT_ID_BASE + User.id
+TOPICS_PER_USER = 5
+WORDS_PER_TOPIC = 20
+EXAMPLES_PER_WORD = 2
+NOTES_PER_USER = 12
+EXAMPLES_PER_NOTE = 2
+ATTEMPTS_PER_USER = 100
+TEST_ANSWERS_PER_ROUND = 5                          # Ответов на слова теста за один проход сценария
+
+# Короткий mp3: кадры MPEG-1 Layer III 128 кбит/с 44.1 кГц без звука
+SILENT_MP3 = (b'\xff\xfb\x90\x64' + b'\x00' * 413) * 10
+
+
+# Замена edge_tts.Communicate
+class FakeCommunicate:
+    """ Замена edge_tts.Communicate: вместо обращения к сервису озвучки записывает короткий mp3 после задержки. """
+    delay = 0.05
+
+    def __init__(self, text: str, voice: str | None = None, rate: str | None = None, **kwargs: Any) -> None:
+        self.text = text
+
+    async def save(self, filename: str) -> None:
+        await asyncio.sleep(self.delay)
+        with open(filename, 'wb') as file:
+            file.write(SILENT_MP3)
+
+
+# Замена GigaChat
+class FakeGigaChat:
+    """ Замена GigaChat: ответ из chunks частей, выдаваемых в течение delay секунд. """
+
+    def __init__(self, delay: float = 0.5, chunks: int = 20) -> None:
+        self.delay = delay
+        self.chunks = chunks
+        self.requests = 0
+
+    async def astream(self, prompt):
+        from langchain_core.messages import AIMessageChunk
+
+        self.requests += 1
+        for idx in range(self.chunks):
+            await asyncio.sleep(self.delay / self.chunks)
+            yield AIMessageChunk(content=f'Part {idx} of the answer. ')
+
+    async def ainvoke(self, prompt):
+        from langchain_core.messages import AIMessage
+
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        return AIMessage(content='Summary of the dialog.')
+
+
+# Результаты сценария
+@dataclass
+class JourneyResult:
+    """ Время обработки апдейтов и ошибки одного сценария. """
+    name: str
+    latencies: list[float] = field(default_factory=list)           # Время обработки апдейтов, в секундах
+    errors: list[str] = field(default_factory=list)
+    elapsed: float = 0.0                                            # Общее время сценария, в секундах
+    queries: int = 0                                                # SQL-запросов за сценарий
+    api_calls: int = 0                                              # Вызовов Telegram API за сценарий
+
+    # Процентиль времени обработки
+    def percentile(self, q: float) -> float:
+        """ Процентиль q (0-100) времени обработки апдейта в мс (по ближайшему рангу). """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        idx = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+        return ordered[idx] * 1000
+
+    def summary(self) -> dict[str, Any]:
+        updates = len(self.latencies)
+        return {
+            'journey': self.name,
+            'updates': updates,
+            'errors': len(self.errors),
+            'updates_per_sec': round(updates / self.elapsed, 1) if self.elapsed else 0.0,
+            'p50_ms': round(self.percentile(50), 2),
+            'p95_ms': round(self.percentile(95), 2),
+            'p99_ms': round(self.percentile(99), 2),
+            'queries_per_update': round(self.queries / updates, 2) if updates else 0.0,
+            'api_calls_per_update': round(self.api_calls / updates, 2) if updates else 0.0,
+        }
+
+
+# Шаги сценариев: ('cb', callback_data) - нажатие inline-кнопки, ('msg', текст) - сообщение пользователя
+Step = tuple[str, str]
+
+
+# Просмотр словаря: темы, слова темы с пагинацией, все слова
+def journey_browse(topic_ids: list[int], rnd: random.Random) -> list[Step]:
+    from app.keyboards.inlines import MenuCallBack, VocabularyCallBack
+
+    topic_id = rnd.choice(topic_ids)
+    return [
+        ('cb', MenuCallBack(level=1, menu_name='vocabulary').pack()),
+        ('cb', MenuCallBack(level=2, menu_name='vocabulary', menu_details='select_topic').pack()),
+        ('cb', f'select_topic_id_{topic_id}'),
+        ('cb', VocabularyCallBack(menu_name=f'select_topic_id_{topic_id}', page=2).pack()),
+        ('cb', 'select_all_words'),
+        ('cb', VocabularyCallBack(menu_name='select_all_words', page=3).pack()),
+        ('cb', MenuCallBack(level=1, menu_name='vocabulary', menu_details='step_back').pack()),
+    ]
+
+
+# Тестирование: выбор типа теста, подсказки и ответы
+def journey_tests(topic_ids: list[int], rnd: random.Random, test_type: str = 'en_ru_word') -> list[Step]:
+    from app.keyboards.inlines import MenuCallBack
+
+    steps = [
+        ('cb', MenuCallBack(level=1, menu_name='tests').pack()),
+        ('cb', MenuCallBack(level=2, menu_name='tests', menu_details=test_type).pack()),
+    ]
+    for _ in range(TEST_ANSWERS_PER_ROUND):
+        if rnd.random() < 0.3:
+            steps.append(('cb', 'tests_ask_hint_0'))
+        steps.append(('cb', rnd.choice(['tests_answer_correct', 'tests_answer_wrong'])))
+    steps.append(('cb', MenuCallBack(level=1, menu_name='tests', menu_details='step_back').pack()))
+    return steps
+
+
+# Аудио-тест: озвучка слова и примеров при каждом новом слове
+def journey_audio_tests(topic_ids: list[int], rnd: random.Random) -> list[Step]:
+    return journey_tests(topic_ids, rnd, test_type='en_ru_audio')
+
+
+# Заметки: просмотр, пагинация, поиск
+def journey_notes(topic_ids: list[int], rnd: random.Random) -> list[Step]:
+    from app.keyboards.inlines import MenuCallBack
+
+    return [
+        ('cb', MenuCallBack(level=1, menu_name='vocabulary').pack()),
+        ('cb', 'my_notes_page_1'),
+        ('cb', 'my_notes_page_2'),
+        ('cb', 'search_notes'),
+        ('msg', f'Note {rnd.randrange(NOTES_PER_USER)}'),
+        ('cb', 'cancel_search_notes'),
+        ('cb', MenuCallBack(level=1, menu_name='vocabulary', menu_details='step_back').pack()),
+    ]
+
+
+# Экспорт словаря и заметок в xlsx
+def journey_export(topic_ids: list[int], rnd: random.Random) -> list[Step]:
+    from app.keyboards.inlines import MenuCallBack
+
+    return [
+        ('cb', MenuCallBack(level=1, menu_name='vocabulary').pack()),
+        ('cb', 'xls_actions'),
+        ('cb', 'send_xls_wb'),
+        ('cb', MenuCallBack(level=1, menu_name='vocabulary', menu_details='step_back').pack()),
+    ]
+
+
+# Диалог с AI-ассистентом
+def journey_giga(topic_ids: list[int], rnd: random.Random) -> list[Step]:
+    from app.keyboards.inlines import MenuCallBack
+
+    return [
+        ('cb', MenuCallBack(level=1, menu_name='giga').pack()),
+        ('msg', f'How do I use the word number {rnd.randrange(1000)}?'),
+        ('msg', 'Give me two more examples, please.'),
+        ('cb', 'clear_chat'),
+    ]
+
+
+JOURNEYS: dict[str, Callable[[list[int], random.Random], list[Step]]] = {
+    'browse': journey_browse,
+    'tests': journey_tests,
+    'audio_tests': journey_audio_tests,
+    'notes': journey_notes,
+    'export': journey_export,
+    'giga': journey_giga,
+}
+
+
+# Заполнение БД сгенерированными данными
+async def seed_database(db, users: int) -> dict[int, list[int]]:
+    """
+    Заполнение БД: пользователи с привязанными чатами и настройками, темы, слова с примерами, заметки, попытки.
+
+    :param db: Объект DataBase
+    :param users: Кол-во пользователей
+    :return: Словарь {id чата: [id тем пользователя]}
+    """
+    from sqlalchemy import insert
+
+    from app.database.models import User, UserChat, UserSettings, Topic, WordPhrase, Context, Notes, Attempt
+    from app.settings import TEST_TYPES
+
+    rnd = random.Random(0)
+    user_rows, chat_rows, settings_rows, topic_rows, word_rows, context_rows, note_rows, attempt_rows = \
+        [], [], [], [], [], [], [], []
+    topics_by_chat: dict[int, list[int]] = {}
+    topic_ids, word_ids, context_ids, note_ids = (itertools.count(1) for _ in range(4))
+
+    for user_id in range(1, users + 1):
+        chat_id = CHAT_ID_BASE + user_id
+        user_rows.append({'id': user_id, 'email': f'user{user_id}@example.com', 'password_hash': 'x' * 97})
+        chat_rows.append({'user_id': user_id, 'chat_id': chat_id})
+        settings_rows.append({'user_id': user_id, 'speech_rate': '-20%', 'voice': 'en-US-AvaNeural'})
+
+        user_words = []
+        for topic_idx in range(TOPICS_PER_USER):
+            topic_id = next(topic_ids)
+            topic_rows.append({'id': topic_id, 'name': f'Topic {topic_idx}', 'user_id': user_id})
+            topics_by_chat.setdefault(chat_id, []).append(topic_id)
+            for word_idx in range(WORDS_PER_TOPIC):
+                word_id = next(word_ids)
+                word = f'word {topic_idx}-{word_idx}'
+                user_words.append((word_id, word, topic_id))
+                word_rows.append({'id': word_id, 'topic_id': topic_id, 'word': word, 'transcription': 'wɜːd',
+                                  'translate': f'слово {word_idx}'})
+                context_rows.extend(
+                    {'id': next(context_ids), 'word_id': word_id, 'example': f'This is example {idx} for {word}'}
+                    for idx in range(EXAMPLES_PER_WORD)
+                )
+
+        for note_idx in range(NOTES_PER_USER):
+            note_id = next(note_ids)
+            note_rows.append({'id': note_id, 'user_id': user_id, 'title': f'Note {note_idx}',
+                              'text': f'Text of the note number {note_idx} about English grammar'})
+            context_rows.extend(
+                {'id': next(context_ids), 'note_id': note_id, 'example': f'Note example {idx} sentence'}
+                for idx in range(EXAMPLES_PER_NOTE)
+            )
+
+        for _ in range(ATTEMPTS_PER_USER):
+            word_id, word, topic_id = rnd.choice(user_words)
+            attempt_rows.append({'user_id': user_id, 'test_type': rnd.choice(TEST_TYPES), 'topic_id': topic_id,
+                                 'word_id': word_id, 'word_text': word,
+                                 'result': rnd.choice(['correct', 'wrong'])})
+
+    async with db.session_maker() as session:
+        for model, rows in ((User, user_rows), (UserChat, chat_rows), (UserSettings, settings_rows),
+                            (Topic, topic_rows), (WordPhrase, word_rows), (Notes, note_rows),
+                            (Context, context_rows), (Attempt, attempt_rows)):
+            await session.execute(insert(model), rows)
+        await session.commit()
+    return topics_by_chat
+
+
+# Прохождение сценария одним пользователем
+async def run_user(dp, bot, chat_id: int, steps: list[Step], result: JourneyResult,
+                   update_ids: itertools.count) -> None:
+    """ Последовательная отправка апдейтов сценария от пользователя chat_id с замером времени обработки. """
+    from aiogram.types import Update
+
+    for kind, payload in steps:
+        if kind == 'cb':
+            raw = make_callback_update(next(update_ids), chat_id, payload)
+        else:
+            raw = make_message_update(next(update_ids), chat_id, payload)
+        update = Update.model_validate(raw, context={'bot': bot})
+
+        start = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception as e:
+            result.errors.append(f'{payload}: {type(e).__name__}: {e}')
+        result.latencies.append(time.perf_counter() - start)
+
+
+# Выполнение сценария всеми пользователями
+async def run_journey(dp, bot, fake: FakeTelegram, name: str, topics_by_chat: dict[int, list[int]], rounds: int,
+                      update_ids: itertools.count) -> JourneyResult:
+    """ Одновременное прохождение сценария name всеми пользователями (каждый - rounds раз). """
+    from app.utils.query_stats import query_totals
+
+    result = JourneyResult(name)
+    rnd = random.Random(name)
+    plans = {
+        chat_id: [step for _ in range(rounds) for step in JOURNEYS[name](topic_ids, rnd)]
+        for chat_id, topic_ids in topics_by_chat.items()
+    }
+
+    queries_before, calls_before = query_totals.queries, len(fake.calls)
+    start = time.perf_counter()
+    await asyncio.gather(*(run_user(dp, bot, chat_id, steps, result, update_ids) for chat_id, steps in plans.items()))
+    result.elapsed = time.perf_counter() - start
+    result.queries = query_totals.queries - queries_before
+    result.api_calls = len(fake.calls) - calls_before
+    return result
+
+
+# Вывод результатов таблицей
+def print_table(results: list[JourneyResult]) -> None:
+    columns = ('journey', 'updates', 'errors', 'updates_per_sec', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_update',
+               'api_calls_per_update')
+    rows = [result.summary() for result in results]
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(row[column]).rjust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        for error in result.errors[:3]:
+            print(f'[{result.name}] {error}')
+
+
+async def main(args: argparse.Namespace) -> list[JourneyResult]:
+    """ Подготовка бота с заменами, заполнение БД и выполнение сценариев. """
+    import edge_tts
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.enums import ParseMode
+    from aiogram.types import Update
+
+    from app import main as app_main
+    from app.middlewares.middlewares import GigaChatMiddleware, BannerFileIdMiddleware
+    from app.utils.banners import banners
+    from app.utils.custom_bot_class import Bot
+    from app.utils.giga_cache import giga_cache
+
+    # Замены внешних сервисов
+    FakeCommunicate.delay = args.tts_delay
+    edge_tts.Communicate = FakeCommunicate
+    fake_giga = FakeGigaChat(delay=args.giga_delay)
+    for middleware in app_main.dp.update.middleware[:]:
+        if isinstance(middleware, GigaChatMiddleware):
+            middleware.giga_chat = fake_giga
+
+    fake = FakeTelegram(delay=args.api_delay)
+    bot = fake.make_bot(bot_class=Bot, local=True, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot.session.middleware(BannerFileIdMiddleware(banners))
+
+    # БД с тестовыми данными
+    db, dp = app_main.db, app_main.dp
+    db.engine.sync_engine.echo = False
+    await db.create_db()
+    await banners.load(db)
+    topics_by_chat = await seed_database(db, args.users)
+
+    update_ids = itertools.count(1)
+    results = []
+    try:
+        # Начало работы с ботом (/start) - подготовка данных чатов, без замера
+        await asyncio.gather(*(
+            dp.feed_update(bot, Update.model_validate(
+                make_message_update(next(update_ids), chat_id, '/start'), context={'bot': bot}
+            ))
+            for chat_id in topics_by_chat
+        ))
+        for name in args.journeys:
+            results.append(await run_journey(dp, bot, fake, name, topics_by_chat, args.rounds, update_ids))
+    finally:
+        await app_main.update_executor.close()
+        await dp.storage.close()
+        await giga_cache.close()
+        await db.engine.dispose()
+        await bot.session.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Нагрузочный тест бота на сценариях пользователей')
+    parser.add_argument('--users', type=int, default=20, help='Кол-во одновременных пользователей')
+    parser.add_argument('--rounds', type=int, default=3, help='Кол-во проходов сценария каждым пользователем')
+    parser.add_argument('--journeys', default=','.join(JOURNEYS),
+                        type=lambda value: [name for name in value.split(',') if name],
+                        help=f'Сценарии через запятую: {", ".join(JOURNEYS)}')
+    parser.add_argument('--fsm-storage', default='memory', choices=('memory', 'sqlite'), help='Хранилище FSM')
+    parser.add_argument('--api-delay', type=float, default=0.0, help='Задержка ответа Telegram API, в секундах')
+    parser.add_argument('--tts-delay', type=float, default=0.05, help='Задержка озвучки, в секундах')
+    parser.add_argument('--giga-delay', type=float, default=0.5, help='Время ответа GigaChat, в секундах')
+    parser.add_argument('--json', action='store_true', help='Вывод результатов в формате JSON')
+    arguments = parser.parse_args()
+    unknown = set(arguments.journeys) - set(JOURNEYS)
+    if unknown:
+        parser.error(f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+
+    # Временные БД, хранилище FSM и кеш GigaChat (настройки читаются при импорте app, поэтому - до него)
+    tmp_dir = tempfile.mkdtemp(prefix='load_test_')
+    os.environ['DB_LITE'] = f'sqlite+aiosqlite:///{os.path.join(tmp_dir, "bot.db")}'
+    os.environ['FSM_STORAGE'] = arguments.fsm_storage
+    os.environ['FSM_SQLITE_PATH'] = os.path.join(tmp_dir, 'fsm_storage.db')
+    os.environ['GIGA_CACHE_PATH'] = os.path.join(tmp_dir, 'giga_cache.db')
+    os.environ.setdefault('BOT_TOKEN', FAKE_TOKEN)
+    try:
+        # Вывод бота (print в обработчиках) при выводе JSON - в stderr
+        with contextlib.redirect_stdout(sys.stderr if arguments.json else sys.stdout):
+            journey_results = asyncio.run(main(arguments))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if arguments.json:
+        json.dump([result.summary() for result in journey_results], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_table(journey_results)
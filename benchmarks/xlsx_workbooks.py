@@ -0,0 +1,131 @@
+"""
+Генератор xlsx-файлов для импорта в формате, который ожидает import_data_from_xls_file (app/utils/xsl_tools.py).
+
+INFO:
+    Структура файла как у экспорта словаря (и Excel_sample_for_import.xlsx):
+        - лист оглавления EXCEL_TABLE_OF_CONTENTS (системный, при импорте пропускается);
+        - лист заметок EXCEL_NOTES: A id | B заголовок | C текст | D примеры через EXAMPLES_SEPARATOR;
+        - листы тем (1 лист = 1 тема): A id | B слово | C транскрипция | D перевод | E примеры через EXAMPLES_SEPARATOR.
+    Первая строка каждого листа - заголовки, данные - с INDEX_MIN_ROW.
+
+    Слова и тексты генерируются из слогов с фиксированным seed (одинаковые параметры - одинаковый файл). Алфавит
+    текста задаётся параметром text:
+        - 'mixed' - слова и примеры латиницей, переводы, названия тем и заметки кириллицей (как в реальном словаре);
+        - 'latin' - весь текст латиницей;
+        - 'cyrillic' - весь текст кириллицей.
+
+    Запуск из корня проекта (запись файла для ручной проверки импорта в боте):
+        python -m benchmarks.xlsx_workbooks --output generated.xlsx [--topics 10] [--rows 100] [--notes 50]
+"""
+import argparse
+import random
+from dataclasses import dataclass
+
+import openpyxl
+
+from app.settings import EXCEL_COLUMNS_NOTES_SHEET, EXCEL_COLUMNS_VCB_SHEET, EXCEL_NOTES, EXCEL_TABLE_OF_CONTENTS, \
+    EXAMPLES_SEPARATOR, TABLE_OF_CONTENTS_TITLE
+
+
+LATIN_SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ra', 'to', 'su', 've', 'ba', 'di', 'fo', 'gu', 'pre', 'str', 'th', 'ough')
+CYRILLIC_SYLLABLES = ('ка', 'ло', 'ми', 'не', 'ра', 'то', 'су', 'ве', 'ба', 'ди', 'жо', 'щу', 'пре', 'стр', 'ый', 'ёж')
+TRANSCRIPTION_SYMBOLS = ('ə', 'ɪ', 'æ', 'ʌ', 'ɜː', 'θ', 'ð', 'ʃ', 'ŋ', 'k', 't', 's', 'r', 'l')
+
+
+# Параметры генерируемого файла
+@dataclass
+class WorkbookSpec:
+    """ Параметры генерируемого файла импорта. """
+    topics: int = 10                                # Кол-во листов тем
+    rows: int = 100                                 # Кол-во слов на листе темы
+    notes: int = 50                                 # Кол-во заметок на листе заметок
+    examples: int = 2                               # Кол-во примеров у слова/заметки
+    text: str = 'mixed'                             # Алфавит текста: mixed/latin/cyrillic
+    seed: int = 0
+
+    @property
+    def words(self) -> int:
+        """ Всего слов в файле. """
+        return self.topics * self.rows
+
+
+# Генератор текста из слогов
+class TextGenerator:
+    """ Генератор слов и предложений из слогов латиницы/кириллицы. """
+
+    def __init__(self, text: str, seed: int) -> None:
+        if text not in ('mixed', 'latin', 'cyrillic'):
+            raise ValueError(f'Неизвестный алфавит текста: {text}')
+        self.rnd = random.Random(seed)
+        self.source = LATIN_SYLLABLES if text != 'cyrillic' else CYRILLIC_SYLLABLES      # Слова и примеры
+        self.native = CYRILLIC_SYLLABLES if text != 'latin' else LATIN_SYLLABLES         # Переводы, темы, заметки
+
+    def word(self, syllables: tuple[str, ...], min_len: int = 2, max_len: int = 4) -> str:
+        return ''.join(self.rnd.choice(syllables) for _ in range(self.rnd.randint(min_len, max_len)))
+
+    def phrase(self, syllables: tuple[str, ...], words: int) -> str:
+        return ' '.join(self.word(syllables) for _ in range(words))
+
+    def transcription(self) -> str:
+        return '[' + ''.join(self.rnd.choice(TRANSCRIPTION_SYMBOLS) for _ in range(self.rnd.randint(3, 7))) + ']'
+
+    def examples(self, count: int, syllables: tuple[str, ...]) -> str:
+        return EXAMPLES_SEPARATOR.join(self.phrase(syllables, self.rnd.randint(4, 10)).capitalize() + '.'
+                                       for _ in range(count))
+
+
+# Создание файла импорта
+def generate_workbook(path: str, spec: WorkbookSpec) -> str:
+    """
+    Создание xlsx-файла импорта с листом заметок и spec.topics листами тем.
+
+    :param path: Путь к создаваемому файлу
+    :param spec: Параметры файла
+    :return: Путь к созданному файлу
+    """
+    gen = TextGenerator(spec.text, spec.seed)
+    wb = openpyxl.Workbook(write_only=True)         # Потоковая запись строк - без хранения всех ячеек в памяти
+
+    # Оглавление (системный лист) и заметки
+    ws_cont = wb.create_sheet(EXCEL_TABLE_OF_CONTENTS)
+    ws_cont.append([TABLE_OF_CONTENTS_TITLE])
+
+    ws = wb.create_sheet(EXCEL_NOTES)
+    ws.append([value['header'] for value in EXCEL_COLUMNS_NOTES_SHEET.values()])
+    for note_id in range(1, spec.notes + 1):
+        title = f'{gen.phrase(gen.native, 2).capitalize()} {note_id}'
+        ws.append([note_id, title, gen.phrase(gen.native, 20).capitalize() + '.',
+                   gen.examples(spec.examples, gen.source) if spec.examples else None])
+
+    # Темы: названия уникальны (название листа - название темы)
+    for topic_idx in range(1, spec.topics + 1):
+        topic_name = f'{gen.word(gen.native).capitalize()} {topic_idx}'
+        ws_cont.append([topic_name])
+        ws = wb.create_sheet(topic_name)
+        ws.append([value['header'] for value in EXCEL_COLUMNS_VCB_SHEET.values()])
+        for word_id in range(1, spec.rows + 1):
+            ws.append([word_id, f'{gen.phrase(gen.source, gen.rnd.randint(1, 2))} {word_id}', gen.transcription(),
+                       gen.phrase(gen.native, gen.rnd.randint(1, 3)),
+                       gen.examples(spec.examples, gen.source) if spec.examples else None])
+
+    wb.save(path)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Генерация xlsx-файла для импорта в бота')
+    parser.add_argument('--output', default='generated_import.xlsx', help='Путь к создаваемому файлу')
+    parser.add_argument('--topics', type=int, default=WorkbookSpec.topics, help='Кол-во листов тем')
+    parser.add_argument('--rows', type=int, default=WorkbookSpec.rows, help='Кол-во слов на листе темы')
+    parser.add_argument('--notes', type=int, default=WorkbookSpec.notes, help='Кол-во заметок')
+    parser.add_argument('--examples', type=int, default=WorkbookSpec.examples, help='Кол-во примеров у записи')
+    parser.add_argument('--text', default=WorkbookSpec.text, choices=('mixed', 'latin', 'cyrillic'),
+                        help='Алфавит текста')
+    parser.add_argument('--seed', type=int, default=WorkbookSpec.seed)
+    arguments = parser.parse_args()
+
+    workbook_spec = WorkbookSpec(arguments.topics, arguments.rows, arguments.notes, arguments.examples, arguments.text,
+                                 arguments.seed)
+    generate_workbook(arguments.output, workbook_spec)
+    print(f'Файл {arguments.output}: тем {workbook_spec.topics}, слов {workbook_spec.words}, '
+          f'заметок {workbook_spec.notes}, примеров у записи {workbook_spec.examples}')